@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the content-addressed asset store (data/assets/blobs).
+
+  migrate  Move assets saved under the old timestamp/uuid names into the blob
+           store (deduplicating identical files) and point their rows at it.
+           Safe to interrupt and re-run. Asset URLs change to /assets/blobs/...
+  gc       Delete blobs no asset references any more, and stray files in the
+           blob directory. Files younger than --grace-sec are kept, so it can
+           run while the server is harvesting.
+
+Both accept --dry-run to report what would change without touching anything.
+
+Usage:
+    python scripts/asset_store.py migrate [--data-dir ./data] [--dry-run]
+    python scripts/asset_store.py gc [--data-dir ./data] [--grace-sec 3600] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.blob_store import GC_GRACE_SEC, BlobStore, collect_garbage, migrate_assets  # noqa: E402
+from server.db import Database  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("migrate", "gc"))
+    parser.add_argument("--data-dir", default=os.getenv("DATA_DIR", "./data"))
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--grace-sec", type=float, default=GC_GRACE_SEC)
+    args = parser.parse_args()
+
+    data_dir = os.path.abspath(args.data_dir)
+    db_path = os.path.join(data_dir, "cockpit.sqlite3")
+    if not os.path.exists(db_path):
+        print(f"No database at {db_path}", file=sys.stderr)
+        return 1
+
+    db = Database(db_path)
+    store = BlobStore(os.path.join(data_dir, "assets"))
+    try:
+        if args.command == "migrate":
+            result = migrate_assets(db, store, dry_run=args.dry_run)
+        else:
+            result = collect_garbage(db, store, grace_sec=args.grace_sec, dry_run=args.dry_run)
+        result["blob_store"] = db.blob_stats()
+    finally:
+        db.close()
+
+    print(json.dumps({"command": args.command, "dry_run": args.dry_run, **result}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
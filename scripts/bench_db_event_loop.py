@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop latency while 50 concurrent POST /api/jobs requests run.
+
+The app is driven in-process through httpx's ASGI transport with a
+FakeComfyClient, so no ComfyUI instance is needed. A heartbeat task sleeps 1 ms
+in a loop and records how late it wakes up; that overshoot is the time the
+event loop spent blocked.
+
+Two modes are compared:
+    blocking - database calls run inline on the event loop, in rollback-journal
+               mode (the previous behaviour)
+    async    - the AsyncDatabase facade (writer thread + read-only WAL readers)
+
+Usage:
+    python scripts/bench_db_event_loop.py [--requests 50] [--rounds 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, List
+
+# The server module reads DATA_DIR at import time; point it at a scratch directory.
+_TMP = tempfile.mkdtemp(prefix="cockpit-bench-")
+os.environ["DATA_DIR"] = _TMP
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from server import main  # noqa: E402
+from server.db import Database  # noqa: E402
+from server.fake_comfy_client import FakeComfyClient  # noqa: E402
+
+
+class BlockingDatabase:
+    """Awaitable shim that runs every call inline on the event loop."""
+
+    def __init__(self, db: Database) -> None:
+        self.sync = db
+
+    def __getattr__(self, name: str) -> Any:
+        fn = getattr(self.sync, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return fn(*args, **kwargs)
+
+        return call
+
+
+async def heartbeat(samples: List[float], stop: asyncio.Event, interval: float = 0.001) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append((loop.time() - start - interval) * 1000.0)
+
+
+async def run_round(n_requests: int) -> List[float]:
+    samples: List[float] = []
+    stop = asyncio.Event()
+    hb = asyncio.create_task(heartbeat(samples, stop))
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.sleep(0.01)
+        responses = await asyncio.gather(
+            *(client.post("/api/jobs", json={"prompt": f"bench {i}"}) for i in range(n_requests))
+        )
+        # Let background submissions settle
+        await asyncio.sleep(0.05)
+    stop.set()
+    await hb
+    bad = [r.status_code for r in responses if r.status_code != 200]
+    if bad:
+        raise RuntimeError(f"unexpected status codes: {bad[:5]}")
+    return samples
+
+
+def summarize(label: str, samples: List[float], elapsed: float) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[int(len(ordered) * 0.99) - 1] if ordered else 0.0
+    print(
+        f"{label:<9} wall={elapsed * 1000:8.1f} ms  "
+        f"lag mean={statistics.fmean(ordered):6.2f} ms  p99={p99:6.2f} ms  max={ordered[-1]:6.2f} ms"
+    )
+
+
+async def bench(mode: str, n_requests: int, rounds: int) -> None:
+    original = main.adb
+    if mode == "blocking":
+        legacy = Database(os.path.join(_TMP, "blocking.sqlite3"))
+        legacy._conn.execute("PRAGMA journal_mode=DELETE;")
+        legacy._conn.execute("PRAGMA synchronous=FULL;")
+        main.adb = BlockingDatabase(legacy)
+    try:
+        all_samples: List[float] = []
+        start = time.perf_counter()
+        for _ in range(rounds):
+            all_samples.extend(await run_round(n_requests))
+        summarize(mode, all_samples, (time.perf_counter() - start) / rounds)
+    finally:
+        main.adb = original
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    main.set_comfy_client(FakeComfyClient())
+    print(f"{args.requests} concurrent POST /api/jobs x {args.rounds} rounds (data dir: {_TMP})")
+    for mode in ("blocking", "async"):
+        asyncio.run(bench(mode, args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main_cli()
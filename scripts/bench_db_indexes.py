@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot jobs/assets queries with and without the lookup indexes.
+
+A scratch database is seeded with 100k jobs and 500k assets (5 per job, ~5%
+favorited). Each query is timed against the schema before the index migration
+(indexes dropped, user_version rolled back), then the database is reopened so
+the migration runs, and the same queries are timed again. The query plan for
+each run is printed so scans vs. index searches are visible.
+
+Usage:
+    python scripts/bench_db_indexes.py [--jobs 100000] [--assets-per-job 5] [--repeat 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.db import Database  # noqa: E402
+
+# Schema version that added the lookup indexes, and the indexes it created.
+LOOKUP_INDEX_VERSION = 3
+LOOKUP_INDEXES = ("idx_jobs_prompt_id", "idx_jobs_created_at", "idx_assets_job_id", "idx_assets_favorite")
+
+
+def seed(db: Database, n_jobs: int, assets_per_job: int) -> Tuple[List[str], List[str]]:
+    rng = random.Random(1234)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    params = json.dumps({"workflow_id": "sdxl_txt2img", "steps": 20, "cfg": 7.0})
+    recipe = json.dumps({"engine": "comfy", "prompt": "bench", "params": {"seed": 1}})
+    job_ids: List[str] = []
+    prompt_ids: List[str] = []
+
+    conn = db._conn
+    jobs = []
+    assets = []
+    for i in range(n_jobs):
+        job_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        prompt_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        created = (base + timedelta(seconds=i * 7)).isoformat()
+        job_ids.append(job_id)
+        prompt_ids.append(prompt_id)
+        jobs.append((job_id, "comfy", "completed", prompt_id, "bench", "", params, created, created, 20, 20, 1, None))
+        for k in range(assets_per_job):
+            favorite = 1 if rng.random() < 0.05 else 0
+            assets.append(
+                (str(uuid.uuid4()), job_id, "comfy", f"{job_id}_{k}.png", created, favorite, recipe, "{}")
+            )
+
+    conn.execute("BEGIN;")
+    conn.executemany(
+        "INSERT INTO jobs (id, engine, status, prompt_id, prompt, negative_prompt, params_json, created_at, "
+        "updated_at, progress_value, progress_max, harvested, error) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+        jobs,
+    )
+    conn.executemany(
+        "INSERT INTO assets (id, job_id, engine, filename, created_at, favorite, recipe_json, meta_json) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?);",
+        assets,
+    )
+    conn.commit()
+    conn.execute("ANALYZE;")
+    return job_ids, prompt_ids
+
+
+def drop_lookup_indexes(db: Database) -> None:
+    for name in LOOKUP_INDEXES:
+        db._conn.execute(f"DROP INDEX IF EXISTS {name};")
+    db._conn.execute(f"PRAGMA user_version = {LOOKUP_INDEX_VERSION - 1};")
+    db._conn.execute("ANALYZE;")
+    db._conn.commit()
+
+
+def plan(db: Database, sql: str, params: tuple) -> str:
+    rows = db._conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return "; ".join(r["detail"] for r in rows)
+
+
+def timed(fn: Callable[[int], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def run_queries(db: Database, job_ids: List[str], prompt_ids: List[str], repeat: int) -> List[Tuple[str, float, str]]:
+    rng = random.Random(99)
+    picks = [rng.randrange(len(job_ids)) for _ in range(repeat)]
+    cases = [
+        (
+            "get_job_by_prompt_id",
+            lambda i: db.get_job_by_prompt_id(prompt_ids[picks[i]]),
+            ("SELECT * FROM jobs WHERE prompt_id = ?;", (prompt_ids[0],)),
+        ),
+        (
+            "get_job_by_prompt_id (miss)",
+            lambda i: db.get_job_by_prompt_id(f"foreign-{i}"),
+            ("SELECT * FROM jobs WHERE prompt_id = ?;", ("foreign",)),
+        ),
+        (
+            "list_jobs(200)",
+            lambda i: db.list_jobs(200),
+            ("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?;", (200,)),
+        ),
+        (
+            "list_assets_by_job",
+            lambda i: db.list_assets_by_job(job_ids[picks[i]]),
+            ("SELECT * FROM assets WHERE job_id = ? ORDER BY created_at DESC;", (job_ids[0],)),
+        ),
+        (
+            "list_assets(200)",
+            lambda i: db.list_assets(200),
+            ("SELECT * FROM assets ORDER BY created_at DESC LIMIT ?;", (200,)),
+        ),
+        (
+            "list_assets(favorites)",
+            lambda i: db.list_assets(200, favorites_only=True),
+            ("SELECT * FROM assets WHERE favorite = 1 ORDER BY created_at DESC LIMIT ?;", (200,)),
+        ),
+    ]
+    results = []
+    for name, fn, (sql, params) in cases:
+        results.append((name, timed(fn, repeat), plan(db, sql, params)))
+    return results
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--assets-per-job", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    path = str(Path(tempfile.mkdtemp(prefix="cockpit-idx-")) / "bench.sqlite3")
+    db = Database(path)
+    t0 = time.perf_counter()
+    job_ids, prompt_ids = seed(db, args.jobs, args.assets_per_job)
+    print(
+        f"seeded {len(job_ids)} jobs / {len(job_ids) * args.assets_per_job} assets "
+        f"in {time.perf_counter() - t0:.1f} s ({path})"
+    )
+
+    drop_lookup_indexes(db)
+    before = run_queries(db, job_ids, prompt_ids, args.repeat)
+    db.close()
+
+    t0 = time.perf_counter()
+    db = Database(path)  # runs the pending migrations
+    print(f"migration to v{db.schema_version()} took {time.perf_counter() - t0:.2f} s")
+    db._conn.execute("ANALYZE;")
+    after = run_queries(db, job_ids, prompt_ids, args.repeat)
+    db.close()
+
+    print()
+    print(f"{'query':<30} {'before ms':>10} {'after ms':>10} {'speedup':>9}")
+    for (name, b, _), (_, a, _) in zip(before, after):
+        print(f"{name:<30} {b:10.3f} {a:10.3f} {b / a if a else float('inf'):8.1f}x")
+    print()
+    for (name, _, plan_before), (_, _, plan_after) in zip(before, after):
+        print(f"{name}\n  before: {plan_before}\n  after:  {plan_after}")
+
+
+if __name__ == "__main__":
+    main_cli()
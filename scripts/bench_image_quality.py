@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark check_image_quality: per-image latency and peak Python memory.
+
+Synthetic noisy images are encoded as PNG and JPEG at 512, 1024 and 2048 px.
+Each is checked with the previous per-pixel implementation (list(getdata())
+plus a Python loop, reproduced below) and the current NumPy implementation.
+Peak memory is measured with tracemalloc, which tracks Python objects and NumPy
+buffers; Pillow's own decode buffer is not included for either implementation.
+
+Usage:
+    python scripts/bench_image_quality.py [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.image_quality import check_image_quality  # noqa: E402
+
+SIZES = (512, 1024, 2048)
+
+
+def legacy_check(image_data: bytes) -> None:
+    """The pre-NumPy implementation (statistics only; the checks are the same)."""
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode == "RGBA":
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+
+    pixels = list(img.getdata())
+    num_pixels = len(pixels)
+    total_brightness = 0.0
+    brightness_values = []
+    color_set = set()
+    sample_size = min(num_pixels, 10000)
+    step = max(1, num_pixels // sample_size)
+    for i in range(0, num_pixels, step):
+        r, g, b = pixels[i]
+        brightness = (r + g + b) / (3 * 255)
+        total_brightness += brightness
+        brightness_values.append(brightness)
+        color_set.add((r, g, b))
+    avg = total_brightness / len(brightness_values)
+    math.sqrt(sum((b - avg) ** 2 for b in brightness_values) / len(brightness_values))
+
+
+def make_image(size: int, fmt: str) -> bytes:
+    rng = np.random.default_rng(size)
+    # Smooth gradient plus noise: realistic entropy for PNG/JPEG sizes
+    y, x = np.mgrid[0:size, 0:size]
+    base = np.stack([x * 255 // size, y * 255 // size, np.full_like(x, 128)], axis=-1)
+    noise = rng.integers(-20, 21, size=base.shape)
+    arr = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(arr, "RGB").save(buffer, format=fmt, quality=90)
+    return buffer.getvalue()
+
+
+def measure(fn: Callable[[bytes], object], data: bytes, repeat: int) -> Tuple[float, float]:
+    """Return (median latency ms, peak traced MiB)."""
+    fn(data)  # warm up
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        timings.append((time.perf_counter() - start) * 1000.0)
+
+    tracemalloc.start()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / (1024 * 1024)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'image':<12} {'legacy ms':>10} {'numpy ms':>10} {'speedup':>8} {'legacy MiB':>11} {'numpy MiB':>10}")
+    for fmt in ("PNG", "JPEG"):
+        for size in SIZES:
+            data = make_image(size, fmt)
+            legacy_ms, legacy_mib = measure(legacy_check, data, args.repeat)
+            numpy_ms, numpy_mib = measure(check_image_quality, data, args.repeat)
+            print(
+                f"{fmt + ' ' + str(size):<12} {legacy_ms:10.1f} {numpy_ms:10.1f} "
+                f"{legacy_ms / numpy_ms:7.1f}x {legacy_mib:11.1f} {numpy_mib:10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main_cli()
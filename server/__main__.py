@@ -22,7 +22,8 @@ except ImportError:
     print("Error: MCP SDK not installed. Run: pip install mcp", file=sys.stderr)
     sys.exit(1)
 
-from .requests_cockpit_api_client import RequestsCockpitApiClient
+from .job_events import JobEventStream
+from .requests_cockpit_api_client import AsyncRequestsCockpitApiClient
 from .mcp_tools import (
     workflows_list,
     workflow_get,
@@ -37,8 +38,8 @@ BASE_URL = os.environ.get("COCKPIT_BASE_URL", "http://127.0.0.1:8787")
 # Create the MCP server
 app = Server("cockpit-image-generator")
 
-# Create the HTTP client
-client = RequestsCockpitApiClient(base_url=BASE_URL)
+# Create the HTTP client (one pooled connection set for the server's lifetime)
+client = AsyncRequestsCockpitApiClient(base_url=BASE_URL)
 
 
 @app.list_tools()
@@ -154,14 +155,14 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> list[TextContent]:
     """Handle tool calls."""
     try:
         if name == "workflows_list":
-            result = workflows_list(client)
+            result = await workflows_list(client)
             return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
         elif name == "workflow_get":
             workflow_id = arguments.get("workflow_id")
             if not workflow_id:
                 raise ValueError("workflow_id is required")
-            result = workflow_get(client, workflow_id)
+            result = await workflow_get(client, workflow_id)
             return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
         elif name == "images_generate":
@@ -171,15 +172,18 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> list[TextContent]:
             wait = arguments.get("wait", True)
             timeout_sec = arguments.get("timeout_sec", 600)
 
-            result = await images_generate(
-                client,
-                workflow_id=workflow_id,
-                params=params,
-                count=count,
-                wait=wait,
-                timeout_sec=timeout_sec,
-                base_url=BASE_URL,
-            )
+            # Job completion is pushed over /api/ws; polling is only the fallback
+            async with JobEventStream(BASE_URL) as events:
+                result = await images_generate(
+                    client,
+                    workflow_id=workflow_id,
+                    params=params,
+                    count=count,
+                    wait=wait,
+                    timeout_sec=timeout_sec,
+                    base_url=BASE_URL,
+                    events=events,
+                )
             return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
         elif name == "images_generate_many":
@@ -195,15 +199,17 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> list[TextContent]:
             wait = arguments.get("wait", True)
             timeout_sec = arguments.get("timeout_sec", 600)
 
-            result = await images_generate_many(
-                client,
-                prompts=prompts,
-                workflow_id=workflow_id,
-                base_params=base_params,
-                wait=wait,
-                timeout_sec=timeout_sec,
-                base_url=BASE_URL,
-            )
+            async with JobEventStream(BASE_URL) as events:
+                result = await images_generate_many(
+                    client,
+                    prompts=prompts,
+                    workflow_id=workflow_id,
+                    base_params=base_params,
+                    wait=wait,
+                    timeout_sec=timeout_sec,
+                    base_url=BASE_URL,
+                    events=events,
+                )
             return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
         else:
@@ -216,8 +222,11 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> list[TextContent]:
 
 async def main():
     """Run the MCP server."""
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(read_stream, write_stream, app.create_initialization_options())
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(read_stream, write_stream, app.create_initialization_options())
+    finally:
+        await client.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+"""Content-addressed asset store: one file per distinct content, shared by assets."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Dict, Optional
+
+from .db import Database
+from .local_import import import_file
+from .storage import ensure_dir, write_stream_atomic
+from .thumbnails import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Blob paths (= assets.filename) start with this, relative to the assets directory
+BLOB_PREFIX = "blobs/"
+STAGING_DIR = ".staging"
+
+# Unreferenced or untracked blob files younger than this are kept by the garbage
+# collector: a harvest may be about to register them.
+GC_GRACE_SEC = 3600.0
+
+
+@dataclass
+class StagedBlob:
+    """A file written to the staging area, not yet in the store."""
+
+    path: str
+    content_hash: str
+    size: int
+    ext: str
+
+
+class BlobStore:
+    """Files under `root`/blobs, named by the sha256 of their content.
+
+    Layout: blobs/ab/cd/abcd...<ext>, two levels of 256 shards so no directory
+    grows large. Writes go to blobs/.staging first (same filesystem, so commit()
+    is a rename) and are hashed while streaming. Committing content that is
+    already stored drops the staged copy and returns the existing path, so
+    identical outputs (re-runs with the same seed, retries) take disk space
+    once. The store only manages files; which assets use a blob is tracked in
+    the database (see Database.create_asset and collect_garbage).
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_deduplicated = 0
+
+    @property
+    def blob_root(self) -> str:
+        return os.path.join(self.root, BLOB_PREFIX.rstrip("/"))
+
+    @staticmethod
+    def relpath(content_hash: str, ext: str = "") -> str:
+        return f"{BLOB_PREFIX}{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{ext.lower()}"
+
+    def path(self, relpath: str) -> str:
+        return os.path.join(self.root, *relpath.split("/"))
+
+    def staging_path(self, ext: str = "") -> str:
+        return os.path.join(self.blob_root, STAGING_DIR, f"{uuid.uuid4().hex}{ext.lower()}")
+
+    def find(self, content_hash: str) -> Optional[str]:
+        """Path of the stored blob with this content (any extension), if any."""
+        shard = self.path(self.relpath(content_hash))
+        directory = os.path.dirname(shard)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return None
+        for name in sorted(names):
+            if name.startswith(content_hash):
+                return self.relpath(content_hash) + name[len(content_hash):]
+        return None
+
+    async def stage(self, chunks: AsyncIterable[bytes], ext: str = "") -> StagedBlob:
+        """Stream chunks into the staging area, hashing them on the way."""
+        digest = hashlib.sha256()
+
+        async def hashed():
+            async for chunk in chunks:
+                digest.update(chunk)
+                yield chunk
+
+        path = self.staging_path(ext)
+        size = await write_stream_atomic(path, hashed())
+        return StagedBlob(path=path, content_hash=digest.hexdigest(), size=size, ext=ext.lower())
+
+    async def stage_bytes(self, data: bytes, ext: str = "") -> StagedBlob:
+        async def one():
+            yield data
+
+        return await self.stage(one(), ext)
+
+    def commit(self, staged: StagedBlob) -> str:
+        """Move a staged file into the store; returns its blob path.
+
+        If the content is stored already, the staged file is removed and the
+        existing blob's mtime refreshed (which keeps it from the garbage
+        collector's grace window while its new reference is registered).
+        """
+        existing = self.find(staged.content_hash)
+        if existing is not None:
+            os.remove(staged.path)
+            os.utime(self.path(existing))
+            self.deduplicated += 1
+            self.bytes_deduplicated += staged.size
+            return existing
+        relpath = self.relpath(staged.content_hash, staged.ext)
+        dest = self.path(relpath)
+        ensure_dir(os.path.dirname(dest))
+        os.replace(staged.path, dest)
+        self.stored += 1
+        return relpath
+
+    def discard(self, staged: StagedBlob) -> None:
+        try:
+            os.remove(staged.path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "bytes_deduplicated": self.bytes_deduplicated,
+        }
+
+
+def collect_garbage(
+    db: Database,
+    store: BlobStore,
+    *,
+    grace_sec: float = GC_GRACE_SEC,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """Delete blobs no asset references.
+
+    Refcounts are first recomputed from the assets table (fixing any drift),
+    then blobs with no references are removed, row and file. Files under the
+    blob directory without a row (a crash between commit and registration,
+    leftover staging files) are removed too. Anything modified within
+    `grace_sec` is kept.
+    """
+    cutoff = time.time() - grace_sec
+    result = {"recounted": 0, "removed": 0, "removed_untracked": 0, "skipped_recent": 0, "bytes_reclaimed": 0}
+    result["recounted"] = db.recount_blob_refs(apply=not dry_run)
+
+    def old_enough(path: str) -> bool:
+        try:
+            return os.path.getmtime(path) < cutoff
+        except FileNotFoundError:
+            return True
+
+    after = ""
+    while True:
+        batch = db.list_unreferenced_blobs(after=after)
+        if not batch:
+            break
+        after = batch[-1].content_hash
+        for blob in batch:
+            path = store.path(blob.path)
+            if not old_enough(path):
+                result["skipped_recent"] += 1
+                continue
+            if dry_run or db.delete_blob(blob.content_hash):
+                result["removed"] += 1
+                result["bytes_reclaimed"] += blob.size
+                if not dry_run:
+                    _remove(path)
+
+    tracked = db.blob_paths()
+    for directory, _, names in os.walk(store.blob_root, topdown=False):
+        for name in names:
+            path = os.path.join(directory, name)
+            relpath = os.path.relpath(path, store.root).replace(os.sep, "/")
+            if relpath in tracked or not old_enough(path):
+                continue
+            result["removed_untracked"] += 1
+            result["bytes_reclaimed"] += os.path.getsize(path)
+            if not dry_run:
+                _remove(path)
+        if not dry_run and directory != store.blob_root:
+            try:
+                os.rmdir(directory)  # only succeeds for empty shard directories
+            except OSError:
+                pass
+    return result
+
+
+def migrate_assets(db: Database, store: BlobStore, *, dry_run: bool = False, batch_size: int = 500) -> Dict[str, int]:
+    """Move assets stored under timestamp/uuid names into the blob store.
+
+    Each file is linked into the store (hardlink, else copy) and hashed, the
+    asset row is pointed at the blob, and only then is the old file removed,
+    so an interrupted migration can simply be run again. Duplicate files
+    collapse into one blob. Asset URLs change to /assets/blobs/...
+    """
+    result = {"migrated": 0, "deduplicated": 0, "missing": 0, "bytes_reclaimed": 0}
+    seen_hashes = set()
+    after_id = ""
+    while True:
+        rows = db.list_assets_outside_prefix(BLOB_PREFIX, batch_size, after_id)
+        if not rows:
+            break
+        after_id = rows[-1].id
+        for row in rows:
+            src = store.path(row.filename)
+            if not os.path.isfile(src):
+                result["missing"] += 1
+                logger.warning(f"Asset {row.id}: {row.filename} not found, left as is")
+                continue
+            ext = os.path.splitext(row.filename)[1]
+            if dry_run:
+                content_hash = file_sha256(src)
+                if content_hash in seen_hashes or store.find(content_hash) is not None:
+                    result["deduplicated"] += 1
+                    result["bytes_reclaimed"] += os.path.getsize(src)
+                seen_hashes.add(content_hash)
+                result["migrated"] += 1
+                continue
+            staging = store.staging_path(ext)
+            imported = import_file(src, staging)
+            deduplicated = store.deduplicated
+            relpath = store.commit(StagedBlob(staging, imported.content_hash, imported.size, ext.lower()))
+            db.move_asset_to_blob(row.id, relpath, imported.content_hash, imported.size)
+            _remove(src)
+            result["migrated"] += 1
+            if store.deduplicated > deduplicated:
+                # A hardlinked new blob shares src's data; only duplicates free space
+                result["deduplicated"] += 1
+                result["bytes_reclaimed"] += imported.size
+    return result
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -4,6 +4,9 @@ CockpitApiClient interface for interacting with the Cockpit HTTP API.
 This is a Protocol (interface) that can be implemented by:
 - RequestsCockpitApiClient: Real HTTP client using httpx
 - FakeCockpitApiClient: Test double for unit tests
+
+Async implementations (AsyncRequestsCockpitApiClient, AsyncFakeCockpitApiClient)
+provide the same methods as coroutines; the MCP tools accept either kind.
 """
 
 from typing import Any, Dict, List, Protocol
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
 
+from .http_pool import HttpPool, UpstreamConfig
+
 
 def _http_to_ws(url: str) -> str:
     # http://127.0.0.1:8188 -> ws://127.0.0.1:8188
@@ -17,16 +19,27 @@ def _http_to_ws(url: str) -> str:
     return "ws://" + url
 
 
+# Chunk size used when streaming /view bodies to disk.
+VIEW_CHUNK_SIZE = 256 * 1024
+
+
 class ComfyClient:
-    def __init__(self, base_url: str) -> None:
+    def __init__(self, base_url: str, *, pool: Optional[HttpPool] = None) -> None:
         self.base_url = base_url.rstrip("/")
-        self.http = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+        # Requests go through the "comfy" upstream of a shared pool (keep-alive, metrics)
+        self._owns_pool = pool is None
+        self._pool = pool or HttpPool({"comfy": UpstreamConfig(timeout=60.0, connect_timeout=10.0)})
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._pool.client("comfy")
 
     def ws_url(self, client_id: str) -> str:
         return f"{_http_to_ws(self.base_url)}/ws?clientId={client_id}"
 
     async def close(self) -> None:
-        await self.http.aclose()
+        if self._owns_pool:
+            await self._pool.close()
 
     async def submit_prompt(self, prompt_workflow: Dict[str, Any], client_id: str) -> Dict[str, Any]:
         payload = {"prompt": prompt_workflow, "client_id": client_id}
@@ -40,17 +53,43 @@ class ComfyClient:
             raise RuntimeError(f"ComfyUI error: {r.status_code} {body}")
         return r.json()
 
+    async def get_queue(self) -> Dict[str, Any]:
+        r = await self.http.get(f"{self.base_url}/queue")
+        r.raise_for_status()
+        return r.json()
+
     async def get_history(self, prompt_id: str) -> Dict[str, Any]:
         r = await self.http.get(f"{self.base_url}/history/{prompt_id}")
         r.raise_for_status()
         return r.json()
 
+    async def get_recent_history(self, max_items: int) -> Dict[str, Any]:
+        """The `max_items` most recent history entries, keyed by prompt_id (one request)."""
+        r = await self.http.get(f"{self.base_url}/history", params={"max_items": max_items})
+        r.raise_for_status()
+        return r.json()
+
     async def get_view_image(self, *, filename: str, subfolder: str, folder_type: str) -> bytes:
         params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
         r = await self.http.get(f"{self.base_url}/view", params=params)
         r.raise_for_status()
         return r.content
 
+    async def iter_view(
+        self,
+        *,
+        filename: str,
+        subfolder: str,
+        folder_type: str,
+        chunk_size: int = VIEW_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Stream a /view body in chunks instead of buffering the whole file."""
+        params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+        async with self.http.stream("GET", f"{self.base_url}/view", params=params) as r:
+            r.raise_for_status()
+            async for chunk in r.aiter_bytes(chunk_size):
+                yield chunk
+
     async def get_models_in_folder(self, folder: str) -> List[str]:
         """Try ComfyUI's /models/{folder} (local server route).
 
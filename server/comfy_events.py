@@ -0,0 +1,116 @@
+"""Hand-off of ComfyUI websocket events to the dispatcher, plus event loop lag sampling."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+# Delay / lag samples kept for percentiles.
+SAMPLE_WINDOW = 512
+
+
+def _summary(samples: Deque[float], peak: float) -> Dict[str, Optional[float]]:
+    ordered = sorted(samples)
+
+    def pct(p: float) -> Optional[float]:
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+    return {
+        "last_ms": round(samples[-1], 2) if samples else None,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "max_ms": round(peak, 2),
+    }
+
+
+class ComfyEventQueue:
+    """Events received from ComfyUI, waiting for the dispatcher.
+
+    The websocket receive loop only parses messages and put()s them here, which
+    never blocks, so slow job updates cannot stall ws.recv() into a ping
+    timeout. Events keep their arrival order. Once `max_backlog` events are
+    waiting, further `progress` events are dropped (a later one supersedes
+    them); other events are always kept. Time spent in the queue is recorded.
+    """
+
+    def __init__(self, *, max_backlog: int = 5000, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_backlog = max(1, max_backlog)
+        self._clock = clock
+        self._items: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._delays: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._max_delay = 0.0
+        self.received = 0
+        self.dropped = 0
+        self.peak_backlog = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, message: Dict[str, Any]) -> None:
+        if len(self._items) >= self.max_backlog and message.get("type") == "progress":
+            self.dropped += 1
+            return
+        self.received += 1
+        self._items.append((self._clock(), message))
+        self.peak_backlog = max(self.peak_backlog, len(self._items))
+        if self._ready is not None:
+            self._ready.set()
+
+    async def get(self) -> Dict[str, Any]:
+        while not self._items:
+            ready = self._event()
+            ready.clear()
+            await ready.wait()
+        received_at, message = self._items.popleft()
+        delay_ms = (self._clock() - received_at) * 1000.0
+        self._delays.append(delay_ms)
+        self._max_delay = max(self._max_delay, delay_ms)
+        return message
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backlog": len(self._items),
+            "peak_backlog": self.peak_backlog,
+            "received": self.received,
+            "dropped": self.dropped,
+            "queue_delay": _summary(self._delays, self._max_delay),
+        }
+
+    def _event(self) -> asyncio.Event:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._ready is None:
+            self._loop = loop
+            self._ready = asyncio.Event()
+        return self._ready
+
+
+class LoopLagMonitor:
+    """Measures event loop lag: how late a sleep of `interval` seconds wakes up.
+
+    Anything blocking the loop (sync I/O, long CPU work in a handler) shows up
+    here before it shows up as dropped websocket connections.
+    """
+
+    def __init__(self, *, interval: float = 0.5, clock: Callable[[], float] = time.monotonic) -> None:
+        self.interval = interval
+        self._clock = clock
+        self._lags: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._max_lag = 0.0
+
+    async def run(self) -> None:
+        while True:
+            start = self._clock()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, self._clock() - start - self.interval) * 1000.0)
+
+    def record(self, lag_ms: float) -> None:
+        self._lags.append(lag_ms)
+        self._max_lag = max(self._max_lag, lag_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"interval_ms": round(self.interval * 1000.0, 2), **_summary(self._lags, self._max_lag)}
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import os
 import sqlite3
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
 
 
 def utc_now_iso() -> str:
@@ -28,6 +34,11 @@ class JobRow:
     progress_max: float
     harvested: int
     error: Optional[str]
+    quality_json: Optional[str] = None
+    priority: str = "interactive"
+    client_id: str = ""
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
 
 
 @dataclass
@@ -40,6 +51,31 @@ class AssetRow:
     favorite: int
     recipe_json: str
     meta_json: str
+    content_hash: Optional[str] = None
+    # Storage tier: original, compressed or thumbnail (see retention.py)
+    tier: str = "original"
+
+
+@dataclass
+class BlobRow:
+    """A content-addressed file in the asset store, shared by `refcount` assets."""
+
+    content_hash: str
+    path: str
+    size: int
+    refcount: int
+    created_at: str
+
+
+@dataclass
+class WaitingJob:
+    """A queued, not yet submitted job as seen by the submission scheduler."""
+
+    id: str
+    priority: str
+    client_id: str
+    workflow_id: str
+    created_at: str
 
 
 @dataclass
@@ -50,76 +86,237 @@ class GrokMessageRow:
     created_at: str
 
 
+# Cursor position for keyset pagination: (created_at, id) of the last row seen.
+PageKey = Tuple[str, str]
+
+# Columns for list views that do not need recipe/meta (JSON left empty).
+_ASSET_SUMMARY_COLUMNS = (
+    "id, job_id, engine, filename, created_at, favorite, '' AS recipe_json, '' AS meta_json, content_hash, tier"
+)
+
+_JOB_WORKFLOW_EXPR = "json_extract(params_json, '$.workflow_id')"
+_ASSET_WORKFLOW_EXPR = "json_extract(recipe_json, '$.params.workflow_id')"
+
+
+# ------------------------------
+# Schema migrations
+# ------------------------------
+#
+# Each entry upgrades the schema by one version; the current version is kept in
+# PRAGMA user_version and every step runs in its own transaction. Append new
+# migrations at the end, never edit or reorder existing ones.
+
+
+def _migrate_base_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            engine TEXT NOT NULL,
+            status TEXT NOT NULL,
+            prompt_id TEXT,
+            prompt TEXT NOT NULL,
+            negative_prompt TEXT NOT NULL,
+            params_json TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            progress_value REAL NOT NULL DEFAULT 0,
+            progress_max REAL NOT NULL DEFAULT 0,
+            harvested INTEGER NOT NULL DEFAULT 0,
+            error TEXT
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS assets (
+            id TEXT PRIMARY KEY,
+            job_id TEXT NOT NULL,
+            engine TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            favorite INTEGER NOT NULL DEFAULT 0,
+            recipe_json TEXT NOT NULL,
+            meta_json TEXT NOT NULL,
+            FOREIGN KEY(job_id) REFERENCES jobs(id)
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS grok_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_created_at ON assets(created_at DESC);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_grok_messages_created_at ON grok_messages(created_at DESC);")
+
+
+def _migrate_jobs_harvested(conn: sqlite3.Connection) -> None:
+    # Databases created by the first MVP versions have no 'harvested' column.
+    if not _has_column(conn, "jobs", "harvested"):
+        conn.execute("ALTER TABLE jobs ADD COLUMN harvested INTEGER NOT NULL DEFAULT 0;")
+
+
+def _migrate_lookup_indexes(conn: sqlite3.Connection) -> None:
+    # get_job_by_prompt_id runs for every ComfyUI websocket message
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_prompt_id ON jobs(prompt_id);")
+    # list_jobs
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at DESC);")
+    # list_assets_by_job (filter + order in one index)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_job_id ON assets(job_id, created_at DESC);")
+    # Favorites view: only favorited rows are indexed
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_assets_favorite ON assets(created_at DESC) WHERE favorite = 1;"
+    )
+
+
+def _migrate_keyset_indexes(conn: sqlite3.Connection) -> None:
+    # Keyset pagination orders by (created_at, id); include id so ties resolve in the index.
+    for name, table, where in (
+        ("idx_jobs_created_at", "jobs", ""),
+        ("idx_assets_created_at", "assets", ""),
+        ("idx_assets_favorite", "assets", " WHERE favorite = 1"),
+    ):
+        conn.execute(f"DROP INDEX IF EXISTS {name};")
+        conn.execute(f"CREATE INDEX {name} ON {table}(created_at, id){where};")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at, id);")
+    # Must match the expressions used by the workflow_id filters below.
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_jobs_workflow_id ON jobs({_JOB_WORKFLOW_EXPR}, created_at, id);"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_assets_workflow_id ON assets({_ASSET_WORKFLOW_EXPR}, created_at, id);"
+    )
+
+
+def _migrate_asset_content_hash(conn: sqlite3.Connection) -> None:
+    # sha256 of the stored file; keys the thumbnail cache. NULL until backfilled.
+    if not _has_column(conn, "assets", "content_hash"):
+        conn.execute("ALTER TABLE assets ADD COLUMN content_hash TEXT;")
+
+
+def _migrate_job_quality(conn: sqlite3.Connection) -> None:
+    # Per-job quality gate report (JSON), written once after harvest.
+    if not _has_column(conn, "jobs", "quality_json"):
+        conn.execute("ALTER TABLE jobs ADD COLUMN quality_json TEXT;")
+
+
+def _migrate_job_scheduling(conn: sqlite3.Connection) -> None:
+    # Scheduling class and submitting client; run start/end times feed the cost model.
+    for column, ddl in (
+        ("priority", "priority TEXT NOT NULL DEFAULT 'interactive'"),
+        ("client_id", "client_id TEXT NOT NULL DEFAULT ''"),
+        ("started_at", "started_at TEXT"),
+        ("finished_at", "finished_at TEXT"),
+    ):
+        if not _has_column(conn, "jobs", column):
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {ddl};")
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs({_JOB_WORKFLOW_EXPR}, finished_at) "
+        "WHERE status = 'completed' AND started_at IS NOT NULL;"
+    )
+
+
+def _migrate_blobs(conn: sqlite3.Connection) -> None:
+    # Content-addressed asset files; assets reference a blob by content_hash and
+    # path (= assets.filename). refcount counts those assets.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            content_hash TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs(content_hash) WHERE refcount <= 0;")
+    # Lookups of assets by content
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_content_hash ON assets(content_hash);")
+
+
+def _migrate_asset_tiers(conn: sqlite3.Connection) -> None:
+    # Retention tier of the stored file; the retention engine scans oldest first
+    # and never revisits thumbnail-tier assets.
+    if not _has_column(conn, "assets", "tier"):
+        conn.execute("ALTER TABLE assets ADD COLUMN tier TEXT NOT NULL DEFAULT 'original';")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_assets_retention ON assets(created_at, id) WHERE tier != 'thumbnail';"
+    )
+
+
+def _has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table});"))
+
+
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _migrate_base_tables,
+    _migrate_jobs_harvested,
+    _migrate_lookup_indexes,
+    _migrate_keyset_indexes,
+    _migrate_asset_content_hash,
+    _migrate_job_quality,
+    _migrate_job_scheduling,
+    _migrate_blobs,
+    _migrate_asset_tiers,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
 class Database:
     """Tiny SQLite wrapper (sync, protected by a lock).
 
-    This MVP keeps it intentionally simple.
+    This MVP keeps it intentionally simple. Async code should go through
+    AsyncDatabase so queries never run on the event loop.
+
+    The database runs in WAL mode so read-only connections (read_only=True)
+    can query concurrently with the writer.
     """
 
-    def __init__(self, db_path: str) -> None:
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+    def __init__(self, db_path: str, *, read_only: bool = False) -> None:
+        self.path = db_path
+        self.read_only = read_only
+        if read_only:
+            uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("PRAGMA synchronous=NORMAL;")
         self._conn.row_factory = sqlite3.Row
         self._lock = threading.Lock()
-        self._init_schema()
+        if not read_only:
+            self._init_schema()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
 
     def _init_schema(self) -> None:
+        """Bring the schema up to SCHEMA_VERSION (tracked in PRAGMA user_version)."""
         with self._lock:
-            cur = self._conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id TEXT PRIMARY KEY,
-                    engine TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    prompt_id TEXT,
-                    prompt TEXT NOT NULL,
-                    negative_prompt TEXT NOT NULL,
-                    params_json TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    progress_value REAL NOT NULL DEFAULT 0,
-                    progress_max REAL NOT NULL DEFAULT 0,
-                    harvested INTEGER NOT NULL DEFAULT 0,
-                    error TEXT
-                );
-                """
-            )
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS assets (
-                    id TEXT PRIMARY KEY,
-                    job_id TEXT NOT NULL,
-                    engine TEXT NOT NULL,
-                    filename TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    favorite INTEGER NOT NULL DEFAULT 0,
-                    recipe_json TEXT NOT NULL,
-                    meta_json TEXT NOT NULL,
-                    FOREIGN KEY(job_id) REFERENCES jobs(id)
-                );
-                """
-            )
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS grok_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at TEXT NOT NULL
-                );
-                """
-            )
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_assets_created_at ON assets(created_at DESC);")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_grok_messages_created_at ON grok_messages(created_at DESC);")
-            self._conn.commit()
+            version = int(self._conn.execute("PRAGMA user_version;").fetchone()[0])
+            for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                self._conn.execute("BEGIN;")
+                try:
+                    migration(self._conn)
+                    self._conn.execute(f"PRAGMA user_version = {target};")
+                    self._conn.commit()
+                except Exception:
+                    self._conn.rollback()
+                    raise
 
-            # Lightweight migration: add 'harvested' column if the DB was created by an older version.
-            try:
-                cur.execute("ALTER TABLE jobs ADD COLUMN harvested INTEGER NOT NULL DEFAULT 0;")
-                self._conn.commit()
-            except Exception:
-                pass
+    def schema_version(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("PRAGMA user_version;").fetchone()[0])
 
     # ---- Jobs ----
 
@@ -133,17 +330,87 @@ class Database:
         negative_prompt: str,
         params: Dict[str, Any],
         prompt_id: Optional[str] = None,
-    ) -> None:
+        priority: str = "interactive",
+        client_id: str = "",
+    ) -> JobRow:
         now = utc_now_iso()
+        params_json = json.dumps(params)
         with self._lock:
             self._conn.execute(
                 """
-                INSERT INTO jobs (id, engine, status, prompt_id, prompt, negative_prompt, params_json, created_at, updated_at, progress_value, progress_max, harvested, error)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0, 0, NULL);
+                INSERT INTO jobs (id, engine, status, prompt_id, prompt, negative_prompt, params_json, created_at, updated_at, progress_value, progress_max, harvested, error, priority, client_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0, 0, NULL, ?, ?);
                 """,
-                (job_id, engine, status, prompt_id, prompt, negative_prompt, json.dumps(params), now, now),
+                (job_id, engine, status, prompt_id, prompt, negative_prompt, params_json, now, now, priority, client_id),
             )
             self._conn.commit()
+        return JobRow(
+            id=job_id,
+            engine=engine,
+            status=status,
+            prompt_id=prompt_id,
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            params_json=params_json,
+            created_at=now,
+            updated_at=now,
+            progress_value=0.0,
+            progress_max=0.0,
+            harvested=0,
+            error=None,
+            priority=priority,
+            client_id=client_id,
+        )
+
+    def create_jobs(self, jobs: List[Dict[str, Any]]) -> List[JobRow]:
+        """Insert many jobs in one transaction (all or nothing).
+
+        Each item takes the keyword arguments of create_job. created_at values
+        increase by one microsecond per job so listings keep the batch order.
+        """
+        base = datetime.now(timezone.utc)
+        rows: List[JobRow] = []
+        for i, job in enumerate(jobs):
+            now = (base + timedelta(microseconds=i)).isoformat()
+            rows.append(
+                JobRow(
+                    id=job["job_id"],
+                    engine=job["engine"],
+                    status=job["status"],
+                    prompt_id=job.get("prompt_id"),
+                    prompt=job["prompt"],
+                    negative_prompt=job["negative_prompt"],
+                    params_json=json.dumps(job["params"]),
+                    created_at=now,
+                    updated_at=now,
+                    progress_value=0.0,
+                    progress_max=0.0,
+                    harvested=0,
+                    error=None,
+                    priority=job.get("priority", "interactive"),
+                    client_id=job.get("client_id", ""),
+                )
+            )
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO jobs (id, engine, status, prompt_id, prompt, negative_prompt, params_json, created_at, updated_at, progress_value, progress_max, harvested, error, priority, client_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0, 0, NULL, ?, ?);
+                    """,
+                    [
+                        (
+                            r.id, r.engine, r.status, r.prompt_id, r.prompt, r.negative_prompt, r.params_json,
+                            r.created_at, r.updated_at, r.priority, r.client_id,
+                        )
+                        for r in rows
+                    ],
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return rows
 
     def update_job(
         self,
@@ -155,13 +422,28 @@ class Database:
         progress_max: Optional[float] = None,
         error: Optional[str] = None,
         harvested: Optional[int] = None,
-    ) -> None:
+        quality: Optional[Dict[str, Any]] = None,
+        durable: bool = False,
+    ) -> Optional[JobRow]:
+        """Update a job row and return it as stored (None if the job does not exist).
+
+        durable=True forces a full fsync for this commit (terminal states), even
+        though the connection normally runs with synchronous=NORMAL. Moving to
+        'running' stamps started_at (once); 'completed'/'failed' stamp finished_at.
+        """
         fields: List[str] = []
         values: List[Any] = []
+        now = utc_now_iso()
 
         if status is not None:
             fields.append("status = ?")
             values.append(status)
+            if status == "running":
+                fields.append("started_at = COALESCE(started_at, ?)")
+                values.append(now)
+            elif status in ("completed", "failed"):
+                fields.append("finished_at = ?")
+                values.append(now)
         if prompt_id is not None:
             fields.append("prompt_id = ?")
             values.append(prompt_id)
@@ -177,17 +459,39 @@ class Database:
         if harvested is not None:
             fields.append("harvested = ?")
             values.append(int(harvested))
+        if quality is not None:
+            fields.append("quality_json = ?")
+            values.append(json.dumps(quality))
 
         if not fields:
-            return
+            return self.get_job(job_id)
 
         fields.append("updated_at = ?")
-        values.append(utc_now_iso())
+        values.append(now)
         values.append(job_id)
 
-        sql = f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?;"
+        sql = f"UPDATE jobs SET {', '.join(fields)} WHERE id = ? RETURNING *;"
         with self._lock:
-            self._conn.execute(sql, tuple(values))
+            if durable:
+                self._conn.execute("PRAGMA synchronous=FULL;")
+            try:
+                row = self._conn.execute(sql, tuple(values)).fetchone()
+                self._conn.commit()
+            finally:
+                if durable:
+                    self._conn.execute("PRAGMA synchronous=NORMAL;")
+        return JobRow(**dict(row)) if row else None
+
+    def update_jobs_progress(self, updates: List[Tuple[str, float, float]]) -> None:
+        """Persist (job_id, progress_value, progress_max) for many jobs in one transaction."""
+        if not updates:
+            return
+        now = utc_now_iso()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET progress_value = ?, progress_max = ?, updated_at = ? WHERE id = ?;",
+                [(value, maxv, now, job_id) for job_id, value, maxv in updates],
+            )
             self._conn.commit()
 
     def get_job(self, job_id: str) -> Optional[JobRow]:
@@ -195,6 +499,69 @@ class Database:
             row = self._conn.execute("SELECT * FROM jobs WHERE id = ?;", (job_id,)).fetchone()
         return JobRow(**dict(row)) if row else None
 
+    def list_waiting_jobs(self, limit: int) -> List[WaitingJob]:
+        """Oldest first: queued jobs that have not been submitted to ComfyUI yet."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT id, priority, client_id, COALESCE({_JOB_WORKFLOW_EXPR}, '') AS workflow_id, created_at
+                FROM jobs WHERE status = 'queued' AND prompt_id IS NULL
+                ORDER BY created_at, id LIMIT ?;
+                """,
+                (limit,),
+            ).fetchall()
+        return [WaitingJob(**dict(row)) for row in rows]
+
+    def workflow_run_times(self, recent: int = 20) -> Dict[str, float]:
+        """Mean run time in seconds (execution start to finish) per workflow_id,
+        over the `recent` most recently completed jobs of each workflow."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT workflow_id, AVG(seconds) AS seconds FROM (
+                    SELECT {_JOB_WORKFLOW_EXPR} AS workflow_id,
+                           (julianday(finished_at) - julianday(started_at)) * 86400.0 AS seconds,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY {_JOB_WORKFLOW_EXPR} ORDER BY finished_at DESC
+                           ) AS rn
+                    FROM jobs
+                    WHERE status = 'completed' AND started_at IS NOT NULL AND finished_at IS NOT NULL
+                )
+                WHERE rn <= ? AND workflow_id IS NOT NULL AND seconds >= 0
+                GROUP BY workflow_id;
+                """,
+                (recent,),
+            ).fetchall()
+        return {row["workflow_id"]: float(row["seconds"]) for row in rows}
+
+    def count_waiting_jobs(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND prompt_id IS NULL;"
+            ).fetchone()
+        return int(row[0])
+
+    def list_unsettled_jobs(self, limit: int, after: Optional[PageKey] = None) -> List[JobRow]:
+        """Oldest first: jobs handed to ComfyUI whose outcome is not recorded yet
+        (queued/running with a prompt_id, or completed but not harvested).
+
+        `after` is the (created_at, id) of the last job of the previous page.
+        """
+        where = (
+            "prompt_id IS NOT NULL AND (status IN ('queued', 'running') "
+            "OR (status = 'completed' AND harvested = 0))"
+        )
+        params: List[Any] = []
+        if after is not None:
+            where += " AND (created_at, id) > (?, ?)"
+            params.extend(after)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE {where} ORDER BY created_at, id LIMIT ?;",
+                (*params, limit),
+            ).fetchall()
+        return [JobRow(**dict(r)) for r in rows]
+
     def get_job_by_prompt_id(self, prompt_id: str) -> Optional[JobRow]:
         with self._lock:
             row = self._conn.execute("SELECT * FROM jobs WHERE prompt_id = ?;", (prompt_id,)).fetchone()
@@ -208,6 +575,71 @@ class Database:
             ).fetchall()
         return [JobRow(**dict(r)) for r in rows]
 
+    def list_jobs_page(
+        self,
+        *,
+        limit: int = 200,
+        before: Optional[PageKey] = None,
+        after: Optional[PageKey] = None,
+        status: Optional[str] = None,
+        engine: Optional[str] = None,
+        workflow_id: Optional[str] = None,
+    ) -> List[JobRow]:
+        """Newest-first page of jobs; see _keyset_page for cursor semantics."""
+        where: List[str] = []
+        args: List[Any] = []
+        if status is not None:
+            where.append("status = ?")
+            args.append(status)
+        if engine is not None:
+            where.append("engine = ?")
+            args.append(engine)
+        if workflow_id is not None:
+            where.append(f"{_JOB_WORKFLOW_EXPR} = ?")
+            args.append(workflow_id)
+        rows = self._keyset_page("jobs", "*", where, args, limit=limit, before=before, after=after)
+        return [JobRow(**dict(r)) for r in rows]
+
+    def _keyset_page(
+        self,
+        table: str,
+        columns: str,
+        where: List[str],
+        args: List[Any],
+        *,
+        limit: int,
+        before: Optional[PageKey],
+        after: Optional[PageKey],
+    ) -> List[sqlite3.Row]:
+        """Fetch up to `limit` rows ordered by (created_at, id) descending.
+
+        `before` returns rows older than the key, `after` rows newer than it (the
+        `limit` rows closest to the key, still returned newest-first).
+        """
+        if before is not None and after is not None:
+            raise ValueError("before and after are mutually exclusive")
+        where = list(where)
+        args = list(args)
+        if after is not None:
+            where.append("(created_at, id) > (?, ?)")
+            args.extend(after)
+            order = "ASC"
+        else:
+            if before is not None:
+                where.append("(created_at, id) < (?, ?)")
+                args.extend(before)
+            order = "DESC"
+        sql = f"SELECT {columns} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY created_at {order}, id {order} LIMIT ?;"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        if after is not None:
+            rows.reverse()
+        return rows
+
     # ---- Assets ----
 
     def create_asset(
@@ -219,26 +651,125 @@ class Database:
         filename: str,
         recipe: Dict[str, Any],
         meta: Dict[str, Any],
+        content_hash: Optional[str] = None,
+        blob_size: Optional[int] = None,
     ) -> None:
+        """Insert an asset.
+
+        With `blob_size`, `filename` is the blob store path of `content_hash` and
+        the asset is counted as a reference to that blob (same transaction).
+        """
         now = utc_now_iso()
         with self._lock:
-            self._conn.execute(
-                """
-                INSERT INTO assets (id, job_id, engine, filename, created_at, favorite, recipe_json, meta_json)
-                VALUES (?, ?, ?, ?, ?, 0, ?, ?);
-                """,
-                (asset_id, job_id, engine, filename, now, json.dumps(recipe), json.dumps(meta)),
-            )
+            try:
+                self._conn.execute(
+                    """
+                    INSERT INTO assets (id, job_id, engine, filename, created_at, favorite, recipe_json, meta_json, content_hash)
+                    VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?);
+                    """,
+                    (asset_id, job_id, engine, filename, now, json.dumps(recipe), json.dumps(meta), content_hash),
+                )
+                if blob_size is not None and content_hash:
+                    self._add_blob_refs(content_hash, filename, blob_size, now)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def _add_blob_refs(self, content_hash: str, path: str, size: int, now: str, count: int = 1) -> None:
+        self._conn.execute(
+            """
+            INSERT INTO blobs (content_hash, path, size, refcount, created_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(content_hash) DO UPDATE SET refcount = MAX(refcount, 0) + excluded.refcount;
+            """,
+            (content_hash, path, size, count, now),
+        )
+
+    def delete_asset(self, asset_id: str) -> Optional[AssetRow]:
+        """Delete an asset row and drop its blob reference. The blob file stays
+        until collect_garbage removes unreferenced blobs."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM assets WHERE id = ?;", (asset_id,)).fetchone()
+            if not row:
+                return None
+            try:
+                self._conn.execute("DELETE FROM assets WHERE id = ?;", (asset_id,))
+                if row["content_hash"]:
+                    self._conn.execute(
+                        "UPDATE blobs SET refcount = refcount - 1 WHERE content_hash = ? AND path = ?;",
+                        (row["content_hash"], row["filename"]),
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return AssetRow(**dict(row))
+
+    def move_asset_to_blob(self, asset_id: str, path: str, content_hash: str, size: int) -> None:
+        """Point an asset stored outside the blob store at blob `path` (migration)."""
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "UPDATE assets SET filename = ?, content_hash = ? WHERE id = ?;", (path, content_hash, asset_id)
+                )
+                self._add_blob_refs(content_hash, path, size, utc_now_iso())
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def set_asset_content_hash(self, asset_id: str, content_hash: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE assets SET content_hash = ? WHERE id = ?;", (content_hash, asset_id))
             self._conn.commit()
 
-    def list_assets(self, limit: int = 200) -> List[AssetRow]:
+    def list_assets(self, limit: int = 200, *, favorites_only: bool = False) -> List[AssetRow]:
+        # `favorite = 1` must appear literally for the partial favorites index to apply.
+        where = "WHERE favorite = 1 " if favorites_only else ""
         with self._lock:
             rows = self._conn.execute(
-                "SELECT * FROM assets ORDER BY created_at DESC LIMIT ?;",
+                f"SELECT * FROM assets {where}ORDER BY created_at DESC LIMIT ?;",
                 (limit,),
             ).fetchall()
         return [AssetRow(**dict(r)) for r in rows]
 
+    def list_assets_page(
+        self,
+        *,
+        limit: int = 200,
+        before: Optional[PageKey] = None,
+        after: Optional[PageKey] = None,
+        favorites_only: bool = False,
+        engine: Optional[str] = None,
+        workflow_id: Optional[str] = None,
+        job_status: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        summary: bool = False,
+    ) -> List[AssetRow]:
+        """Newest-first page of assets.
+
+        With `summary=True` recipe_json/meta_json are not read and come back empty.
+        """
+        where: List[str] = []
+        args: List[Any] = []
+        if favorites_only:
+            where.append("favorite = 1")
+        if engine is not None:
+            where.append("engine = ?")
+            args.append(engine)
+        if workflow_id is not None:
+            where.append(f"{_ASSET_WORKFLOW_EXPR} = ?")
+            args.append(workflow_id)
+        if job_status is not None:
+            where.append("EXISTS (SELECT 1 FROM jobs WHERE jobs.id = assets.job_id AND jobs.status = ?)")
+            args.append(job_status)
+        if content_hash is not None:
+            where.append("content_hash = ?")
+            args.append(content_hash)
+        columns = _ASSET_SUMMARY_COLUMNS if summary else "*"
+        rows = self._keyset_page("assets", columns, where, args, limit=limit, before=before, after=after)
+        return [AssetRow(**dict(r)) for r in rows]
+
     def list_assets_by_job(self, job_id: str) -> List[AssetRow]:
         with self._lock:
             rows = self._conn.execute(
@@ -252,6 +783,117 @@ class Database:
             row = self._conn.execute("SELECT * FROM assets WHERE id = ?;", (asset_id,)).fetchone()
         return AssetRow(**dict(row)) if row else None
 
+    def list_assets_outside_prefix(self, prefix: str, limit: int, after_id: str = "") -> List[AssetRow]:
+        """Assets whose filename does not start with `prefix`, by id (for migrations)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM assets WHERE substr(filename, 1, ?) != ? AND id > ? ORDER BY id LIMIT ?;",
+                (len(prefix), prefix, after_id, limit),
+            ).fetchall()
+        return [AssetRow(**dict(r)) for r in rows]
+
+    def list_retention_candidates(self, created_before: str, limit: int, after: Optional[PageKey] = None) -> List[AssetRow]:
+        """Oldest first: assets created before `created_before` not yet reduced to a thumbnail."""
+        where = "tier != 'thumbnail' AND created_at < ?"
+        args: List[Any] = [created_before]
+        if after is not None:
+            where += " AND (created_at, id) > (?, ?)"
+            args.extend(after)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM assets WHERE {where} ORDER BY created_at, id LIMIT ?;", (*args, limit)
+            ).fetchall()
+        return [AssetRow(**dict(r)) for r in rows]
+
+    def retier_assets(
+        self,
+        metas: Dict[str, Dict[str, Any]],
+        *,
+        old_path: str,
+        new_path: str,
+        content_hash: str,
+        size: int,
+        tier: str,
+    ) -> int:
+        """Point assets (asset_id -> new meta) at the blob `new_path` in `tier`.
+
+        Only assets still stored at `old_path` are updated; blob references move
+        with them in the same transaction. recipe_json is never touched. Returns
+        the number of assets updated.
+        """
+        with self._lock:
+            try:
+                updated = 0
+                old_hash: Optional[str] = None
+                for asset_id, meta in metas.items():
+                    row = self._conn.execute(
+                        "SELECT content_hash FROM assets WHERE id = ? AND filename = ?;", (asset_id, old_path)
+                    ).fetchone()
+                    if not row:
+                        continue
+                    old_hash = row[0]
+                    self._conn.execute(
+                        "UPDATE assets SET filename = ?, content_hash = ?, tier = ?, meta_json = ? WHERE id = ?;",
+                        (new_path, content_hash, tier, json.dumps(meta), asset_id),
+                    )
+                    updated += 1
+                if updated:
+                    if old_hash:
+                        self._conn.execute(
+                            "UPDATE blobs SET refcount = refcount - ? WHERE content_hash = ? AND path = ?;",
+                            (updated, old_hash, old_path),
+                        )
+                    self._add_blob_refs(content_hash, new_path, size, utc_now_iso(), updated)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return updated
+
+    # ---- Blobs ----
+
+    def get_blob(self, content_hash: str) -> Optional[BlobRow]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM blobs WHERE content_hash = ?;", (content_hash,)).fetchone()
+        return BlobRow(**dict(row)) if row else None
+
+    def list_unreferenced_blobs(self, limit: int = 1000, after: str = "") -> List[BlobRow]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM blobs WHERE refcount <= 0 AND content_hash > ? ORDER BY content_hash LIMIT ?;",
+                (after, limit),
+            ).fetchall()
+        return [BlobRow(**dict(r)) for r in rows]
+
+    def blob_paths(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT path FROM blobs;")}
+
+    def delete_blob(self, content_hash: str) -> bool:
+        """Delete a blob row if it is (still) unreferenced."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM blobs WHERE content_hash = ? AND refcount <= 0;", (content_hash,))
+            self._conn.commit()
+            return cur.rowcount > 0
+
+    def recount_blob_refs(self, *, apply: bool = True) -> int:
+        """Recompute refcounts from the assets table; returns how many were wrong."""
+        actual = "(SELECT COUNT(*) FROM assets WHERE assets.content_hash = blobs.content_hash AND assets.filename = blobs.path)"
+        with self._lock:
+            wrong = int(self._conn.execute(f"SELECT COUNT(*) FROM blobs WHERE refcount != {actual};").fetchone()[0])
+            if apply and wrong:
+                self._conn.execute(f"UPDATE blobs SET refcount = {actual} WHERE refcount != {actual};")
+                self._conn.commit()
+        return wrong
+
+    def blob_stats(self) -> Dict[str, int]:
+        """Blob count, bytes on disk, and bytes the referencing assets would take undeduplicated."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(size * MAX(refcount, 0)), 0) FROM blobs;"
+            ).fetchone()
+        return {"blobs": int(row[0]), "stored_bytes": int(row[1]), "referenced_bytes": int(row[2])}
+
     def toggle_favorite(self, asset_id: str) -> Optional[AssetRow]:
         with self._lock:
             row = self._conn.execute("SELECT favorite FROM assets WHERE id = ?;", (asset_id,)).fetchone()
@@ -298,3 +940,213 @@ class Database:
         with self._lock:
             self._conn.execute("DELETE FROM grok_messages;")
             self._conn.commit()
+
+
+class AsyncDatabase:
+    """Awaitable facade over Database that never blocks the event loop.
+
+    - Writes are funneled through one dedicated writer thread. Its executor queue
+      acts as the command queue, so writes stay serialized and ordered.
+    - Reads run on a small pool of threads, each with its own read-only
+      connection. WAL mode lets them run alongside the writer.
+
+    Method names and arguments mirror Database; each one is awaitable.
+    """
+
+    def __init__(self, db: Database, *, readers: int = 4) -> None:
+        self.sync = db
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=max(1, readers), thread_name_prefix="db-reader")
+        self._local = threading.local()
+        self._reader_conns: List[Database] = []
+        self._reader_lock = threading.Lock()
+
+    def _reader(self) -> Database:
+        conn = getattr(self._local, "db", None)
+        if conn is None:
+            conn = Database(self.sync.path, read_only=True)
+            self._local.db = conn
+            with self._reader_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    async def _write(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(fn, *args, **kwargs))
+
+    async def _read(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        def call() -> Any:
+            return getattr(self._reader(), name)(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, call)
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._reader_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+
+    # ---- Jobs ----
+
+    async def create_job(
+        self,
+        *,
+        job_id: str,
+        engine: str,
+        status: str,
+        prompt: str,
+        negative_prompt: str,
+        params: Dict[str, Any],
+        prompt_id: Optional[str] = None,
+        priority: str = "interactive",
+        client_id: str = "",
+    ) -> JobRow:
+        return await self._write(
+            self.sync.create_job,
+            job_id=job_id,
+            engine=engine,
+            status=status,
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            params=params,
+            prompt_id=prompt_id,
+            priority=priority,
+            client_id=client_id,
+        )
+
+    async def create_jobs(self, jobs: List[Dict[str, Any]]) -> List[JobRow]:
+        return await self._write(self.sync.create_jobs, jobs)
+
+    async def update_job(
+        self,
+        job_id: str,
+        *,
+        status: Optional[str] = None,
+        prompt_id: Optional[str] = None,
+        progress_value: Optional[float] = None,
+        progress_max: Optional[float] = None,
+        error: Optional[str] = None,
+        harvested: Optional[int] = None,
+        quality: Optional[Dict[str, Any]] = None,
+        durable: bool = False,
+    ) -> Optional[JobRow]:
+        return await self._write(
+            self.sync.update_job,
+            job_id,
+            status=status,
+            prompt_id=prompt_id,
+            progress_value=progress_value,
+            progress_max=progress_max,
+            error=error,
+            harvested=harvested,
+            quality=quality,
+            durable=durable,
+        )
+
+    async def update_jobs_progress(self, updates: List[Tuple[str, float, float]]) -> None:
+        await self._write(self.sync.update_jobs_progress, updates)
+
+    async def get_job(self, job_id: str) -> Optional[JobRow]:
+        return await self._read("get_job", job_id)
+
+    async def get_job_by_prompt_id(self, prompt_id: str) -> Optional[JobRow]:
+        return await self._read("get_job_by_prompt_id", prompt_id)
+
+    async def list_waiting_jobs(self, limit: int) -> List[WaitingJob]:
+        return await self._read("list_waiting_jobs", limit)
+
+    async def workflow_run_times(self, recent: int = 20) -> Dict[str, float]:
+        return await self._read("workflow_run_times", recent)
+
+    async def count_waiting_jobs(self) -> int:
+        return await self._read("count_waiting_jobs")
+
+    async def list_unsettled_jobs(self, limit: int, after: Optional[PageKey] = None) -> List[JobRow]:
+        return await self._read("list_unsettled_jobs", limit, after)
+
+    async def list_jobs(self, limit: int = 200) -> List[JobRow]:
+        return await self._read("list_jobs", limit=limit)
+
+    async def list_jobs_page(self, **kwargs: Any) -> List[JobRow]:
+        """Keyword arguments as for Database.list_jobs_page."""
+        return await self._read("list_jobs_page", **kwargs)
+
+    # ---- Assets ----
+
+    async def create_asset(
+        self,
+        *,
+        asset_id: str,
+        job_id: str,
+        engine: str,
+        filename: str,
+        recipe: Dict[str, Any],
+        meta: Dict[str, Any],
+        content_hash: Optional[str] = None,
+        blob_size: Optional[int] = None,
+    ) -> None:
+        await self._write(
+            self.sync.create_asset,
+            asset_id=asset_id,
+            job_id=job_id,
+            engine=engine,
+            filename=filename,
+            recipe=recipe,
+            meta=meta,
+            content_hash=content_hash,
+            blob_size=blob_size,
+        )
+
+    async def delete_asset(self, asset_id: str) -> Optional[AssetRow]:
+        return await self._write(self.sync.delete_asset, asset_id)
+
+    async def set_asset_content_hash(self, asset_id: str, content_hash: str) -> None:
+        await self._write(self.sync.set_asset_content_hash, asset_id, content_hash)
+
+    async def list_assets(self, limit: int = 200, *, favorites_only: bool = False) -> List[AssetRow]:
+        return await self._read("list_assets", limit=limit, favorites_only=favorites_only)
+
+    async def list_assets_page(self, **kwargs: Any) -> List[AssetRow]:
+        """Keyword arguments as for Database.list_assets_page."""
+        return await self._read("list_assets_page", **kwargs)
+
+    async def list_assets_by_job(self, job_id: str) -> List[AssetRow]:
+        return await self._read("list_assets_by_job", job_id)
+
+    async def get_asset(self, asset_id: str) -> Optional[AssetRow]:
+        return await self._read("get_asset", asset_id)
+
+    async def blob_stats(self) -> Dict[str, int]:
+        return await self._read("blob_stats")
+
+    async def list_retention_candidates(
+        self, created_before: str, limit: int, after: Optional[PageKey] = None
+    ) -> List[AssetRow]:
+        return await self._read("list_retention_candidates", created_before, limit, after)
+
+    async def retier_assets(self, metas: Dict[str, Dict[str, Any]], **kwargs: Any) -> int:
+        """Keyword arguments as for Database.retier_assets."""
+        return await self._write(self.sync.retier_assets, metas, **kwargs)
+
+    async def get_blob(self, content_hash: str) -> Optional[BlobRow]:
+        return await self._read("get_blob", content_hash)
+
+    async def delete_blob(self, content_hash: str) -> bool:
+        return await self._write(self.sync.delete_blob, content_hash)
+
+    async def toggle_favorite(self, asset_id: str) -> Optional[AssetRow]:
+        return await self._write(self.sync.toggle_favorite, asset_id)
+
+    # ---- Grok messages ----
+
+    async def create_grok_message(self, *, role: str, content: str) -> GrokMessageRow:
+        return await self._write(self.sync.create_grok_message, role=role, content=content)
+
+    async def list_grok_messages(self, limit: Optional[int] = None) -> List[GrokMessageRow]:
+        return await self._read("list_grok_messages", limit=limit)
+
+    async def clear_grok_messages(self) -> None:
+        await self._write(self.sync.clear_grok_messages)
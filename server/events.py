@@ -27,13 +27,13 @@ def normalize_ws_prefs(payload: Dict[str, Any] | None, current: Dict[str, bool])
 def event_allowed(event_type: str | None, prefs: Dict[str, bool]) -> bool:
     if not event_type:
         return True
-    if event_type in ("job_update", "job_created", "jobs_snapshot"):
+    if event_type in ("job_update", "job_created", "jobs_created", "jobs_snapshot"):
         return prefs.get("jobs", True)
     if event_type == "job_progress":
         return prefs.get("job_progress", True)
     if event_type in ("asset_created", "asset_updated", "assets_snapshot"):
         return prefs.get("assets", True)
-    if event_type in ("comfy_connected", "comfy_disconnected"):
+    if event_type in ("comfy_connected", "comfy_disconnected", "comfy_health"):
         return prefs.get("system", True)
     return True
 
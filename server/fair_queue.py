@@ -0,0 +1,156 @@
+"""Submission order policy: priority classes, then weighted fair queuing by client."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .db import WaitingJob
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is served first; a class only gets slots when all higher ones are empty.
+PRIORITY_CLASSES: Dict[str, int] = {"interactive": 0, "batch": 1, "background": 2}
+DEFAULT_PRIORITY = "interactive"
+
+
+class CostModel:
+    """Expected run time per workflow, learned from recently completed jobs.
+
+    `load()` returns mean seconds per workflow_id (see Database.workflow_run_times)
+    and is re-run in the background once the figures are older than
+    `refresh_sec`; cost() never waits for it. Workflows without history cost
+    the median of the known ones (or `default_sec` if nothing is known yet).
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[Dict[str, float]]],
+        *,
+        default_sec: float = 30.0,
+        refresh_sec: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._load = load
+        self.default_sec = default_sec
+        self.refresh_sec = refresh_sec
+        self._clock = clock
+        self._costs: Dict[str, float] = {}
+        self._fallback = default_sec
+        self._loaded_at = float("-inf")
+        self._task: Optional[asyncio.Task] = None
+
+    def cost(self, workflow_id: str) -> float:
+        self._maybe_refresh()
+        return self._costs.get(workflow_id, self._fallback)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {wf: round(sec, 2) for wf, sec in sorted(self._costs.items())}
+
+    async def refresh(self) -> None:
+        try:
+            costs = await self._load()
+        except Exception as e:
+            logger.warning(f"Loading workflow run times failed: {e}")
+            return
+        finally:
+            self._loaded_at = self._clock()
+        self.set_costs(costs)
+
+    def set_costs(self, costs: Dict[str, float]) -> None:
+        self._costs = {wf: max(0.1, float(sec)) for wf, sec in costs.items()}
+        known = sorted(self._costs.values())
+        self._fallback = known[len(known) // 2] if known else self.default_sec
+
+    def _maybe_refresh(self) -> None:
+        if self._clock() - self._loaded_at < self.refresh_sec:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._loaded_at = self._clock()  # at most one refresh per period
+            self._task = loop.create_task(self.refresh())
+
+
+class FairQueue:
+    """Chooses which waiting jobs to submit next.
+
+    Priority classes are strict: interactive before batch before background.
+    Within a class, clients share ComfyUI by start-time fair queuing: a job's
+    start tag is max(virtual time, its client's previous finish tag), its finish
+    tag adds cost / weight, the job with the smallest finish tag goes first and
+    virtual time advances to the start tag of the job sent. A client's start
+    tag is kept while it has jobs waiting and dropped once it goes idle, so a
+    backlogged client is not pushed back and an idle one banks no credit. Cost is the
+    workflow's expected run time, so a client submitting long video jobs gets
+    fewer turns than one submitting quick images. Each client's own jobs keep
+    their arrival order.
+    """
+
+    def __init__(
+        self,
+        cost: Callable[[str], float],
+        *,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self._cost = cost
+        self.weights = dict(weights or {})
+        self._virtual: Dict[str, float] = defaultdict(float)
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        # Start tag of the next job of each backlogged (priority, client) flow
+        self._head_start: Dict[Tuple[str, str], float] = {}
+        self.dispatched: Dict[str, int] = defaultdict(int)
+
+    def select(self, jobs: Iterable[WaitingJob], n: int) -> List[WaitingJob]:
+        """Pick up to n jobs in submission order and charge their clients."""
+        by_class: Dict[int, Dict[str, List[WaitingJob]]] = defaultdict(lambda: defaultdict(list))
+        backlogged = set()
+        for job in sorted(jobs, key=lambda j: (j.created_at, j.id)):
+            rank = PRIORITY_CLASSES.get(job.priority, PRIORITY_CLASSES[DEFAULT_PRIORITY])
+            by_class[rank][job.client_id].append(job)
+            backlogged.add((job.priority, job.client_id))
+        for key in list(self._head_start):
+            if key not in backlogged:
+                del self._head_start[key]
+
+        chosen: List[WaitingJob] = []
+        for rank in sorted(by_class):
+            flows = {client: list(reversed(queue)) for client, queue in by_class[rank].items()}
+            while flows and len(chosen) < n:
+                client, (start, finish) = min(
+                    ((c, self._tags(q[-1])) for c, q in flows.items()),
+                    key=lambda item: item[1][1],
+                )
+                job = flows[client].pop()
+                if not flows[client]:
+                    del flows[client]
+                key = (job.priority, job.client_id)
+                self._last_finish[key] = finish
+                self._head_start[key] = finish
+                self._virtual[job.priority] = max(self._virtual[job.priority], start)
+                self.dispatched[job.client_id or "-"] += 1
+                chosen.append(job)
+            if len(chosen) >= n:
+                break
+        return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "weights": dict(self.weights),
+            "dispatched": dict(self.dispatched),
+        }
+
+    def _weight(self, client_id: str) -> float:
+        return max(0.01, float(self.weights.get(client_id, 1.0)))
+
+    def _tags(self, job: WaitingJob) -> Tuple[float, float]:
+        key = (job.priority, job.client_id)
+        start = self._head_start.get(key)
+        if start is None:
+            start = max(self._virtual[job.priority], self._last_finish.get(key, 0.0))
+            self._head_start[key] = start
+        return start, start + self._cost(job.workflow_id) / self._weight(job.client_id)
@@ -2,8 +2,11 @@
 Fake implementation of CockpitApiClient for testing.
 
 Does not make any HTTP requests. Returns predefined responses.
+AsyncFakeCockpitApiClient is the async counterpart, for code paths that take
+an async client.
 """
 
+import asyncio
 from typing import Any, Dict, List
 
 
@@ -131,3 +134,57 @@ class FakeCockpitApiClient:
         if job_id in self.jobs_db:
             self.jobs_db[job_id]["status"] = "failed"
             self.jobs_db[job_id]["error"] = error
+
+
+class AsyncFakeCockpitApiClient(FakeCockpitApiClient):
+    """Async variant of FakeCockpitApiClient (same data, awaitable methods).
+
+    `latency_sec` delays every call so tests can observe concurrency;
+    `max_in_flight` records the most calls that were running at once.
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8787", latency_sec: float = 0.0):
+        super().__init__(base_url)
+        self.latency_sec = latency_sec
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+
+    async def _call(self, method, *args):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Run the sync implementation first so job numbering follows call order
+            result = method(*args)
+            if self.latency_sec:
+                await asyncio.sleep(self.latency_sec)
+            return result
+        finally:
+            self.in_flight -= 1
+
+    async def get_health(self) -> Dict[str, Any]:
+        """Mock GET /api/health."""
+        return await self._call(super().get_health)
+
+    async def list_workflows(self) -> List[Dict[str, Any]]:
+        """Mock GET /api/workflows."""
+        return await self._call(super().list_workflows)
+
+    async def get_workflow(self, workflow_id: str) -> Dict[str, Any]:
+        """Mock GET /api/workflows/{workflow_id}."""
+        return await self._call(super().get_workflow, workflow_id)
+
+    async def create_job(
+        self,
+        workflow_id: str,
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Mock POST /api/jobs."""
+        return await self._call(super().create_job, workflow_id, params)
+
+    async def get_job(self, job_id: str) -> Dict[str, Any]:
+        """Mock GET /api/jobs/{job_id}."""
+        return await self._call(super().get_job, job_id)
+
+    async def aclose(self) -> None:
+        self.closed = True
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 
 class FakeComfyClient:
@@ -30,6 +30,16 @@ class FakeComfyClient:
         self.samplers = ["euler", "euler_ancestral", "dpm_2"]
         self.schedulers = ["normal", "karras", "simple"]
         self.vaes = ["test-vae.safetensors"]
+        self.images_per_prompt = 1
+        # Prompts reported by get_queue() as running / pending
+        self.queue_running: List[Any] = []
+        self.queue_pending: List[Any] = []
+        # History entries by prompt_id overriding the default "completed" entry;
+        # None means ComfyUI has no record of the prompt
+        self.history_overrides: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.history_calls = 0
+        # /view bodies by filename (default: a 1x1 PNG)
+        self.view_files: Dict[str, bytes] = {}
 
     def ws_url(self, client_id: str) -> str:
         return f"ws://fake-comfy:8188/ws?clientId={client_id}"
@@ -59,33 +69,62 @@ class FakeComfyClient:
 
         return {"prompt_id": prompt_id, "number": len(self.submitted_prompts)}
 
+    async def get_queue(self) -> Dict[str, Any]:
+        """Return the configured queue_running / queue_pending lists."""
+        if not self.is_reachable:
+            raise RuntimeError("Connection refused")
+        return {"queue_running": list(self.queue_running), "queue_pending": list(self.queue_pending)}
+
     async def get_history(self, prompt_id: str) -> Dict[str, Any]:
         """Return fake history for a prompt."""
         if not self.is_reachable:
             raise RuntimeError("Connection refused")
+        self.history_calls += 1
+        entry = self._history_entry(prompt_id)
+        return {prompt_id: entry} if entry is not None else {}
 
-        # Return a completed execution with one output image
-        return {
-            prompt_id: {
-                "status": {"completed": True},
-                "outputs": {
-                    "7": {
-                        "images": [
-                            {
-                                "filename": f"fake_output_{prompt_id[:8]}.png",
-                                "subfolder": "",
-                                "type": "output",
-                            }
-                        ]
-                    }
-                },
+    async def get_recent_history(self, max_items: int) -> Dict[str, Any]:
+        """History of submitted prompts that are no longer queued, newest first."""
+        if not self.is_reachable:
+            raise RuntimeError("Connection refused")
+        self.history_calls += 1
+        queued = {str(item[1]) for item in self.queue_running + self.queue_pending if isinstance(item, (list, tuple))}
+        history: Dict[str, Any] = {}
+        for submitted in reversed(self.submitted_prompts):
+            prompt_id = submitted["prompt_id"]
+            entry = None if prompt_id in queued else self._history_entry(prompt_id)
+            if entry is not None and len(history) < max_items:
+                history[prompt_id] = entry
+        return history
+
+    def _history_entry(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        if prompt_id in self.history_overrides:
+            return self.history_overrides[prompt_id]
+
+        # A completed execution with `images_per_prompt` output images
+        images = [
+            {
+                "filename": f"fake_output_{prompt_id[:8]}.png" if i == 0 else f"fake_output_{prompt_id[:8]}_{i}.png",
+                "subfolder": "",
+                "type": "output",
             }
+            for i in range(self.images_per_prompt)
+        ]
+        return {
+            "status": {"completed": True},
+            "outputs": {
+                "7": {
+                    "images": images
+                }
+            },
         }
 
     async def get_view_image(self, *, filename: str, subfolder: str, folder_type: str) -> bytes:
         """Return fake image bytes."""
         if not self.is_reachable:
             raise RuntimeError("Connection refused")
+        if filename in self.view_files:
+            return self.view_files[filename]
 
         # Return a minimal valid PNG (1x1 transparent pixel)
         # PNG signature + IHDR + IDAT + IEND
@@ -96,6 +135,19 @@ class FakeComfyClient:
             b'\x00\x00\x00\x00IEND\xaeB`\x82'
         )
 
+    async def iter_view(
+        self,
+        *,
+        filename: str,
+        subfolder: str,
+        folder_type: str,
+        chunk_size: int = 16,
+    ) -> AsyncIterator[bytes]:
+        """Yield the fake image bytes in small chunks (exercises streaming writes)."""
+        data = await self.get_view_image(filename=filename, subfolder=subfolder, folder_type=folder_type)
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+
     async def get_models_in_folder(self, folder: str) -> List[str]:
         """Return fake model list based on folder type."""
         if not self.is_reachable:
@@ -193,3 +245,8 @@ class FakeComfyClient:
         self.error_mode = None
         self.submitted_prompts = []
         self.last_prompt_id = None
+        self.queue_running = []
+        self.queue_pending = []
+        self.history_overrides = {}
+        self.history_calls = 0
+        self.view_files = {}
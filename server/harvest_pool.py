@@ -0,0 +1,133 @@
+"""Background harvest workers: download finished jobs' outputs off the websocket loop."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IncompleteHarvestError(Exception):
+    """Raised by a harvest when some outputs failed; the others were kept."""
+
+    pass
+
+
+class HarvestPool:
+    """Runs harvests as background tasks, at most `concurrency` at a time.
+
+    submit() returns immediately, so the caller (the ComfyUI event dispatcher,
+    the reconciler) never waits for downloads. A job that is already queued or
+    being harvested is not queued again. A harvest that raises is retried after
+    `backoff_sec` (doubling each time) up to `max_attempts` attempts in total;
+    after that `give_up` is awaited with the last error. Retries fetch the
+    history again instead of reusing the entry passed to submit().
+
+    Callbacks:
+        harvest(job_id, history_item) -> None: harvest one job, raising on
+            failures worth retrying
+        give_up(job_id, error) -> None: optional, the job's last attempt failed
+    """
+
+    def __init__(
+        self,
+        harvest: Callable[[str, Optional[Dict[str, Any]]], Awaitable[None]],
+        *,
+        give_up: Optional[Callable[[str, Exception], Awaitable[None]]] = None,
+        concurrency: int = 2,
+        max_attempts: int = 3,
+        backoff_sec: float = 1.0,
+    ) -> None:
+        self._harvest = harvest
+        self._give_up = give_up
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_sec = backoff_sec
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.active = 0
+        self.harvested = 0
+        self.retries = 0
+        self.failed = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def submit(self, job_id: str, history_item: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue a harvest (call from the event loop). False if already queued."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Tasks from another (finished) loop will never run again
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._pending = {}
+            self.active = 0
+        if job_id in self._pending:
+            return False
+        task = loop.create_task(self._run(job_id, history_item))
+        self._pending[job_id] = task
+        task.add_done_callback(lambda _: self._pending.pop(job_id, None))
+        return True
+
+    async def join(self) -> None:
+        """Wait until every queued harvest has finished (or given up)."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending.values()), return_exceptions=True)
+
+    async def close(self) -> None:
+        """Cancel queued and running harvests; their jobs stay unharvested for the reconciler."""
+        tasks = list(self._pending.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "queued": len(self._pending) - self.active,
+            "active": self.active,
+            "harvested": self.harvested,
+            "retries": self.retries,
+            "failed": self.failed,
+            "avg_ms": round(self.total_ms / self.harvested, 2) if self.harvested else None,
+            "max_ms": round(self.max_ms, 2),
+        }
+
+    async def _run(self, job_id: str, history_item: Optional[Dict[str, Any]]) -> None:
+        assert self._semaphore is not None
+        attempt = 1
+        while True:
+            async with self._semaphore:
+                self.active += 1
+                start = time.perf_counter()
+                try:
+                    await self._harvest(job_id, history_item)
+                except Exception as e:
+                    error: Optional[Exception] = e
+                else:
+                    error = None
+                    elapsed_ms = (time.perf_counter() - start) * 1000.0
+                    self.harvested += 1
+                    self.total_ms += elapsed_ms
+                    self.max_ms = max(self.max_ms, elapsed_ms)
+                finally:
+                    self.active -= 1
+            if error is None:
+                return
+            if attempt >= self.max_attempts:
+                self.failed += 1
+                logger.error(f"Harvest of job {job_id} failed after {attempt} attempts: {error}")
+                if self._give_up is not None:
+                    try:
+                        await self._give_up(job_id, error)
+                    except Exception as e:
+                        logger.warning(f"Giving up on harvest of job {job_id} failed: {e}")
+                return
+            self.retries += 1
+            logger.warning(f"Harvest of job {job_id} failed (attempt {attempt}), retrying: {error}")
+            await asyncio.sleep(self.backoff_sec * (2 ** (attempt - 1)))
+            attempt += 1
+            history_item = None
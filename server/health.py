@@ -0,0 +1,162 @@
+"""Background ComfyUI health prober: one upstream probe per interval, shared by all callers."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# A snapshot older than this many intervals is refreshed on demand (prober not running).
+STALE_INTERVALS = 3
+
+
+def _memory_summary(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """RAM/VRAM figures (bytes) from a /system_stats response."""
+    system = stats.get("system") or {}
+    devices = stats.get("devices") or []
+    device = devices[0] if devices and isinstance(devices[0], dict) else {}
+    return {
+        "ram_total": system.get("ram_total"),
+        "ram_free": system.get("ram_free"),
+        "vram_total": device.get("vram_total"),
+        "vram_free": device.get("vram_free"),
+        "device": device.get("name"),
+    }
+
+
+def _queue_summary(queue: Dict[str, Any]) -> Dict[str, int]:
+    return {
+        "running": len(queue.get("queue_running") or []),
+        "pending": len(queue.get("queue_pending") or []),
+    }
+
+
+class HealthProber:
+    """Samples ComfyUI's /system_stats and /queue and keeps the latest result.
+
+    `run()` probes every `interval` seconds and broadcasts a `comfy_health` event
+    whenever the state (ok / error_code) changes. `snapshot()` answers from memory;
+    it only probes itself when no recent result exists (e.g. before startup or if
+    the loop is not running), and concurrent callers share that probe.
+    """
+
+    def __init__(
+        self,
+        client: Callable[[], httpx.AsyncClient],
+        comfy_url: str,
+        *,
+        interval: float = 5.0,
+        history_size: int = 60,
+        timeout: float = 5.0,
+    ) -> None:
+        self._client = client
+        self.comfy_url = comfy_url.rstrip("/")
+        self.interval = interval
+        self.timeout = timeout
+        self._latest: Optional[Dict[str, Any]] = None
+        self._latest_at = 0.0
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._inflight: Optional["asyncio.Future[Dict[str, Any]]"] = None
+
+    async def snapshot(self, *, include_history: bool = True) -> Dict[str, Any]:
+        """The latest probe result (probing now if none is recent)."""
+        if self._latest is None or time.monotonic() - self._latest_at > self.interval * STALE_INTERVALS:
+            await self._probe_shared()
+        result = dict(self._latest or {})
+        if include_history:
+            result["history"] = list(self._history)
+        return result
+
+    async def run(self, broadcast: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> None:
+        """Background loop: probe every `interval`, broadcast state changes."""
+        previous: Optional[tuple] = None
+        while True:
+            try:
+                result = await self._probe_shared()
+                state = (result["ok"], result["error_code"])
+                if broadcast is not None and state != previous:
+                    await broadcast({"type": "comfy_health", "payload": result})
+                previous = state
+            except Exception as e:
+                logger.warning(f"Health probe failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _probe_shared(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        fut = self._inflight
+        if fut is None or fut.done() or fut.get_loop() is not loop:
+            fut = asyncio.ensure_future(self.probe())
+            self._inflight = fut
+        return await asyncio.shield(fut)
+
+    async def probe(self) -> Dict[str, Any]:
+        """Query ComfyUI once and record the result.
+
+        Returns error codes:
+        - COMFY_UNREACHABLE: Cannot connect to ComfyUI server
+        - COMFY_ERROR: ComfyUI returned an error
+        - None: Everything is OK
+        """
+        result: Dict[str, Any] = {
+            "ok": False,
+            "comfy_url": self.comfy_url,
+            "error_code": None,
+            "error_message": None,
+            "checked_at": time.time(),
+            "latency_ms": None,
+            "queue": None,
+            "memory": None,
+        }
+        client = self._client()
+        start = time.perf_counter()
+        try:
+            r = await client.get(f"{self.comfy_url}/system_stats", timeout=self.timeout)
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000.0, 2)
+            if r.status_code == 200:
+                stats = r.json()
+                result["ok"] = True
+                result["comfy_stats"] = stats
+                result["memory"] = _memory_summary(stats)
+            else:
+                result["error_code"] = "COMFY_ERROR"
+                result["error_message"] = f"ComfyUI returned status {r.status_code}"
+        except httpx.ConnectError:
+            result["error_code"] = "COMFY_UNREACHABLE"
+            result["error_message"] = "Cannot connect to ComfyUI server"
+        except httpx.TimeoutException:
+            result["error_code"] = "COMFY_UNREACHABLE"
+            result["error_message"] = "Connection to ComfyUI timed out"
+        except Exception as e:
+            result["error_code"] = "COMFY_ERROR"
+            result["error_message"] = str(e)
+
+        if result["ok"]:
+            try:
+                r = await client.get(f"{self.comfy_url}/queue", timeout=self.timeout)
+                if r.status_code == 200:
+                    result["queue"] = _queue_summary(r.json())
+            except Exception:
+                pass  # queue depth is best-effort
+
+        self._record(result)
+        return result
+
+    def _record(self, result: Dict[str, Any]) -> None:
+        memory = result["memory"] or {}
+        queue = result["queue"] or {}
+        self._history.append({
+            "checked_at": result["checked_at"],
+            "ok": result["ok"],
+            "latency_ms": result["latency_ms"],
+            "vram_free": memory.get("vram_free"),
+            "ram_free": memory.get("ram_free"),
+            "queue_running": queue.get("running"),
+            "queue_pending": queue.get("pending"),
+        })
+        self._latest = result
+        self._latest_at = time.monotonic()
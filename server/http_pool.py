@@ -0,0 +1,152 @@
+"""Shared outbound HTTP: one pooled httpx client per upstream, with latency metrics."""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per upstream for percentiles.
+LATENCY_WINDOW = 512
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class UpstreamConfig:
+    """Connection settings for one upstream service."""
+
+    timeout: float = 60.0
+    connect_timeout: float = 10.0
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+
+
+@dataclass
+class UpstreamMetrics:
+    """Request counts and time-to-response-headers for one upstream."""
+
+    requests: int = 0
+    errors: int = 0  # transport errors and 5xx responses
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    _samples: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, elapsed_ms: float, status: Optional[int]) -> None:
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self._samples.append(elapsed_ms)
+        bucket = f"{status // 100}xx" if status is not None else "error"
+        self.status_counts[bucket] = self.status_counts.get(bucket, 0) + 1
+        if status is None or status >= 500:
+            self.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+
+        def pct(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "status": dict(self.status_counts),
+            "avg_ms": round(self.total_ms / self.requests, 2) if self.requests else None,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """Times each request until response headers arrive (streamed bodies excluded)."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, metrics: UpstreamMetrics) -> None:
+        self._inner = inner
+        self._metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        status: Optional[int] = None
+        try:
+            response = await self._inner.handle_async_request(request)
+            status = response.status_code
+            return response
+        finally:
+            self._metrics.record((time.perf_counter() - start) * 1000.0, status)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class HttpPool:
+    """Pooled, keep-alive httpx clients keyed by upstream name ("comfy", "xai", ...).
+
+    Each upstream gets one AsyncClient with its own limits and timeouts, created on
+    first use, so repeated calls reuse TCP/TLS connections. HTTP/2 is negotiated
+    when the optional `h2` package is installed (`pip install httpx[http2]`),
+    otherwise HTTP/1.1 keep-alive is used. Clients are bound to the event loop
+    they were created on; a call from another loop gets a fresh client.
+    """
+
+    def __init__(self, upstreams: Optional[Dict[str, UpstreamConfig]] = None) -> None:
+        self._configs: Dict[str, UpstreamConfig] = dict(upstreams or {})
+        self._clients: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._metrics: Dict[str, UpstreamMetrics] = {}
+        self._warned_http2 = False
+
+    def configure(self, name: str, config: UpstreamConfig) -> None:
+        """Set the config for an upstream (takes effect for clients created afterwards)."""
+        self._configs[name] = config
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """The shared client for an upstream (must be called from the event loop)."""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(name)
+        if entry is not None and entry[0] is loop and not entry[1].is_closed:
+            return entry[1]
+        client = self._create(name)
+        self._clients[name] = (loop, client)
+        return client
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {name: m.to_dict() for name, m in sorted(self._metrics.items())}
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        config = self._configs.get(name) or UpstreamConfig()
+        http2 = config.http2 and HTTP2_AVAILABLE
+        if config.http2 and not HTTP2_AVAILABLE and not self._warned_http2:
+            logger.info("h2 is not installed; outbound HTTP uses HTTP/1.1 keep-alive")
+            self._warned_http2 = True
+
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        metrics = self._metrics.setdefault(name, UpstreamMetrics())
+        transport = _MeteredTransport(httpx.AsyncHTTPTransport(http2=http2, limits=limits), metrics)
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        )
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        loop = asyncio.get_running_loop()
+        for client_loop, client in clients.values():
+            if client_loop is loop:
+                await client.aclose()
@@ -2,16 +2,138 @@
 from __future__ import annotations
 
 import io
-import math
-from typing import Optional
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
 
+import numpy as np
 from PIL import Image
 
 
+# JPEGs are decoded at a reduced scale (Image.draft) but not below this size; other
+# formats decode in full.
+ANALYSIS_SIZE = 512
+# Number of pixels sampled for brightness/variance/color statistics.
+SAMPLE_SIZE = 10000
+# Rows copied out of the decoded image per step while sampling.
+SAMPLE_BAND_ROWS = 64
+
+
+@dataclass
+class ImageQualityStats:
+    """Statistics computed by check_image_quality over the sampled pixels."""
+
+    width: int
+    height: int
+    decoded_width: int
+    decoded_height: int
+    sampled_pixels: int
+    mean_brightness: float
+    stddev: float
+    unique_colors: int
+    dominant_color: Tuple[int, int, int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 class ImageQualityError(Exception):
     """Raised when image fails quality checks."""
 
-    pass
+    def __init__(self, message: str, stats: Optional[ImageQualityStats] = None) -> None:
+        super().__init__(message)
+        self.stats = stats
+
+
+def _sample_rgb(img: Image.Image) -> np.ndarray:
+    """Return an (N, 3) uint8 array of evenly strided pixels, composited like the checks expect.
+
+    Pixels are gathered band by band from the decoded image, so at most
+    SAMPLE_BAND_ROWS rows are copied out of Pillow at a time. Mode conversions
+    are per-pixel and are applied to the sample only.
+    """
+    if img.mode not in ("RGB", "RGBA", "L"):
+        img = img.convert("RGB")
+    channels = len(img.getbands())
+    width, height = img.size
+
+    num_pixels = width * height
+    step = max(1, num_pixels // min(num_pixels, SAMPLE_SIZE))
+    index = np.arange(0, num_pixels, step)
+    rows, cols = np.divmod(index, width)
+
+    sample = np.empty((len(index), channels), dtype=np.uint8)
+    for top in range(0, height, SAMPLE_BAND_ROWS):
+        bottom = min(height, top + SAMPLE_BAND_ROWS)
+        lo, hi = np.searchsorted(rows, (top, bottom))
+        if lo == hi:
+            continue
+        band = np.frombuffer(img.crop((0, top, width, bottom)).tobytes(), dtype=np.uint8)
+        band = band.reshape(bottom - top, width, channels)
+        sample[lo:hi] = band[rows[lo:hi] - top, cols[lo:hi]]
+
+    if img.mode == "RGBA":
+        # Composite onto white, using Pillow on the sample so rounding matches paste()
+        rgba = Image.fromarray(sample.reshape(1, -1, 4), "RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[3])
+        return np.asarray(background).reshape(-1, 3)
+    if img.mode == "L":
+        return np.repeat(sample, 3, axis=1)
+    return sample
+
+
+def _unpack_rgb(packed: int) -> Tuple[int, int, int]:
+    return ((packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF)
+
+
+def compute_image_stats(image_data: bytes) -> ImageQualityStats:
+    """Decode an image and compute brightness/variance/color statistics.
+
+    Args:
+        image_data: Raw image bytes (PNG, JPEG, etc.)
+
+    Returns:
+        ImageQualityStats for the sampled pixels
+
+    Raises:
+        ImageQualityError: If the image has no pixels
+    """
+    return _compute(image_data)[0]
+
+
+def _compute(image_data: bytes) -> Tuple[ImageQualityStats, np.ndarray]:
+    """Return the stats plus the distinct sampled colors (packed 0xRRGGBB)."""
+    img = Image.open(io.BytesIO(image_data))
+    width, height = img.size
+    if img.format == "JPEG":
+        # DCT scaling: decode at 1/2, 1/4 or 1/8 size, never below ANALYSIS_SIZE
+        img.draft("RGB", (ANALYSIS_SIZE, ANALYSIS_SIZE))
+
+    if img.width * img.height == 0:
+        raise ImageQualityError("Image has no pixels")
+
+    sample = _sample_rgb(img)
+    brightness = sample.sum(axis=1, dtype=np.uint32) / (3 * 255)  # Normalize to 0-1
+    mean = float(brightness.mean())
+    stddev = float(brightness.std()) if len(brightness) > 1 else 0.0
+
+    packed = (
+        (sample[:, 0].astype(np.uint32) << 16) | (sample[:, 1].astype(np.uint32) << 8) | sample[:, 2]
+    )
+    colors, counts = np.unique(packed, return_counts=True)
+    top = int(colors[int(np.argmax(counts))])
+
+    return ImageQualityStats(
+        width=width,
+        height=height,
+        decoded_width=img.width,
+        decoded_height=img.height,
+        sampled_pixels=int(len(brightness)),
+        mean_brightness=mean,
+        stddev=stddev,
+        unique_colors=int(len(colors)),
+        dominant_color=_unpack_rgb(top),
+    ), colors
 
 
 def check_image_quality(
@@ -21,7 +143,7 @@ def check_image_quality(
     stddev_min: float = 0.0,
     min_bytes: int = 0,
     skip_checks: bool = False,
-) -> None:
+) -> Optional[ImageQualityStats]:
     """Check if an image passes quality checks.
 
     Detects:
@@ -39,11 +161,16 @@ def check_image_quality(
         min_bytes: Minimum file size in bytes. 0 = disabled.
         skip_checks: If True, skip all checks
 
+    Returns:
+        The computed ImageQualityStats (None if checks were skipped or the
+        file failed the size check before decoding)
+
     Raises:
-        ImageQualityError: If image fails quality checks
+        ImageQualityError: If image fails quality checks (`stats` is attached
+        when the image was decoded)
     """
     if skip_checks:
-        return
+        return None
 
     # Check minimum file size first
     if min_bytes > 0 and len(image_data) < min_bytes:
@@ -51,100 +178,40 @@ def check_image_quality(
             f"Image file too small: {len(image_data)} bytes (minimum: {min_bytes})"
         )
 
-    # Load image
-    img = Image.open(io.BytesIO(image_data))
-
-    # Convert to RGB if necessary
-    if img.mode == "RGBA":
-        # Create white background and composite
-        background = Image.new("RGB", img.size, (255, 255, 255))
-        background.paste(img, mask=img.split()[3])  # Use alpha channel as mask
-        img = background
-    elif img.mode == "L":
-        # Grayscale - convert to RGB
-        img = img.convert("RGB")
-    elif img.mode != "RGB":
-        img = img.convert("RGB")
-
-    # Get pixel data
-    pixels = list(img.getdata())
-    num_pixels = len(pixels)
-
-    if num_pixels == 0:
-        raise ImageQualityError("Image has no pixels")
-
-    # Calculate statistics
-    total_brightness = 0
-    brightness_values = []
-    color_set = set()
-    sample_size = min(num_pixels, 10000)  # Sample for large images
-    step = max(1, num_pixels // sample_size)
-
-    for i in range(0, num_pixels, step):
-        r, g, b = pixels[i]
-        brightness = (r + g + b) / (3 * 255)  # Normalize to 0-1
-        total_brightness += brightness
-        brightness_values.append(brightness)
-        color_set.add((r, g, b))
-
-    sampled_count = len(brightness_values)
-    avg_brightness = total_brightness / sampled_count
-
-    # Calculate standard deviation of brightness
-    if sampled_count > 1:
-        variance = sum((b - avg_brightness) ** 2 for b in brightness_values) / sampled_count
-        stddev = math.sqrt(variance)
-    else:
-        stddev = 0.0
-
-    # Check for single color FIRST (more specific error)
-    # But only if it's not black or white (those have their own checks)
-    is_black_ish = avg_brightness < black_threshold
-    is_white_ish = avg_brightness > white_threshold
+    stats, colors = _compute(image_data)
+    avg_brightness = stats.mean_brightness
 
     # Check for pure black
-    if is_black_ish:
+    if avg_brightness < black_threshold:
         raise ImageQualityError(
-            f"Image appears to be black (brightness: {avg_brightness:.4f})"
+            f"Image appears to be black (brightness: {avg_brightness:.4f})", stats
         )
 
     # Check for pure white
-    if is_white_ish:
+    if avg_brightness > white_threshold:
         raise ImageQualityError(
-            f"Image appears to be white (brightness: {avg_brightness:.4f})"
+            f"Image appears to be white (brightness: {avg_brightness:.4f})", stats
         )
 
     # Check for single color (non-black, non-white)
     # Allow some tolerance for compression artifacts
-    if len(color_set) <= 3:
-        # Get the dominant color
-        if len(color_set) == 1:
-            dominant = list(color_set)[0]
+    if stats.unique_colors <= 3:
+        dominant = stats.dominant_color
+        # Check if colors are very similar (likely single color with noise)
+        others = [_unpack_rgb(int(c)) for c in colors]
+        if all(sum(abs(a - b) for a, b in zip(dominant, c)) <= 15 for c in others):
             raise ImageQualityError(
-                f"Image is a single color: RGB({dominant[0]}, {dominant[1]}, {dominant[2]})"
+                f"Image is a single color: RGB({dominant[0]}, {dominant[1]}, {dominant[2]})", stats
             )
-        else:
-            # Check if colors are very similar (likely single color with noise)
-            colors = list(color_set)
-            all_similar = True
-            for c in colors[1:]:
-                diff = sum(abs(a - b) for a, b in zip(colors[0], c))
-                if diff > 15:  # Allow small differences
-                    all_similar = False
-                    break
-
-            if all_similar:
-                dominant = colors[0]
-                raise ImageQualityError(
-                    f"Image is a single color: RGB({dominant[0]}, {dominant[1]}, {dominant[2]})"
-                )
 
     # Check for low variance (after single-color check to provide more specific error)
-    if stddev_min > 0 and stddev < stddev_min:
+    if stddev_min > 0 and stats.stddev < stddev_min:
         raise ImageQualityError(
-            f"Image has low variance (stddev: {stddev:.4f}, minimum: {stddev_min:.4f})"
+            f"Image has low variance (stddev: {stats.stddev:.4f}, minimum: {stddev_min:.4f})", stats
         )
 
+    return stats
+
 
 def get_image_info(image_data: bytes) -> dict:
     """Get basic information about an image.
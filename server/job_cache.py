@@ -0,0 +1,151 @@
+"""In-process, write-through cache of job state keyed by job id and prompt_id."""
+from __future__ import annotations
+
+import dataclasses
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .db import AsyncDatabase, JobRow
+
+PayloadBuilder = Callable[[JobRow, Dict[str, Any]], Dict[str, Any]]
+
+
+@dataclass
+class _Entry:
+    row: JobRow
+    params: Dict[str, Any]
+    payload: Optional[Dict[str, Any]] = None
+
+
+class JobCache:
+    """Write-through cache in front of the jobs table.
+
+    Every job write goes through this cache, so after the first load a job (or
+    one of our prompt_ids) can be resolved without touching SQLite. params_json
+    is parsed once per row, and the serialized JobOut payload is memoized until
+    the row changes.
+
+    Unknown prompt_ids (prompts queued by other ComfyUI clients) are remembered
+    in a bounded negative cache. Assigning a prompt_id through update() clears it.
+    """
+
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        to_payload: PayloadBuilder,
+        *,
+        capacity: int = 2000,
+        negative_capacity: int = 1024,
+    ) -> None:
+        self._db = db
+        self._to_payload = to_payload
+        self._capacity = max(1, capacity)
+        self._negative_capacity = max(0, negative_capacity)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_prompt: Dict[str, str] = {}
+        self._unknown_prompts: "OrderedDict[str, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---- internal ----
+
+    def _store(self, row: JobRow) -> _Entry:
+        entry = self._entries.get(row.id)
+        if entry is not None and entry.row.params_json == row.params_json:
+            entry.row = row
+            entry.payload = None
+        else:
+            params = json.loads(row.params_json) if row.params_json else {}
+            entry = _Entry(row=row, params=params)
+            self._entries[row.id] = entry
+        self._entries.move_to_end(row.id)
+
+        if row.prompt_id:
+            self._by_prompt[row.prompt_id] = row.id
+            self._unknown_prompts.pop(row.prompt_id, None)
+
+        while len(self._entries) > self._capacity:
+            _, evicted = self._entries.popitem(last=False)
+            if evicted.row.prompt_id:
+                self._by_prompt.pop(evicted.row.prompt_id, None)
+        return entry
+
+    async def _entry(self, job_id: str) -> Optional[_Entry]:
+        entry = self._entries.get(job_id)
+        if entry is not None:
+            self._entries.move_to_end(job_id)
+            return entry
+        row = await self._db.get_job(job_id)
+        return self._store(row) if row else None
+
+    # ---- reads ----
+
+    async def get(self, job_id: str) -> Optional[JobRow]:
+        entry = await self._entry(job_id)
+        return entry.row if entry else None
+
+    async def get_by_prompt_id(self, prompt_id: str) -> Optional[JobRow]:
+        job_id = self._by_prompt.get(prompt_id)
+        if job_id is not None:
+            entry = await self._entry(job_id)
+            if entry is not None and entry.row.prompt_id == prompt_id:
+                return entry.row
+        if prompt_id in self._unknown_prompts:
+            return None
+
+        row = await self._db.get_job_by_prompt_id(prompt_id)
+        if row is None:
+            if self._negative_capacity:
+                self._unknown_prompts[prompt_id] = None
+                while len(self._unknown_prompts) > self._negative_capacity:
+                    self._unknown_prompts.popitem(last=False)
+            return None
+        return self._store(row).row
+
+    async def params(self, job_id: str) -> Dict[str, Any]:
+        entry = await self._entry(job_id)
+        return entry.params if entry else {}
+
+    async def payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Serialized JobOut for a job, built from memory and memoized per row version."""
+        entry = await self._entry(job_id)
+        if entry is None:
+            return None
+        if entry.payload is None:
+            entry.payload = self._to_payload(entry.row, entry.params)
+        return entry.payload
+
+    # ---- writes (write-through) ----
+
+    async def create(self, **kwargs: Any) -> JobRow:
+        row = await self._db.create_job(**kwargs)
+        return self._store(row).row
+
+    async def create_many(self, jobs: List[Dict[str, Any]]) -> List[JobRow]:
+        """Insert many jobs in one transaction (see Database.create_jobs)."""
+        rows = await self._db.create_jobs(jobs)
+        return [self._store(row).row for row in rows]
+
+    async def update(self, job_id: str, **fields: Any) -> Optional[JobRow]:
+        try:
+            row = await self._db.update_job(job_id, **fields)
+        except BaseException:
+            # The write may still land (e.g. cancelled while the writer thread runs);
+            # drop the entry so the next access reloads the stored state.
+            self._entries.pop(job_id, None)
+            raise
+        if row is None:
+            self._entries.pop(job_id, None)
+            return None
+        return self._store(row).row
+
+    def set_progress(self, job_id: str, value: float, maxv: float) -> None:
+        """Apply progress in memory only; ProgressTracker persists it in batches."""
+        entry = self._entries.get(job_id)
+        if entry is None:
+            return
+        entry.row = dataclasses.replace(entry.row, progress_value=value, progress_max=maxv)
+        entry.payload = None
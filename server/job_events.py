@@ -0,0 +1,140 @@
+"""
+Job event stream for MCP tools: wakes waiters when the Cockpit server pushes job events.
+
+Subscribes to the server's /api/ws WebSocket (job_update and asset_created
+events only) and records which job IDs changed. Waiters re-fetch just those
+jobs instead of polling every unfinished job on a fixed interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Collection, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Subscription sent after connecting (see server/events.py for the pref keys).
+SUBSCRIBE_PREFS = {"jobs": True, "assets": True, "job_progress": False, "system": False}
+
+RECONNECT_MIN_SEC = 0.5
+RECONNECT_MAX_SEC = 10.0
+
+
+def _ws_url(base_url: str) -> str:
+    base = base_url.rstrip("/")
+    if base.startswith("https://"):
+        return "wss://" + base[len("https://"):] + "/api/ws"
+    if base.startswith("http://"):
+        return "ws://" + base[len("http://"):] + "/api/ws"
+    return "ws://" + base + "/api/ws"
+
+
+def _default_connect(url: str) -> Any:
+    import websockets
+
+    return websockets.connect(url, ping_interval=20, ping_timeout=20)
+
+
+def job_id_of(message: Any) -> Optional[str]:
+    """The job a server event refers to, or None for unrelated events."""
+    if not isinstance(message, dict):
+        return None
+    payload = message.get("payload")
+    if not isinstance(payload, dict):
+        return None
+    if message.get("type") == "job_update":
+        return payload.get("id")
+    if message.get("type") == "asset_created":
+        return payload.get("job_id")
+    return None
+
+
+class JobEventStream:
+    """Background subscription to job events, used as `async with JobEventStream(url) as events`.
+
+    The connection is retried with backoff. After every (re)connect all watched
+    jobs are reported as changed once, since events may have been missed while
+    disconnected.
+    """
+
+    def __init__(self, base_url: str, *, connect: Optional[Callable[[str], Any]] = None) -> None:
+        self.url = _ws_url(base_url)
+        self._connect = connect or _default_connect
+        self._changed: Set[str] = set()
+        self._resync = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+
+    async def __aenter__(self) -> "JobEventStream":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        self.connected = False
+
+    async def wait(self, job_ids: Collection[str], timeout: float) -> Set[str]:
+        """Wait up to `timeout` seconds for events about `job_ids`.
+
+        Returns:
+            The subset of job_ids with events since the last call (all of them
+            after a reconnect), or an empty set on timeout
+        """
+        watched = set(job_ids)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            if self._resync:
+                self._resync = False
+                self._changed.clear()
+                return watched
+            hits = self._changed & watched
+            self._changed.clear()  # events for other jobs are not interesting to this waiter
+            if hits:
+                return hits
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return set()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                return set()
+
+    def _notify(self, job_id: str) -> None:
+        self._changed.add(job_id)
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN_SEC
+        while True:
+            try:
+                async with self._connect(self.url) as ws:
+                    await ws.send(json.dumps({"type": "prefs", "payload": SUBSCRIBE_PREFS}))
+                    self.connected = True
+                    delay = RECONNECT_MIN_SEC
+                    self._resync = True
+                    self._wakeup.set()
+                    async for raw in ws:
+                        try:
+                            job_id = job_id_of(json.loads(raw))
+                        except (TypeError, ValueError):
+                            continue
+                        if job_id:
+                            self._notify(str(job_id))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Job event stream disconnected ({self.url}): {e}")
+            self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(RECONNECT_MAX_SEC, delay * 2)
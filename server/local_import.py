@@ -0,0 +1,172 @@
+"""Local import of ComfyUI outputs when the cockpit shares ComfyUI's filesystem."""
+from __future__ import annotations
+
+import asyncio
+import errno
+import logging
+import os
+import shutil
+import stat
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .storage import ensure_dir
+from .thumbnails import file_sha256
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# off:  outputs are always downloaded over HTTP (/view)
+# link: hardlink (or reflink, or copy) the file from ComfyUI's output directory;
+#       ComfyUI keeps its file
+# move: like link, then ComfyUI's file is removed once the asset is registered
+LOCAL_IMPORT_MODES = ("off", "link", "move")
+
+# ioctl(dest_fd, FICLONE, src_fd): copy-on-write clone (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+
+@dataclass
+class LocalImport:
+    source_path: str
+    method: str  # hardlink, reflink or copy
+    size: int
+    content_hash: str
+
+
+def _reflink(src_path: str, dest_path: str) -> None:
+    if fcntl is None or not hasattr(fcntl, "ioctl"):
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+
+
+def _place(src_path: str, tmp_path: str) -> str:
+    """Put src_path's content at tmp_path as cheaply as the filesystem allows."""
+    try:
+        os.link(src_path, tmp_path)
+        return "hardlink"
+    except OSError as e:
+        logger.debug(f"Hardlink of {src_path} failed: {e}")
+    try:
+        _reflink(src_path, tmp_path)
+        return "reflink"
+    except OSError as e:
+        logger.debug(f"Reflink of {src_path} failed: {e}")
+    shutil.copyfile(src_path, tmp_path)
+    return "copy"
+
+
+def import_file(src_path: str, dest_path: str) -> LocalImport:
+    """Import src_path as dest_path (hardlink, else reflink, else copy) and hash it.
+
+    The file appears at dest_path atomically. The source must be a regular file
+    whose size and mtime do not change during the import, and the imported file
+    must have the source's size; otherwise the import is undone and ValueError
+    is raised (ComfyUI may still be writing it).
+    """
+    before = os.stat(src_path)
+    if not stat.S_ISREG(before.st_mode):
+        raise ValueError(f"not a regular file: {src_path}")
+    directory = os.path.dirname(dest_path)
+    ensure_dir(directory)
+    tmp_path = os.path.join(directory, f".{os.path.basename(dest_path)}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        method = _place(src_path, tmp_path)
+        size = os.path.getsize(tmp_path)
+        content_hash = file_sha256(tmp_path)
+        after = os.stat(src_path)
+        if size != before.st_size or (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+            raise ValueError(f"{src_path} changed during import")
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return LocalImport(source_path=src_path, method=method, size=size, content_hash=content_hash)
+
+
+class LocalImporter:
+    """Imports outputs straight from ComfyUI's output directory instead of /view.
+
+    With ComfyUI on the same machine, downloading an output over HTTP writes a
+    second copy of it. A hardlink (same filesystem) or reflink (copy-on-write
+    filesystems) instead shares the data, and either is instant even for
+    multi-GB videos; a plain local copy is the last resort. The imported file
+    is hashed for the asset's content_hash and checked against the source (see
+    import_file). Only "output" files inside `output_dir` are imported; for
+    anything else, or if the import fails, import_output() returns None and the
+    caller downloads the file over HTTP.
+
+    In "move" mode, release() removes ComfyUI's file after the asset has been
+    registered, so a failed harvest can still be retried.
+    """
+
+    def __init__(self, output_dir: str = "", *, mode: str = "off") -> None:
+        if mode not in LOCAL_IMPORT_MODES:
+            raise ValueError(f"Unsupported local import mode: {mode} (expected one of {list(LOCAL_IMPORT_MODES)})")
+        self.output_dir = os.path.realpath(output_dir) if output_dir else ""
+        self.mode = mode
+        self.counts: Dict[str, int] = {"hardlink": 0, "reflink": 0, "copy": 0}
+        self.fallbacks = 0
+        self.released = 0
+        self.bytes_imported = 0
+        self.bytes_shared = 0  # imported without a second copy on disk
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off" and bool(self.output_dir)
+
+    def source_path(self, filename: str, subfolder: str = "", folder_type: str = "output") -> Optional[str]:
+        """Path of an output in ComfyUI's output directory, or None if not importable."""
+        if not self.enabled or folder_type != "output" or not filename:
+            return None
+        path = os.path.realpath(os.path.join(self.output_dir, subfolder or "", filename))
+        if os.path.commonpath([path, self.output_dir]) != self.output_dir:
+            return None  # subfolder/filename escapes the output directory
+        return path
+
+    async def import_output(
+        self, filename: str, subfolder: str, folder_type: str, dest_path: str
+    ) -> Optional[LocalImport]:
+        src_path = self.source_path(filename, subfolder, folder_type)
+        if src_path is None:
+            return None
+        try:
+            imported = await asyncio.to_thread(import_file, src_path, dest_path)
+        except (OSError, ValueError) as e:
+            self.fallbacks += 1
+            logger.info(f"Local import of {filename} failed, downloading instead: {e}")
+            return None
+        self.counts[imported.method] += 1
+        self.bytes_imported += imported.size
+        if imported.method != "copy":
+            self.bytes_shared += imported.size
+        return imported
+
+    def release(self, imported: LocalImport) -> None:
+        """Remove ComfyUI's copy of an imported output (move mode only)."""
+        if self.mode != "move":
+            return
+        try:
+            os.remove(imported.source_path)
+            self.released += 1
+        except OSError as e:
+            logger.warning(f"Could not remove {imported.source_path} after import: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode if self.enabled else "off",
+            **self.counts,
+            "fallbacks": self.fallbacks,
+            "released": self.released,
+            "bytes_imported": self.bytes_imported,
+            "bytes_shared": self.bytes_shared,
+        }
@@ -9,24 +9,39 @@ import sys
 import uuid
 import logging
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Literal, Optional, Set, Tuple, Union
 
 import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, WebSocket, UploadFile, File
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, UploadFile, File
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, model_validator
 
 from .comfy_client import ComfyClient
+from .comfy_events import ComfyEventQueue, LoopLagMonitor
 from .comfy_workflow import build_txt2img_workflow
-from .db import Database
+from .db import AsyncDatabase, Database, PageKey, WaitingJob
 from .events import WebSocketManager
-from .model_scanner import scan_checkpoints, scan_vaes
+from .fair_queue import CostModel, FairQueue
+from .harvest_pool import HarvestPool, IncompleteHarvestError
+from .health import HealthProber
+from .http_pool import HTTP2_AVAILABLE, HttpPool, UpstreamConfig
+from .model_scanner import ModelIndex
+from .job_cache import JobCache
+from .blob_store import BlobStore, StagedBlob
+from .local_import import LocalImporter
+from .media import collect_output_files, media_kind, media_type
+from .progress import ProgressTracker, progress_payload
+from .quality_gate import QualityGate, QualityReport, quality_params_for
+from .reconciler import Reconciler
+from .retention import RetentionEngine, parse_policies
+from .submission_queue import SubmissionScheduler
 from .storage import ensure_dir, new_asset_filename, write_bytes
+from .thumbnails import DEFAULT_THUMB_SIZE, THUMB_SIZES, ThumbnailCache, file_sha256
 from .workflow_registry import WorkflowRegistry, WorkflowNotFoundError
-from .workflow_patcher import apply_patch, PatchError
+from .workflow_patcher import PatchError
 
 
 load_dotenv()
@@ -49,6 +64,53 @@ class Settings:
     checkpoints_dir: str
     vae_dir: str
     comfy_input_dir: str
+    # ComfyUI's output directory, if reachable from here ("" = not shared), and
+    # how outputs are imported from it: off (always /view), link or move
+    comfy_output_dir: str = ""
+    local_import: str = "off"
+    # Max concurrent /view downloads per harvested prompt
+    harvest_concurrency: int = 4
+    # Jobs harvested at the same time, and attempts per job before leaving it
+    # to the reconciler
+    harvest_workers: int = 2
+    harvest_max_attempts: int = 3
+    # Progress persistence: batch flush period and per-job job_progress broadcast rate
+    progress_flush_interval_sec: float = 1.0
+    progress_broadcast_hz: float = 4.0
+    thumb_cache_max_mb: int = 1024
+    thumb_workers: int = 2
+    thumb_format: str = "webp"
+    quality_gate_mode: str = "flag"
+    quality_workers: int = 2
+    # Poll period for workflow directory changes (0 disables hot reload)
+    workflow_poll_sec: float = 2.0
+    # Model directory index: full rescan period, and whether to keep partial file hashes
+    model_index_ttl_sec: float = 300.0
+    model_index_hash: bool = False
+    # Outbound HTTP pool (per upstream: ComfyUI, xAI)
+    http_max_connections: int = 20
+    http_max_keepalive: int = 10
+    http2: bool = True
+    comfy_timeout_sec: float = 60.0
+    xai_timeout_sec: float = 120.0
+    # Background ComfyUI health probing
+    health_probe_interval_sec: float = 5.0
+    health_history_size: int = 60
+    # Job submission: concurrent POST /prompt requests, and the ComfyUI queue
+    # length (running + pending) to keep topped up (0 = no limit)
+    submit_concurrency: int = 4
+    comfy_target_queue_depth: int = 2
+    # Fair-share weights per client id (default 1.0); a weight-2 client gets
+    # twice the ComfyUI time of a weight-1 client in the same priority class
+    client_weights: Dict[str, float] = field(default_factory=dict)
+    # Recent ComfyUI history entries read per reconciliation pass
+    reconcile_history_items: int = 500
+    # Asset retention: policies (see retention.parse_policies; empty keeps
+    # everything), pass period, and rate limits of the background engine
+    retention_policies: Any = None
+    retention_interval_sec: float = 3600.0
+    retention_assets_per_sec: float = 2.0
+    retention_mb_per_sec: float = 20.0
 
 
 def get_settings() -> Settings:
@@ -100,13 +162,99 @@ def get_settings() -> Settings:
             os.getenv("COMFY_INPUT_DIR",
                       r"C:\Users\souto\Desktop\ComfyUI_windows_portable\ComfyUI\input")
         ),
+        comfy_output_dir=str(config.get("comfy_output_dir") or os.getenv("COMFY_OUTPUT_DIR", "")),
+        local_import=str(config.get("local_import") or os.getenv("LOCAL_IMPORT", "off")).lower(),
+        harvest_concurrency=int(config.get("harvest_concurrency") or os.getenv("HARVEST_CONCURRENCY", "4")),
+        harvest_workers=int(config.get("harvest_workers") or os.getenv("HARVEST_WORKERS", "2")),
+        harvest_max_attempts=int(config.get("harvest_max_attempts") or os.getenv("HARVEST_MAX_ATTEMPTS", "3")),
+        progress_flush_interval_sec=float(
+            config.get("progress_flush_interval_sec") or os.getenv("PROGRESS_FLUSH_INTERVAL_SEC", "1.0")
+        ),
+        progress_broadcast_hz=float(
+            config.get("progress_broadcast_hz") if config.get("progress_broadcast_hz") is not None
+            else os.getenv("PROGRESS_BROADCAST_HZ", "4.0")
+        ),
+        thumb_cache_max_mb=int(config.get("thumb_cache_max_mb") or os.getenv("THUMB_CACHE_MAX_MB", "1024")),
+        thumb_workers=int(
+            config.get("thumb_workers") if config.get("thumb_workers") is not None
+            else os.getenv("THUMB_WORKERS", "2")
+        ),
+        thumb_format=str(config.get("thumb_format") or os.getenv("THUMB_FORMAT", "webp")).lower(),
+        quality_gate_mode=str(config.get("quality_gate_mode") or os.getenv("QUALITY_GATE_MODE", "flag")).lower(),
+        quality_workers=int(
+            config.get("quality_workers") if config.get("quality_workers") is not None
+            else os.getenv("QUALITY_WORKERS", "2")
+        ),
+        workflow_poll_sec=float(
+            config.get("workflow_poll_sec") if config.get("workflow_poll_sec") is not None
+            else os.getenv("WORKFLOW_POLL_SEC", "2.0")
+        ),
+        model_index_ttl_sec=float(
+            config.get("model_index_ttl_sec") or os.getenv("MODEL_INDEX_TTL_SEC", "300")
+        ),
+        model_index_hash=str(
+            config.get("model_index_hash") if config.get("model_index_hash") is not None
+            else os.getenv("MODEL_INDEX_HASH", "false")
+        ).lower() in ("1", "true", "yes"),
+        http_max_connections=int(config.get("http_max_connections") or os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+        http_max_keepalive=int(
+            config.get("http_max_keepalive") if config.get("http_max_keepalive") is not None
+            else os.getenv("HTTP_MAX_KEEPALIVE", "10")
+        ),
+        http2=str(
+            config.get("http2") if config.get("http2") is not None else os.getenv("HTTP2", "true")
+        ).lower() in ("1", "true", "yes"),
+        comfy_timeout_sec=float(config.get("comfy_timeout_sec") or os.getenv("COMFY_TIMEOUT_SEC", "60")),
+        xai_timeout_sec=float(config.get("xai_timeout_sec") or os.getenv("XAI_TIMEOUT_SEC", "120")),
+        health_probe_interval_sec=float(
+            config.get("health_probe_interval_sec") or os.getenv("HEALTH_PROBE_INTERVAL_SEC", "5")
+        ),
+        health_history_size=int(config.get("health_history_size") or os.getenv("HEALTH_HISTORY_SIZE", "60")),
+        submit_concurrency=int(config.get("submit_concurrency") or os.getenv("SUBMIT_CONCURRENCY", "4")),
+        comfy_target_queue_depth=int(
+            config.get("comfy_target_queue_depth") if config.get("comfy_target_queue_depth") is not None
+            else os.getenv("COMFY_TARGET_QUEUE_DEPTH", "2")
+        ),
+        reconcile_history_items=int(
+            config.get("reconcile_history_items") or os.getenv("RECONCILE_HISTORY_ITEMS", "500")
+        ),
+        client_weights=_parse_client_weights(config.get("client_weights") or os.getenv("CLIENT_WEIGHTS", "")),
+        retention_policies=config.get("retention_policies") or os.getenv("RETENTION_POLICIES", ""),
+        retention_interval_sec=float(
+            config.get("retention_interval_sec") or os.getenv("RETENTION_INTERVAL_SEC", "3600")
+        ),
+        retention_assets_per_sec=float(
+            config.get("retention_assets_per_sec") if config.get("retention_assets_per_sec") is not None
+            else os.getenv("RETENTION_ASSETS_PER_SEC", "2")
+        ),
+        retention_mb_per_sec=float(
+            config.get("retention_mb_per_sec") if config.get("retention_mb_per_sec") is not None
+            else os.getenv("RETENTION_MB_PER_SEC", "20")
+        ),
     )
 
 
+def _parse_client_weights(value: Any) -> Dict[str, float]:
+    """Client weights from a config dict or a "client=weight,..." string."""
+    if isinstance(value, dict):
+        items = list(value.items())
+    else:
+        items = [part.split("=", 1) for part in str(value).split(",") if "=" in part]
+    weights: Dict[str, float] = {}
+    for client_id, weight in items:
+        try:
+            weights[str(client_id).strip()] = float(weight)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid client weight: {client_id}={weight}")
+    return weights
+
+
 settings = get_settings()
 
 DATA_DIR = os.path.abspath(settings.data_dir)
 ASSETS_DIR = os.path.join(DATA_DIR, "assets")
+THUMBS_DIR = os.path.join(DATA_DIR, "thumbs")
+QUARANTINE_DIR = os.path.join(DATA_DIR, "quarantine")
 DB_PATH = os.path.join(DATA_DIR, "cockpit.sqlite3")
 WEB_DIR = os.path.join(os.path.dirname(__file__), "..", "web")
 WEB_DIR = os.path.abspath(WEB_DIR)
@@ -118,9 +266,59 @@ ensure_dir(ASSETS_DIR)
 
 
 db = Database(DB_PATH)
+# Async handlers must use `adb`; `db` stays available for sync callers (scripts, tests).
+adb = AsyncDatabase(db)
+progress_tracker = ProgressTracker(
+    adb,
+    flush_interval=settings.progress_flush_interval_sec,
+    broadcast_hz=settings.progress_broadcast_hz,
+)
+thumbnails = ThumbnailCache(
+    THUMBS_DIR,
+    max_bytes=settings.thumb_cache_max_mb * 1024 * 1024,
+    workers=settings.thumb_workers,
+    fmt=settings.thumb_format,
+)
+# Thumbnail renders queued by harvests (the loop only keeps weak references to tasks)
+thumbnail_tasks: Set["asyncio.Task[None]"] = set()
+quality_gate = QualityGate(mode=settings.quality_gate_mode, workers=settings.quality_workers)
+local_importer = LocalImporter(settings.comfy_output_dir, mode=settings.local_import)
+blob_store = BlobStore(ASSETS_DIR)
+retention_engine = RetentionEngine(
+    adb,
+    blob_store,
+    parse_policies(settings.retention_policies),
+    thumb_format=settings.thumb_format,
+    interval_sec=settings.retention_interval_sec,
+    assets_per_sec=settings.retention_assets_per_sec,
+    mb_per_sec=settings.retention_mb_per_sec,
+)
 workflow_registry = WorkflowRegistry(Path(WORKFLOWS_DIR))
+model_index = ModelIndex(ttl_sec=settings.model_index_ttl_sec, hash_files=settings.model_index_hash)
 ws_manager = WebSocketManager()
-comfy = ComfyClient(settings.comfy_url)
+
+
+def _upstream(timeout: float) -> UpstreamConfig:
+    return UpstreamConfig(
+        timeout=timeout,
+        max_connections=settings.http_max_connections,
+        max_keepalive=settings.http_max_keepalive,
+        http2=settings.http2,
+    )
+
+
+# All outbound HTTP goes through these pooled clients
+http_pool = HttpPool({
+    "comfy": _upstream(settings.comfy_timeout_sec),
+    "xai": _upstream(settings.xai_timeout_sec),
+})
+comfy = ComfyClient(settings.comfy_url, pool=http_pool)
+health_prober = HealthProber(
+    lambda: http_pool.client("comfy"),
+    settings.comfy_url,
+    interval=settings.health_probe_interval_sec,
+    history_size=settings.health_history_size,
+)
 
 
 def set_comfy_client(client: Any) -> None:
@@ -188,10 +386,18 @@ DEFAULT_NEGATIVE_PROMPT = (
 )
 
 
+Priority = Literal["interactive", "batch", "background"]
+
+
 class JobCreate(BaseModel):
     # Workflow selection (klein is the default)
     workflow_id: str = "flux2_klein_distilled"
 
+    # Scheduling: priority class and fair-share client (defaults: interactive,
+    # the caller's address)
+    priority: Optional[Priority] = None
+    client_id: Optional[str] = Field(None, max_length=128)
+
     # New-style, manifest-driven params
     params: Dict[str, Any] = Field(default_factory=dict)
 
@@ -222,6 +428,36 @@ class JobCreate(BaseModel):
         return self
 
 
+class SeedRange(BaseModel):
+    start: int = Field(..., ge=0)
+    count: int = Field(..., ge=1)
+    step: int = 1
+
+
+class JobBatchCreate(BaseModel):
+    """Many jobs in one request: explicit param sets, or base params x variations."""
+
+    workflow_id: str = "flux2_klein_distilled"
+    # Base params merged into every job
+    params: Dict[str, Any] = Field(default_factory=dict)
+    # Explicit param sets (each overrides `params`; may set its own workflow_id)
+    items: Optional[List[Dict[str, Any]]] = None
+    # Variations: one job per prompt x seed combination
+    prompts: Optional[List[str]] = None
+    seeds: Optional[Union[List[int], SeedRange]] = None
+    # Scheduling (defaults: batch, the caller's address)
+    priority: Optional[Priority] = None
+    client_id: Optional[str] = Field(None, max_length=128)
+
+    @model_validator(mode="after")
+    def _validate_spec(self) -> "JobBatchCreate":
+        if self.items is not None and (self.prompts is not None or self.seeds is not None):
+            raise ValueError("use either items or prompts/seeds, not both")
+        if self.items is None and self.prompts is None and self.seeds is None:
+            raise ValueError("items, prompts or seeds is required")
+        return self
+
+
 class JobOut(BaseModel):
     id: str
     engine: str
@@ -236,16 +472,34 @@ class JobOut(BaseModel):
     progress_max: float
     outputs: List[Dict[str, Any]] = Field(default_factory=list)
     error: Optional[str] = None
+    quality: Optional[Dict[str, Any]] = None
+    priority: str = "interactive"
+    client_id: str = ""
 
 
-class AssetOut(BaseModel):
+class JobBatchOut(BaseModel):
+    jobs: List[JobOut]
+
+
+class AssetGridOut(BaseModel):
+    """Asset fields needed to render a gallery tile (no recipe/meta)."""
+
     id: str
     job_id: str
     engine: str
     filename: str
     url: str
+    thumb_url: str
     created_at: str
     favorite: bool
+    # image, animation, video or audio (grid: from the file extension; full
+    # asset: as recorded at harvest, which also knows animated WebP/PNG)
+    media_kind: str = "image"
+    # Storage tier: original, compressed or thumbnail (see retention.py)
+    tier: str = "original"
+
+
+class AssetOut(AssetGridOut):
     recipe: Dict[str, Any]
     meta: Dict[str, Any]
 
@@ -318,8 +572,13 @@ class UploadImageOut(BaseModel):
     filename: str
 
 
-def jobrow_to_out(row, outputs: Optional[List[Dict[str, Any]]] = None) -> JobOut:
-    params = json.loads(row.params_json) if row.params_json else {}
+def jobrow_to_out(
+    row,
+    outputs: Optional[List[Dict[str, Any]]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> JobOut:
+    if params is None:
+        params = json.loads(row.params_json) if row.params_json else {}
     return JobOut(
         id=row.id,
         engine=row.engine,
@@ -334,6 +593,9 @@ def jobrow_to_out(row, outputs: Optional[List[Dict[str, Any]]] = None) -> JobOut
         progress_max=row.progress_max,
         outputs=outputs or [],
         error=row.error,
+        quality=json.loads(row.quality_json) if row.quality_json else None,
+        priority=row.priority,
+        client_id=row.client_id,
     )
 
 
@@ -346,13 +608,80 @@ def assetrow_to_out(row) -> AssetOut:
         engine=row.engine,
         filename=row.filename,
         url=f"/assets/{row.filename}",
+        thumb_url=f"/thumbs/{row.id}?size={DEFAULT_THUMB_SIZE}",
         created_at=row.created_at,
         favorite=bool(row.favorite),
+        media_kind=(meta.get("media") or {}).get("kind") or media_kind(row.filename),
+        tier=row.tier,
         recipe=recipe,
         meta=meta,
     )
 
 
+def assetrow_to_grid(row) -> AssetGridOut:
+    return AssetGridOut(
+        id=row.id,
+        job_id=row.job_id,
+        engine=row.engine,
+        filename=row.filename,
+        url=f"/assets/{row.filename}",
+        thumb_url=f"/thumbs/{row.id}?size={DEFAULT_THUMB_SIZE}",
+        created_at=row.created_at,
+        favorite=bool(row.favorite),
+        media_kind=media_kind(row.filename),
+        tier=row.tier,
+    )
+
+
+# ------------------------------
+# Keyset pagination
+# ------------------------------
+
+PAGE_LIMIT_MAX = 1000
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> PageKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        if not isinstance(created_at, str) or not isinstance(row_id, str):
+            raise ValueError("cursor fields must be strings")
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    return created_at, row_id
+
+
+def _page_keys(before: Optional[str], after: Optional[str]) -> Tuple[Optional[PageKey], Optional[PageKey]]:
+    if before and after:
+        raise HTTPException(status_code=400, detail="use either 'before' or 'after', not both")
+    return (decode_cursor(before) if before else None), (decode_cursor(after) if after else None)
+
+
+def _finish_page(rows: List[Any], limit: int, after: Optional[PageKey], response: Response) -> List[Any]:
+    """Trim the probe row (queries fetch limit + 1) and set the cursor headers.
+
+    X-Next-Cursor points at older rows and is only set when more exist;
+    X-Prev-Cursor points at newer rows (poll it to pick up new items).
+    """
+    has_more = len(rows) > limit
+    if has_more:
+        # `after` pages are the rows closest to the cursor; the probe is the newest one.
+        rows = rows[1:] if after is not None else rows[:limit]
+    if rows:
+        if has_more or after is not None:
+            response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+        response.headers["X-Prev-Cursor"] = encode_cursor(rows[0].created_at, rows[0].id)
+    return rows
+
+
+job_cache = JobCache(adb, lambda row, params: jobrow_to_out(row, params=params).model_dump())
+
+
 async def refresh_comfy_options() -> None:
     global CACHED_CHECKPOINTS, CACHED_SAMPLERS, CACHED_SCHEDULERS, CACHED_VAES
 
@@ -446,12 +775,12 @@ async def grok_chat(
 
     async with _grok_lock:
         if reset:
-            db.clear_grok_messages()
+            await adb.clear_grok_messages()
 
-        db.create_grok_message(role="user", content=message)
+        await adb.create_grok_message(role="user", content=message)
 
         history_limit = None if send_full_history else GROK_RECENT_LIMIT
-        history_rows = db.list_grok_messages(limit=history_limit)
+        history_rows = await adb.list_grok_messages(limit=history_limit)
 
         messages = [{"role": "system", "content": GROK_SYSTEM_PROMPT}]
         messages.extend([{"role": row.role, "content": row.content} for row in history_rows])
@@ -471,10 +800,9 @@ async def grok_chat(
         url = f"{settings.xai_base_url}/chat/completions"
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                r = await client.post(url, headers=headers, json=payload)
-                r.raise_for_status()
-                data = r.json()
+            r = await http_pool.client("xai").post(url, headers=headers, json=payload)
+            r.raise_for_status()
+            data = r.json()
         except httpx.HTTPStatusError as e:
             # Surface server response (truncate)
             body = ""
@@ -487,7 +815,7 @@ async def grok_chat(
             raise HTTPException(status_code=502, detail=f"xAI request failed: {str(e)}")
 
         reply = _extract_chat_text(data)
-        db.create_grok_message(role="assistant", content=reply)
+        await adb.create_grok_message(role="assistant", content=reply)
         return reply
 
 
@@ -533,18 +861,139 @@ def _normalize_job_params(req: JobCreate) -> Dict[str, Any]:
     return params
 
 
-async def harvest_assets_for_prompt(job_id: str, prompt_id: str) -> List[AssetOut]:
-    """Fetch outputs from /history and download images via /view."""
+async def _harvest_output(
+    job_id: str,
+    prompt_id: str,
+    recipe: Dict[str, Any],
+    node_id: str,
+    file_info: Dict[str, Any],
+    quality_params: Optional[Dict[str, Any]] = None,
+    report: Optional[QualityReport] = None,
+) -> Optional[AssetOut]:
+    """Stream a single output file (any media kind) into the blob store and register it as an asset.
+
+    The file is imported from ComfyUI's output directory when local import is
+    enabled (see LocalImporter), otherwise written chunk by chunk from /view and
+    hashed on the way, so memory use does not depend on its size. Content that
+    is stored already is not stored twice. With `quality_params` still images
+    go through the quality gate first; in quarantine mode a failing file is
+    moved to QUARANTINE_DIR and None is returned.
+    """
+    filename = file_info.get("filename")
+    subfolder = file_info.get("subfolder", "")
+    folder_type = file_info.get("type", "output")
+    kind = file_info.get("kind") or media_kind(str(filename), file_info)
+
+    ext = os.path.splitext(filename)[1] or (".png" if kind == "image" else ".bin")
+    imported = None
+    if local_importer.enabled:
+        staging_path = blob_store.staging_path(ext)
+        imported = await local_importer.import_output(filename, subfolder, folder_type, staging_path)
+    if imported is not None:
+        staged = StagedBlob(staging_path, imported.content_hash, imported.size, ext.lower())
+    else:
+        staged = await blob_store.stage(
+            comfy.iter_view(filename=filename, subfolder=subfolder, folder_type=folder_type), ext
+        )
+
+    quality: Optional[Dict[str, Any]] = None
+    if quality_params is not None and kind == "image":
+        try:
+            quality = await quality_gate.check(staged.path, quality_params)
+        except BaseException:
+            blob_store.discard(staged)
+            raise
+        if not quality["passed"] and quality_gate.quarantine:
+            quarantine_name = new_asset_filename(prefix="comfy", ext=ext)
+            ensure_dir(QUARANTINE_DIR)
+            os.replace(staged.path, os.path.join(QUARANTINE_DIR, quarantine_name))
+            if report is not None:
+                report.record(filename, quality, subfolder=subfolder, quarantined=True, stored_as=quarantine_name)
+            logger.info(f"Quarantined {filename} as {quarantine_name} (job {job_id}): {quality['reason']}")
+            if imported is not None:
+                local_importer.release(imported)
+            return None
+
+    stored_name = blob_store.commit(staged)
+    if quality is not None and report is not None:
+        report.record(filename, quality, subfolder=subfolder, stored_as=stored_name)
+    stored_path = blob_store.path(stored_name)
+    content_hash = staged.content_hash
+
+    asset_id = str(uuid.uuid4())
+    meta = {
+        "prompt_id": prompt_id,
+        "node_id": node_id,
+        "comfy": {
+            "filename": filename,
+            "subfolder": subfolder,
+            "type": folder_type,
+            "import": imported.method if imported is not None else "http",
+        },
+        "media": {"kind": kind, "mime": media_type(stored_name)},
+    }
+    if quality is not None:
+        meta["quality"] = quality
+
+    await adb.create_asset(
+        asset_id=asset_id,
+        job_id=job_id,
+        engine="comfy",
+        filename=stored_name,
+        recipe=recipe,
+        meta=meta,
+        content_hash=content_hash,
+        blob_size=staged.size,
+    )
+    if imported is not None:
+        local_importer.release(imported)
+    if kind != "audio":
+        # Poster frames for videos are extracted by the thumbnail workers
+        task = asyncio.create_task(_pregenerate_thumbnails(stored_path, content_hash))
+        thumbnail_tasks.add(task)
+        task.add_done_callback(thumbnail_tasks.discard)
+
+    row = await adb.get_asset(asset_id)
+    return assetrow_to_out(row) if row else None
+
+
+async def _pregenerate_thumbnails(path: str, content_hash: str) -> None:
+    try:
+        await thumbnails.generate_all(path, content_hash)
+    except Exception as e:
+        # Not fatal: /thumbs renders on demand
+        logger.warning(f"Thumbnail generation failed for {os.path.basename(path)}: {e}")
+
+
+async def harvest_assets_for_prompt(
+    job_id: str,
+    prompt_id: str,
+    on_asset: Optional[Callable[[AssetOut], Awaitable[None]]] = None,
+    history_item: Optional[Dict[str, Any]] = None,
+) -> List[AssetOut]:
+    """Fetch outputs from /history and stream them via /view.
+
+    Downloads run concurrently (bounded by settings.harvest_concurrency). `on_asset`
+    is awaited for each asset as soon as it lands, not after the whole batch.
+    `history_item` is the prompt's /history entry if the caller already has it.
+
+    Outputs the job already has an asset for (or that an earlier attempt
+    quarantined) are skipped, so a retry only fetches what is missing. If any
+    output fails, the others are still registered and IncompleteHarvestError is
+    raised at the end, so the harvest pool retries the job.
+    """
     created_assets: List[AssetOut] = []
 
-    history = await comfy.get_history(prompt_id)
-    item = history.get(prompt_id)
+    item = history_item
+    if item is None:
+        history = await comfy.get_history(prompt_id)
+        item = history.get(prompt_id)
     if not item:
         return []
 
     outputs = item.get("outputs") or {}
 
-    job = db.get_job(job_id)
+    job = await job_cache.get(job_id)
     if not job:
         return []
 
@@ -552,61 +1001,202 @@ async def harvest_assets_for_prompt(job_id: str, prompt_id: str) -> List[AssetOu
         "engine": job.engine,
         "prompt": job.prompt,
         "negative_prompt": job.negative_prompt,
-        "params": json.loads(job.params_json) if job.params_json else {},
+        "params": await job_cache.params(job_id),
     }
 
-    for node_id, node_output in outputs.items():
-        if not isinstance(node_output, dict):
-            continue
-        images = node_output.get("images")
-        if not images:
-            continue
-        for image_info in images:
-            try:
-                filename = image_info.get("filename")
-                subfolder = image_info.get("subfolder", "")
-                folder_type = image_info.get("type", "output")
-                if not filename:
-                    continue
-
-                img_bytes = await comfy.get_view_image(filename=filename, subfolder=subfolder, folder_type=folder_type)
-
-                stored_name = new_asset_filename(prefix="comfy", ext=os.path.splitext(filename)[1] or ".png")
-                write_bytes(os.path.join(ASSETS_DIR, stored_name), img_bytes)
-
-                asset_id = str(uuid.uuid4())
-                meta = {
-                    "prompt_id": prompt_id,
-                    "node_id": str(node_id),
-                    "comfy": {
-                        "filename": filename,
-                        "subfolder": subfolder,
-                        "type": folder_type,
-                    },
-                }
-
-                db.create_asset(
-                    asset_id=asset_id,
-                    job_id=job_id,
-                    engine="comfy",
-                    filename=stored_name,
-                    recipe=recipe,
-                    meta=meta,
-                )
+    files = collect_output_files(outputs)
+    if not files:
+        return []
 
-                row = db.get_asset(asset_id)
-                if row:
-                    created_assets.append(assetrow_to_out(row))
+    # A report from an earlier attempt already counts the outputs it kept
+    report = QualityReport(**json.loads(job.quality_json)) if job.quality_json else QualityReport()
+    done = {_output_key(f) for f in report.failures if f.get("quarantined")}
+    for row in await adb.list_assets_by_job(job_id):
+        done.add(_output_key((json.loads(row.meta_json or "{}").get("comfy") or {})))
+    total = len(files)
+    files = [(node_id, info) for node_id, info in files if _output_key(info) not in done]
 
+    quality_params = await _quality_params_for_job(recipe["params"]) if quality_gate.enabled else None
+    semaphore = asyncio.Semaphore(max(1, settings.harvest_concurrency))
+    failed: List[str] = []
+
+    async def run_one(node_id: str, file_info: Dict[str, Any]) -> Optional[AssetOut]:
+        async with semaphore:
+            try:
+                return await _harvest_output(
+                    job_id, prompt_id, recipe, node_id, file_info, quality_params=quality_params, report=report
+                )
             except Exception as e:
-                # swallow per-image failure; other images may still download
-                continue
+                # Other outputs may still download; the job is retried for this one
+                logger.warning(f"Harvest failed for {file_info.get('filename')} (prompt {prompt_id}): {e}")
+                failed.append(str(file_info.get("filename")))
+                return None
+
+    tasks = [asyncio.create_task(run_one(node_id, info)) for node_id, info in files]
+    for fut in asyncio.as_completed(tasks):
+        asset = await fut
+        if asset is None:
+            continue
+        created_assets.append(asset)
+        if on_asset is not None:
+            await on_asset(asset)
+
+    if report.checked:
+        await job_cache.update(job_id, quality=report.to_dict())
+        if report.failed:
+            logger.warning(
+                f"Quality gate: {report.failed}/{report.checked} outputs failed for job {job_id}"
+                f" ({report.quarantined} quarantined)"
+            )
 
+    if failed:
+        raise IncompleteHarvestError(
+            f"{len(failed)} of {total} outputs failed for prompt {prompt_id}: {', '.join(sorted(failed)[:5])}"
+        )
     return created_assets
 
 
+def _output_key(file_info: Dict[str, Any]) -> Tuple[str, str]:
+    """Identifies a ComfyUI output across harvest attempts (filename, subfolder)."""
+    return str(file_info.get("filename") or ""), str(file_info.get("subfolder") or "")
+
+
+async def _quality_params_for_job(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Quality check kwargs from the job's workflow manifest (None: no checks)."""
+    workflow_id = params.get("workflow_id")
+    if not workflow_id:
+        return None
+    try:
+        manifest = (await workflow_registry.aget_workflow(str(workflow_id)))["manifest"]
+    except Exception:
+        return None
+    return quality_params_for(manifest)
+
+
+async def _complete_job(job_id: str, history_item: Optional[Dict[str, Any]] = None) -> None:
+    """Mark a job completed and queue the harvest of its outputs."""
+    job = await job_cache.get(job_id)
+    if not job or int(job.harvested) == 1 or not job.prompt_id:
+        return
+    if job.status != "completed":
+        await job_cache.update(job_id, status="completed", durable=True, **progress_tracker.pop(job_id))
+        progress_tracker.forget(job_id)
+        await ws_manager.broadcast({"type": "job_update", "payload": await job_cache.payload(job_id)})
+    harvest_pool.submit(job_id, history_item)
+
+
+async def _harvest_job(job_id: str, history_item: Optional[Dict[str, Any]] = None) -> None:
+    """Harvest a completed job's outputs once (guarded by the `harvested` flag)."""
+    job = await job_cache.get(job_id)
+    if not job or int(job.harvested) == 1 or not job.prompt_id:
+        return
+
+    async def broadcast_asset(a: AssetOut) -> None:
+        await ws_manager.broadcast({"type": "asset_created", "payload": a.model_dump()})
+
+    await harvest_assets_for_prompt(job_id, str(job.prompt_id), on_asset=broadcast_asset, history_item=history_item)
+    await job_cache.update(job_id, harvested=1, durable=True)
+
+
+async def _give_up_harvest(job_id: str, error: Exception) -> None:
+    """After the last attempt: keep a partial harvest as final.
+
+    Other errors (ComfyUI unreachable) leave the job unharvested, and the
+    reconciler queues it again on its next pass.
+    """
+    if isinstance(error, IncompleteHarvestError):
+        await job_cache.update(job_id, harvested=1, durable=True)
+
+
+async def _fail_running_job(job_id: str, error: str) -> None:
+    """Record a failure reported by ComfyUI (terminal: written immediately and durably)."""
+    await job_cache.update(job_id, status="failed", error=error, durable=True, **progress_tracker.pop(job_id))
+    progress_tracker.forget(job_id)
+    await ws_manager.broadcast({"type": "job_update", "payload": await job_cache.payload(job_id)})
+
+
+async def _mark_job_running(job_id: str) -> None:
+    await job_cache.update(job_id, status="running", **progress_tracker.pop(job_id))
+    await ws_manager.broadcast({"type": "job_update", "payload": await job_cache.payload(job_id)})
+
+
+# Downloads run here, off the websocket loop; one job per harvest_workers slot
+harvest_pool = HarvestPool(
+    _harvest_job,
+    give_up=_give_up_harvest,
+    concurrency=settings.harvest_workers,
+    max_attempts=settings.harvest_max_attempts,
+)
+
+# Settles jobs whose websocket events were missed (cockpit restart, socket gap)
+reconciler = Reconciler(
+    lambda: comfy,
+    lambda limit, after: adb.list_unsettled_jobs(limit, after),
+    complete=lambda job, entry: _complete_job(job.id, entry),
+    fail=_fail_running_job,
+    mark_running=_mark_job_running,
+    history_items=settings.reconcile_history_items,
+)
+
+# ComfyUI events between the websocket receive loop and the dispatcher
+comfy_events = ComfyEventQueue()
+loop_lag = LoopLagMonitor()
+
+
+async def handle_comfy_event(msg: Dict[str, Any]) -> None:
+    """Apply one ComfyUI websocket event to our jobs and broadcast the changes."""
+    mtype = msg.get("type")
+    data = msg.get("data") or {}
+    prompt_id = data.get("prompt_id")
+    if not prompt_id:
+        return
+
+    # Served from the in-process job cache (no SQLite round trip on hits)
+    job = await job_cache.get_by_prompt_id(str(prompt_id))
+    if not job:
+        return
+
+    # Update running state
+    if mtype == "execution_start":
+        await _mark_job_running(job.id)
+
+    # Progress updates: kept in memory, flushed to SQLite in batches
+    if mtype == "progress":
+        value = float(data.get("value", 0))
+        maxv = float(data.get("max", 0))
+        job_cache.set_progress(job.id, value, maxv)
+        if progress_tracker.record(job.id, str(prompt_id), value, maxv):
+            await ws_manager.broadcast({"type": "job_progress", "payload": progress_payload(job.id, str(prompt_id), value, maxv)})
+
+    # Errors (terminal: written immediately and durably)
+    if mtype in ("execution_error", "execution_interrupted"):
+        await _fail_running_job(job.id, json.dumps(data)[:2000])
+
+    # Completion
+    # Per ComfyUI docs, `executing` with node=None indicates completion.
+    # Some builds also send execution_success. We treat either as a completion signal,
+    # but we guard harvesting with a DB flag to avoid duplicating assets.
+    is_done_signal = (mtype == "executing" and data.get("node") is None) or (mtype == "execution_success")
+    if is_done_signal:
+        await _complete_job(job.id)
+
+
+async def comfy_event_dispatcher() -> None:
+    """Apply queued ComfyUI events in arrival order."""
+    while True:
+        msg = await comfy_events.get()
+        try:
+            await handle_comfy_event(msg)
+        except Exception as e:
+            logger.warning(f"Handling ComfyUI event {msg.get('type')} failed: {e}")
+
+
 async def comfy_ws_loop() -> None:
-    """Maintain a websocket connection to ComfyUI and translate its events into our app events."""
+    """Maintain a websocket connection to ComfyUI and queue its job events for the dispatcher.
+
+    The receive loop does nothing but parse and queue, so it keeps reading (and
+    answering pings) while events are applied and outputs downloaded.
+    """
     import websockets
 
     ws_url = comfy.ws_url(COMFY_CLIENT_ID)
@@ -616,60 +1206,20 @@ async def comfy_ws_loop() -> None:
             async with websockets.connect(ws_url, ping_interval=20, ping_timeout=20) as ws:
                 # Connection established
                 await ws_manager.broadcast({"type": "comfy_connected", "payload": {"url": settings.comfy_url}})
+                # Catch up on events missed before this connection (also covers startup)
+                reconciler.trigger()
 
                 while True:
                     raw = await ws.recv()
                     if isinstance(raw, (bytes, bytearray)):
-                        continue
-
-                    msg = json.loads(raw)
-                    mtype = msg.get("type")
-                    data = msg.get("data") or {}
-                    prompt_id = data.get("prompt_id")
-
-                    if not prompt_id:
-                        continue
+                        continue  # preview images
 
-                    job = db.get_job_by_prompt_id(str(prompt_id))
-                    if not job:
+                    try:
+                        msg = json.loads(raw)
+                    except ValueError:
                         continue
-
-                    # Update running state
-                    if mtype == "execution_start":
-                        db.update_job(job.id, status="running")
-                        await ws_manager.broadcast({"type": "job_update", "payload": jobrow_to_out(db.get_job(job.id)).model_dump()})
-
-                    # Progress updates
-                    if mtype == "progress":
-                        value = float(data.get("value", 0))
-                        maxv = float(data.get("max", 0))
-                        db.update_job(job.id, progress_value=value, progress_max=maxv)
-                        await ws_manager.broadcast({"type": "job_progress", "payload": {"job_id": job.id, "prompt_id": prompt_id, "value": value, "max": maxv}})
-
-                    # Errors
-                    if mtype in ("execution_error", "execution_interrupted"):
-                        err = json.dumps(data)[:2000]
-                        db.update_job(job.id, status="failed", error=err)
-                        await ws_manager.broadcast({"type": "job_update", "payload": jobrow_to_out(db.get_job(job.id)).model_dump()})
-
-                    # Completion
-                    # Per ComfyUI docs, `executing` with node=None indicates completion.
-                    # Some builds also send execution_success. We treat either as a completion signal,
-                    # but we guard harvesting with a DB flag to avoid duplicating assets.
-                    is_done_signal = (mtype == "executing" and data.get("node") is None) or (mtype == "execution_success")
-                    if is_done_signal:
-                        latest = db.get_job(job.id)
-                        if latest and int(latest.harvested) == 1:
-                            # Already harvested; nothing to do.
-                            continue
-
-                        db.update_job(job.id, status="completed")
-                        await ws_manager.broadcast({"type": "job_update", "payload": jobrow_to_out(db.get_job(job.id)).model_dump()})
-
-                        assets = await harvest_assets_for_prompt(job.id, str(prompt_id))
-                        db.update_job(job.id, harvested=1)
-                        for a in assets:
-                            await ws_manager.broadcast({"type": "asset_created", "payload": a.model_dump()})
+                    if isinstance(msg, dict) and (msg.get("data") or {}).get("prompt_id"):
+                        comfy_events.put(msg)
 
         except Exception:
             # Connection lost; retry.
@@ -680,54 +1230,95 @@ async def comfy_ws_loop() -> None:
 app = FastAPI(title="Grok-Comfy Cockpit (MVP)")
 
 
+# Loops started at startup; cancelled and awaited at shutdown
+background_tasks: Set["asyncio.Task[Any]"] = set()
+
+
+def _start_background(coro: Coroutine[Any, Any, Any], name: str) -> None:
+    task = asyncio.create_task(coro, name=name)
+    background_tasks.add(task)
+    task.add_done_callback(_background_done)
+
+
+def _background_done(task: "asyncio.Task[Any]") -> None:
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task {task.get_name()} stopped: {task.exception()!r}")
+
+
+async def _cancel_all(tasks: Set["asyncio.Task[Any]"]) -> None:
+    pending = list(tasks)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
 @app.on_event("startup")
 async def on_startup() -> None:
     await refresh_comfy_options()
-    asyncio.create_task(comfy_ws_loop())
+    _start_background(comfy_event_dispatcher(), "comfy_event_dispatcher")
+    _start_background(comfy_ws_loop(), "comfy_ws_loop")
+    _start_background(loop_lag.run(), "loop_lag")
+    _start_background(progress_tracker.run(ws_manager.broadcast), "progress_tracker")
+    _start_background(health_prober.run(ws_manager.broadcast), "health_prober")
+    if settings.workflow_poll_sec > 0:
+        _start_background(workflow_registry.watch(settings.workflow_poll_sec), "workflow_watch")
+    _start_background(model_index.warm([settings.checkpoints_dir, settings.vae_dir]), "model_index_warm")
+    if retention_engine.enabled:
+        _start_background(retention_engine.run(), "retention")
+    # Resume jobs that were queued but never submitted before the last shutdown
+    submission_scheduler.notify()
 
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
+    # Stop everything that writes to the database before closing it
+    await _cancel_all(background_tasks)
+    await reconciler.close()
+    await harvest_pool.close()
+    # Not needed for correctness: /thumbs renders missing thumbnails on demand
+    await _cancel_all(thumbnail_tasks)
+    await progress_tracker.flush()
     await comfy.close()
+    await http_pool.close()
+    thumbnails.close()
+    quality_gate.close()
+    retention_engine.close()
+    adb.close()
 
 
 @app.get("/api/health")
-async def health() -> Dict[str, Any]:
+async def health(history: bool = True) -> Dict[str, Any]:
     """Health check with detailed ComfyUI connection status.
 
-    Returns error codes:
-    - COMFY_UNREACHABLE: Cannot connect to ComfyUI server
-    - COMFY_ERROR: ComfyUI returned an error
-    - None: Everything is OK
+    Served from the background prober's latest sample (see HealthProber.probe for
+    error codes); `history` adds the recent samples.
     """
-    result: Dict[str, Any] = {
-        "ok": False,
-        "comfy_url": settings.comfy_url,
-        "error_code": None,
-        "error_message": None,
-    }
+    return await health_prober.snapshot(include_history=history)
 
-    try:
-        # Try to get system stats from ComfyUI
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            r = await client.get(f"{settings.comfy_url}/system_stats")
-            if r.status_code == 200:
-                result["ok"] = True
-                result["comfy_stats"] = r.json()
-            else:
-                result["error_code"] = "COMFY_ERROR"
-                result["error_message"] = f"ComfyUI returned status {r.status_code}"
-    except httpx.ConnectError:
-        result["error_code"] = "COMFY_UNREACHABLE"
-        result["error_message"] = "Cannot connect to ComfyUI server"
-    except httpx.TimeoutException:
-        result["error_code"] = "COMFY_UNREACHABLE"
-        result["error_message"] = "Connection to ComfyUI timed out"
-    except Exception as e:
-        result["error_code"] = "COMFY_ERROR"
-        result["error_message"] = str(e)
 
-    return result
+@app.get("/api/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """Outbound HTTP metrics per upstream (request/error counts, time to response
+    headers), the job submission queue and its fair-share state, job
+    reconciliation, the ComfyUI event queue and harvest workers, the asset
+    store and retention engine, and event loop lag."""
+    return {
+        "http2": settings.http2 and HTTP2_AVAILABLE,
+        "upstreams": http_pool.metrics(),
+        "submission": {
+            **submission_scheduler.stats(),
+            "waiting": await adb.count_waiting_jobs(),
+            "fair_share": {**fair_queue.stats(), "workflow_cost_sec": cost_model.snapshot()},
+        },
+        "reconcile": reconciler.stats(),
+        "comfy_events": comfy_events.stats(),
+        "harvest": harvest_pool.stats(),
+        "local_import": local_importer.stats(),
+        "asset_store": {**blob_store.stats(), **await adb.blob_stats()},
+        "retention": retention_engine.stats(),
+        "event_loop_lag": loop_lag.stats(),
+    }
 
 
 @app.get("/api/config")
@@ -781,7 +1372,7 @@ async def grok_chat_api(req: GrokChatIn) -> GrokChatOut:
 
 @app.get("/api/grok/history", response_model=List[GrokMessageOut])
 async def grok_history(limit: Optional[int] = None) -> List[GrokMessageOut]:
-    rows = db.list_grok_messages(limit=limit)
+    rows = await adb.list_grok_messages(limit=limit)
     return [GrokMessageOut(role=r.role, content=r.content, created_at=r.created_at) for r in rows]
 
 
@@ -810,9 +1401,13 @@ async def list_templates() -> List[TemplateOut]:
 # ========================
 
 @app.get("/api/workflows", response_model=List[WorkflowOut])
-async def list_workflows() -> List[WorkflowOut]:
-    """List all available workflows."""
+async def list_workflows(request: Request, response: Response) -> Union[List[WorkflowOut], Response]:
+    """List all available workflows (ETag changes whenever a workflow is added, edited or removed)."""
     workflows = workflow_registry.list_workflows()
+    headers = {"ETag": f'"{workflow_registry.list_etag()}"', "Cache-Control": "no-cache"}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return [
         WorkflowOut(
             id=w["id"],
@@ -828,7 +1423,7 @@ async def list_workflows() -> List[WorkflowOut]:
 async def get_workflow(workflow_id: str) -> WorkflowDetailOut:
     """Get workflow details including parameters with dynamic choices."""
     try:
-        wf = workflow_registry.get_workflow(workflow_id)
+        wf = await workflow_registry.aget_workflow(workflow_id)
         manifest = wf["manifest"]
 
         # Deep copy params to avoid mutating cached manifest
@@ -836,16 +1431,14 @@ async def get_workflow(workflow_id: str) -> WorkflowDetailOut:
 
         # Inject dynamic choices for checkpoint/VAE
         if "checkpoint" in params:
-            checkpoints = scan_checkpoints(settings.checkpoints_dir)
-            logger.info(f"Scanned checkpoints from {settings.checkpoints_dir}: {len(checkpoints)} files")
+            checkpoints = await model_index.choices(settings.checkpoints_dir)
             if checkpoints:
                 params["checkpoint"]["choices"] = checkpoints
             else:
                 logger.warning(f"No checkpoints found in {settings.checkpoints_dir}")
 
         if "vae" in params:
-            vaes = scan_vaes(settings.vae_dir)
-            logger.info(f"Scanned VAEs from {settings.vae_dir}: {len(vaes)} files")
+            vaes = await model_index.choices(settings.vae_dir)
             if vaes:
                 params["vae"]["choices"] = vaes
             else:
@@ -917,10 +1510,9 @@ async def grok_image(req: GrokImageIn) -> List[AssetOut]:
     url = f"{settings.xai_base_url}/images/generations"
 
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            r = await client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
+        r = await http_pool.client("xai").post(url, headers=headers, json=payload)
+        r.raise_for_status()
+        data = r.json()
     except httpx.HTTPStatusError as e:
         body = ""
         try:
@@ -938,64 +1530,67 @@ async def grok_image(req: GrokImageIn) -> List[AssetOut]:
     created: List[AssetOut] = []
     job_id = str(uuid.uuid4())
 
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        for idx, item in enumerate(items):
-            if not isinstance(item, dict):
-                continue
+    # Image downloads reuse the pooled xai client
+    client = http_pool.client("xai")
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
 
-            img_bytes: Optional[bytes] = None
-            img_url = item.get("url")
-            b64 = item.get("b64_json")
-
-            if b64:
-                try:
-                    img_bytes = base64.b64decode(b64)
-                except Exception:
-                    img_bytes = None
-            elif img_url:
-                try:
-                    resp = await client.get(img_url)
-                    resp.raise_for_status()
-                    img_bytes = resp.content
-                except Exception:
-                    img_bytes = None
-
-            if not img_bytes:
-                continue
+        img_bytes: Optional[bytes] = None
+        img_url = item.get("url")
+        b64 = item.get("b64_json")
 
-            ext = _image_ext_from_url(str(img_url)) if img_url else ".png"
-            stored_name = new_asset_filename(prefix="grok", ext=ext)
-            write_bytes(os.path.join(ASSETS_DIR, stored_name), img_bytes)
-
-            asset_id = str(uuid.uuid4())
-            recipe = {
-                "engine": "grok-image",
-                "prompt": prompt,
-                "model": model_to_use,
-                "params": {"n": int(req.n)},
-            }
-            meta = {
-                "source": "xai",
-                "model": model_to_use,
-                "index": idx,
-                "image_url": img_url,
-                "revised_prompt": item.get("revised_prompt"),
-            }
-
-            db.create_asset(
-                asset_id=asset_id,
-                job_id=job_id,
-                engine="grok-image",
-                filename=stored_name,
-                recipe=recipe,
-                meta=meta,
-            )
+        if b64:
+            try:
+                img_bytes = base64.b64decode(b64)
+            except Exception:
+                img_bytes = None
+        elif img_url:
+            try:
+                resp = await client.get(img_url)
+                resp.raise_for_status()
+                img_bytes = resp.content
+            except Exception:
+                img_bytes = None
+
+        if not img_bytes:
+            continue
+
+        ext = _image_ext_from_url(str(img_url)) if img_url else ".png"
+        staged = await blob_store.stage_bytes(img_bytes, ext)
+        stored_name = blob_store.commit(staged)
+
+        asset_id = str(uuid.uuid4())
+        recipe = {
+            "engine": "grok-image",
+            "prompt": prompt,
+            "model": model_to_use,
+            "params": {"n": int(req.n)},
+        }
+        meta = {
+            "source": "xai",
+            "model": model_to_use,
+            "index": idx,
+            "image_url": img_url,
+            "revised_prompt": item.get("revised_prompt"),
+        }
+
+        await adb.create_asset(
+            asset_id=asset_id,
+            job_id=job_id,
+            engine="grok-image",
+            filename=stored_name,
+            recipe=recipe,
+            meta=meta,
+            content_hash=staged.content_hash,
+            blob_size=staged.size,
+        )
 
-            row = db.get_asset(asset_id)
-            if row:
-                out = assetrow_to_out(row)
-                created.append(out)
-                await ws_manager.broadcast({"type": "asset_created", "payload": out.model_dump()})
+        row = await adb.get_asset(asset_id)
+        if row:
+            out = assetrow_to_out(row)
+            created.append(out)
+            await ws_manager.broadcast({"type": "asset_created", "payload": out.model_dump()})
 
     if not created:
         raise HTTPException(status_code=502, detail="xAI returned no images or downloads failed")
@@ -1003,42 +1598,161 @@ async def grok_image(req: GrokImageIn) -> List[AssetOut]:
     return created
 
 
-async def _submit_prompt_background(
-    job_id: str,
-    template: Dict[str, Any],
-    manifest: Dict[str, Any],
-    patch_params: Dict[str, Any],
-) -> None:
+# Request fields that also set other manifest params (e.g. width -> width_scheduler)
+PARAM_ALIASES = {
+    "width": ["width_scheduler"],
+    "height": ["height_scheduler"],
+    "cfg": ["guidance"],  # cfg maps to both cfg and guidance for Flux2
+}
+
+BATCH_MAX_JOBS = 500
+
+
+def _patch_params_for(params: Dict[str, Any], manifest_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Manifest patch values for a job's stored params.
+
+    Omitted fields keep their manifest defaults; aliases are filled in and a
+    checkpoint is only patched if the workflow has a checkpoint param.
     """
-    Background task to submit workflow to ComfyUI (workflow registry path).
-    This prevents blocking the API response while ComfyUI loads models.
+    patch_params = {k: v for k, v in params.items() if k != "workflow_id"}
+    for source, targets in PARAM_ALIASES.items():
+        if source in params:
+            for target in targets:
+                if target in manifest_params and target not in patch_params:
+                    patch_params[target] = params[source]
+    if "checkpoint" not in manifest_params:
+        patch_params.pop("checkpoint", None)
+    return patch_params
+
+
+async def _prepare_job(
+    normalized_params: Dict[str, Any],
+    workflow_id: str,
+    *,
+    priority: str = "interactive",
+    client_id: str = "",
+) -> Dict[str, Any]:
+    """Resolve one job request into keyword arguments for job_cache.create.
+
+    Raises:
+        HTTPException: 400 if the prompt is empty, 404 if the workflow is unknown
+    """
+    prompt = str(normalized_params.get("prompt") or "").strip()
+    if not prompt:
+        raise HTTPException(status_code=400, detail="prompt is empty")
+
+    try:
+        wf = await workflow_registry.aget_workflow(workflow_id)
+    except WorkflowNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Workflow not found: {workflow_id}")
+    manifest_params = wf["manifest"].get("params", {})
+
+    # Store params for job record (preserve extra params for re-run)
+    params = dict(normalized_params)
+    params["prompt"] = prompt
+    params["workflow_id"] = workflow_id
+    # Handle checkpoint specially (uses pick_checkpoint helper)
+    if "checkpoint" in params and "checkpoint" in manifest_params:
+        params["checkpoint"] = pick_checkpoint(params.get("checkpoint"))
+
+    negative_prompt = params.get("negative_prompt")
+    return {
+        "job_id": str(uuid.uuid4()),
+        "engine": "comfy",
+        "status": "queued",
+        "prompt": prompt,
+        "negative_prompt": "" if negative_prompt is None else str(negative_prompt),
+        "params": params,
+        "priority": priority,
+        "client_id": client_id,
+    }
+
+
+def _client_id(request: Request, requested: Optional[str]) -> str:
+    """Fair-share client for a job: as requested, else the caller's address."""
+    if requested and requested.strip():
+        return requested.strip()
+    return request.client.host if request.client else "local"
+
+
+def _waiting_job(row) -> WaitingJob:
+    params = json.loads(row.params_json) if row.params_json else {}
+    return WaitingJob(
+        id=row.id,
+        priority=row.priority,
+        client_id=row.client_id,
+        workflow_id=str(params.get("workflow_id") or ""),
+        created_at=row.created_at,
+    )
+
+
+async def _fail_job(job_id: str, error: str) -> None:
+    await job_cache.update(job_id, status="failed", error=error, durable=True)
+    await ws_manager.broadcast({"type": "job_update", "payload": await job_cache.payload(job_id)})
+
+
+async def _submit_job(job_id: str) -> bool:
+    """
+    Submit a queued job to ComfyUI (workflow registry path).
+    Called by the submission scheduler so the API response never waits for
+    ComfyUI (which may be busy loading models).
+
+    Returns:
+        True if ComfyUI accepted the prompt; failures are recorded on the job
     """
-    import time
-    bg_start = time.time()
-    print(f"[DEBUG] Background task started for job {job_id}", file=sys.stderr)
     try:
-        # Apply patches to template
-        workflow = apply_patch(template, manifest, patch_params)
-        print(f"[DEBUG] Patch applied for job {job_id}, elapsed: {time.time() - bg_start:.3f}s", file=sys.stderr)
+        row = await job_cache.get(job_id)
+        if row is None or row.status != "queued" or row.prompt_id:
+            return False
+        params = await job_cache.params(job_id)
+        workflow_id = str(params.get("workflow_id") or "")
+        wf = await workflow_registry.aget_workflow(workflow_id)
+        plan = await workflow_registry.aget_plan(workflow_id)
+
+        # Apply patches via the workflow's compiled plan (unpatched nodes are shared
+        # with the cached template, so the result is only serialized, never mutated)
+        workflow = plan.apply(_patch_params_for(params, wf["manifest"].get("params", {})))
 
-        print(f"[DEBUG] Submitting to ComfyUI for job {job_id}...", file=sys.stderr)
         res = await comfy.submit_prompt(workflow, COMFY_CLIENT_ID)
-        print(f"[DEBUG] ComfyUI submission completed for job {job_id}, elapsed: {time.time() - bg_start:.3f}s", file=sys.stderr)
         prompt_id = res.get("prompt_id")
         if not prompt_id:
             raise RuntimeError(f"ComfyUI did not return prompt_id: {res}")
 
-        db.update_job(job_id, prompt_id=str(prompt_id))
-        await ws_manager.broadcast({"type": "job_update", "payload": jobrow_to_out(db.get_job(job_id)).model_dump()})
+        await job_cache.update(job_id, prompt_id=str(prompt_id))
+        await ws_manager.broadcast({"type": "job_update", "payload": await job_cache.payload(job_id)})
+        return True
 
     except PatchError as e:
-        print(f"[ERROR] Background submit failed for job {job_id}: Patch error: {e}", file=sys.stderr)
-        db.update_job(job_id, status="failed", error=f"Patch error: {e}")
-        await ws_manager.broadcast({"type": "job_update", "payload": jobrow_to_out(db.get_job(job_id)).model_dump()})
+        print(f"[ERROR] Submit failed for job {job_id}: Patch error: {e}", file=sys.stderr)
+        await _fail_job(job_id, f"Patch error: {e}")
+    except WorkflowNotFoundError as e:
+        print(f"[ERROR] Submit failed for job {job_id}: {e}", file=sys.stderr)
+        await _fail_job(job_id, str(e))
     except Exception as e:
-        print(f"[ERROR] Background submit failed for job {job_id}: {e}", file=sys.stderr)
-        db.update_job(job_id, status="failed", error=str(e))
-        await ws_manager.broadcast({"type": "job_update", "payload": jobrow_to_out(db.get_job(job_id)).model_dump()})
+        print(f"[ERROR] Submit failed for job {job_id}: {e}", file=sys.stderr)
+        await _fail_job(job_id, str(e))
+    return False
+
+
+async def _comfy_queue_depth() -> int:
+    queue = await comfy.get_queue()
+    return len(queue.get("queue_running") or []) + len(queue.get("queue_pending") or [])
+
+
+# Expected run time per workflow, from recent completed jobs
+cost_model = CostModel(lambda: adb.workflow_run_times())
+fair_queue = FairQueue(cost_model.cost, weights=settings.client_weights)
+
+# Waiting jobs live in SQLite (status 'queued', no prompt_id); the scheduler
+# feeds them to ComfyUI in fair-queue order and picks up leftovers after a restart
+submission_scheduler = SubmissionScheduler(
+    _submit_job,
+    lambda limit: adb.list_waiting_jobs(limit),
+    _comfy_queue_depth,
+    select=fair_queue.select,
+    concurrency=settings.submit_concurrency,
+    target_depth=settings.comfy_target_queue_depth,
+)
 
 
 async def _submit_legacy_workflow_background(
@@ -1073,17 +1787,17 @@ async def _submit_legacy_workflow_background(
         if not prompt_id:
             raise RuntimeError(f"ComfyUI did not return prompt_id: {res}")
 
-        db.update_job(job_id, prompt_id=str(prompt_id))
-        await ws_manager.broadcast({"type": "job_update", "payload": jobrow_to_out(db.get_job(job_id)).model_dump()})
+        await job_cache.update(job_id, prompt_id=str(prompt_id))
+        await ws_manager.broadcast({"type": "job_update", "payload": await job_cache.payload(job_id)})
 
     except Exception as e:
         print(f"[ERROR] Background legacy submit failed for job {job_id}: {e}", file=sys.stderr)
-        db.update_job(job_id, status="failed", error=str(e))
-        await ws_manager.broadcast({"type": "job_update", "payload": jobrow_to_out(db.get_job(job_id)).model_dump()})
+        await job_cache.update(job_id, status="failed", error=str(e), durable=True)
+        await ws_manager.broadcast({"type": "job_update", "payload": await job_cache.payload(job_id)})
 
 
 @app.post("/api/jobs", response_model=JobOut)
-async def create_job(req: JobCreate) -> JobOut:
+async def create_job(req: JobCreate, request: Request) -> JobOut:
     import time
     start_time = time.time()
     print(f"[DEBUG] create_job started at {start_time}", file=sys.stderr)
@@ -1095,9 +1809,6 @@ async def create_job(req: JobCreate) -> JobOut:
         raise HTTPException(status_code=400, detail="prompt is empty")
     normalized_params["prompt"] = prompt
 
-    job_id = str(uuid.uuid4())
-    print(f"[DEBUG] job_id created: {job_id}, elapsed: {time.time() - start_time:.3f}s", file=sys.stderr)
-
     # Always use workflow registry (klein_distilled is default)
     if True:
         # New workflow registry path
@@ -1105,72 +1816,26 @@ async def create_job(req: JobCreate) -> JobOut:
         if "workflow_id" not in req.model_fields_set:
             workflow_id = str(normalized_params.get("workflow_id") or workflow_id)
 
-        try:
-            wf = workflow_registry.get_workflow(workflow_id)
-            print(f"[DEBUG] workflow loaded: {workflow_id}, elapsed: {time.time() - start_time:.3f}s", file=sys.stderr)
-        except WorkflowNotFoundError:
-            raise HTTPException(status_code=404, detail=f"Workflow not found: {workflow_id}")
-
-        manifest = wf["manifest"]
-        template = wf["template"]
-        manifest_params = manifest.get("params", {})
-
-        # Build patch_params from explicitly provided fields
-        # This allows manifest defaults to be used for omitted fields
-        patch_params = {k: v for k, v in normalized_params.items() if k != "workflow_id"}
-
-        # Map request fields to manifest param names
-        # Some fields map to multiple params (e.g., width -> width, width_scheduler)
-        mapping_defaults = {
-            "width": ["width_scheduler"],
-            "height": ["height_scheduler"],
-            "cfg": ["guidance"],  # cfg maps to both cfg and guidance for Flux2
-        }
-        for source, targets in mapping_defaults.items():
-            if source in normalized_params:
-                for target in targets:
-                    if target in manifest_params and target not in patch_params:
-                        patch_params[target] = normalized_params[source]
-
-        # Handle checkpoint specially (uses pick_checkpoint helper)
-        resolved_checkpoint: Optional[str] = None
-        if "checkpoint" in patch_params and "checkpoint" in manifest_params:
-            resolved_checkpoint = pick_checkpoint(patch_params.get("checkpoint"))
-            patch_params["checkpoint"] = resolved_checkpoint
-        elif "checkpoint" in patch_params and "checkpoint" not in manifest_params:
-            patch_params.pop("checkpoint", None)
-
-        # Store params for job record (preserve extra params for re-run)
-        params = dict(normalized_params)
-        params["workflow_id"] = workflow_id
-        if resolved_checkpoint is not None:
-            params["checkpoint"] = resolved_checkpoint
-
-        negative_prompt = params.get("negative_prompt")
-        if negative_prompt is None:
-            negative_prompt = ""
-        else:
-            negative_prompt = str(negative_prompt)
-
-        db.create_job(
-            job_id=job_id,
-            engine="comfy",
-            status="queued",
-            prompt=prompt,
-            negative_prompt=negative_prompt,
-            params=params,
+        job = await _prepare_job(
+            normalized_params,
+            workflow_id,
+            priority=req.priority or "interactive",
+            client_id=_client_id(request, req.client_id),
         )
+        job_id = job["job_id"]
+        print(f"[DEBUG] job prepared: {job_id}, elapsed: {time.time() - start_time:.3f}s", file=sys.stderr)
+
+        row = await job_cache.create(**job)
         print(f"[DEBUG] job created in DB, elapsed: {time.time() - start_time:.3f}s", file=sys.stderr)
 
-        await ws_manager.broadcast({"type": "job_created", "payload": jobrow_to_out(db.get_job(job_id)).model_dump()})
-        print(f"[DEBUG] broadcast sent, elapsed: {time.time() - start_time:.3f}s", file=sys.stderr)
+        await ws_manager.broadcast({"type": "job_created", "payload": await job_cache.payload(job_id)})
 
-        # Submit to ComfyUI in background to avoid blocking the API response
-        asyncio.create_task(_submit_prompt_background(job_id, template, manifest, patch_params))
-        print(f"[DEBUG] background task created, elapsed: {time.time() - start_time:.3f}s", file=sys.stderr)
+        # Submitted to ComfyUI by the scheduler to avoid blocking the API response
+        submission_scheduler.notify([_waiting_job(row)])
 
     else:
         # Legacy path: use build_txt2img_workflow for backward compatibility
+        job_id = str(uuid.uuid4())
         sampler_name = req.sampler_name
         scheduler = req.scheduler
         checkpoint = pick_checkpoint(req.checkpoint)
@@ -1210,7 +1875,7 @@ async def create_job(req: JobCreate) -> JobOut:
             "checkpoint": checkpoint,
         }
 
-        db.create_job(
+        await job_cache.create(
             job_id=job_id,
             engine="comfy",
             status="queued",
@@ -1219,7 +1884,7 @@ async def create_job(req: JobCreate) -> JobOut:
             params=params,
         )
 
-        await ws_manager.broadcast({"type": "job_created", "payload": jobrow_to_out(db.get_job(job_id)).model_dump()})
+        await ws_manager.broadcast({"type": "job_created", "payload": await job_cache.payload(job_id)})
 
         # Submit to ComfyUI in background to avoid blocking the API response
         asyncio.create_task(_submit_legacy_workflow_background(
@@ -1229,23 +1894,98 @@ async def create_job(req: JobCreate) -> JobOut:
             params=params,
         ))
 
-    row = db.get_job(job_id)
+    payload = await job_cache.payload(job_id)
     print(f"[DEBUG] returning response, elapsed: {time.time() - start_time:.3f}s", file=sys.stderr)
-    return jobrow_to_out(row)
+    return JobOut(**payload)
+
+
+def _expand_batch(req: JobBatchCreate) -> List[Dict[str, Any]]:
+    """Param sets for a batch request (base params merged into each)."""
+    base = {k: v for k, v in req.params.items() if v is not None}
+    if req.items is not None:
+        return [{**base, **{k: v for k, v in item.items() if v is not None}} for item in req.items]
+
+    prompts: List[Optional[str]] = list(req.prompts) if req.prompts is not None else [None]
+    if isinstance(req.seeds, SeedRange):
+        seeds: List[Optional[int]] = [req.seeds.start + i * req.seeds.step for i in range(req.seeds.count)]
+    elif req.seeds is not None:
+        seeds = list(req.seeds)
+    else:
+        seeds = [None]
+
+    param_sets = []
+    for prompt in prompts:
+        for seed in seeds:
+            params = dict(base)
+            if prompt is not None:
+                params["prompt"] = prompt
+            if seed is not None:
+                params["seed"] = seed
+            param_sets.append(params)
+    return param_sets
+
+
+@app.post("/api/jobs/batch", response_model=JobBatchOut)
+async def create_jobs_batch(req: JobBatchCreate, request: Request) -> JobBatchOut:
+    """Create many jobs at once: one transaction, one `jobs_created` event.
+
+    Jobs are created in order (items, or every prompt x seed combination) and
+    submitted to ComfyUI by the submission scheduler (priority "batch" unless
+    given). If any job is invalid nothing is created.
+    """
+    param_sets = _expand_batch(req)
+    if not param_sets:
+        raise HTTPException(status_code=400, detail="batch is empty")
+    if len(param_sets) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"batch exceeds {BATCH_MAX_JOBS} jobs")
+
+    priority = req.priority or "batch"
+    client_id = _client_id(request, req.client_id)
+    jobs = []
+    for i, params in enumerate(param_sets):
+        workflow_id = str(params.get("workflow_id") or req.workflow_id)
+        try:
+            jobs.append(await _prepare_job(params, workflow_id, priority=priority, client_id=client_id))
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"jobs[{i}]: {e.detail}")
+
+    rows = await job_cache.create_many(jobs)
+    payloads = [await job_cache.payload(row.id) for row in rows]
+    await ws_manager.broadcast({"type": "jobs_created", "payload": payloads})
+    submission_scheduler.notify(_waiting_job(row) for row in rows)
+    return JobBatchOut(jobs=[JobOut(**p) for p in payloads])
 
 
 @app.get("/api/jobs", response_model=List[JobOut])
-async def list_jobs(limit: int = 200) -> List[JobOut]:
-    return [jobrow_to_out(r) for r in db.list_jobs(limit=limit)]
+async def list_jobs(
+    response: Response,
+    limit: int = Query(200, ge=1, le=PAGE_LIMIT_MAX),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    engine: Optional[str] = None,
+    workflow_id: Optional[str] = None,
+) -> List[JobOut]:
+    """Newest-first jobs. Pass X-Next-Cursor as `before` for older pages, X-Prev-Cursor as `after` for newer."""
+    before_key, after_key = _page_keys(before, after)
+    rows = await adb.list_jobs_page(
+        limit=limit + 1,
+        before=before_key,
+        after=after_key,
+        status=status,
+        engine=engine,
+        workflow_id=workflow_id,
+    )
+    return [jobrow_to_out(r) for r in _finish_page(rows, limit, after_key, response)]
 
 
 @app.get("/api/jobs/{job_id}", response_model=JobOut)
 async def get_job(job_id: str) -> JobOut:
     """Get a single job by ID with status, progress, and metadata."""
-    row = db.get_job(job_id)
+    row = await job_cache.get(job_id)
     if not row:
         raise HTTPException(status_code=404, detail="job not found")
-    assets = db.list_assets_by_job(job_id)
+    assets = await adb.list_assets_by_job(job_id)
     outputs = [
         {
             "id": a.id,
@@ -1255,17 +1995,46 @@ async def get_job(job_id: str) -> JobOut:
         }
         for a in assets
     ]
-    return jobrow_to_out(row, outputs=outputs)
-
-
-@app.get("/api/assets", response_model=List[AssetOut])
-async def list_assets(limit: int = 200) -> List[AssetOut]:
-    return [assetrow_to_out(r) for r in db.list_assets(limit=limit)]
+    return jobrow_to_out(row, outputs=outputs, params=await job_cache.params(job_id))
+
+
+@app.get("/api/assets", response_model=List[Union[AssetOut, AssetGridOut]])
+async def list_assets(
+    response: Response,
+    limit: int = Query(200, ge=1, le=PAGE_LIMIT_MAX),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    favorite: bool = False,
+    engine: Optional[str] = None,
+    workflow_id: Optional[str] = None,
+    job_status: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    view: str = Query("full", pattern="^(full|grid)$"),
+) -> List[Union[AssetOut, AssetGridOut]]:
+    """Newest-first assets, paginated like /api/jobs. `view=grid` omits recipe/meta.
+
+    `content_hash` (sha256) finds every asset with that exact content.
+    """
+    before_key, after_key = _page_keys(before, after)
+    grid = view == "grid"
+    rows = await adb.list_assets_page(
+        limit=limit + 1,
+        before=before_key,
+        after=after_key,
+        favorites_only=favorite,
+        engine=engine,
+        workflow_id=workflow_id,
+        job_status=job_status,
+        content_hash=content_hash,
+        summary=grid,
+    )
+    rows = _finish_page(rows, limit, after_key, response)
+    return [assetrow_to_grid(r) if grid else assetrow_to_out(r) for r in rows]
 
 
 @app.get("/api/assets/{asset_id}", response_model=AssetOut)
 async def get_asset(asset_id: str) -> AssetOut:
-    row = db.get_asset(asset_id)
+    row = await adb.get_asset(asset_id)
     if not row:
         raise HTTPException(status_code=404, detail="asset not found")
     return assetrow_to_out(row)
@@ -1273,7 +2042,7 @@ async def get_asset(asset_id: str) -> AssetOut:
 
 @app.post("/api/assets/{asset_id}/favorite", response_model=AssetOut)
 async def toggle_favorite(asset_id: str) -> AssetOut:
-    row = db.toggle_favorite(asset_id)
+    row = await adb.toggle_favorite(asset_id)
     if not row:
         raise HTTPException(status_code=404, detail="asset not found")
     out = assetrow_to_out(row)
@@ -1281,6 +2050,54 @@ async def toggle_favorite(asset_id: str) -> AssetOut:
     return out
 
 
+THUMB_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@app.get("/thumbs/{asset_id}")
+async def get_thumbnail(asset_id: str, request: Request, size: int = DEFAULT_THUMB_SIZE) -> Response:
+    """Serve a cached thumbnail, rendering it (and backfilling the content hash) on first use."""
+    if size not in THUMB_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {list(THUMB_SIZES)}")
+    row = await adb.get_asset(asset_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="asset not found")
+
+    src_path = os.path.join(ASSETS_DIR, row.filename)
+    content_hash = row.content_hash
+    if not content_hash:
+        # Assets stored before content hashing: hash once and remember it
+        try:
+            content_hash = await asyncio.to_thread(file_sha256, src_path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="asset file not found")
+        await adb.set_asset_content_hash(asset_id, content_hash)
+
+    etag = f'"{content_hash[:32]}-{size}-{thumbnails.fmt}"'
+    headers = {"ETag": etag, "Cache-Control": THUMB_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = await thumbnails.get(src_path, content_hash, size)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="asset file not found")
+    except Exception as e:
+        logger.warning(f"Thumbnail render failed for asset {asset_id}: {e}")
+        raise HTTPException(status_code=415, detail="thumbnail not available for this asset")
+    return FileResponse(path, media_type=thumbnails.media_type, headers=headers)
+
+
+async def _assets_snapshot(limit: int = 200) -> Dict[str, Any]:
+    """Newest assets as gallery tiles; `next_cursor` continues with /api/assets?before=."""
+    rows = await adb.list_assets_page(limit=limit + 1, summary=True)
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return {
+        "type": "assets_snapshot",
+        "payload": [assetrow_to_grid(r).model_dump() for r in rows[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+
 @app.websocket("/api/ws")
 async def websocket_endpoint(ws: WebSocket) -> None:
     await ws_manager.connect(ws)
@@ -1289,9 +2106,9 @@ async def websocket_endpoint(ws: WebSocket) -> None:
         await ws.send_json({"type": "hello", "payload": {"ok": True}})
         prefs = ws_manager.get_prefs(ws)
         if prefs.get("jobs", True):
-            await ws.send_json({"type": "jobs_snapshot", "payload": [jobrow_to_out(r).model_dump() for r in db.list_jobs(limit=200)]})
+            await ws.send_json({"type": "jobs_snapshot", "payload": [jobrow_to_out(r).model_dump() for r in await adb.list_jobs(limit=200)]})
         if prefs.get("assets", True):
-            await ws.send_json({"type": "assets_snapshot", "payload": [assetrow_to_out(r).model_dump() for r in db.list_assets(limit=200)]})
+            await ws.send_json(await _assets_snapshot())
 
         while True:
             raw = await ws.receive_text()
@@ -3,16 +3,63 @@ MCP tools for Cockpit image generation.
 
 These tools are designed to be called by LLMs via MCP protocol.
 All tools accept a CockpitApiClient for dependency injection (testability).
+Both blocking clients and async clients (whose methods return awaitables,
+e.g. AsyncRequestsCockpitApiClient) are supported.
 """
 
 import asyncio
+import inspect
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from .cockpit_api_client import CockpitApiClient
+from .job_events import JobEventStream
 
+# Polling interval when no job event stream is connected
 POLL_INTERVAL_SEC = 2
+# Safety-net re-check of all pending jobs while the event stream is connected
+EVENT_FALLBACK_POLL_SEC = 15
 MAX_COUNT = 100
 MAX_PROMPTS = 50
+# Concurrent POST /api/jobs (and GET /api/jobs/{id}) requests per tool call
+SUBMIT_CONCURRENCY = 8
+
+
+async def _resolve(value: Any) -> Any:
+    """Await client results from async clients; pass through blocking ones."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def _bounded_gather(
+    calls: List[Callable[[], Awaitable[Any]]],
+    limit: int,
+) -> List[Any]:
+    """Run calls concurrently, at most `limit` at a time.
+
+    Results keep the order of `calls`; a call that raised yields its exception.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(call: Callable[[], Awaitable[Any]]) -> Any:
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+
+
+async def _create_jobs(
+    client: CockpitApiClient,
+    workflow_id: str,
+    params_list: List[Dict[str, Any]],
+    max_concurrency: int,
+) -> List[Any]:
+    """POST one job per params dict; returns job dicts or exceptions, in order."""
+    calls = [
+        (lambda p=p: _resolve(client.create_job(workflow_id, p)))
+        for p in params_list
+    ]
+    return await _bounded_gather(calls, max_concurrency)
 
 
 def _coerce_seed(job_params: Dict[str, Any]) -> None:
@@ -51,6 +98,8 @@ def workflows_list(client: CockpitApiClient) -> Dict[str, Any]:
     """
     List all available workflows.
 
+    With an async client, returns an awaitable of the same result.
+
     Returns:
         {
             "workflows": [
@@ -65,13 +114,21 @@ def workflows_list(client: CockpitApiClient) -> Dict[str, Any]:
         }
     """
     workflows = client.list_workflows()
+    if inspect.isawaitable(workflows):
+        return _wrap_workflows(workflows)
     return {"workflows": workflows}
 
 
+async def _wrap_workflows(workflows: Awaitable[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    return {"workflows": await workflows}
+
+
 def workflow_get(client: CockpitApiClient, workflow_id: str) -> Dict[str, Any]:
     """
     Get details about a specific workflow.
 
+    With an async client, returns an awaitable of the same result.
+
     Args:
         workflow_id: The workflow ID to retrieve
 
@@ -99,6 +156,8 @@ async def images_generate(
     wait: bool = True,
     timeout_sec: int = 600,
     base_url: str = "http://127.0.0.1:8787",
+    events: Optional[JobEventStream] = None,
+    max_concurrency: int = SUBMIT_CONCURRENCY,
 ) -> Dict[str, Any]:
     """
     Generate images using a workflow.
@@ -108,9 +167,14 @@ async def images_generate(
         workflow_id: The workflow to use (default: flux2_klein_distilled)
         params: Parameters for the workflow (e.g., {"prompt": "a cat", "seed": 42})
         count: Number of images to generate with same params (different seeds)
-        wait: If True, poll until jobs complete. If False, return immediately.
+        wait: If True, wait until jobs complete. If False, return immediately.
         timeout_sec: Maximum time to wait for completion (seconds)
         base_url: Base URL of the Cockpit server (for constructing asset URLs)
+        events: Job event stream; jobs are re-fetched when the server pushes an
+            event for them. Without it, all pending jobs are polled every
+            POLL_INTERVAL_SEC.
+        max_concurrency: Maximum number of job requests in flight at once
+            (only matters for async clients)
 
     Returns:
         {
@@ -132,8 +196,7 @@ async def images_generate(
     if params is None:
         params = {}
 
-    # Create jobs with partial failure handling
-    jobs = []
+    params_list = []
     for i in range(count):
         job_params = params.copy()
         # Remove workflow_id from params to prevent collision
@@ -144,91 +207,29 @@ async def images_generate(
         # If seed is specified, increment for each additional job
         if count > 1 and "seed" in job_params and job_params["seed"] >= 0:
             job_params["seed"] = job_params["seed"] + i
+        params_list.append(job_params)
 
-        try:
-            job = client.create_job(workflow_id, job_params)
+    # Create jobs concurrently with partial failure handling
+    jobs = []
+    for job in await _create_jobs(client, workflow_id, params_list, max_concurrency):
+        if isinstance(job, Exception):
             jobs.append({
-                "job_id": job["id"],
-                "status": job["status"],
+                "job_id": None,
+                "status": "failed",
                 "outputs": [],
-                "error": job.get("error"),
+                "error": f"Job creation failed: {str(job)}",
             })
-        except Exception as e:
+        else:
             jobs.append({
-                "job_id": None,
-                "status": "failed",
+                "job_id": job["id"],
+                "status": job["status"],
                 "outputs": [],
-                "error": f"Job creation failed: {str(e)}",
+                "error": job.get("error"),
             })
 
-    # If wait=True, poll until completion
+    # If wait=True, wait until completion (pushed job events, polling as fallback)
     if wait:
-        start_time = time.time()
-        max_iterations = timeout_sec // POLL_INTERVAL_SEC + 10
-        iterations = 0
-        while True:
-            iterations += 1
-            if iterations > max_iterations:
-                # Force timeout to prevent infinite loop
-                for job_info in jobs:
-                    if job_info["status"] not in ("completed", "failed"):
-                        job_info["status"] = "timeout"
-                        job_info["error"] = f"Max iterations reached ({max_iterations})"
-                break
-
-            all_done = True
-            for job_info in jobs:
-                # Skip failed jobs (no job_id)
-                if job_info["job_id"] is None:
-                    continue
-                if job_info["status"] in ("queued", "running") or (
-                    job_info["status"] == "completed" and not job_info["outputs"]
-                ):
-                    # Poll job status
-                    job_id = job_info["job_id"]
-                    try:
-                        job_status = client.get_job(job_id)
-                        job_info["status"] = job_status["status"]
-                        job_info["error"] = job_status.get("error")
-                        if job_status["status"] == "completed":
-                            # Extract asset URLs
-                            outputs = job_status.get("outputs", [])
-                            # Convert to full URLs
-                            asset_urls = []
-                            for output in outputs:
-                                if isinstance(output, dict) and "filename" in output:
-                                    filename = output["filename"]
-                                    asset_urls.append(f"{base_url}/assets/{filename}")
-                                elif isinstance(output, str):
-                                    # Already a URL or filename
-                                    if output.startswith("http"):
-                                        asset_urls.append(output)
-                                    else:
-                                        asset_urls.append(f"{base_url}/assets/{output}")
-                            if asset_urls:
-                                job_info["outputs"] = asset_urls
-                    except Exception as e:
-                        job_info["status"] = "failed"
-                        job_info["error"] = str(e)
-
-                if job_info["status"] not in ("completed", "failed") or (
-                    job_info["status"] == "completed" and not job_info["outputs"]
-                ):
-                    all_done = False
-
-            if all_done:
-                break
-
-            # Check timeout
-            if time.time() - start_time > timeout_sec:
-                # Timeout - return partial results
-                for job_info in jobs:
-                    if job_info["status"] not in ("completed", "failed"):
-                        job_info["status"] = "timeout"
-                        job_info["error"] = f"Timeout after {timeout_sec}s"
-                break
-
-            await asyncio.sleep(POLL_INTERVAL_SEC)  # Non-blocking sleep
+        await _wait_for_jobs(client, jobs, timeout_sec, base_url, events, max_concurrency)
 
     return {
         "jobs": jobs,
@@ -244,6 +245,8 @@ async def images_generate_many(
     wait: bool = True,
     timeout_sec: int = 600,
     base_url: str = "http://127.0.0.1:8787",
+    events: Optional[JobEventStream] = None,
+    max_concurrency: int = SUBMIT_CONCURRENCY,
 ) -> Dict[str, Any]:
     """
     Generate multiple images with different prompts in batch.
@@ -256,9 +259,12 @@ async def images_generate_many(
         prompts: List of prompts to generate (e.g., ["a cat", "a dog", "a tree"])
         workflow_id: The workflow to use (default: flux2_klein_distilled)
         base_params: Base parameters to merge with each prompt (e.g., {"width": 512})
-        wait: If True, poll until all jobs complete. If False, return immediately.
+        wait: If True, wait until all jobs complete. If False, return immediately.
         timeout_sec: Maximum time to wait for all jobs to complete
         base_url: Base URL of the Cockpit server
+        events: Job event stream (see images_generate)
+        max_concurrency: Maximum number of job requests in flight at once; with
+            an async client the prompts are submitted concurrently
 
     Returns:
         {
@@ -281,30 +287,32 @@ async def images_generate_many(
     if base_params is None:
         base_params = {}
 
-    results = []
+    params_list = []
     for prompt in prompts:
         params = base_params.copy()
         # Remove workflow_id from params to prevent collision
         params.pop("workflow_id", None)
         params["prompt"] = prompt
+        params_list.append(params)
 
-        try:
-            # Generate single image (wait=False initially)
-            job = client.create_job(workflow_id, params)
+    results = []
+    created = await _create_jobs(client, workflow_id, params_list, max_concurrency)
+    for prompt, job in zip(prompts, created):
+        if isinstance(job, Exception):
             results.append({
                 "prompt": prompt,
-                "job_id": job["id"],
-                "status": job["status"],
+                "job_id": None,
+                "status": "failed",
                 "outputs": [],
-                "error": job.get("error"),
+                "error": f"Job creation failed: {str(job)}",
             })
-        except Exception as e:
+        else:
             results.append({
                 "prompt": prompt,
-                "job_id": None,
-                "status": "failed",
+                "job_id": job["id"],
+                "status": job["status"],
                 "outputs": [],
-                "error": f"Job creation failed: {str(e)}",
+                "error": job.get("error"),
             })
 
     if not wait:
@@ -313,70 +321,104 @@ async def images_generate_many(
             "ui_url": f"{base_url}/",
         }
 
-    # Poll all jobs
+    await _wait_for_jobs(client, results, timeout_sec, base_url, events, max_concurrency)
+
+    return {
+        "results": results,
+        "ui_url": f"{base_url}/",
+    }
+
+
+def _output_urls(outputs: List[Any], base_url: str) -> List[str]:
+    """Convert job outputs (dicts with filename, filenames or URLs) to full URLs."""
+    asset_urls = []
+    for output in outputs:
+        if isinstance(output, dict) and "filename" in output:
+            asset_urls.append(f"{base_url}/assets/{output['filename']}")
+        elif isinstance(output, str):
+            # Already a URL or filename
+            if output.startswith("http"):
+                asset_urls.append(output)
+            else:
+                asset_urls.append(f"{base_url}/assets/{output}")
+    return asset_urls
+
+
+def _needs_refresh(entry: Dict[str, Any]) -> bool:
+    return entry["status"] in ("queued", "running") or (
+        entry["status"] == "completed" and not entry["outputs"]
+    )
+
+
+def _is_finished(entry: Dict[str, Any]) -> bool:
+    return entry["status"] in ("completed", "failed") and not (
+        entry["status"] == "completed" and not entry["outputs"]
+    )
+
+
+async def _refresh_entry(client: CockpitApiClient, entry: Dict[str, Any], base_url: str) -> None:
+    """Update a result entry from GET /api/jobs/{id}."""
+    try:
+        job_status = await _resolve(client.get_job(entry["job_id"]))
+        entry["status"] = job_status["status"]
+        entry["error"] = job_status.get("error")
+        if job_status["status"] == "completed":
+            asset_urls = _output_urls(job_status.get("outputs", []), base_url)
+            if asset_urls:
+                entry["outputs"] = asset_urls
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["error"] = str(e)
+
+
+async def _wait_for_jobs(
+    client: CockpitApiClient,
+    entries: List[Dict[str, Any]],
+    timeout_sec: int,
+    base_url: str,
+    events: Optional[JobEventStream] = None,
+    max_concurrency: int = SUBMIT_CONCURRENCY,
+) -> None:
+    """Refresh entries (dicts with job_id/status/outputs/error) until all finish or time out.
+
+    With an event stream, only jobs the server reported changes for are
+    re-fetched; all pending jobs are re-checked every EVENT_FALLBACK_POLL_SEC
+    (POLL_INTERVAL_SEC while the stream is disconnected). Without one, every
+    pending job is polled each POLL_INTERVAL_SEC. Up to max_concurrency jobs
+    are re-fetched at once.
+    """
     start_time = time.time()
-    max_iterations = timeout_sec // POLL_INTERVAL_SEC + 10
-    iterations = 0
+    to_check = {e["job_id"] for e in entries if e["job_id"] is not None}
     while True:
-        iterations += 1
-        if iterations > max_iterations:
-            # Force timeout to prevent infinite loop
-            for result in results:
-                if result["status"] not in ("completed", "failed"):
-                    result["status"] = "timeout"
-                    result["error"] = f"Max iterations reached ({max_iterations})"
-            break
-
-        all_done = True
-        for result in results:
+        stale = [
+            entry for entry in entries
             # Skip failed jobs (no job_id)
-            if result["job_id"] is None:
-                continue
-            if result["status"] in ("queued", "running") or (
-                result["status"] == "completed" and not result["outputs"]
-            ):
-                job_id = result["job_id"]
-                try:
-                    job_status = client.get_job(job_id)
-                    result["status"] = job_status["status"]
-                    result["error"] = job_status.get("error")
-                    if job_status["status"] == "completed":
-                        outputs = job_status.get("outputs", [])
-                        asset_urls = []
-                        for output in outputs:
-                            if isinstance(output, dict) and "filename" in output:
-                                filename = output["filename"]
-                                asset_urls.append(f"{base_url}/assets/{filename}")
-                            elif isinstance(output, str):
-                                if output.startswith("http"):
-                                    asset_urls.append(output)
-                                else:
-                                    asset_urls.append(f"{base_url}/assets/{output}")
-                        if asset_urls:
-                            result["outputs"] = asset_urls
-                except Exception as e:
-                    result["status"] = "failed"
-                    result["error"] = str(e)
-
-            if result["status"] not in ("completed", "failed") or (
-                result["status"] == "completed" and not result["outputs"]
-            ):
-                all_done = False
-
-        if all_done:
+            if entry["job_id"] is not None and entry["job_id"] in to_check and _needs_refresh(entry)
+        ]
+        await _bounded_gather(
+            [(lambda e=e: _refresh_entry(client, e, base_url)) for e in stale],
+            max_concurrency,
+        )
+
+        pending = [e["job_id"] for e in entries if e["job_id"] is not None and not _is_finished(e)]
+        if not pending:
             break
 
-        if time.time() - start_time > timeout_sec:
-            # Timeout
-            for result in results:
-                if result["status"] not in ("completed", "failed"):
-                    result["status"] = "timeout"
-                    result["error"] = f"Timeout after {timeout_sec}s"
+        remaining = timeout_sec - (time.time() - start_time)
+        if remaining <= 0:
+            # Timeout - return partial results
+            for entry in entries:
+                if entry["status"] not in ("completed", "failed"):
+                    entry["status"] = "timeout"
+                    entry["error"] = f"Timeout after {timeout_sec}s"
             break
 
-        await asyncio.sleep(POLL_INTERVAL_SEC)  # Non-blocking sleep
+        if events is None:
+            await asyncio.sleep(min(POLL_INTERVAL_SEC, remaining))  # Non-blocking sleep
+            to_check = set(pending)
+            continue
 
-    return {
-        "results": results,
-        "ui_url": f"{base_url}/",
-    }
+        interval = EVENT_FALLBACK_POLL_SEC if events.connected else POLL_INTERVAL_SEC
+        to_check = await events.wait(pending, min(interval, remaining))
+        if not to_check:
+            to_check = set(pending)  # no events in time: poll everything once
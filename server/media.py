@@ -0,0 +1,108 @@
+"""Media kinds of ComfyUI outputs, and poster frames for video thumbnails."""
+from __future__ import annotations
+
+import mimetypes
+import os
+import shutil
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+# Keys under which ComfyUI nodes report output files in /history. Core nodes use
+# "images" (also for SaveAnimatedWEBP/PNG and SaveVideo, flagged "animated") and
+# "audio"; VideoHelperSuite's Video Combine uses "gifs".
+OUTPUT_KEYS = ("images", "gifs", "videos", "video", "audio")
+
+ANIMATION_EXTS = {".gif", ".apng"}
+VIDEO_EXTS = {".mp4", ".webm", ".mov", ".mkv", ".avi", ".m4v"}
+AUDIO_EXTS = {".wav", ".mp3", ".flac", ".ogg", ".opus", ".m4a", ".aac"}
+
+# A poster frame is grabbed this far into a video (first frame for shorter clips).
+POSTER_OFFSET_SEC = 0.5
+POSTER_TIMEOUT_SEC = 30.0
+
+
+def media_kind(filename: str, info: Optional[Dict[str, Any]] = None) -> str:
+    """"image", "animation", "video" or "audio" for an output file.
+
+    `info` is the file's /history entry; an `animated` flag (or a "gifs" entry
+    with a video format) refines what the extension says.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    info = info or {}
+    if ext in VIDEO_EXTS or str(info.get("format", "")).startswith("video/"):
+        return "video"
+    if ext in AUDIO_EXTS:
+        return "audio"
+    if ext in ANIMATION_EXTS or info.get("animated"):
+        return "animation"
+    return "image"
+
+
+def media_type(filename: str) -> str:
+    guessed, _ = mimetypes.guess_type(filename)
+    if guessed:
+        return guessed
+    ext = os.path.splitext(filename)[1].lower()
+    return {".webp": "image/webp", ".webm": "video/webm", ".mkv": "video/x-matroska", ".opus": "audio/opus"}.get(
+        ext, "application/octet-stream"
+    )
+
+
+def collect_output_files(outputs: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Flatten /history outputs into (node_id, file_info) pairs, every output kind.
+
+    Each file_info is the node's entry plus "kind" (see media_kind); a file
+    reported under several keys is listed once.
+    """
+    files: List[Tuple[str, Dict[str, Any]]] = []
+    seen = set()
+    for node_id, node_output in outputs.items():
+        if not isinstance(node_output, dict):
+            continue
+        animated = node_output.get("animated")
+        for key in OUTPUT_KEYS:
+            entries = node_output.get(key)
+            if not isinstance(entries, list):
+                continue
+            for i, info in enumerate(entries):
+                if not isinstance(info, dict) or not info.get("filename"):
+                    continue
+                ident = (info.get("filename"), info.get("subfolder", ""), info.get("type", "output"))
+                if ident in seen:
+                    continue
+                seen.add(ident)
+                info = dict(info)
+                if isinstance(animated, list) and i < len(animated) and animated[i]:
+                    info["animated"] = True
+                info["kind"] = "audio" if key == "audio" else media_kind(str(info["filename"]), info)
+                files.append((str(node_id), info))
+    return files
+
+
+def extract_poster_frame(src_path: str, offset_sec: float = POSTER_OFFSET_SEC) -> bytes:
+    """One video frame as PNG bytes, decoded by ffmpeg.
+
+    ffmpeg seeks to the frame instead of decoding the whole file, so even
+    multi-GB videos cost a few reads. Clips shorter than `offset_sec` fall back
+    to their first frame.
+
+    Raises:
+        RuntimeError: If ffmpeg is not installed or cannot decode the file
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is not installed; video thumbnails are unavailable")
+    for offset in (offset_sec, 0.0):
+        result = subprocess.run(
+            [
+                ffmpeg, "-v", "error", "-ss", f"{offset:.3f}", "-i", src_path,
+                "-frames:v", "1", "-f", "image2pipe", "-vcodec", "png", "-",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=POSTER_TIMEOUT_SEC,
+            check=False,
+        )
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    raise RuntimeError(f"ffmpeg could not extract a frame: {result.stderr.decode(errors='replace')[:500]}")
@@ -1,11 +1,20 @@
 """Model scanner utility for enumerating checkpoint and VAE files."""
 from __future__ import annotations
+import asyncio
+import hashlib
 import logging
+import os
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_EXTENSIONS = [".safetensors", ".ckpt", ".pt"]
+# Bytes read from each end of a file for the partial hash
+PARTIAL_HASH_BYTES = 1024 * 1024
+
 
 def scan_models(directory: str, extensions: List[str] = None) -> List[str]:
     """
@@ -15,12 +24,14 @@ def scan_models(directory: str, extensions: List[str] = None) -> List[str]:
         directory: Path to directory containing models
         extensions: List of file extensions (default: [".safetensors", ".ckpt", ".pt"])
 
+    Subfolders are searched recursively, as ComfyUI does.
+
     Returns:
-        Sorted list of model filenames (not full paths)
+        Sorted list of model filenames relative to `directory` (not full paths)
         Returns empty list if directory doesn't exist or is empty
     """
     if extensions is None:
-        extensions = [".safetensors", ".ckpt", ".pt"]
+        extensions = DEFAULT_EXTENSIONS
 
     path = Path(directory)
 
@@ -33,12 +44,10 @@ def scan_models(directory: str, extensions: List[str] = None) -> List[str]:
         return []
 
     try:
-        models = []
-        for ext in extensions:
-            models.extend(path.glob(f"*{ext}"))
-
-        # Return filenames only (ComfyUI expects filenames, not paths)
-        filenames = [f.name for f in models]
+        files, _ = _walk_models(str(path), extensions)
+        # Return names relative to the directory (ComfyUI expects "sub/model.safetensors"
+        # for models in subfolders, plain filenames otherwise)
+        filenames = [name for name, _st in files]
         logger.info(f"Found {len(filenames)} models in {directory}")
         return sorted(filenames)
     except PermissionError as e:
@@ -57,3 +66,204 @@ def scan_checkpoints(checkpoints_dir: str) -> List[str]:
 def scan_vaes(vae_dir: str) -> List[str]:
     """Convenience wrapper for VAE scanning."""
     return scan_models(vae_dir)
+
+
+def _walk_models(
+    directory: str, extensions: Iterable[str]
+) -> Tuple[List[Tuple[str, os.stat_result]], Dict[str, int]]:
+    """Walk `directory` recursively in one pass.
+
+    Symlinked folders are followed, but each folder is only walked once (by
+    device and inode), so a link back up the tree does not loop.
+
+    Returns:
+        ([(relative name, stat)] for matching files, {dir path: mtime_ns} for every
+        directory visited)
+    """
+    suffixes = tuple(ext.lower() for ext in extensions)
+    files: List[Tuple[str, os.stat_result]] = []
+    dir_mtimes: Dict[str, int] = {}
+    visited: Set[Tuple[int, int]] = set()
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            st = os.stat(current)
+            if (st.st_dev, st.st_ino) in visited:
+                continue
+            visited.add((st.st_dev, st.st_ino))
+            dir_mtimes[current] = st.st_mtime_ns
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError as e:
+            if current == directory:
+                raise
+            logger.warning(f"Skipping unreadable model folder {current}: {e}")
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=True):
+                pending.append(entry.path)
+            elif entry.name.lower().endswith(suffixes):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue  # removed while scanning
+                files.append((os.path.relpath(entry.path, directory), st))
+    return files, dir_mtimes
+
+
+def partial_hash(path: str, size: int) -> str:
+    """Hex sha256 over the file size and its first and last PARTIAL_HASH_BYTES.
+
+    Cheap enough for multi-GB checkpoints on network storage, and distinct for
+    different model files in practice. Not a full content hash.
+    """
+    digest = hashlib.sha256(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        if size > 2 * PARTIAL_HASH_BYTES:
+            f.seek(size - PARTIAL_HASH_BYTES)
+            digest.update(f.read(PARTIAL_HASH_BYTES))
+        elif size > PARTIAL_HASH_BYTES:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ModelFile:
+    """One indexed model file."""
+
+    name: str  # relative to the model directory, as ComfyUI lists it
+    size: int
+    mtime_ns: int
+    partial_hash: Optional[str] = None
+
+
+@dataclass
+class _DirectoryIndex:
+    files: List[ModelFile]
+    dir_mtimes: Dict[str, int]
+    scanned_at: float
+    checked_at: float
+
+
+class ModelIndex:
+    """In-memory index of model directories, scanned off the event loop.
+
+    A directory is walked once (recursively) and then served from memory. It is
+    rescanned when the mtime of any of its folders changes (a file was added,
+    removed or renamed), checked at most every `recheck_sec`, or after `ttl_sec`
+    regardless. Rescans reuse the partial hash of files whose size and mtime are
+    unchanged.
+    """
+
+    def __init__(
+        self,
+        *,
+        extensions: Optional[List[str]] = None,
+        ttl_sec: float = 300.0,
+        recheck_sec: float = 5.0,
+        hash_files: bool = False,
+        clock=time.monotonic,
+    ) -> None:
+        self.extensions = list(extensions or DEFAULT_EXTENSIONS)
+        self.ttl_sec = ttl_sec
+        self.recheck_sec = recheck_sec
+        self.hash_files = hash_files
+        self._clock = clock
+        self._index: Dict[str, _DirectoryIndex] = {}
+        self._inflight: Dict[str, "asyncio.Future[_DirectoryIndex]"] = {}
+
+    async def choices(self, directory: str) -> List[str]:
+        """Sorted model names in `directory` (empty if it is missing or unreadable)."""
+        return [f.name for f in await self.files(directory)]
+
+    async def files(self, directory: str) -> List[ModelFile]:
+        """Indexed files of `directory`, refreshed first if stale."""
+        key = os.path.abspath(directory)
+        entry = self._index.get(key)
+        now = self._clock()
+        if entry is not None and now - entry.scanned_at < self.ttl_sec:
+            if now - entry.checked_at < self.recheck_sec:
+                return entry.files
+            if not await asyncio.to_thread(self._changed, entry):
+                entry.checked_at = self._clock()
+                return entry.files
+        return (await self._refresh(key)).files
+
+    async def warm(self, directories: Iterable[str]) -> None:
+        """Index directories in the background (called at startup)."""
+        for directory in directories:
+            try:
+                await self.files(directory)
+            except Exception as e:
+                logger.warning(f"Model index warm-up failed for {directory}: {e}")
+
+    def invalidate(self, directory: Optional[str] = None) -> None:
+        """Force a rescan of one directory (or all) on next access."""
+        if directory is None:
+            self._index.clear()
+        else:
+            self._index.pop(os.path.abspath(directory), None)
+
+    async def _refresh(self, key: str) -> _DirectoryIndex:
+        # Concurrent requests for the same directory share one scan
+        loop = asyncio.get_running_loop()
+        fut = self._inflight.get(key)
+        if fut is None or fut.get_loop() is not loop:
+            fut = asyncio.ensure_future(asyncio.to_thread(self.scan, key))
+            self._inflight[key] = fut
+
+            def _done(f: "asyncio.Future[_DirectoryIndex]") -> None:
+                if self._inflight.get(key) is f:
+                    del self._inflight[key]
+
+            fut.add_done_callback(_done)
+        entry = await asyncio.shield(fut)
+        self._index[key] = entry
+        return entry
+
+    def scan(self, directory: str) -> _DirectoryIndex:
+        """Walk a directory now (blocking). Missing or unreadable directories index as empty."""
+        key = os.path.abspath(directory)
+        previous = {f.name: f for f in self._index[key].files} if key in self._index else {}
+        start = time.perf_counter()
+        try:
+            found, dir_mtimes = _walk_models(key, self.extensions)
+        except FileNotFoundError:
+            logger.warning(f"Model directory does not exist: {directory}")
+            found, dir_mtimes = [], {}
+        except OSError as e:
+            logger.error(f"Error scanning {directory}: {e}")
+            found, dir_mtimes = [], {}
+
+        files = []
+        for name, st in found:
+            digest = None
+            if self.hash_files:
+                old = previous.get(name)
+                if old is not None and old.size == st.st_size and old.mtime_ns == st.st_mtime_ns:
+                    digest = old.partial_hash
+                if digest is None:
+                    try:
+                        digest = partial_hash(os.path.join(key, name), st.st_size)
+                    except OSError:
+                        digest = None
+            files.append(ModelFile(name, st.st_size, st.st_mtime_ns, digest))
+        files.sort(key=lambda f: f.name)
+
+        logger.info(f"Indexed {len(files)} models in {directory} ({time.perf_counter() - start:.3f}s)")
+        now = self._clock()
+        return _DirectoryIndex(files=files, dir_mtimes=dir_mtimes, scanned_at=now, checked_at=now)
+
+    @staticmethod
+    def _changed(entry: _DirectoryIndex) -> bool:
+        if not entry.dir_mtimes:
+            return True  # directory was missing; see if it exists now
+        for path, mtime_ns in entry.dir_mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
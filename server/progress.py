@@ -0,0 +1,125 @@
+"""Coalesced progress persistence and throttled broadcasts for ComfyUI progress events."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .db import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+
+def progress_payload(job_id: str, prompt_id: str, value: float, maxv: float) -> Dict[str, Any]:
+    return {"job_id": job_id, "prompt_id": prompt_id, "value": value, "max": maxv}
+
+
+class ProgressTracker:
+    """Keeps the latest progress per job in memory and persists it in batches.
+
+    - record() is called for every ComfyUI `progress` message and only touches memory.
+      It returns True when a job_progress broadcast is due for that job.
+    - flush() writes every pending value in one transaction; run() does this on a timer.
+    - pop() hands a job's pending value to the caller, so a state change can write
+      status and progress in a single (durable) update.
+
+    Broadcasts are throttled to `broadcast_hz` per job (0 disables throttling). The
+    final step of a run is always broadcast, and run() emits a trailing event for
+    values that were throttled, so clients always see the latest progress.
+    """
+
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        *,
+        flush_interval: float = 1.0,
+        broadcast_hz: float = 4.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._db = db
+        self.flush_interval = flush_interval
+        self.broadcast_hz = broadcast_hz
+        self._clock = clock
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        self._last_broadcast: Dict[str, float] = {}
+        self._unsent: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def broadcast_interval(self) -> float:
+        return 1.0 / self.broadcast_hz if self.broadcast_hz > 0 else 0.0
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def record(self, job_id: str, prompt_id: str, value: float, maxv: float) -> bool:
+        """Store the latest progress for a job; return True if it should be broadcast now."""
+        self._pending[job_id] = (value, maxv)
+
+        now = self._clock()
+        last = self._last_broadcast.get(job_id)
+        is_final = maxv > 0 and value >= maxv
+        if last is None or is_final or now - last >= self.broadcast_interval:
+            self._last_broadcast[job_id] = now
+            self._unsent.pop(job_id, None)
+            return True
+
+        self._unsent[job_id] = progress_payload(job_id, prompt_id, value, maxv)
+        return False
+
+    def take_due_broadcasts(self) -> List[Dict[str, Any]]:
+        """Return throttled payloads whose window has passed (trailing-edge events)."""
+        now = self._clock()
+        due: List[Dict[str, Any]] = []
+        for job_id, payload in list(self._unsent.items()):
+            if now - self._last_broadcast.get(job_id, 0.0) >= self.broadcast_interval:
+                due.append(payload)
+                self._last_broadcast[job_id] = now
+                del self._unsent[job_id]
+        return due
+
+    def pop(self, job_id: str) -> Dict[str, float]:
+        """Remove a job's pending progress and return it as update_job() kwargs."""
+        self._unsent.pop(job_id, None)
+        pending = self._pending.pop(job_id, None)
+        if pending is None:
+            return {}
+        return {"progress_value": pending[0], "progress_max": pending[1]}
+
+    def forget(self, job_id: str) -> None:
+        """Drop all state for a job that reached a terminal state."""
+        self._pending.pop(job_id, None)
+        self._unsent.pop(job_id, None)
+        self._last_broadcast.pop(job_id, None)
+
+    async def flush(self) -> int:
+        """Persist all pending progress in one transaction. Returns the number of jobs written."""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        try:
+            await self._db.update_jobs_progress([(job_id, v, m) for job_id, (v, m) in batch.items()])
+        except Exception:
+            # Put values back unless newer ones arrived meanwhile; retry on the next tick.
+            for job_id, vm in batch.items():
+                self._pending.setdefault(job_id, vm)
+            raise
+        return len(batch)
+
+    async def run(self, broadcast: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> None:
+        """Background loop: flush every `flush_interval`, emit trailing broadcasts."""
+        tick = max(0.05, self.flush_interval)
+        if 0 < self.broadcast_interval < tick:
+            tick = self.broadcast_interval
+        last_flush = self._clock()
+        while True:
+            await asyncio.sleep(tick)
+            if broadcast is not None:
+                for payload in self.take_due_broadcasts():
+                    await broadcast({"type": "job_progress", "payload": payload})
+            if self._clock() - last_flush >= self.flush_interval:
+                last_flush = self._clock()
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.warning(f"Progress flush failed: {e}")
@@ -0,0 +1,118 @@
+"""Quality gate for harvested images: runs manifest quality_checks in a worker pool."""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .image_quality import ImageQualityError, check_image_quality, get_quality_params_from_manifest
+from .workers import WorkerPool
+
+# off:        no checks
+# flag:       failing outputs are kept, meta["quality"]["passed"] is False
+# quarantine: failing outputs are moved out of the gallery and no asset is created
+QUALITY_GATE_MODES = ("off", "flag", "quarantine")
+
+# Failure reasons kept per job report (counts are always complete).
+MAX_REPORTED_FAILURES = 20
+
+
+def check_file(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run check_image_quality on a stored file. Runs in a worker process.
+
+    Returns:
+        Dict with 'passed', 'reason' (None when passed) and 'stats'
+        (ImageQualityStats as a dict, None if the image could not be decoded)
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        stats = check_image_quality(data, **params)
+    except ImageQualityError as e:
+        return {"passed": False, "reason": str(e), "stats": e.stats.to_dict() if e.stats else None}
+    except Exception as e:
+        # Truncated or undecodable output counts as a failed generation
+        return {"passed": False, "reason": f"Unreadable image: {e}", "stats": None}
+    return {"passed": True, "reason": None, "stats": stats.to_dict() if stats else None}
+
+
+@dataclass
+class QualityReport:
+    """Pass/fail counts for the outputs of one job."""
+
+    passed: int = 0
+    failed: int = 0
+    quarantined: int = 0
+    failures: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def checked(self) -> int:
+        return self.passed + self.failed
+
+    def record(
+        self,
+        filename: str,
+        result: Dict[str, Any],
+        *,
+        subfolder: str = "",
+        quarantined: bool = False,
+        stored_as: Optional[str] = None,
+    ) -> None:
+        """Count one checked output.
+
+        `filename`/`subfolder` are ComfyUI's names for it; `stored_as` is where
+        it was kept (the asset's blob path, or the file name in the quarantine
+        directory).
+        """
+        if result["passed"]:
+            self.passed += 1
+            return
+        self.failed += 1
+        if quarantined:
+            self.quarantined += 1
+        if len(self.failures) < MAX_REPORTED_FAILURES:
+            self.failures.append({
+                "filename": filename,
+                "subfolder": subfolder,
+                "stored_as": stored_as,
+                "reason": result["reason"],
+                "quarantined": quarantined,
+            })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class QualityGate:
+    """Checks harvested images against a workflow's `quality_checks`.
+
+    Checks run in a process pool, so a batch of outputs is decoded in parallel
+    and the event loop only awaits the results.
+    """
+
+    def __init__(self, *, mode: str = "flag", workers: int = 2) -> None:
+        if mode not in QUALITY_GATE_MODES:
+            raise ValueError(f"Unsupported quality gate mode: {mode} (expected one of {list(QUALITY_GATE_MODES)})")
+        self.mode = mode
+        self._pool = WorkerPool(workers)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def quarantine(self) -> bool:
+        return self.mode == "quarantine"
+
+    async def check(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._pool.run(check_file, path, params)
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+def quality_params_for(manifest: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """check_image_quality kwargs for a manifest, or None if it defines no quality_checks."""
+    if not manifest or not isinstance(manifest.get("quality_checks"), dict):
+        return None
+    params = get_quality_params_from_manifest(manifest)
+    return None if params.get("skip_checks") else params
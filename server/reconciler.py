@@ -0,0 +1,245 @@
+"""Reconciler: settles jobs whose ComfyUI websocket events were missed."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .db import JobRow, PageKey, utc_now_iso
+
+logger = logging.getLogger(__name__)
+
+# Messages in a history entry's status that mean the prompt did not finish.
+FAILURE_MESSAGES = ("execution_error", "execution_interrupted")
+
+# ComfyUI trims its history to this many entries (MAXIMUM_HISTORY_SIZE), so a
+# /history?max_items= window of this size holds everything it still knows.
+COMFY_MAX_HISTORY = 10000
+
+
+def history_error(entry: Dict[str, Any]) -> Optional[str]:
+    """The failure recorded in a /history entry, or None if the prompt succeeded.
+
+    ComfyUI only writes a history entry once a prompt has stopped executing, so
+    an entry without an error or interrupt message is a completed prompt.
+    """
+    status = entry.get("status") or {}
+    for message in status.get("messages") or []:
+        if isinstance(message, (list, tuple)) and len(message) == 2 and message[0] in FAILURE_MESSAGES:
+            return json.dumps(message[1])[:2000]
+    if status.get("status_str") == "error":
+        return json.dumps(status)[:2000]
+    return None
+
+
+def _queue_prompt_ids(items: Any) -> Set[str]:
+    # Queue items are [number, prompt_id, prompt, extra_data, outputs_to_execute]
+    return {str(item[1]) for item in items or [] if isinstance(item, (list, tuple)) and len(item) > 1}
+
+
+@dataclass
+class _Snapshot:
+    taken_at: str
+    running: Set[str]
+    pending: Set[str]
+    history: Dict[str, Any]
+    truncated: bool  # history response was full; older prompts may be missing
+
+
+class Reconciler:
+    """Brings unsettled jobs in line with ComfyUI's /queue and /history.
+
+    Job state normally follows ComfyUI's websocket events, and events sent while
+    the socket was down (or the cockpit was not running) are lost. A pass reads
+    the unsettled jobs (Database.list_unsettled_jobs) in pages of `batch_size`
+    and compares them with a single /queue and a single /history?max_items=
+    response, fetched once per pass and only if there is anything to check
+    (ComfyUI has no endpoint that returns both):
+
+    - still in ComfyUI's queue: left alone (marked running if ComfyUI runs it)
+    - in the history with an error or interrupt: failed
+    - in the history otherwise: completed and harvested via complete(), which
+      must be a no-op for jobs already harvested
+    - in neither: failed as lost. If the history response was full the job may
+      be older than that window; then, once per pass, the history is fetched
+      again with `full_history_items` entries (all ComfyUI keeps) and the job
+      is checked against that.
+
+    A pass therefore makes two HTTP calls, three at most, however many jobs
+    and batches it covers.
+
+    Jobs that changed after the snapshot was taken are skipped until the next
+    pass. trigger() runs a pass in the background; triggers during a pass
+    schedule one more pass after it.
+    """
+
+    def __init__(
+        self,
+        client: Callable[[], Any],
+        list_unsettled: Callable[[int, Optional[PageKey]], Awaitable[List[JobRow]]],
+        *,
+        complete: Callable[[JobRow, Dict[str, Any]], Awaitable[None]],
+        fail: Callable[[str, str], Awaitable[None]],
+        mark_running: Callable[[str], Awaitable[None]],
+        history_items: int = 500,
+        full_history_items: int = COMFY_MAX_HISTORY,
+        batch_size: int = 200,
+    ) -> None:
+        self._client = client
+        self._list_unsettled = list_unsettled
+        self._complete = complete
+        self._fail = fail
+        self._mark_running = mark_running
+        self.history_items = max(1, history_items)
+        self.full_history_items = max(self.history_items, full_history_items)
+        self.batch_size = max(1, batch_size)
+
+        self._task: Optional[asyncio.Task] = None
+        self._again = False
+        self.passes = 0
+        self.completed = 0
+        self.failed = 0
+        self.lost = 0
+        self.widened = 0
+        self.errors = 0
+        self.last_pass_at: Optional[float] = None
+        self.last_pass_ms: Optional[float] = None
+
+    def trigger(self) -> None:
+        """Start a pass in the background (or queue one if a pass is running)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            self._again = True
+            return
+        self._again = False
+        self._task = loop.create_task(self._run())
+
+    async def close(self) -> None:
+        """Cancel a running pass (the next startup reconciles again)."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "passes": self.passes,
+            "completed": self.completed,
+            "failed": self.failed,
+            "lost": self.lost,
+            "widened": self.widened,
+            "errors": self.errors,
+            "last_pass_at": self.last_pass_at,
+            "last_pass_ms": self.last_pass_ms,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Job reconciliation failed: {e}")
+            if not self._again:
+                return
+            self._again = False
+
+    async def reconcile(self) -> None:
+        """Run one pass over all unsettled jobs."""
+        start = time.perf_counter()
+        snapshot: Optional[_Snapshot] = None
+        after: Optional[PageKey] = None
+        while True:
+            jobs = await self._list_unsettled(self.batch_size, after)
+            if not jobs:
+                break
+            after = (jobs[-1].created_at, jobs[-1].id)
+            if snapshot is None:
+                snapshot = await self._snapshot()
+            deferred = await self._settle_all(jobs, snapshot)
+            if deferred:
+                # Older than the history window: widen it once for the rest of the pass
+                snapshot = await self._widen(snapshot)
+                await self._settle_all(deferred, snapshot)
+            if len(jobs) < self.batch_size:
+                break
+        self.passes += 1
+        self.last_pass_at = time.time()
+        self.last_pass_ms = round((time.perf_counter() - start) * 1000.0, 2)
+
+    async def _snapshot(self) -> _Snapshot:
+        taken_at = utc_now_iso()
+        client = self._client()
+        # Queue first: a prompt finishing in between then shows up in the history
+        # instead of in neither
+        queue = await client.get_queue()
+        history = await client.get_recent_history(self.history_items)
+        return _Snapshot(
+            taken_at=taken_at,
+            running=_queue_prompt_ids(queue.get("queue_running")),
+            pending=_queue_prompt_ids(queue.get("queue_pending")),
+            history=history or {},
+            truncated=len(history or {}) >= self.history_items,
+        )
+
+    async def _widen(self, snapshot: _Snapshot) -> _Snapshot:
+        self.widened += 1
+        history = await self._client().get_recent_history(self.full_history_items)
+        return _Snapshot(
+            taken_at=snapshot.taken_at,
+            running=snapshot.running,
+            pending=snapshot.pending,
+            history=history or {},
+            truncated=False,  # nothing older to fetch
+        )
+
+    async def _settle_all(self, jobs: List[JobRow], snapshot: _Snapshot) -> List[JobRow]:
+        """Settle jobs; returns those that need a wider history window."""
+        deferred: List[JobRow] = []
+        for job in jobs:
+            try:
+                if not await self._settle(job, snapshot):
+                    deferred.append(job)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Reconciling job {job.id} failed: {e}")
+        return deferred
+
+    async def _settle(self, job: JobRow, snapshot: _Snapshot) -> bool:
+        """Settle one job; False if it may be older than the history window."""
+        prompt_id = str(job.prompt_id)
+        if prompt_id in snapshot.running:
+            if job.status == "queued":
+                await self._mark_running(job.id)
+            return True
+        if prompt_id in snapshot.pending:
+            return True
+
+        entry = snapshot.history.get(prompt_id)
+        if entry is None and snapshot.truncated:
+            return False
+        if entry is None:
+            await self._settle_lost(job, snapshot)
+            return True
+
+        error = history_error(entry)
+        if error is not None and job.status != "completed":
+            self.failed += 1
+            await self._fail(job.id, error)
+        else:
+            self.completed += 1
+            await self._complete(job, entry)
+        return True
+
+    async def _settle_lost(self, job: JobRow, snapshot: _Snapshot) -> None:
+        if job.updated_at > snapshot.taken_at:
+            return  # changed since the snapshot; the next pass decides
+        self.lost += 1
+        if job.status == "completed":
+            # Finished, but ComfyUI no longer has its outputs (e.g. restarted)
+            await self._complete(job, {})
+        else:
+            await self._fail(job.id, "Prompt not found in ComfyUI queue or history (ComfyUI restarted?)")
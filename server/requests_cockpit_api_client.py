@@ -1,11 +1,14 @@
 """
-Real HTTP implementation of CockpitApiClient using httpx.
+Real HTTP implementations of CockpitApiClient using httpx.
 
-Makes actual HTTP requests to the Cockpit server.
+Makes actual HTTP requests to the Cockpit server. RequestsCockpitApiClient is
+blocking; AsyncRequestsCockpitApiClient is the pooled async variant used by
+the MCP server.
 """
 
+import asyncio
 import httpx
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 class RequestsCockpitApiClient:
@@ -88,3 +91,133 @@ class RequestsCockpitApiClient:
             response = client.get(url)
             response.raise_for_status()
             return response.json()
+
+
+# Statuses worth retrying: the server is overloaded or a proxy could not reach it.
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class AsyncRequestsCockpitApiClient:
+    """Async HTTP client for Cockpit API (async implementation of CockpitApiClient).
+
+    Uses one persistent httpx.AsyncClient, so calls reuse pooled keep-alive
+    connections and never block the event loop. Failed requests are retried
+    with exponential backoff: GETs on transport errors and RETRY_STATUSES,
+    POST /api/jobs only when the request cannot have reached the server
+    (connect errors) or on 429, so a job is never created twice.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:8787",
+        timeout: float = 30.0,
+        *,
+        max_connections: int = 16,
+        max_retries: int = 3,
+        backoff_sec: float = 0.5,
+        client_id: Optional[str] = "mcp",
+        priority: Optional[str] = "batch",
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            base_url: Base URL of the Cockpit server (e.g., "http://127.0.0.1:8787")
+            timeout: Default timeout for requests in seconds
+            max_connections: Connection pool size
+            max_retries: Retries after the first attempt (0 disables retrying)
+            backoff_sec: Delay before the first retry; doubles on each further retry
+            client_id: Fair-share client id sent with created jobs (None: server default)
+            priority: Priority class sent with created jobs (None: server default)
+            transport: Custom httpx transport (for tests)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_sec = backoff_sec
+        self.client_id = client_id
+        self.priority = priority
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncRequestsCockpitApiClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _request(self, method: str, path: str, *, idempotent: bool, **kwargs: Any) -> Any:
+        attempt = 0
+        while True:
+            try:
+                response = await self._client.request(method, path, **kwargs)
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries and (
+                    idempotent or response.status_code == 429
+                ):
+                    raise _Retry()
+                response.raise_for_status()
+                return response.json()
+            except _Retry:
+                pass
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt >= self.max_retries:
+                    raise
+            except httpx.TransportError:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+            await asyncio.sleep(self.backoff_sec * (2 ** attempt))
+            attempt += 1
+
+    async def get_health(self) -> Dict[str, Any]:
+        """Call GET /api/health."""
+        return await self._request("GET", "/api/health", idempotent=True)
+
+    async def list_workflows(self) -> List[Dict[str, Any]]:
+        """Call GET /api/workflows."""
+        return await self._request("GET", "/api/workflows", idempotent=True)
+
+    async def get_workflow(self, workflow_id: str) -> Dict[str, Any]:
+        """
+        Call GET /api/workflows/{workflow_id}.
+
+        Raises:
+            httpx.HTTPStatusError: If workflow not found (404)
+        """
+        return await self._request("GET", f"/api/workflows/{workflow_id}", idempotent=True)
+
+    async def create_job(
+        self,
+        workflow_id: str,
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Call POST /api/jobs."""
+        payload: Dict[str, Any] = {
+            "workflow_id": workflow_id,
+            "params": params,
+        }
+        if self.client_id is not None:
+            payload["client_id"] = self.client_id
+        if self.priority is not None:
+            payload["priority"] = self.priority
+        return await self._request("POST", "/api/jobs", idempotent=False, json=payload)
+
+    async def get_job(self, job_id: str) -> Dict[str, Any]:
+        """
+        Call GET /api/jobs/{job_id}.
+
+        Raises:
+            httpx.HTTPStatusError: If job not found (404)
+        """
+        return await self._request("GET", f"/api/jobs/{job_id}", idempotent=True)
+
+
+class _Retry(Exception):
+    """Internal: response status asks for another attempt."""
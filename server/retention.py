@@ -0,0 +1,418 @@
+"""Retention engine: moves old assets to cheaper storage tiers, per policy."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, features
+
+from .blob_store import BLOB_PREFIX, GC_GRACE_SEC, BlobStore, StagedBlob
+from .db import AssetRow, AsyncDatabase, PageKey
+from .media import media_kind, media_type
+from .thumbnails import THUMB_FORMATS, THUMB_SIZES, file_sha256, render_thumbnail
+from .workers import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# original:   the file as harvested
+# compressed: still images re-encoded (lossless WebP, or AVIF/JPEG at `quality`)
+# thumbnail:  only a THUMB_SIZES[-1] thumbnail is kept; the recipe can regenerate the rest
+TIERS = ("original", "compressed", "thumbnail")
+
+# format name -> (Pillow format, file extension); "none" skips the compressed tier
+RECOMPRESS_FORMATS: Dict[str, Tuple[str, str]] = {
+    "webp": ("WEBP", ".webp"),
+    "avif": ("AVIF", ".avif"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+
+DAY_SEC = 86400.0
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Ages (days since the asset was created) at which it moves down a tier.
+
+    None keeps the asset in its tier forever. Only still images are
+    recompressed; other kinds stay original until `thumbnail_days`, and audio
+    (which has no thumbnail) is never touched.
+    """
+
+    compress_days: Optional[float] = None
+    thumbnail_days: Optional[float] = None
+    format: str = "webp"
+    quality: int = 90
+
+    @property
+    def keeps_everything(self) -> bool:
+        return self.thumbnail_days is None and (self.compress_days is None or self.format == "none")
+
+    def target_tier(self, age_days: float, kind: str) -> str:
+        if kind == "audio":
+            return "original"
+        if self.thumbnail_days is not None and age_days >= self.thumbnail_days:
+            return "thumbnail"
+        if (
+            kind == "image"
+            and self.format != "none"
+            and self.compress_days is not None
+            and age_days >= self.compress_days
+        ):
+            return "compressed"
+        return "original"
+
+
+@dataclass
+class RetentionPolicies:
+    """Which policy applies to an asset: `favorite` for favorited assets (if
+    set), else the one for its workflow_id, else `default`. A policy replaces
+    the default as a whole; fields it leaves out keep the asset forever."""
+
+    default: RetentionPolicy = field(default_factory=RetentionPolicy)
+    favorite: Optional[RetentionPolicy] = None
+    workflows: Dict[str, RetentionPolicy] = field(default_factory=dict)
+
+    def all(self) -> List[RetentionPolicy]:
+        return [self.default, *([self.favorite] if self.favorite else []), *self.workflows.values()]
+
+    @property
+    def enabled(self) -> bool:
+        return not all(p.keeps_everything for p in self.all())
+
+    def min_age_days(self) -> Optional[float]:
+        """Youngest age at which any policy changes anything."""
+        ages = [
+            age
+            for p in self.all()
+            for age in (p.thumbnail_days, p.compress_days if p.format != "none" else None)
+            if age is not None
+        ]
+        return min(ages) if ages else None
+
+    def for_asset(self, favorite: bool, workflow_id: Optional[str]) -> RetentionPolicy:
+        if favorite and self.favorite is not None:
+            return self.favorite
+        if workflow_id and workflow_id in self.workflows:
+            return self.workflows[workflow_id]
+        return self.default
+
+
+def _parse_policy(value: Any) -> RetentionPolicy:
+    if not isinstance(value, dict):
+        raise ValueError(f"retention policy must be an object, got {value!r}")
+    unknown = set(value) - {"compress_days", "thumbnail_days", "format", "quality"}
+    if unknown:
+        raise ValueError(f"unknown retention policy keys: {sorted(unknown)}")
+    fmt = str(value.get("format", "webp")).lower()
+    if fmt != "none" and fmt not in RECOMPRESS_FORMATS:
+        raise ValueError(f"unsupported retention format: {fmt} (expected none or one of {list(RECOMPRESS_FORMATS)})")
+    if fmt == "avif" and not features.check("avif"):
+        logger.warning("Pillow has no AVIF support; retention recompresses to lossless WebP instead")
+        fmt = "webp"
+
+    def days(key: str) -> Optional[float]:
+        raw = value.get(key)
+        return None if raw is None else float(raw)
+
+    return RetentionPolicy(
+        compress_days=days("compress_days"),
+        thumbnail_days=days("thumbnail_days"),
+        format=fmt,
+        quality=int(value.get("quality", 90)),
+    )
+
+
+def parse_policies(value: Any) -> RetentionPolicies:
+    """Policies from a config dict or a JSON string:
+
+    {"default": {...}, "favorite": {...}, "workflows": {"<workflow_id>": {...}}}
+
+    Raises:
+        ValueError: On malformed policies
+    """
+    if isinstance(value, str):
+        value = json.loads(value) if value.strip() else {}
+    if not isinstance(value, dict):
+        raise ValueError("retention policies must be an object")
+    workflows = value.get("workflows") or {}
+    if not isinstance(workflows, dict):
+        raise ValueError("retention 'workflows' must map workflow ids to policies")
+    return RetentionPolicies(
+        default=_parse_policy(value.get("default") or {}),
+        favorite=_parse_policy(value["favorite"]) if value.get("favorite") is not None else None,
+        workflows={str(k): _parse_policy(v) for k, v in workflows.items()},
+    )
+
+
+def recompress_image(src_path: str, dest_path: str, fmt: str, quality: int) -> Tuple[int, str]:
+    """Re-encode a still image. Runs in a worker process. Returns (size, sha256)."""
+    pil_format = RECOMPRESS_FORMATS[fmt][0]
+    with Image.open(src_path) as img:
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        if pil_format == "JPEG":
+            if has_alpha:
+                rgba = img.convert("RGBA")
+                flat = Image.new("RGB", rgba.size, (255, 255, 255))
+                flat.paste(rgba, mask=rgba.split()[3])
+                img = flat
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            options: Dict[str, Any] = {"quality": quality, "optimize": True}
+        else:
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if has_alpha else "RGB")
+            if pil_format == "WEBP":
+                options = {"lossless": True, "quality": 100, "method": 4}
+            else:
+                options = {"quality": quality}
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        img.save(dest_path, format=pil_format, **options)
+    return os.path.getsize(dest_path), file_sha256(dest_path)
+
+
+def render_tier_thumbnail(src_path: str, dest_path: str, size: int, fmt: str) -> Tuple[int, str]:
+    """The thumbnail that replaces an asset's file. Runs in a worker process."""
+    written = render_thumbnail(src_path, dest_path, size, fmt)
+    return written, file_sha256(dest_path)
+
+
+def _age_days(created_at: str, now: float) -> float:
+    try:
+        created = datetime.fromisoformat(created_at).timestamp()
+    except ValueError:
+        return 0.0
+    return (now - created) / DAY_SEC
+
+
+def _workflow_id(row: AssetRow) -> Optional[str]:
+    try:
+        return (json.loads(row.recipe_json or "{}").get("params") or {}).get("workflow_id")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _kind(row: AssetRow, meta: Dict[str, Any]) -> str:
+    return (meta.get("media") or {}).get("kind") or media_kind(row.filename)
+
+
+class RetentionEngine:
+    """Moves assets down the tiers (original -> compressed -> thumbnail) as
+    their policy says, reclaiming the space of the files they replace.
+
+    A pass walks the assets oldest first, in pages of `batch_size`, skipping
+    those already at the thumbnail tier. Assets that share a blob (identical
+    content) move together, and only as far as the least aggressive of their
+    policies allows. The new file goes into the blob store, the assets are
+    repointed at it in one transaction (recipe_json is never changed; the
+    original file's hash, size and type are kept in meta["retention"]), and the
+    old blob is deleted once nothing references it. A recompressed file that is
+    not smaller than the original is not kept; the assets are only marked
+    compressed.
+
+    Work is rate limited to `assets_per_sec` transitions and `mb_per_sec` of
+    source files read (0 disables either limit) so a first pass over a large
+    library does not starve harvests. run() repeats passes every `interval_sec`.
+    Assets outside the blob store (not migrated yet) are skipped.
+    """
+
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        store: BlobStore,
+        policies: RetentionPolicies,
+        *,
+        workers: int = 1,
+        thumb_format: str = "webp",
+        interval_sec: float = 3600.0,
+        assets_per_sec: float = 2.0,
+        mb_per_sec: float = 20.0,
+        batch_size: int = 200,
+        grace_sec: float = GC_GRACE_SEC,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._db = db
+        self._store = store
+        self.policies = policies
+        self._pool = WorkerPool(workers)
+        self.thumb_format = thumb_format if thumb_format in THUMB_FORMATS else "webp"
+        self.interval_sec = interval_sec
+        self.assets_per_sec = assets_per_sec
+        self.mb_per_sec = mb_per_sec
+        self.batch_size = max(1, batch_size)
+        self.grace_sec = grace_sec
+        self._clock = clock
+
+        self.passes = 0
+        self.transitions: Dict[str, int] = {"compressed": 0, "thumbnail": 0}
+        self.skipped = 0
+        self.errors = 0
+        self.bytes_reclaimed = 0
+        self.last_pass: Optional[Dict[str, Any]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.policies.enabled
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.run_pass()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Retention pass failed: {e}")
+            await asyncio.sleep(self.interval_sec)
+
+    async def run_pass(self) -> Dict[str, Any]:
+        """One pass over every asset old enough for some policy to apply."""
+        min_days = self.policies.min_age_days()
+        started = time.perf_counter()
+        result = {"assets_moved": 0, "bytes_reclaimed": 0, "skipped": 0, "errors": 0}
+        if min_days is not None:
+            now = self._clock()
+            cutoff = datetime.fromtimestamp(now - min_days * DAY_SEC, timezone.utc).isoformat()
+            done = set()
+            after: Optional[PageKey] = None
+            while True:
+                rows = await self._db.list_retention_candidates(cutoff, self.batch_size, after)
+                if not rows:
+                    break
+                after = (rows[-1].created_at, rows[-1].id)
+                for row in rows:
+                    if row.content_hash in done:
+                        continue
+                    done.add(row.content_hash)
+                    try:
+                        await self._process(row, now, result)
+                    except Exception as e:
+                        result["errors"] += 1
+                        self.errors += 1
+                        logger.warning(f"Retention of asset {row.id} failed: {e}")
+        self.passes += 1
+        self.bytes_reclaimed += result["bytes_reclaimed"]
+        self.last_pass = {**result, "at": self._clock(), "ms": round((time.perf_counter() - started) * 1000.0, 2)}
+        if result["assets_moved"]:
+            logger.info(
+                f"Retention moved {result['assets_moved']} assets, reclaimed {result['bytes_reclaimed']} bytes"
+            )
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "passes": self.passes,
+            "transitions": dict(self.transitions),
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "last_pass": self.last_pass,
+        }
+
+    def close(self) -> None:
+        self._pool.close()
+
+    async def _process(self, row: AssetRow, now: float, result: Dict[str, Any]) -> None:
+        if not row.filename.startswith(BLOB_PREFIX) or not row.content_hash:
+            result["skipped"] += 1
+            self.skipped += 1
+            return
+        group = [
+            r
+            for r in await self._db.list_assets_page(content_hash=row.content_hash, limit=10000)
+            if r.filename == row.filename
+        ]
+        metas = {r.id: json.loads(r.meta_json) if r.meta_json else {} for r in group}
+        kind = _kind(row, metas.get(row.id, {}))
+        targets = [
+            self.policies.for_asset(bool(r.favorite), _workflow_id(r)).target_tier(_age_days(r.created_at, now), kind)
+            for r in group
+        ]
+        if not targets:
+            return
+        target = min(targets, key=TIERS.index)
+        if TIERS.index(target) <= TIERS.index(row.tier):
+            return
+
+        start = time.perf_counter()
+        src_path = self._store.path(row.filename)
+        src_size = os.path.getsize(src_path)
+        if target == "compressed":
+            policy = min(
+                (self.policies.for_asset(bool(r.favorite), _workflow_id(r)) for r in group),
+                key=lambda p: (p.format != "webp", -p.quality),  # lossless wins, then best quality
+            )
+            ext = RECOMPRESS_FORMATS[policy.format][1]
+            staging = self._store.staging_path(ext)
+            size, new_hash = await self._pool.run(recompress_image, src_path, staging, policy.format, policy.quality)
+        else:
+            ext = THUMB_FORMATS[self.thumb_format][2]
+            staging = self._store.staging_path(ext)
+            size, new_hash = await self._pool.run(
+                render_tier_thumbnail, src_path, staging, THUMB_SIZES[-1], self.thumb_format
+            )
+
+        staged = StagedBlob(staging, new_hash, size, ext)
+        if target == "compressed" and size >= src_size:
+            # Nothing to gain: keep the original file, just record the tier
+            self._store.discard(staged)
+            new_path, new_hash, size = row.filename, row.content_hash, src_size
+        else:
+            stored_before = self._store.stored
+            new_path = self._store.commit(staged)
+            if self._store.stored > stored_before:
+                result["bytes_reclaimed"] -= size
+
+        at = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        for meta in metas.values():
+            retention = meta.setdefault("retention", {})
+            retention.setdefault(
+                "original",
+                {"content_hash": row.content_hash, "size": src_size, "media": meta.get("media") or {"kind": kind}},
+            )
+            retention.update({"tier": target, "at": at})
+            if new_path != row.filename:
+                meta["media"] = {"kind": media_kind(new_path), "mime": media_type(new_path)}
+        moved = await self._db.retier_assets(
+            metas, old_path=row.filename, new_path=new_path, content_hash=new_hash, size=size, tier=target
+        )
+        result["assets_moved"] += moved
+        self.transitions[target] += moved
+        if new_path != row.filename:
+            result["bytes_reclaimed"] += await self._reclaim(row.content_hash, src_path, src_size)
+
+        await self._throttle(start, src_size)
+
+    async def _reclaim(self, content_hash: str, path: str, size: int) -> int:
+        """Delete a replaced blob if nothing references it any more."""
+        blob = await self._db.get_blob(content_hash)
+        if blob is None or blob.refcount > 0:
+            return 0
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return 0
+        if st.st_mtime > self._clock() - self.grace_sec:
+            return 0  # just deduplicated onto by a harvest; left to collect_garbage
+        if not await self._db.delete_blob(content_hash):
+            return 0
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        # A blob hardlinked from ComfyUI's output directory (local import) keeps its data there
+        return size if st.st_nlink == 1 else 0
+
+    async def _throttle(self, start: float, bytes_read: int) -> None:
+        wait = 0.0
+        if self.assets_per_sec > 0:
+            wait = 1.0 / self.assets_per_sec
+        if self.mb_per_sec > 0:
+            wait = max(wait, bytes_read / (self.mb_per_sec * 1024 * 1024))
+        remaining = wait - (time.perf_counter() - start)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
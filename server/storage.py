@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import uuid
 from datetime import datetime
-from typing import Tuple
+from typing import AsyncIterable, Tuple
 
 
 def ensure_dir(path: str) -> None:
@@ -19,3 +20,33 @@ def write_bytes(path: str, data: bytes) -> None:
     ensure_dir(os.path.dirname(path))
     with open(path, "wb") as f:
         f.write(data)
+
+
+async def write_stream_atomic(path: str, chunks: AsyncIterable[bytes]) -> int:
+    """Stream chunks into a temp file next to `path`, then rename it into place.
+
+    File I/O runs in a worker thread so large downloads never block the event loop,
+    and readers never observe a half-written file. Returns the number of bytes written.
+    """
+    directory = os.path.dirname(path)
+    ensure_dir(directory)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.part")
+
+    size = 0
+    f = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            await asyncio.to_thread(f.write, chunk)
+            size += len(chunk)
+        await asyncio.to_thread(f.close)
+        os.replace(tmp_path, path)
+    except BaseException:
+        f.close()
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return size
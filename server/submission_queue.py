@@ -0,0 +1,213 @@
+"""Submission scheduler: feeds waiting jobs to ComfyUI with backpressure."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from .db import WaitingJob
+
+logger = logging.getLogger(__name__)
+
+# (waiting jobs, free slots) -> jobs to submit now, in order
+SelectPolicy = Callable[[List[WaitingJob], int], List[WaitingJob]]
+
+
+def fifo(jobs: List[WaitingJob], n: int) -> List[WaitingJob]:
+    return sorted(jobs, key=lambda j: (j.created_at, j.id))[:n]
+
+
+class SubmissionScheduler:
+    """Submits queued jobs to ComfyUI while keeping ComfyUI's own queue short.
+
+    SQLite is the source of truth: a job is waiting while its status is
+    'queued' and it has no prompt_id, so nothing is lost on restart. A
+    dispatcher task keeps the waiting jobs in memory (read from the table when
+    it starts and every `rescan_sec`, plus jobs passed to notify()) and starts
+    submissions while both limits allow it:
+
+    - at most `concurrency` submissions in flight, and
+    - ComfyUI's queue (running + pending, from /queue, refreshed at most every
+      `depth_refresh_sec` and counted up locally after each submit) plus
+      in-flight submissions below `target_depth` (0 disables this limit).
+
+    Which waiting jobs get the free slots is up to `select` (FIFO by default,
+    see FairQueue.select); the reordering happens here, so ComfyUI only ever
+    holds a short window of jobs.
+
+    The dispatcher is started on demand by notify() and exits when nothing is
+    waiting, so it needs no startup hook; call notify() at startup to resume
+    jobs left over from a previous run. While limits hold jobs back it re-checks
+    every `poll_sec`.
+
+    Callbacks:
+        submit(job_id) -> bool: submit one job, True if ComfyUI accepted it
+            (failures are expected to be recorded on the job)
+        load_waiting(limit) -> WaitingJobs: oldest waiting jobs first
+        queue_depth() -> int: ComfyUI's current queue length
+    """
+
+    def __init__(
+        self,
+        submit: Callable[[str], Awaitable[bool]],
+        load_waiting: Callable[[int], Awaitable[List[WaitingJob]]],
+        queue_depth: Callable[[], Awaitable[int]],
+        *,
+        select: SelectPolicy = fifo,
+        concurrency: int = 4,
+        target_depth: int = 2,
+        depth_refresh_sec: float = 1.0,
+        poll_sec: float = 1.0,
+        rescan_sec: float = 30.0,
+        scan_limit: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._submit = submit
+        self._load_waiting = load_waiting
+        self._queue_depth = queue_depth
+        self._select = select
+        self.concurrency = max(1, concurrency)
+        self.target_depth = max(0, target_depth)
+        self.depth_refresh_sec = depth_refresh_sec
+        self.poll_sec = poll_sec
+        self.rescan_sec = rescan_sec
+        self.scan_limit = max(1, scan_limit)
+        self._clock = clock
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._known: Dict[str, WaitingJob] = {}
+        self._scanned_at = float("-inf")
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        # Jobs whose submit() raised; not retried until restart
+        self._errored: Set[str] = set()
+
+        self._comfy_depth: Optional[int] = None
+        self._depth_at = float("-inf")
+        self.submitted = 0
+        self.failed = 0
+        self.errors = 0
+        self.throttled = 0  # dispatch rounds held back by the depth limit
+
+    def notify(self, jobs: Iterable[WaitingJob] = ()) -> None:
+        """Wake the dispatcher (starting it if needed). Call from the event loop.
+
+        Args:
+            jobs: Newly created waiting jobs, if known (saves a table read)
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Tasks from another (finished) loop will never run again
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._dispatcher = None
+            self._in_flight = set()
+            self._tasks = set()
+            self._known = {}
+            # Rescan timer starts now; an empty _known is read from the table anyway
+            self._scanned_at = self._clock()
+            self._depth_at = float("-inf")
+        for job in jobs:
+            self._known[job.id] = job
+        assert self._wakeup is not None
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "concurrency": self.concurrency,
+            "target_depth": self.target_depth,
+            "comfy_queue_depth": self._comfy_depth,
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "running": self._dispatcher is not None and not self._dispatcher.done(),
+        }
+
+    async def _dispatch(self) -> None:
+        wakeup = self._wakeup
+        assert wakeup is not None
+        while True:
+            wakeup.clear()
+            if not self._known or self._clock() - self._scanned_at >= self.rescan_sec:
+                await self._scan()
+            waiting = [job for job_id, job in self._known.items() if job_id not in self._in_flight]
+            if not waiting and not self._in_flight:
+                return
+
+            if waiting:
+                slots = await self._free_slots()
+                if slots <= 0 and len(self._in_flight) < self.concurrency:
+                    self.throttled += 1
+                if slots > 0:
+                    for job in self._select(waiting, slots):
+                        self._start(job.id)
+
+            try:
+                await asyncio.wait_for(wakeup.wait(), self.poll_sec)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _scan(self) -> None:
+        before = set(self._known)
+        try:
+            loaded = await self._load_waiting(self.scan_limit)
+        except Exception as e:
+            logger.error(f"Loading waiting jobs failed: {e}")
+            return
+        finally:
+            self._scanned_at = self._clock()
+        loaded_ids = set()
+        for job in loaded:
+            if job.id not in self._errored and job.id not in self._in_flight:
+                self._known[job.id] = job
+                loaded_ids.add(job.id)
+        if len(loaded) < self.scan_limit:
+            # Known before the scan but no longer waiting (e.g. failed elsewhere)
+            for job_id in before - loaded_ids:
+                self._known.pop(job_id, None)
+
+    async def _free_slots(self) -> int:
+        slots = self.concurrency - len(self._in_flight)
+        if self.target_depth <= 0 or slots <= 0:
+            return slots
+        if self._clock() - self._depth_at >= self.depth_refresh_sec:
+            try:
+                self._comfy_depth = await self._queue_depth()
+            except Exception as e:
+                # Unknown depth: keep submitting, submissions will report the error
+                logger.debug(f"ComfyUI queue depth unavailable: {e}")
+                self._comfy_depth = None
+            self._depth_at = self._clock()
+        depth = self._comfy_depth or 0
+        return min(slots, self.target_depth - depth - len(self._in_flight))
+
+    def _start(self, job_id: str) -> None:
+        self._known.pop(job_id, None)
+        self._in_flight.add(job_id)
+        task = asyncio.get_running_loop().create_task(self._run_one(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_one(self, job_id: str) -> None:
+        try:
+            if await self._submit(job_id):
+                self.submitted += 1
+                if self._comfy_depth is not None:
+                    self._comfy_depth += 1
+            else:
+                self.failed += 1
+        except Exception as e:
+            self.errors += 1
+            self._errored.add(job_id)
+            logger.error(f"Submission of job {job_id} failed: {e}")
+        finally:
+            self._in_flight.discard(job_id)
+            if self._wakeup is not None:
+                self._wakeup.set()
@@ -76,6 +76,19 @@ class TestWorkflowsAPI:
         assert data["ok"] is True
         assert "count" in data
 
+    def test_list_workflows_etag_not_modified(self, test_client):
+        """Test GET /api/workflows answers 304 for a matching If-None-Match."""
+        response = test_client.get("/api/workflows")
+        etag = response.headers.get("etag")
+        assert etag
+
+        response = test_client.get("/api/workflows", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+        response = test_client.get("/api/workflows", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+
     def test_wan22_workflow_present(self, test_client):
         """wan2_2_ti2v_5b should be discoverable in workflows list."""
         response = test_client.get("/api/workflows")
@@ -250,6 +263,27 @@ class TestHealthAndConfig:
             assert data["error_code"] in ["COMFY_UNREACHABLE", "COMFY_ERROR"]
             assert data["error_message"] is not None
 
+    def test_metrics_endpoint_reports_comfy_upstream(self, test_client):
+        """Test GET /api/metrics reports the comfy upstream used by the health probe."""
+        test_client.get("/api/health")
+
+        response = test_client.get("/api/metrics")
+        assert response.status_code == 200
+        data = response.json()
+        assert "http2" in data
+        comfy = data["upstreams"]["comfy"]
+        assert comfy["requests"] >= 1
+        assert comfy["max_ms"] >= 0
+
+    def test_health_served_from_snapshot(self, test_client):
+        """Test repeated GET /api/health calls reuse the prober's latest sample."""
+        first = test_client.get("/api/health").json()
+        second = test_client.get("/api/health").json()
+
+        assert second["checked_at"] == first["checked_at"]
+        assert isinstance(second["history"], list) and second["history"]
+        assert "history" not in test_client.get("/api/health?history=false").json()
+
     def test_config_endpoint(self, test_client):
         """Test GET /api/config returns expected structure."""
         response = test_client.get("/api/config")
@@ -421,6 +455,95 @@ class TestCreateJobWithMock:
         assert data["error"] is not None
 
 
+class TestJobBatchAPI:
+    """Tests for POST /api/jobs/batch."""
+
+    def test_batch_prompts_times_seeds(self, test_client_with_fake_comfy, fake_comfy_client, monkeypatch):
+        from server import main
+
+        # Start all six at once (the fake ComfyUI queue never drains, so no depth
+        # limit); TestClient stops the event loop after each request
+        monkeypatch.setattr(main.submission_scheduler, "target_depth", 0)
+        monkeypatch.setattr(main.submission_scheduler, "concurrency", 8)
+        response = test_client_with_fake_comfy.post(
+            "/api/jobs/batch",
+            json={
+                "params": {"width": 512},
+                "prompts": ["a cat", "a dog"],
+                "seeds": {"start": 10, "count": 3},
+            },
+        )
+        assert response.status_code == 200
+        jobs = response.json()["jobs"]
+        assert [(j["prompt"], j["params"]["seed"]) for j in jobs] == [
+            ("a cat", 10), ("a cat", 11), ("a cat", 12),
+            ("a dog", 10), ("a dog", 11), ("a dog", 12),
+        ]
+        assert all(j["params"]["width"] == 512 for j in jobs)
+        assert all(j["params"]["workflow_id"] == "flux2_klein_distilled" for j in jobs)
+
+        import time
+        for _ in range(50):
+            if len(fake_comfy_client.submitted_prompts) >= 6:
+                break
+            time.sleep(0.02)
+        assert len(fake_comfy_client.submitted_prompts) >= 6
+
+    def test_batch_items(self, test_client_with_fake_comfy):
+        response = test_client_with_fake_comfy.post(
+            "/api/jobs/batch",
+            json={
+                "params": {"prompt": "base prompt", "steps": 4},
+                "items": [{}, {"prompt": "override", "steps": 8}],
+            },
+        )
+        assert response.status_code == 200
+        jobs = response.json()["jobs"]
+        assert [j["prompt"] for j in jobs] == ["base prompt", "override"]
+        assert [j["params"]["steps"] for j in jobs] == [4, 8]
+
+    def test_batch_invalid_job_creates_nothing(self, test_client_with_fake_comfy):
+        before = test_client_with_fake_comfy.get("/api/jobs", params={"limit": 1}).json()
+        response = test_client_with_fake_comfy.post(
+            "/api/jobs/batch",
+            json={"items": [{"prompt": "fine"}, {"prompt": "  "}]},
+        )
+        assert response.status_code == 400
+        assert "jobs[1]" in response.json()["detail"]
+        after = test_client_with_fake_comfy.get("/api/jobs", params={"limit": 1}).json()
+        assert [j["id"] for j in after] == [j["id"] for j in before]
+
+    def test_batch_requires_a_spec(self, test_client_with_fake_comfy):
+        response = test_client_with_fake_comfy.post("/api/jobs/batch", json={"params": {"prompt": "x"}})
+        assert response.status_code == 422
+
+    def test_scheduling_defaults_and_overrides(self, test_client_with_fake_comfy):
+        batch = test_client_with_fake_comfy.post(
+            "/api/jobs/batch", json={"params": {"prompt": "x"}, "seeds": [1]}
+        ).json()["jobs"][0]
+        # TestClient connects as "testclient"
+        assert (batch["priority"], batch["client_id"]) == ("batch", "testclient")
+
+        single = test_client_with_fake_comfy.post(
+            "/api/jobs", json={"params": {"prompt": "x"}, "priority": "background", "client_id": "mcp"}
+        ).json()
+        assert (single["priority"], single["client_id"]) == ("background", "mcp")
+        stored = test_client_with_fake_comfy.get(f"/api/jobs/{single['id']}").json()
+        assert (stored["priority"], stored["client_id"]) == ("background", "mcp")
+
+        bad = test_client_with_fake_comfy.post("/api/jobs", json={"params": {"prompt": "x"}, "priority": "urgent"})
+        assert bad.status_code == 422
+
+    def test_batch_size_limit(self, test_client_with_fake_comfy):
+        from server.main import BATCH_MAX_JOBS
+
+        response = test_client_with_fake_comfy.post(
+            "/api/jobs/batch",
+            json={"params": {"prompt": "x"}, "seeds": {"start": 0, "count": BATCH_MAX_JOBS + 1}},
+        )
+        assert response.status_code == 400
+
+
 class TestJobParamsNormalization:
     """Tests for new params dict handling and legacy compatibility."""
 
@@ -470,3 +593,96 @@ class TestJobsListAndAssets:
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
+
+
+@pytest.fixture
+def seeded_assets_client(tmp_path, monkeypatch):
+    """Test client backed by a scratch database with 12 assets."""
+    from server import main
+    from server.db import AsyncDatabase, Database
+
+    db = Database(str(tmp_path / "pages.sqlite3"))
+    db.create_job(job_id="job-1", engine="comfy", status="completed", prompt="p", negative_prompt="", params={})
+    for i in range(12):
+        db.create_asset(
+            asset_id=f"asset-{i:02d}",
+            job_id="job-1",
+            engine="comfy",
+            filename=f"{i}.png",
+            recipe={"params": {"workflow_id": "sdxl_txt2img"}},
+            meta={"i": i},
+        )
+    adb = AsyncDatabase(db, readers=1)
+    monkeypatch.setattr(main, "adb", adb)
+    yield TestClient(main.app)
+    adb.close()
+    db.close()
+
+
+class TestPagination:
+    """Tests for keyset pagination on /api/assets and /api/jobs."""
+
+    def test_assets_cursor_walk(self, seeded_assets_client):
+        ids = []
+        response = seeded_assets_client.get("/api/assets", params={"limit": 5})
+        while True:
+            assert response.status_code == 200
+            ids.extend(a["id"] for a in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            response = seeded_assets_client.get("/api/assets", params={"limit": 5, "before": cursor})
+
+        assert len(ids) == 12
+        assert len(set(ids)) == 12
+
+    def test_after_cursor_returns_newer_page(self, seeded_assets_client):
+        first = seeded_assets_client.get("/api/assets", params={"limit": 4})
+        second = seeded_assets_client.get(
+            "/api/assets", params={"limit": 4, "before": first.headers["X-Next-Cursor"]}
+        )
+        back = seeded_assets_client.get(
+            "/api/assets", params={"limit": 4, "after": second.headers["X-Prev-Cursor"]}
+        )
+        assert [a["id"] for a in back.json()] == [a["id"] for a in first.json()]
+
+    def test_grid_view_omits_recipe_and_meta(self, seeded_assets_client):
+        response = seeded_assets_client.get("/api/assets", params={"view": "grid", "limit": 2})
+        assert response.status_code == 200
+        item = response.json()[0]
+        assert "recipe" not in item
+        assert "meta" not in item
+        assert item["url"].startswith("/assets/")
+
+        full = seeded_assets_client.get("/api/assets", params={"limit": 2}).json()[0]
+        assert full["recipe"]["params"]["workflow_id"] == "sdxl_txt2img"
+
+    def test_filters(self, seeded_assets_client):
+        response = seeded_assets_client.get("/api/assets", params={"workflow_id": "other"})
+        assert response.json() == []
+        response = seeded_assets_client.get("/api/jobs", params={"status": "completed"})
+        assert [j["id"] for j in response.json()] == ["job-1"]
+
+    def test_ws_assets_snapshot_is_grid_page_with_cursor(self, seeded_assets_client, monkeypatch):
+        from server import main
+
+        async def small_snapshot(limit: int = 5):
+            return await snapshot(limit)
+
+        snapshot = main._assets_snapshot
+        monkeypatch.setattr(main, "_assets_snapshot", small_snapshot)
+        with seeded_assets_client.websocket_connect("/api/ws") as ws:
+            assert ws.receive_json()["type"] == "hello"
+            msg = ws.receive_json()
+
+        assert msg["type"] == "assets_snapshot"
+        assert [a["id"] for a in msg["payload"]] == [f"asset-{i:02d}" for i in range(11, 6, -1)]
+        assert "recipe" not in msg["payload"][0]
+        assert "meta" not in msg["payload"][0]
+        rest = seeded_assets_client.get("/api/assets", params={"view": "grid", "before": msg["next_cursor"]})
+        assert [a["id"] for a in rest.json()] == [f"asset-{i:02d}" for i in range(6, -1, -1)]
+
+    def test_invalid_cursor_returns_400(self, seeded_assets_client):
+        assert seeded_assets_client.get("/api/assets", params={"before": "not-a-cursor"}).status_code == 400
+        response = seeded_assets_client.get("/api/jobs", params={"before": "x", "after": "y"})
+        assert response.status_code == 400
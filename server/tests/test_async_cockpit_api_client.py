@@ -0,0 +1,121 @@
+"""Tests for AsyncRequestsCockpitApiClient (pooling, retries) using httpx.MockTransport."""
+
+import json
+
+import httpx
+import pytest
+
+from server.requests_cockpit_api_client import AsyncRequestsCockpitApiClient
+
+
+def _client(handler, **kwargs):
+    kwargs.setdefault("backoff_sec", 0)
+    return AsyncRequestsCockpitApiClient(
+        "http://cockpit.test", transport=httpx.MockTransport(handler), **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_retries_on_503_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True})
+
+    async with _client(handler) as client:
+        assert await client.get_health() == {"ok": True}
+    assert calls == ["/api/health"] * 3
+
+
+@pytest.mark.asyncio
+async def test_get_gives_up_after_max_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(502)
+
+    async with _client(handler, max_retries=2) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_job("job_1")
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_retries_read_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            raise httpx.ReadError("connection reset")
+        return httpx.Response(200, json={"id": "job_1", "status": "running"})
+
+    async with _client(handler) as client:
+        job = await client.get_job("job_1")
+    assert job["status"] == "running"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_job_not_retried_after_request_may_have_been_sent():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            raise httpx.ReadError("connection reset")
+        return httpx.Response(200, json={"id": "job_2"})
+
+    async with _client(handler) as client:
+        with pytest.raises(httpx.ReadError):
+            await client.create_job("wf", {"prompt": "x"})
+    assert len(calls) == 1
+
+    calls.clear()
+
+    def failing(request):
+        calls.append(1)
+        return httpx.Response(503)
+
+    async with _client(failing) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.create_job("wf", {"prompt": "x"})
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_create_job_retried_on_connect_error_and_429():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused")
+        if len(calls) == 2:
+            return httpx.Response(429)
+        return httpx.Response(200, json={"id": "job_1", "status": "queued"})
+
+    async with _client(handler) as client:
+        job = await client.create_job("wf", {"prompt": "x"})
+    assert job["id"] == "job_1"
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_create_job_sends_scheduling_fields():
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"id": "job_1"})
+
+    async with _client(handler) as client:
+        await client.create_job("wf", {"prompt": "x"})
+    async with _client(handler, client_id=None, priority="interactive") as client:
+        await client.create_job("wf", {"prompt": "x"})
+    assert bodies[0]["client_id"] == "mcp" and bodies[0]["priority"] == "batch"
+    assert "client_id" not in bodies[1] and bodies[1]["priority"] == "interactive"
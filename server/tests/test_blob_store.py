@@ -0,0 +1,165 @@
+"""Tests for the content-addressed asset store, its garbage collector and migration."""
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+
+import pytest
+
+from server.blob_store import BlobStore, collect_garbage, migrate_assets
+from server.db import Database
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "assets"))
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = Database(str(tmp_path / "test.sqlite3"))
+    db.create_job(job_id="job-1", engine="comfy", status="completed", prompt="p", negative_prompt="", params={})
+    yield db
+    db.close()
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _age(path: str, seconds: float) -> None:
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def _register(db: Database, asset_id: str, relpath: str, data: bytes) -> None:
+    db.create_asset(
+        asset_id=asset_id, job_id="job-1", engine="comfy", filename=relpath, recipe={}, meta={},
+        content_hash=_sha(data), blob_size=len(data),
+    )
+
+
+class TestBlobStore:
+    @pytest.mark.asyncio
+    async def test_stage_and_commit_use_sharded_content_path(self, store):
+        staged = await store.stage_bytes(b"hello", ".PNG")
+        assert staged.content_hash == _sha(b"hello")
+        assert staged.size == 5
+
+        relpath = store.commit(staged)
+
+        h = _sha(b"hello")
+        assert relpath == f"blobs/{h[:2]}/{h[2:4]}/{h}.png"
+        with open(store.path(relpath), "rb") as f:
+            assert f.read() == b"hello"
+        assert not os.path.exists(staged.path)
+
+    @pytest.mark.asyncio
+    async def test_identical_content_is_stored_once(self, store):
+        first = store.commit(await store.stage_bytes(b"same", ".png"))
+        second_staged = await store.stage_bytes(b"same", ".webp")
+        second = store.commit(second_staged)
+
+        assert second == first
+        assert not os.path.exists(second_staged.path)
+        assert store.stats() == {"stored": 1, "deduplicated": 1, "bytes_deduplicated": 4}
+        assert store.find(_sha(b"same")) == first
+        assert store.find(_sha(b"other")) is None
+
+    @pytest.mark.asyncio
+    async def test_discard(self, store):
+        staged = await store.stage_bytes(b"x")
+        store.discard(staged)
+        store.discard(staged)
+        assert not os.path.exists(staged.path)
+
+
+class TestCollectGarbage:
+    @pytest.mark.asyncio
+    async def test_removes_unreferenced_and_untracked_blobs(self, store, database):
+        kept = store.commit(await store.stage_bytes(b"kept", ".png"))
+        dropped = store.commit(await store.stage_bytes(b"dropped", ".png"))
+        stray = store.commit(await store.stage_bytes(b"stray", ".png"))  # never registered
+        _register(database, "a1", kept, b"kept")
+        _register(database, "a2", dropped, b"dropped")
+        database.delete_asset("a2")
+        for relpath in (kept, dropped, stray):
+            _age(store.path(relpath), 7200)
+
+        preview = collect_garbage(database, store, dry_run=True)
+        assert (preview["removed"], preview["removed_untracked"]) == (1, 1)
+        assert os.path.exists(store.path(dropped))
+
+        result = collect_garbage(database, store)
+
+        assert (result["removed"], result["removed_untracked"]) == (1, 1)
+        assert result["bytes_reclaimed"] == len(b"dropped") + len(b"stray")
+        assert os.path.exists(store.path(kept))
+        assert not os.path.exists(store.path(dropped))
+        assert not os.path.exists(store.path(stray))
+        assert database.get_blob(_sha(b"dropped")) is None
+        # Empty shard directories are pruned
+        assert not os.path.exists(os.path.dirname(store.path(dropped)))
+
+    @pytest.mark.asyncio
+    async def test_keeps_recent_files(self, store, database):
+        relpath = store.commit(await store.stage_bytes(b"fresh", ".png"))
+        _register(database, "a1", relpath, b"fresh")
+        database.delete_asset("a1")
+        stray = store.commit(await store.stage_bytes(b"just committed", ".png"))
+
+        result = collect_garbage(database, store)
+
+        assert result["removed"] == 0
+        assert result["removed_untracked"] == 0
+        assert result["skipped_recent"] == 1
+        assert os.path.exists(store.path(relpath))
+        assert os.path.exists(store.path(stray))
+
+    @pytest.mark.asyncio
+    async def test_recounts_before_collecting(self, store, database):
+        relpath = store.commit(await store.stage_bytes(b"used", ".png"))
+        _register(database, "a1", relpath, b"used")
+        _age(store.path(relpath), 7200)
+        database._conn.execute("UPDATE blobs SET refcount = 0;")
+        database._conn.commit()
+
+        result = collect_garbage(database, store)
+
+        assert result["recounted"] == 1
+        assert result["removed"] == 0
+        assert os.path.exists(store.path(relpath))
+
+
+class TestMigrateAssets:
+    def _legacy(self, store: BlobStore, database: Database, asset_id: str, name: str, data: bytes) -> None:
+        os.makedirs(store.root, exist_ok=True)
+        with open(os.path.join(store.root, name), "wb") as f:
+            f.write(data)
+        database.create_asset(asset_id=asset_id, job_id="job-1", engine="comfy", filename=name, recipe={}, meta={})
+
+    def test_moves_legacy_files_into_blobs(self, store, database):
+        self._legacy(store, database, "a1", "comfy_1.png", b"one")
+        self._legacy(store, database, "a2", "comfy_2.png", b"one")
+        self._legacy(store, database, "a3", "comfy_3.mp4", b"three")
+        database.create_asset(asset_id="a4", job_id="job-1", engine="comfy", filename="gone.png", recipe={}, meta={})
+
+        preview = migrate_assets(database, store, dry_run=True)
+        assert preview == {"migrated": 3, "deduplicated": 1, "missing": 1, "bytes_reclaimed": 3}
+        assert database.get_asset("a1").filename == "comfy_1.png"
+
+        result = migrate_assets(database, store, batch_size=2)
+
+        assert result == {"migrated": 3, "deduplicated": 1, "missing": 1, "bytes_reclaimed": 3}
+        a1, a2, a3 = (database.get_asset(i) for i in ("a1", "a2", "a3"))
+        assert a1.filename == a2.filename == BlobStore.relpath(_sha(b"one"), ".png")
+        assert a1.content_hash == _sha(b"one")
+        assert a3.filename.endswith(".mp4")
+        assert database.get_blob(_sha(b"one")).refcount == 2
+        assert sorted(os.listdir(store.root)) == ["blobs"]
+        with open(store.path(a3.filename), "rb") as f:
+            assert f.read() == b"three"
+
+        # Idempotent
+        assert migrate_assets(database, store)["migrated"] == 0
@@ -0,0 +1,62 @@
+"""Tests for the ComfyUI event queue and the event loop lag monitor."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from server.comfy_events import ComfyEventQueue, LoopLagMonitor
+
+
+def _event(mtype: str, i: int = 0) -> dict:
+    return {"type": mtype, "data": {"prompt_id": "p", "value": i}}
+
+
+@pytest.mark.asyncio
+async def test_events_keep_arrival_order_and_record_queue_delay():
+    now = [0.0]
+    queue = ComfyEventQueue(clock=lambda: now[0])
+    queue.put(_event("execution_start"))
+    queue.put(_event("progress", 1))
+    now[0] = 0.25
+    assert (await queue.get())["type"] == "execution_start"
+    assert (await queue.get())["data"]["value"] == 1
+    stats = queue.stats()
+    assert stats["backlog"] == 0
+    assert stats["queue_delay"]["max_ms"] == 250.0
+
+
+@pytest.mark.asyncio
+async def test_get_waits_for_put():
+    queue = ComfyEventQueue()
+    waiter = asyncio.create_task(queue.get())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    queue.put(_event("executing"))
+    assert (await asyncio.wait_for(waiter, 1.0))["type"] == "executing"
+
+
+def test_full_backlog_drops_progress_but_keeps_other_events():
+    queue = ComfyEventQueue(max_backlog=2)
+    queue.put(_event("progress", 1))
+    queue.put(_event("progress", 2))
+    queue.put(_event("progress", 3))
+    queue.put(_event("execution_success"))
+    assert len(queue) == 3
+    stats = queue.stats()
+    assert (stats["dropped"], stats["received"], stats["peak_backlog"]) == (1, 3, 3)
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_sees_blocking_work():
+    import time
+
+    monitor = LoopLagMonitor(interval=0.01)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.005)
+    time.sleep(0.05)  # blocks the loop
+    await asyncio.sleep(0.03)
+    task.cancel()
+    stats = monitor.stats()
+    assert stats["max_ms"] >= 30
+    assert stats["interval_ms"] == 10.0
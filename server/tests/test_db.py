@@ -0,0 +1,379 @@
+"""Tests for the SQLite storage layer."""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from server.db import SCHEMA_VERSION, AsyncDatabase, Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = Database(str(tmp_path / "test.sqlite3"))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def async_db(database):
+    adb = AsyncDatabase(database, readers=2)
+    yield adb
+    adb.close()
+
+
+def _job_kwargs(job_id: str, **overrides):
+    kwargs = dict(
+        job_id=job_id,
+        engine="comfy",
+        status="queued",
+        prompt="a cat",
+        negative_prompt="",
+        params={"workflow_id": "sdxl_txt2img"},
+    )
+    kwargs.update(overrides)
+    return kwargs
+
+
+class TestDatabaseModes:
+    """Tests for connection modes."""
+
+    def test_writer_uses_wal(self, database):
+        mode = database._conn.execute("PRAGMA journal_mode;").fetchone()[0]
+        assert mode.lower() == "wal"
+
+    def test_read_only_connection_rejects_writes(self, database):
+        database.create_job(**_job_kwargs("job-1"))
+        reader = Database(database.path, read_only=True)
+        try:
+            assert reader.get_job("job-1") is not None
+            with pytest.raises(sqlite3.OperationalError):
+                reader.update_job("job-1", status="failed")
+        finally:
+            reader.close()
+
+
+def _query_plan(db: Database, sql: str, params=()) -> str:
+    rows = db._conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return " | ".join(r["detail"] for r in rows)
+
+
+class TestSchemaMigrations:
+    """Tests for versioned schema migrations."""
+
+    def test_fresh_database_is_current(self, database):
+        assert database.schema_version() == SCHEMA_VERSION
+
+    def test_reopen_is_noop(self, database):
+        database.create_job(**_job_kwargs("job-1"))
+        again = Database(database.path)
+        try:
+            assert again.schema_version() == SCHEMA_VERSION
+            assert again.get_job("job-1") is not None
+        finally:
+            again.close()
+
+    def test_upgrades_legacy_database(self, tmp_path):
+        path = str(tmp_path / "legacy.sqlite3")
+        conn = sqlite3.connect(path)
+        # Schema of the first MVP: no 'harvested' column, no user_version
+        conn.execute(
+            """
+            CREATE TABLE jobs (
+                id TEXT PRIMARY KEY, engine TEXT NOT NULL, status TEXT NOT NULL,
+                prompt_id TEXT, prompt TEXT NOT NULL, negative_prompt TEXT NOT NULL,
+                params_json TEXT NOT NULL, created_at TEXT NOT NULL, updated_at TEXT NOT NULL,
+                progress_value REAL NOT NULL DEFAULT 0, progress_max REAL NOT NULL DEFAULT 0,
+                error TEXT
+            );
+            """
+        )
+        conn.execute(
+            "INSERT INTO jobs (id, engine, status, prompt, negative_prompt, params_json, created_at, updated_at) "
+            "VALUES ('old', 'comfy', 'completed', 'p', '', '{}', '2024-01-01', '2024-01-01');"
+        )
+        conn.commit()
+        conn.close()
+
+        db = Database(path)
+        try:
+            assert db.schema_version() == SCHEMA_VERSION
+            row = db.get_job("old")
+            assert row.status == "completed"
+            assert row.harvested == 0
+        finally:
+            db.close()
+
+    def test_lookup_queries_use_indexes(self, database):
+        assert "idx_jobs_prompt_id" in _query_plan(database, "SELECT * FROM jobs WHERE prompt_id = ?;", ("p",))
+        assert "idx_jobs_created_at" in _query_plan(
+            database, "SELECT * FROM jobs ORDER BY created_at DESC LIMIT 10;"
+        )
+        assert "idx_assets_job_id" in _query_plan(
+            database, "SELECT * FROM assets WHERE job_id = ? ORDER BY created_at DESC;", ("j",)
+        )
+        assert "idx_assets_favorite" in _query_plan(
+            database, "SELECT * FROM assets WHERE favorite = 1 ORDER BY created_at DESC LIMIT 10;"
+        )
+
+    def test_create_jobs_inserts_batch_in_order(self, database):
+        rows = database.create_jobs([_job_kwargs(f"job-{i}") for i in range(5)])
+        assert [r.id for r in rows] == [f"job-{i}" for i in range(5)]
+        listed = database.list_jobs_page(limit=10)
+        assert [r.id for r in listed] == [f"job-{i}" for i in reversed(range(5))]
+
+    def test_waiting_jobs_are_unsubmitted_queued_jobs(self, database):
+        database.create_jobs([_job_kwargs(f"job-{i}") for i in range(4)])
+        database.update_job("job-0", prompt_id="p0")
+        database.update_job("job-2", status="failed")
+        assert [j.id for j in database.list_waiting_jobs(10)] == ["job-1", "job-3"]
+        assert [j.id for j in database.list_waiting_jobs(1)] == ["job-1"]
+        assert database.count_waiting_jobs() == 2
+
+    def test_waiting_jobs_carry_scheduling_fields(self, database):
+        database.create_job(**_job_kwargs("job-1", priority="batch", client_id="mcp"))
+        database.create_job(**_job_kwargs("job-2", params={}))
+        first, second = database.list_waiting_jobs(10)
+        assert (first.priority, first.client_id, first.workflow_id) == ("batch", "mcp", "sdxl_txt2img")
+        assert (second.priority, second.client_id, second.workflow_id) == ("interactive", "", "")
+
+    def test_run_times_from_start_and_finish_stamps(self, database):
+        database.create_jobs([_job_kwargs(f"job-{i}") for i in range(3)])
+        database.update_job("job-0", status="running")
+        first_start = database.get_job("job-0").started_at
+        database.update_job("job-0", status="running")
+        database.update_job("job-0", status="completed")
+        row = database.get_job("job-0")
+        assert row.started_at == first_start
+        assert row.finished_at is not None
+        database.update_job("job-1", status="failed")
+        assert database.get_job("job-1").started_at is None
+
+        conn = database._conn
+        for job_id, seconds in (("job-0", 10), ("job-2", 30)):
+            conn.execute(
+                "UPDATE jobs SET status = 'completed', started_at = ?, finished_at = ? WHERE id = ?;",
+                ("2026-01-01T00:00:00+00:00", f"2026-01-01T00:00:{seconds:02d}+00:00", job_id),
+            )
+        conn.commit()
+        assert database.workflow_run_times() == {"sdxl_txt2img": pytest.approx(20.0, abs=0.01)}
+        # Only the most recently finished job
+        assert database.workflow_run_times(recent=1) == {"sdxl_txt2img": pytest.approx(30.0, abs=0.01)}
+
+    def test_unsettled_jobs_page_by_created_at(self, database):
+        database.create_jobs([_job_kwargs(f"job-{i}", prompt_id=f"p{i}") for i in range(5)])
+        database.create_job(**_job_kwargs("not-submitted"))
+        database.update_job("job-1", status="completed", harvested=1)
+        database.update_job("job-2", status="completed")
+        database.update_job("job-3", status="failed")
+
+        first = database.list_unsettled_jobs(2)
+        assert [j.id for j in first] == ["job-0", "job-2"]
+        rest = database.list_unsettled_jobs(2, after=(first[-1].created_at, first[-1].id))
+        assert [j.id for j in rest] == ["job-4"]
+
+    def test_create_jobs_is_all_or_nothing(self, database):
+        database.create_job(**_job_kwargs("job-2"))
+        with pytest.raises(sqlite3.IntegrityError):
+            database.create_jobs([_job_kwargs(f"job-{i}") for i in range(4)])
+        assert database.get_job("job-0") is None
+        assert database.get_job("job-3") is None
+
+    def test_list_assets_favorites_only(self, database):
+        database.create_job(**_job_kwargs("job-1"))
+        for asset_id in ("a1", "a2"):
+            database.create_asset(
+                asset_id=asset_id, job_id="job-1", engine="comfy", filename=f"{asset_id}.png", recipe={}, meta={}
+            )
+        database.toggle_favorite("a2")
+
+        assert [a.id for a in database.list_assets(favorites_only=True)] == ["a2"]
+        assert len(database.list_assets()) == 2
+
+
+class TestBlobRefs:
+    """Tests for blob reference counting."""
+
+    def _asset(self, db: Database, asset_id: str, content_hash: str = "h1", **kwargs) -> None:
+        kwargs.setdefault("blob_size", 10)
+        db.create_asset(
+            asset_id=asset_id, job_id="job-1", engine="comfy", filename=f"blobs/{content_hash}.png",
+            recipe={}, meta={}, content_hash=content_hash, **kwargs,
+        )
+
+    def test_assets_share_a_refcounted_blob(self, database):
+        database.create_job(**_job_kwargs("job-1"))
+        self._asset(database, "a1")
+        self._asset(database, "a2")
+        self._asset(database, "a3", blob_size=None)  # not a blob reference
+
+        blob = database.get_blob("h1")
+        assert (blob.path, blob.size, blob.refcount) == ("blobs/h1.png", 10, 2)
+        assert database.blob_stats() == {"blobs": 1, "stored_bytes": 10, "referenced_bytes": 20}
+
+        assert database.delete_asset("a1").id == "a1"
+        assert database.delete_asset("a1") is None
+        database.delete_asset("a2")
+        assert database.get_blob("h1").refcount == 0
+        assert [b.content_hash for b in database.list_unreferenced_blobs()] == ["h1"]
+
+        assert database.delete_blob("h1")
+        assert database.get_blob("h1") is None
+
+    def test_referenced_blob_is_not_deleted(self, database):
+        database.create_job(**_job_kwargs("job-1"))
+        self._asset(database, "a1")
+        assert not database.delete_blob("h1")
+
+    def test_recount_fixes_drift(self, database):
+        database.create_job(**_job_kwargs("job-1"))
+        self._asset(database, "a1")
+        self._asset(database, "a2", content_hash="h2")
+        database._conn.execute("UPDATE blobs SET refcount = 7 WHERE content_hash = 'h1';")
+        database._conn.execute("DELETE FROM assets WHERE id = 'a2';")
+        database._conn.commit()
+
+        assert database.recount_blob_refs(apply=False) == 2
+        assert database.get_blob("h1").refcount == 7
+        assert database.recount_blob_refs() == 2
+        assert (database.get_blob("h1").refcount, database.get_blob("h2").refcount) == (1, 0)
+        assert database.recount_blob_refs() == 0
+
+    def test_failed_insert_does_not_count(self, database):
+        database.create_job(**_job_kwargs("job-1"))
+        self._asset(database, "a1")
+        with pytest.raises(sqlite3.IntegrityError):
+            self._asset(database, "a1")
+        assert database.get_blob("h1").refcount == 1
+
+
+def _seed_assets(db: Database, count: int) -> None:
+    """Insert jobs/assets with two assets per timestamp so ids break ties."""
+    conn = db._conn
+    for i in range(count):
+        job_id = f"job-{i:03d}"
+        status = "completed" if i % 2 == 0 else "failed"
+        created = f"2024-01-01T00:00:{i // 2:02d}+00:00"
+        params = '{"workflow_id": "%s"}' % ("flux" if i % 3 == 0 else "sdxl")
+        conn.execute(
+            "INSERT INTO jobs (id, engine, status, prompt, negative_prompt, params_json, created_at, updated_at) "
+            "VALUES (?, 'comfy', ?, 'p', '', ?, ?, ?);",
+            (job_id, status, params, created, created),
+        )
+        conn.execute(
+            "INSERT INTO assets (id, job_id, engine, filename, created_at, favorite, recipe_json, meta_json) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, '{}');",
+            (
+                f"asset-{i:03d}",
+                job_id,
+                "comfy" if i % 4 else "grok-image",
+                f"{i}.png",
+                created,
+                1 if i % 5 == 0 else 0,
+                '{"params": %s}' % params,
+            ),
+        )
+    conn.commit()
+
+
+class TestKeysetPagination:
+    """Tests for (created_at, id) keyset pages."""
+
+    def test_walks_all_rows_without_gaps(self, database):
+        _seed_assets(database, 25)
+        seen = []
+        before = None
+        while True:
+            page = database.list_assets_page(limit=7, before=before)
+            if not page:
+                break
+            seen.extend(a.id for a in page)
+            before = (page[-1].created_at, page[-1].id)
+
+        assert seen == [f"asset-{i:03d}" for i in reversed(range(25))]
+
+    def test_after_returns_rows_closest_to_cursor(self, database):
+        _seed_assets(database, 10)
+        page = database.list_assets_page(limit=3, after=("2024-01-01T00:00:01+00:00", "asset-002"))
+        assert [a.id for a in page] == ["asset-005", "asset-004", "asset-003"]
+
+    def test_filters(self, database):
+        _seed_assets(database, 20)
+        favorites = database.list_assets_page(favorites_only=True)
+        assert [a.id for a in favorites] == ["asset-015", "asset-010", "asset-005", "asset-000"]
+
+        grok = database.list_assets_page(engine="grok-image")
+        assert {a.id for a in grok} == {f"asset-{i:03d}" for i in range(0, 20, 4)}
+
+        flux = database.list_assets_page(workflow_id="flux")
+        assert {a.id for a in flux} == {f"asset-{i:03d}" for i in range(0, 20, 3)}
+
+        failed = database.list_assets_page(job_status="failed", limit=3)
+        assert [a.id for a in failed] == ["asset-019", "asset-017", "asset-015"]
+
+        jobs = database.list_jobs_page(status="completed", workflow_id="flux")
+        assert [j.id for j in jobs] == ["job-018", "job-012", "job-006", "job-000"]
+
+    def test_summary_skips_json_columns(self, database):
+        _seed_assets(database, 2)
+        page = database.list_assets_page(summary=True)
+        assert [a.id for a in page] == ["asset-001", "asset-000"]
+        assert page[0].recipe_json == ""
+        assert page[0].meta_json == ""
+
+    def test_before_and_after_are_exclusive(self, database):
+        with pytest.raises(ValueError):
+            database.list_jobs_page(before=("a", "b"), after=("a", "b"))
+
+
+class TestAsyncDatabase:
+    """Tests for the awaitable facade."""
+
+    @pytest.mark.asyncio
+    async def test_reads_see_committed_writes(self, async_db):
+        await async_db.create_job(**_job_kwargs("job-1"))
+        await async_db.update_job("job-1", status="running", progress_value=3, progress_max=10)
+
+        row = await async_db.get_job("job-1")
+        assert row is not None
+        assert row.status == "running"
+        assert row.progress_value == 3
+        assert [r.id for r in await async_db.list_jobs()] == ["job-1"]
+
+    @pytest.mark.asyncio
+    async def test_queries_run_off_the_event_loop_thread(self, async_db, monkeypatch):
+        loop_thread = threading.get_ident()
+        seen = []
+        original = Database.get_job
+
+        def spy(self, job_id):
+            seen.append(threading.get_ident())
+            return original(self, job_id)
+
+        monkeypatch.setattr(Database, "get_job", spy)
+        await async_db.get_job("missing")
+
+        assert seen and loop_thread not in seen
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_are_serialized(self, async_db):
+        await asyncio.gather(*(async_db.create_job(**_job_kwargs(f"job-{i}")) for i in range(50)))
+        rows = await async_db.list_jobs(limit=100)
+        assert len(rows) == 50
+
+    @pytest.mark.asyncio
+    async def test_toggle_favorite_returns_updated_row(self, async_db):
+        await async_db.create_job(**_job_kwargs("job-1"))
+        await async_db.create_asset(
+            asset_id="asset-1",
+            job_id="job-1",
+            engine="comfy",
+            filename="a.png",
+            recipe={},
+            meta={},
+        )
+        row = await async_db.toggle_favorite("asset-1")
+        assert row is not None and row.favorite == 1
+        assert await async_db.toggle_favorite("missing") is None
@@ -0,0 +1,114 @@
+"""Tests for priority classes, fair queuing and learned workflow costs."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import Dict, List
+
+import pytest
+
+from server.db import WaitingJob
+from server.fair_queue import CostModel, FairQueue
+
+
+def _jobs(client_id: str, count: int, *, workflow_id: str = "image", priority: str = "interactive",
+          start: int = 0) -> List[WaitingJob]:
+    return [
+        WaitingJob(f"{client_id}-{i}", priority, client_id, workflow_id, f"2026-01-01T00:{start + i:02d}:00")
+        for i in range(count)
+    ]
+
+
+def _drain(queue: FairQueue, jobs: List[WaitingJob], per_round: int = 1) -> List[WaitingJob]:
+    """Submit everything, `per_round` jobs at a time, like the scheduler does."""
+    waiting = list(jobs)
+    order: List[WaitingJob] = []
+    while waiting:
+        chosen = queue.select(waiting, per_round)
+        assert chosen
+        order.extend(chosen)
+        waiting = [j for j in waiting if j not in chosen]
+    return order
+
+
+def test_priority_classes_are_strict():
+    queue = FairQueue(lambda wf: 1.0)
+    jobs = (
+        _jobs("bg", 2, priority="background")
+        + _jobs("mcp", 2, priority="batch", start=10)
+        + _jobs("ui", 2, start=20)
+    )
+    order = [j.priority for j in queue.select(jobs, 6)]
+    assert order == ["interactive"] * 2 + ["batch"] * 2 + ["background"] * 2
+
+
+def test_clients_take_turns_and_keep_their_own_order():
+    queue = FairQueue(lambda wf: 1.0)
+    # "big" queued 10 jobs before "small" queued 2
+    jobs = _jobs("big", 10) + _jobs("small", 2, start=30)
+    order = [j.id for j in _drain(queue, jobs)]
+    assert order.index("small-0") <= 2
+    assert order.index("small-1") <= 4
+    assert [i for i in order if i.startswith("big")] == [f"big-{i}" for i in range(10)]
+
+
+def test_expensive_workflows_get_fewer_turns():
+    costs = {"video": 120.0, "image": 10.0}
+    queue = FairQueue(costs.__getitem__)
+    jobs = _jobs("video-client", 20, workflow_id="video") + _jobs("image-client", 40, workflow_id="image")
+    first = Counter(j.client_id for j in _drain(queue, jobs)[:26])
+    # Equal ComfyUI time: one 120 s video per twelve 10 s images
+    assert first["image-client"] >= 20
+    assert first["video-client"] <= 3
+
+
+def test_weights_scale_the_share():
+    queue = FairQueue(lambda wf: 1.0, weights={"vip": 3})
+    jobs = _jobs("vip", 30) + _jobs("other", 30)
+    first = Counter(j.client_id for j in _drain(queue, jobs)[:20])
+    assert first["vip"] == 15
+    assert queue.stats()["weights"] == {"vip": 3}
+
+
+def test_late_client_does_not_get_banked_credit():
+    # A client idle while another worked does not jump ahead of it for long
+    queue = FairQueue(lambda wf: 1.0)
+    _drain(queue, _jobs("early", 10))
+    jobs = _jobs("early", 4, start=20) + _jobs("late", 4, start=30)
+    order = [j.client_id for j in _drain(queue, jobs)]
+    assert order[:4].count("late") <= 2
+
+
+def test_cost_model_falls_back_to_median_then_refreshes():
+    now = [0.0]
+    loads: List[Dict[str, float]] = [{"a": 10.0, "b": 20.0, "c": 60.0}, {"a": 5.0}]
+
+    async def load() -> Dict[str, float]:
+        return loads.pop(0)
+
+    async def scenario() -> None:
+        model = CostModel(load, default_sec=30, refresh_sec=60, clock=lambda: now[0])
+        assert model.cost("a") == 30  # nothing loaded yet; refresh started in the background
+        await asyncio.sleep(0)
+        assert model.cost("a") == 10
+        assert model.cost("unknown") == 20  # median of the known workflows
+        assert model.snapshot() == {"a": 10.0, "b": 20.0, "c": 60.0}
+
+        now[0] = 61.0
+        model.cost("a")
+        await asyncio.sleep(0)
+        assert model.cost("a") == 5
+        assert loads == []
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.asyncio
+async def test_cost_model_keeps_previous_costs_when_load_fails():
+    async def load() -> Dict[str, float]:
+        raise RuntimeError("database is locked")
+
+    model = CostModel(load, default_sec=30)
+    model.set_costs({"a": 12.0})
+    await model.refresh()
+    assert model.cost("a") == 12
@@ -0,0 +1,497 @@
+"""Tests for the asset harvest pipeline (FakeComfyClient, no ComfyUI required)."""
+from __future__ import annotations
+
+import json
+import os
+import uuid
+
+import pytest
+
+
+async def _agen(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestWriteStreamAtomic:
+    """Tests for storage.write_stream_atomic."""
+
+    @pytest.mark.asyncio
+    async def test_writes_all_chunks(self, tmp_path):
+        from server.storage import write_stream_atomic
+
+        dest = tmp_path / "out" / "a.png"
+        size = await write_stream_atomic(str(dest), _agen([b"abc", b"", b"def"]))
+
+        assert size == 6
+        assert dest.read_bytes() == b"abcdef"
+        # No temp files left behind
+        assert [p.name for p in dest.parent.iterdir()] == ["a.png"]
+
+    @pytest.mark.asyncio
+    async def test_failure_leaves_no_partial_file(self, tmp_path):
+        from server.storage import write_stream_atomic
+
+        async def broken():
+            yield b"partial"
+            raise RuntimeError("connection reset")
+
+        dest = tmp_path / "b.png"
+        with pytest.raises(RuntimeError):
+            await write_stream_atomic(str(dest), broken())
+
+        assert not dest.exists()
+        assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def harvest_env(tmp_path, monkeypatch):
+    from server import main
+    from server.blob_store import BlobStore
+    from server.fake_comfy_client import FakeComfyClient
+    from server.quality_gate import QualityGate
+    from server.thumbnails import ThumbnailCache
+
+    fake = FakeComfyClient()
+    original = main.get_comfy_client()
+    main.set_comfy_client(fake)
+    assets_dir = tmp_path / "assets"
+    assets_dir.mkdir()
+    monkeypatch.setattr(main, "ASSETS_DIR", str(assets_dir))
+    monkeypatch.setattr(main, "blob_store", BlobStore(str(assets_dir)))
+    monkeypatch.setattr(main, "thumbnails", ThumbnailCache(str(tmp_path / "thumbs"), workers=0))
+    monkeypatch.setattr(main, "quality_gate", QualityGate(mode="flag", workers=0))
+    monkeypatch.setattr(main, "QUARANTINE_DIR", str(tmp_path / "quarantine"))
+    yield main, fake, assets_dir
+    main.set_comfy_client(original)
+
+
+def _blob_files(assets_dir) -> list:
+    """Files in the blob store (staging excluded)."""
+    return [p for p in (assets_dir / "blobs").rglob("*") if p.is_file() and ".staging" not in p.parts]
+
+
+def _fail_view(fake, suffix: str) -> None:
+    """Make downloads of outputs whose name ends with `suffix` fail."""
+    original_iter_view = fake.iter_view
+
+    def flaky_iter_view(*, filename, subfolder, folder_type):
+        if filename.endswith(suffix):
+            raise RuntimeError("404")
+        return original_iter_view(filename=filename, subfolder=subfolder, folder_type=folder_type)
+
+    fake.iter_view = flaky_iter_view
+
+
+def _create_running_job(main) -> tuple[str, str]:
+    job_id = str(uuid.uuid4())
+    prompt_id = str(uuid.uuid4())
+    main.db.create_job(
+        job_id=job_id,
+        engine="comfy",
+        status="running",
+        prompt="harvest test",
+        negative_prompt="",
+        params={"workflow_id": "sdxl_txt2img"},
+        prompt_id=prompt_id,
+    )
+    return job_id, prompt_id
+
+
+class TestHarvestAssetsForPrompt:
+    """Tests for main.harvest_assets_for_prompt."""
+
+    @pytest.mark.asyncio
+    async def test_harvests_every_output(self, harvest_env):
+        main, fake, assets_dir = harvest_env
+        fake.images_per_prompt = 5
+        job_id, prompt_id = _create_running_job(main)
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        assert len(assets) == 5
+        assert {a.job_id for a in assets} == {job_id}
+        for a in assets:
+            data = (assets_dir / a.filename).read_bytes()
+            assert data.startswith(b"\x89PNG")
+            assert a.recipe["params"]["workflow_id"] == "sdxl_txt2img"
+
+    @pytest.mark.asyncio
+    async def test_identical_outputs_share_one_blob(self, harvest_env):
+        import hashlib
+
+        main, fake, assets_dir = harvest_env
+        fake.images_per_prompt = 3  # the fake serves the same PNG for every file
+        job_id, prompt_id = _create_running_job(main)
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        assert len({a.id for a in assets}) == 3
+        (blob,) = _blob_files(assets_dir)
+        content_hash = hashlib.sha256(blob.read_bytes()).hexdigest()
+        path = f"blobs/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.png"
+        assert {a.filename for a in assets} == {path}
+        assert {a.url for a in assets} == {f"/assets/{path}"}
+        # main.db is shared with other tests that harvest the same fake PNG
+        found = main.db.list_assets_page(content_hash=content_hash, limit=10000)
+        assert {a.id for a in assets} <= {row.id for row in found}
+        assert main.db.get_blob(content_hash).refcount == len([r for r in found if r.filename == path])
+
+    @pytest.mark.asyncio
+    async def test_on_asset_called_per_file(self, harvest_env):
+        main, fake, _ = harvest_env
+        fake.images_per_prompt = 3
+        job_id, prompt_id = _create_running_job(main)
+
+        seen = []
+
+        async def on_asset(asset):
+            # The file must already be in place when the event fires
+            assert os.path.exists(os.path.join(main.ASSETS_DIR, asset.filename))
+            seen.append(asset.id)
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id, on_asset=on_asset)
+
+        assert sorted(seen) == sorted(a.id for a in assets)
+        assert len(seen) == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_download_does_not_abort_batch(self, harvest_env):
+        from server.harvest_pool import IncompleteHarvestError
+
+        main, fake, _ = harvest_env
+        fake.images_per_prompt = 3
+        job_id, prompt_id = _create_running_job(main)
+        seen = []
+
+        async def on_asset(asset):
+            seen.append(asset.meta["comfy"]["filename"])
+
+        _fail_view(fake, "_1.png")
+
+        with pytest.raises(IncompleteHarvestError, match="1 of 3 outputs failed"):
+            await main.harvest_assets_for_prompt(job_id, prompt_id, on_asset=on_asset)
+        assert len(seen) == 2
+        assert len(main.db.list_assets_by_job(job_id)) == 2
+
+    @pytest.mark.asyncio
+    async def test_retry_only_fetches_missing_outputs(self, harvest_env):
+        from server.harvest_pool import IncompleteHarvestError
+
+        main, fake, _ = harvest_env
+        fake.images_per_prompt = 3
+        job_id, prompt_id = _create_running_job(main)
+        original_iter_view = fake.iter_view
+        _fail_view(fake, "_1.png")
+        with pytest.raises(IncompleteHarvestError):
+            await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        fetched = []
+
+        def counting_iter_view(*, filename, subfolder, folder_type):
+            fetched.append(filename)
+            return original_iter_view(filename=filename, subfolder=subfolder, folder_type=folder_type)
+
+        fake.iter_view = counting_iter_view
+        (asset,) = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        assert fetched == [asset.meta["comfy"]["filename"]]
+        assert asset.meta["comfy"]["filename"].endswith("_1.png")
+        rows = main.db.list_assets_by_job(job_id)
+        assert len({json.loads(r.meta_json)["comfy"]["filename"] for r in rows}) == len(rows) == 3
+
+    @pytest.mark.asyncio
+    async def test_records_content_hash(self, harvest_env):
+        import hashlib
+
+        main, fake, assets_dir = harvest_env
+        job_id, prompt_id = _create_running_job(main)
+
+        (asset,) = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        row = main.db.get_asset(asset.id)
+        expected = hashlib.sha256((assets_dir / asset.filename).read_bytes()).hexdigest()
+        assert row.content_hash == expected
+        assert asset.thumb_url == f"/thumbs/{asset.id}?size=256"
+
+    @pytest.mark.asyncio
+    async def test_thumbnail_renders_are_tracked_until_done(self, harvest_env):
+        import asyncio
+
+        main, _, _ = harvest_env
+        job_id, prompt_id = _create_running_job(main)
+        release = asyncio.Event()
+        rendered = []
+
+        async def slow_generate_all(path, content_hash):
+            await release.wait()
+            rendered.append(content_hash)
+
+        main.thumbnails.generate_all = slow_generate_all
+
+        earlier = set(main.thumbnail_tasks)  # left pending by other tests' loops
+        await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        tasks = main.thumbnail_tasks - earlier
+        assert len(tasks) == 1
+        release.set()
+        await asyncio.gather(*tasks)
+        assert len(rendered) == 1
+        assert not tasks & main.thumbnail_tasks
+
+    @pytest.mark.asyncio
+    async def test_uses_history_item_from_caller(self, harvest_env):
+        main, fake, _ = harvest_env
+        job_id, prompt_id = _create_running_job(main)
+        entry = (await fake.get_history(prompt_id))[prompt_id]
+        fake.history_calls = 0
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id, history_item=entry)
+        assert len(assets) == 1
+        assert fake.history_calls == 0
+        assert await main.harvest_assets_for_prompt(job_id, prompt_id, history_item={}) == []
+
+
+class TestHarvestMediaKinds:
+    """Video, animation and audio outputs are harvested like images."""
+
+    @pytest.mark.asyncio
+    async def test_harvests_every_output_kind(self, harvest_env):
+        main, fake, assets_dir = harvest_env
+        job_id, prompt_id = _create_running_job(main)
+        fake.history_overrides[prompt_id] = {
+            "status": {"status_str": "success"},
+            "outputs": {
+                "9": {"images": [{"filename": "still.png", "subfolder": "", "type": "output"}]},
+                "12": {
+                    "images": [{"filename": "clip.webp", "subfolder": "", "type": "output"}],
+                    "animated": [True],
+                },
+                "15": {"gifs": [{"filename": "wan.mp4", "subfolder": "video", "type": "output",
+                                 "format": "video/h264-mp4"}]},
+                "18": {"audio": [{"filename": "voice.flac", "subfolder": "", "type": "output"}]},
+            },
+        }
+        video = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 4096
+        fake.view_files = {"wan.mp4": video, "voice.flac": b"fLaC" + b"\x00" * 64, "clip.webp": b"RIFF0000WEBP"}
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        kinds = {a.meta["comfy"]["filename"]: a.media_kind for a in assets}
+        assert kinds == {"still.png": "image", "clip.webp": "animation", "wan.mp4": "video", "voice.flac": "audio"}
+        by_name = {a.meta["comfy"]["filename"]: a for a in assets}
+        assert by_name["wan.mp4"].filename.endswith(".mp4")
+        assert by_name["wan.mp4"].meta["media"] == {"kind": "video", "mime": "video/mp4"}
+        assert (assets_dir / by_name["wan.mp4"].filename).read_bytes() == video
+        # The quality gate only looks at still images
+        assert "quality" in by_name["still.png"].meta
+        assert "quality" not in by_name["wan.mp4"].meta
+
+
+class TestLocalImport:
+    """Outputs are imported from a shared ComfyUI output directory."""
+
+    @pytest.mark.asyncio
+    async def test_imports_local_outputs_and_downloads_the_rest(self, harvest_env, tmp_path, monkeypatch):
+        import hashlib
+
+        from server.local_import import LocalImporter
+
+        main, fake, assets_dir = harvest_env
+        output_dir = tmp_path / "comfy_output"
+        output_dir.mkdir()
+        (output_dir / "local.png").write_bytes(b"\x89PNG local copy")
+        monkeypatch.setattr(main, "local_importer", LocalImporter(str(output_dir), mode="move"))
+        job_id, prompt_id = _create_running_job(main)
+        fake.history_overrides[prompt_id] = {
+            "status": {"status_str": "success"},
+            "outputs": {
+                "9": {"images": [
+                    {"filename": "local.png", "subfolder": "", "type": "output"},
+                    {"filename": "remote.png", "subfolder": "", "type": "output"},
+                ]},
+            },
+        }
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        by_name = {a.meta["comfy"]["filename"]: a for a in assets}
+        assert by_name["local.png"].meta["comfy"]["import"] == "hardlink"
+        assert (assets_dir / by_name["local.png"].filename).read_bytes() == b"\x89PNG local copy"
+        assert by_name["remote.png"].meta["comfy"]["import"] == "http"
+        # Move mode: ComfyUI's copy is gone once the asset is registered
+        assert not (output_dir / "local.png").exists()
+        row = main.db.get_asset(by_name["local.png"].id)
+        assert row.content_hash == hashlib.sha256(b"\x89PNG local copy").hexdigest()
+
+
+class TestCompleteJob:
+    """Tests for main._complete_job (shared by the event dispatcher and the reconciler)."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_completions_harvest_once(self, harvest_env):
+        import asyncio
+
+        main, fake, assets_dir = harvest_env
+        fake.images_per_prompt = 2
+        job_id, _ = _create_running_job(main)
+
+        await asyncio.gather(main._complete_job(job_id), main._complete_job(job_id))
+        # Completed right away; outputs arrive from the harvest pool
+        assert main.db.get_job(job_id).status == "completed"
+        await main.harvest_pool.join()
+        await main._complete_job(job_id)
+        await main.harvest_pool.join()
+
+        row = main.db.get_job(job_id)
+        assert (row.status, row.harvested) == ("completed", 1)
+        assert row.finished_at is not None
+        assert len(main.db.list_assets_by_job(job_id)) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_outputs_are_retried_until_attempts_run_out(self, harvest_env, monkeypatch):
+        from server.harvest_pool import HarvestPool
+
+        main, fake, _ = harvest_env
+        fake.images_per_prompt = 3
+        monkeypatch.setattr(
+            main,
+            "harvest_pool",
+            HarvestPool(main._harvest_job, give_up=main._give_up_harvest, max_attempts=2, backoff_sec=0),
+        )
+        job_id, _ = _create_running_job(main)
+        _fail_view(fake, "_1.png")
+        attempts = []
+        harvest_job = main._harvest_job
+
+        async def counting_harvest_job(job_id, history_item=None):
+            attempts.append(main.db.get_job(job_id).harvested)
+            await harvest_job(job_id, history_item)
+
+        main.harvest_pool._harvest = counting_harvest_job
+
+        await main._complete_job(job_id)
+        await main.harvest_pool.join()
+
+        # Not final after the first failure; kept as final once attempts are exhausted
+        assert attempts == [0, 0]
+        assert main.db.get_job(job_id).harvested == 1
+        assert len(main.db.list_assets_by_job(job_id)) == 2
+
+
+def _png(color=None, size=(96, 96)) -> bytes:
+    """Solid image if `color` is given, otherwise a gradient that passes the checks."""
+    import io
+
+    from PIL import Image
+
+    if color is not None:
+        img = Image.new("RGB", size, color)
+    else:
+        img = Image.linear_gradient("L").resize(size).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", compress_level=0)
+    return buffer.getvalue()
+
+
+class TestHarvestQualityGate:
+    """Tests for the quality gate inside harvest_assets_for_prompt."""
+
+    @pytest.fixture
+    def gated_env(self, harvest_env):
+        main, fake, assets_dir = harvest_env
+        fake.images_per_prompt = 3
+
+        async def view_image(*, filename, subfolder, folder_type):
+            # The second output is a black (failed) generation
+            return _png((0, 0, 0)) if filename.endswith("_1.png") else _png()
+
+        fake.get_view_image = view_image
+        return main, fake, assets_dir
+
+    @pytest.mark.asyncio
+    async def test_flag_mode_keeps_assets_and_records_stats(self, gated_env):
+        main, _, _ = gated_env
+        job_id, prompt_id = _create_running_job(main)
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        assert len(assets) == 3
+        by_result = sorted(a.meta["quality"]["passed"] for a in assets)
+        assert by_result == [False, True, True]
+        failed = next(a for a in assets if not a.meta["quality"]["passed"])
+        assert "black" in failed.meta["quality"]["reason"]
+        assert failed.meta["quality"]["stats"]["mean_brightness"] == 0.0
+
+        job = main.db.get_job(job_id)
+        report = json.loads(job.quality_json)
+        assert (report["passed"], report["failed"], report["quarantined"]) == (2, 1, 0)
+        assert report["failures"][0]["filename"].endswith("_1.png")
+        assert report["failures"][0]["stored_as"] == failed.filename
+        assert main.jobrow_to_out(job).quality == report
+
+    @pytest.mark.asyncio
+    async def test_quarantine_mode_moves_failing_outputs(self, gated_env, monkeypatch, tmp_path):
+        from server.quality_gate import QualityGate
+
+        main, _, assets_dir = gated_env
+        monkeypatch.setattr(main, "quality_gate", QualityGate(mode="quarantine", workers=0))
+        job_id, prompt_id = _create_running_job(main)
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        assert len(assets) == 2
+        assert all(a.meta["quality"]["passed"] for a in assets)
+        # The two passing outputs are identical: one blob
+        assert len(_blob_files(assets_dir)) == 1
+        assert len(list((tmp_path / "quarantine").iterdir())) == 1
+        report = json.loads(main.db.get_job(job_id).quality_json)
+        assert (report["passed"], report["failed"], report["quarantined"]) == (2, 1, 1)
+        assert report["failures"][0]["quarantined"] is True
+        assert report["failures"][0]["filename"].endswith("_1.png")
+        assert [p.name for p in (tmp_path / "quarantine").iterdir()] == [report["failures"][0]["stored_as"]]
+
+    @pytest.mark.asyncio
+    async def test_off_mode_skips_checks(self, gated_env, monkeypatch):
+        from server.quality_gate import QualityGate
+
+        main, _, _ = gated_env
+        monkeypatch.setattr(main, "quality_gate", QualityGate(mode="off", workers=0))
+        job_id, prompt_id = _create_running_job(main)
+
+        assets = await main.harvest_assets_for_prompt(job_id, prompt_id)
+
+        assert len(assets) == 3
+        assert all("quality" not in a.meta for a in assets)
+        assert main.db.get_job(job_id).quality_json is None
+
+
+class TestComfyEventDispatch:
+    """Tests for main.handle_comfy_event."""
+
+    @pytest.mark.asyncio
+    async def test_completion_event_does_not_wait_for_downloads(self, harvest_env):
+        import asyncio
+
+        main, fake, assets_dir = harvest_env
+        job_id, prompt_id = _create_running_job(main)
+        release = asyncio.Event()
+        original_iter_view = fake.iter_view
+
+        async def slow_iter_view(**kwargs):
+            await release.wait()
+            async for chunk in original_iter_view(**kwargs):
+                yield chunk
+
+        fake.iter_view = slow_iter_view
+
+        await asyncio.wait_for(
+            main.handle_comfy_event({"type": "executing", "data": {"node": None, "prompt_id": prompt_id}}), 1.0
+        )
+        assert main.db.get_job(job_id).status == "completed"
+        assert main.db.get_job(job_id).harvested == 0
+
+        release.set()
+        await main.harvest_pool.join()
+        assert main.db.get_job(job_id).harvested == 1
+        assert len(main.db.list_assets_by_job(job_id)) == 1
@@ -0,0 +1,96 @@
+"""Tests for the background harvest pool."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from server.harvest_pool import HarvestPool
+
+
+class FakeHarvester:
+    def __init__(self, *, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: List[tuple] = []
+        self.failures: Dict[str, int] = {}
+        self.active = 0
+        self.peak = 0
+
+    async def harvest(self, job_id: str, history_item: Optional[Dict[str, Any]]) -> None:
+        self.calls.append((job_id, history_item))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures.get(job_id, 0) > 0:
+                self.failures[job_id] -= 1
+                raise RuntimeError("history unavailable")
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    harvester = FakeHarvester(delay=0.01)
+    pool = HarvestPool(harvester.harvest, concurrency=2)
+    for i in range(6):
+        assert pool.submit(f"job-{i}")
+    await pool.join()
+    assert harvester.peak == 2
+    stats = pool.stats()
+    assert (stats["harvested"], stats["queued"], stats["active"]) == (6, 0, 0)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_submissions_are_ignored_while_pending():
+    harvester = FakeHarvester(delay=0.01)
+    pool = HarvestPool(harvester.harvest)
+    assert pool.submit("job", {"outputs": {}})
+    assert not pool.submit("job")
+    await pool.join()
+    assert harvester.calls == [("job", {"outputs": {}})]
+    assert pool.submit("job")  # finished, so it can be queued again
+    await pool.join()
+
+
+@pytest.mark.asyncio
+async def test_failures_are_retried_with_a_fresh_history_read():
+    harvester = FakeHarvester()
+    harvester.failures = {"job": 2}
+    pool = HarvestPool(harvester.harvest, max_attempts=3, backoff_sec=0)
+    pool.submit("job", {"outputs": {}})
+    await pool.join()
+    assert harvester.calls == [("job", {"outputs": {}}), ("job", None), ("job", None)]
+    assert (pool.stats()["retries"], pool.stats()["failed"], pool.stats()["harvested"]) == (2, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts():
+    harvester = FakeHarvester()
+    harvester.failures = {"job": 5}
+    given_up = []
+
+    async def give_up(job_id, error):
+        given_up.append((job_id, str(error)))
+
+    pool = HarvestPool(harvester.harvest, give_up=give_up, max_attempts=2, backoff_sec=0)
+    pool.submit("job")
+    await pool.join()
+    assert len(harvester.calls) == 2
+    assert pool.stats()["failed"] == 1
+    assert given_up == [("job", "history unavailable")]
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_queued_and_running_harvests():
+    harvester = FakeHarvester(delay=10)
+    pool = HarvestPool(harvester.harvest, concurrency=1)
+    pool.submit("job-1")
+    pool.submit("job-2")
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(pool.close(), timeout=1)
+    assert [job_id for job_id, _ in harvester.calls] == ["job-1"]
+    assert pool.stats()["harvested"] == 0
+    assert (pool.stats()["queued"], pool.stats()["active"]) == (0, 0)
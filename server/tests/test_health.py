@@ -0,0 +1,98 @@
+"""Tests for the background ComfyUI health prober."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+SYSTEM_STATS = {
+    "system": {"ram_total": 64_000, "ram_free": 32_000},
+    "devices": [{"name": "cuda:0", "vram_total": 24_000, "vram_free": 20_000}],
+}
+
+
+def _prober(handler, **kwargs):
+    from server.health import HealthProber
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return HealthProber(lambda: client, "http://comfy", **kwargs)
+
+
+class TestHealthProber:
+    """Tests for probing, caching and state-change broadcasts."""
+
+    @pytest.mark.asyncio
+    async def test_probe_collects_memory_and_queue(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/queue":
+                return httpx.Response(200, json={"queue_running": [[1]], "queue_pending": [[2], [3]]})
+            return httpx.Response(200, json=SYSTEM_STATS)
+
+        result = await _prober(handler).probe()
+
+        assert result["ok"] is True
+        assert result["error_code"] is None
+        assert result["comfy_stats"] == SYSTEM_STATS
+        assert result["memory"]["vram_free"] == 20_000
+        assert result["memory"]["ram_total"] == 64_000
+        assert result["queue"] == {"running": 1, "pending": 2}
+        assert result["latency_ms"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_unreachable_and_error_status(self):
+        def refused(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("refused", request=request)
+
+        result = await _prober(refused).probe()
+        assert result["ok"] is False
+        assert result["error_code"] == "COMFY_UNREACHABLE"
+
+        result = await _prober(lambda request: httpx.Response(500)).probe()
+        assert result["error_code"] == "COMFY_ERROR"
+        assert "500" in result["error_message"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_snapshots_share_one_probe(self):
+        calls: List[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json=SYSTEM_STATS if request.url.path == "/system_stats" else {})
+
+        prober = _prober(handler)
+        results = await asyncio.gather(*(prober.snapshot() for _ in range(10)))
+        assert calls.count("/system_stats") == 1
+
+        # Later calls are answered from memory
+        again = await prober.snapshot()
+        assert calls.count("/system_stats") == 1
+        assert again["checked_at"] == results[0]["checked_at"]
+        assert len(again["history"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_run_broadcasts_state_changes_only(self):
+        up = {"value": True}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if not up["value"]:
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json=SYSTEM_STATS if request.url.path == "/system_stats" else {})
+
+        prober = _prober(handler, interval=0.01, history_size=5)
+        events: List[Dict[str, Any]] = []
+
+        async def broadcast(event: Dict[str, Any]) -> None:
+            events.append(event)
+            if len(events) == 1:
+                up["value"] = False
+
+        task = asyncio.create_task(prober.run(broadcast))
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+        assert [e["payload"]["ok"] for e in events] == [True, False]
+        assert all(e["type"] == "comfy_health" for e in events)
+        history = (await prober.snapshot())["history"]
+        assert len(history) == 5
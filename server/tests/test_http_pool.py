@@ -0,0 +1,94 @@
+"""Tests for the shared outbound HTTP pool."""
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+
+class TestUpstreamMetrics:
+    """Tests for per-upstream latency metrics."""
+
+    def test_empty_metrics(self):
+        from server.http_pool import UpstreamMetrics
+
+        data = UpstreamMetrics().to_dict()
+        assert data["requests"] == 0
+        assert data["avg_ms"] is None
+        assert data["p95_ms"] is None
+
+    def test_percentiles_and_errors(self):
+        from server.http_pool import UpstreamMetrics
+
+        metrics = UpstreamMetrics()
+        for ms in range(1, 101):
+            metrics.record(float(ms), 200)
+        metrics.record(500.0, 503)
+        metrics.record(5.0, None)
+
+        data = metrics.to_dict()
+        assert data["requests"] == 102
+        assert data["errors"] == 2
+        assert data["status"] == {"2xx": 100, "5xx": 1, "error": 1}
+        assert data["p50_ms"] == 51.0
+        assert data["p95_ms"] == 96.0
+        assert data["max_ms"] == 500.0
+
+
+class TestMeteredTransport:
+    """Tests for request timing at the transport layer."""
+
+    @pytest.mark.asyncio
+    async def test_records_responses_and_transport_errors(self):
+        from server.http_pool import UpstreamMetrics, _MeteredTransport
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/down":
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(404 if request.url.path == "/missing" else 200, json={})
+
+        metrics = UpstreamMetrics()
+        transport = _MeteredTransport(httpx.MockTransport(handler), metrics)
+        async with httpx.AsyncClient(transport=transport, base_url="http://upstream") as client:
+            await client.get("/ok")
+            await client.get("/missing")
+            with pytest.raises(httpx.ConnectError):
+                await client.get("/down")
+
+        data = metrics.to_dict()
+        assert data["requests"] == 3
+        assert data["errors"] == 1
+        assert data["status"] == {"2xx": 1, "4xx": 1, "error": 1}
+
+
+class TestHttpPool:
+    """Tests for pooled client lifecycle."""
+
+    @pytest.mark.asyncio
+    async def test_client_reused_per_upstream(self):
+        from server.http_pool import HttpPool, UpstreamConfig
+
+        pool = HttpPool({"comfy": UpstreamConfig(timeout=5.0, connect_timeout=1.0)})
+        comfy = pool.client("comfy")
+        assert pool.client("comfy") is comfy
+        assert pool.client("xai") is not comfy
+        assert comfy.timeout.read == 5.0
+        assert comfy.timeout.connect == 1.0
+
+        await pool.close()
+        assert comfy.is_closed
+        assert pool.client("comfy") is not comfy
+        await pool.close()
+
+    def test_new_event_loop_gets_new_client(self):
+        from server.http_pool import HttpPool
+
+        pool = HttpPool()
+
+        async def get_client() -> httpx.AsyncClient:
+            return pool.client("comfy")
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+        assert first is not second
@@ -421,3 +421,73 @@ class TestGetImageInfo:
         assert info["size_bytes"] == len(image_data)
         assert info["width"] == 100
         assert info["height"] == 100
+
+
+def _reference_stats(image_data: bytes) -> tuple:
+    """Per-pixel Python computation the NumPy implementation must match."""
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode == "RGBA":
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    pixels = list(img.getdata())
+    step = max(1, len(pixels) // min(len(pixels), 10000))
+    sample = pixels[::step]
+    brightness = [(r + g + b) / (3 * 255) for r, g, b in sample]
+    mean = sum(brightness) / len(brightness)
+    stddev = (sum((b - mean) ** 2 for b in brightness) / len(brightness)) ** 0.5
+    return len(sample), mean, stddev, len(set(sample))
+
+
+class TestImageStats:
+    """Tests for the computed statistics."""
+
+    @pytest.mark.parametrize("mode", ["RGB", "RGBA", "L"])
+    def test_matches_reference(self, mode):
+        import numpy as np
+
+        from server.image_quality import compute_image_stats
+
+        rng = np.random.default_rng(7)
+        channels = {"RGB": 3, "RGBA": 4, "L": 1}[mode]
+        arr = rng.integers(0, 256, size=(300, 317, channels), dtype=np.uint8)
+        img = Image.fromarray(arr.squeeze(), mode)
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        data = buffer.getvalue()
+
+        stats = compute_image_stats(data)
+        count, mean, stddev, unique = _reference_stats(data)
+
+        assert stats.sampled_pixels == count
+        assert stats.mean_brightness == pytest.approx(mean, abs=1e-12)
+        assert stats.stddev == pytest.approx(stddev, abs=1e-12)
+        assert stats.unique_colors == unique
+        assert (stats.width, stats.height) == (317, 300)
+
+    def test_check_returns_stats_and_errors_carry_them(self):
+        from server.image_quality import ImageQualityError, check_image_quality
+
+        stats = check_image_quality(create_gradient_image())
+        assert stats.unique_colors > 3
+        assert 0 < stats.mean_brightness < 1
+
+        with pytest.raises(ImageQualityError) as exc_info:
+            check_image_quality(create_test_image((10, 200, 30)))
+        assert exc_info.value.stats.dominant_color == (10, 200, 30)
+        assert exc_info.value.stats.unique_colors == 1
+
+    def test_large_jpeg_decoded_at_reduced_scale(self):
+        from server.image_quality import ANALYSIS_SIZE, compute_image_stats
+
+        img = Image.new("RGB", (2048, 2048))
+        img.paste((200, 50, 50), (0, 0, 1024, 2048))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG")
+
+        stats = compute_image_stats(buffer.getvalue())
+
+        assert (stats.width, stats.height) == (2048, 2048)
+        assert ANALYSIS_SIZE <= stats.decoded_width < 2048
@@ -0,0 +1,127 @@
+"""Tests for the write-through job state cache."""
+from __future__ import annotations
+
+import pytest
+
+from server.db import AsyncDatabase, Database
+from server.job_cache import JobCache
+
+
+class CountingDatabase:
+    """Wraps AsyncDatabase and counts calls per method."""
+
+    def __init__(self, adb: AsyncDatabase) -> None:
+        self._adb = adb
+        self.calls: dict[str, int] = {}
+
+    def __getattr__(self, name):
+        fn = getattr(self._adb, name)
+
+        async def call(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return await fn(*args, **kwargs)
+
+        return call
+
+
+def _payload(row, params):
+    return {"id": row.id, "status": row.status, "params": params, "progress_value": row.progress_value}
+
+
+@pytest.fixture
+def counting_db(tmp_path):
+    db = Database(str(tmp_path / "cache.sqlite3"))
+    adb = AsyncDatabase(db)
+    yield CountingDatabase(adb)
+    adb.close()
+    db.close()
+
+
+async def _create(cache, job_id="job-1", **overrides):
+    kwargs = dict(
+        job_id=job_id,
+        engine="comfy",
+        status="queued",
+        prompt="a cat",
+        negative_prompt="",
+        params={"workflow_id": "sdxl_txt2img", "steps": 20},
+    )
+    kwargs.update(overrides)
+    return await cache.create(**kwargs)
+
+
+class TestJobCache:
+    @pytest.mark.asyncio
+    async def test_update_returns_updated_row(self, counting_db):
+        cache = JobCache(counting_db, _payload)
+        await _create(cache)
+
+        row = await cache.update("job-1", status="running", prompt_id="p-1")
+        assert row.status == "running"
+        assert row.prompt_id == "p-1"
+        assert await cache.update("missing", status="failed") is None
+
+    @pytest.mark.asyncio
+    async def test_prompt_lookup_hits_memory(self, counting_db):
+        cache = JobCache(counting_db, _payload)
+        await _create(cache)
+        await cache.update("job-1", prompt_id="p-1")
+        counting_db.calls.clear()
+
+        for _ in range(10):
+            row = await cache.get_by_prompt_id("p-1")
+            assert row.id == "job-1"
+            await cache.payload("job-1")
+
+        assert counting_db.calls == {}
+
+    @pytest.mark.asyncio
+    async def test_unknown_prompt_queried_once(self, counting_db):
+        cache = JobCache(counting_db, _payload)
+        assert await cache.get_by_prompt_id("foreign") is None
+        assert await cache.get_by_prompt_id("foreign") is None
+        assert counting_db.calls == {"get_job_by_prompt_id": 1}
+
+    @pytest.mark.asyncio
+    async def test_assigning_prompt_id_clears_negative_entry(self, counting_db):
+        cache = JobCache(counting_db, _payload)
+        await _create(cache)
+        # Event raced ahead of the submit response
+        assert await cache.get_by_prompt_id("p-1") is None
+
+        await cache.update("job-1", prompt_id="p-1")
+        row = await cache.get_by_prompt_id("p-1")
+        assert row is not None and row.id == "job-1"
+
+    @pytest.mark.asyncio
+    async def test_payload_memoized_until_row_changes(self, counting_db):
+        built = []
+
+        def builder(row, params):
+            built.append(row.status)
+            return _payload(row, params)
+
+        cache = JobCache(counting_db, builder)
+        await _create(cache)
+
+        first = await cache.payload("job-1")
+        assert await cache.payload("job-1") is first
+        assert first["params"] == {"workflow_id": "sdxl_txt2img", "steps": 20}
+
+        await cache.update("job-1", status="running")
+        assert (await cache.payload("job-1"))["status"] == "running"
+        cache.set_progress("job-1", 3, 10)
+        assert (await cache.payload("job-1"))["progress_value"] == 3
+        assert built == ["queued", "running", "running"]
+
+    @pytest.mark.asyncio
+    async def test_loads_from_db_after_eviction(self, counting_db):
+        cache = JobCache(counting_db, _payload, capacity=2)
+        for i in range(3):
+            await _create(cache, job_id=f"job-{i}", prompt_id=f"p-{i}")
+        assert len(cache) == 2
+        counting_db.calls.clear()
+
+        row = await cache.get_by_prompt_id("p-0")
+        assert row is not None and row.id == "job-0"
+        assert counting_db.calls == {"get_job_by_prompt_id": 1}
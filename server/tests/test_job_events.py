@@ -0,0 +1,148 @@
+"""Tests for the MCP job event stream (push-based job completion)."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, List, Optional
+
+import pytest
+
+from server.fake_cockpit_api_client import FakeCockpitApiClient
+from server.job_events import JobEventStream, job_id_of
+from server.mcp_tools import images_generate_many
+
+
+class _FakeSocket:
+    """Stands in for a websockets connection to /api/ws."""
+
+    def __init__(self) -> None:
+        self.sent: List[Any] = []
+        self.incoming: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+    async def send(self, data: str) -> None:
+        self.sent.append(json.loads(data))
+
+    def push(self, event_type: str, payload: Any) -> None:
+        self.incoming.put_nowait(json.dumps({"type": event_type, "payload": payload}))
+
+    def __aiter__(self) -> "_FakeSocket":
+        return self
+
+    async def __anext__(self) -> str:
+        item = await self.incoming.get()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+
+class _Connection:
+    def __init__(self, socket: _FakeSocket) -> None:
+        self.socket = socket
+
+    async def __aenter__(self) -> _FakeSocket:
+        return self.socket
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+
+def _stream(socket: _FakeSocket, urls: Optional[List[str]] = None) -> JobEventStream:
+    def connect(url: str) -> _Connection:
+        if urls is not None:
+            urls.append(url)
+        return _Connection(socket)
+
+    return JobEventStream("http://127.0.0.1:8787", connect=connect)
+
+
+class TestJobIdOf:
+    def test_job_and_asset_events(self):
+        assert job_id_of({"type": "job_update", "payload": {"id": "j1"}}) == "j1"
+        assert job_id_of({"type": "asset_created", "payload": {"job_id": "j2"}}) == "j2"
+        assert job_id_of({"type": "job_progress", "payload": {"job_id": "j3"}}) is None
+        assert job_id_of({"type": "hello", "payload": {"ok": True}}) is None
+        assert job_id_of("garbage") is None
+
+
+class TestJobEventStream:
+    @pytest.mark.asyncio
+    async def test_subscribes_and_reports_changed_jobs(self):
+        socket = _FakeSocket()
+        urls: List[str] = []
+        async with _stream(socket, urls) as events:
+            # First wake-up after connecting re-checks everything (events may have been missed)
+            assert await events.wait(["j1", "j2"], timeout=1.0) == {"j1", "j2"}
+            assert events.connected
+            assert urls == ["ws://127.0.0.1:8787/api/ws"]
+            assert socket.sent[0]["type"] == "prefs"
+            assert socket.sent[0]["payload"]["jobs"] is True
+
+            socket.push("job_update", {"id": "j1", "status": "running"})
+            socket.push("job_update", {"id": "other", "status": "running"})
+            assert await events.wait(["j1", "j2"], timeout=1.0) == {"j1"}
+
+            socket.push("asset_created", {"id": "a1", "job_id": "j2"})
+            assert await events.wait(["j1", "j2"], timeout=1.0) == {"j2"}
+
+            socket.push("job_update", {"id": "other", "status": "completed"})
+            assert await events.wait(["j1", "j2"], timeout=0.05) == set()
+        assert not events.connected
+
+    @pytest.mark.asyncio
+    async def test_reconnect_triggers_resync(self, monkeypatch):
+        from server import job_events
+
+        monkeypatch.setattr(job_events, "RECONNECT_MIN_SEC", 0.01)
+        socket = _FakeSocket()
+        async with _stream(socket) as events:
+            assert await events.wait(["j1"], timeout=1.0) == {"j1"}
+            socket.incoming.put_nowait(None)  # server closes the connection
+            assert await events.wait(["j1"], timeout=1.0) == {"j1"}
+            assert len([m for m in socket.sent if m["type"] == "prefs"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_unreachable_server_times_out(self):
+        def connect(url: str) -> Any:
+            raise OSError("connection refused")
+
+        async with JobEventStream("http://127.0.0.1:1", connect=connect) as events:
+            assert await events.wait(["j1"], timeout=0.05) == set()
+            assert not events.connected
+
+
+class TestImagesGenerateWithEvents:
+    @pytest.mark.asyncio
+    async def test_completion_is_pushed_not_polled(self):
+        """Jobs finish as soon as their events arrive, with one fetch per event."""
+        client = FakeCockpitApiClient()
+        fetched: List[str] = []
+        original_get_job = client.get_job
+
+        def get_job(job_id: str):
+            fetched.append(job_id)
+            return original_get_job(job_id)
+
+        client.get_job = get_job
+        socket = _FakeSocket()
+
+        async def finish_jobs() -> None:
+            await asyncio.sleep(0.1)
+            for job_id in list(client.jobs_db):
+                client.set_job_completed(job_id, [f"{job_id}.png"])
+                socket.push("job_update", {"id": job_id, "status": "completed"})
+                await asyncio.sleep(0.01)
+
+        start = time.monotonic()
+        async with _stream(socket) as events:
+            finisher = asyncio.create_task(finish_jobs())
+            result = await images_generate_many(
+                client, prompts=["a", "b", "c"], timeout_sec=10, events=events
+            )
+            await finisher
+
+        assert time.monotonic() - start < 1.0  # well under POLL_INTERVAL_SEC
+        assert all(r["status"] == "completed" for r in result["results"])
+        assert result["results"][0]["outputs"] == ["http://127.0.0.1:8787/assets/job_1.png"]
+        # Initial check + reconnect resync + one fetch per completion event
+        assert len(fetched) <= 3 * 3
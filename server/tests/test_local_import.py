@@ -0,0 +1,113 @@
+"""Tests for importing ComfyUI outputs from a shared output directory."""
+from __future__ import annotations
+
+import hashlib
+import os
+
+import pytest
+
+from server import local_import
+from server.local_import import LocalImporter, import_file
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    out = tmp_path / "comfy_output"
+    (out / "video").mkdir(parents=True)
+    (out / "video" / "clip.mp4").write_bytes(b"video bytes" * 1000)
+    return out
+
+
+class TestImportFile:
+    def test_hardlinks_on_same_filesystem(self, tmp_path, output_dir):
+        src = output_dir / "video" / "clip.mp4"
+        dest = tmp_path / "assets" / "a.mp4"
+
+        imported = import_file(str(src), str(dest))
+
+        assert imported.method == "hardlink"
+        assert os.path.samefile(src, dest)
+        assert imported.size == src.stat().st_size
+        assert imported.content_hash == hashlib.sha256(src.read_bytes()).hexdigest()
+        assert [p.name for p in dest.parent.iterdir()] == ["a.mp4"]
+
+    def test_copies_when_links_are_unsupported(self, tmp_path, output_dir, monkeypatch):
+        def unsupported(*args):
+            raise OSError(18, "Invalid cross-device link")
+
+        monkeypatch.setattr(local_import.os, "link", unsupported)
+        monkeypatch.setattr(local_import, "_reflink", unsupported)
+        src = output_dir / "video" / "clip.mp4"
+        dest = tmp_path / "assets" / "a.mp4"
+
+        imported = import_file(str(src), str(dest))
+
+        assert imported.method == "copy"
+        assert not os.path.samefile(src, dest)
+        assert dest.read_bytes() == src.read_bytes()
+
+    def test_rejects_source_changed_during_import(self, tmp_path, output_dir, monkeypatch):
+        src = output_dir / "video" / "clip.mp4"
+        real_hash = local_import.file_sha256
+
+        def hash_while_writing(path):
+            with open(src, "ab") as f:
+                f.write(b"more frames")
+            return real_hash(path)
+
+        monkeypatch.setattr(local_import, "file_sha256", hash_while_writing)
+        dest = tmp_path / "assets" / "a.mp4"
+
+        with pytest.raises(ValueError):
+            import_file(str(src), str(dest))
+        assert list(dest.parent.iterdir()) == []
+
+
+class TestLocalImporter:
+    def test_rejects_unknown_mode(self):
+        with pytest.raises(ValueError):
+            LocalImporter("/tmp", mode="symlink")
+
+    def test_disabled_without_output_dir(self):
+        assert not LocalImporter("", mode="link").enabled
+        assert not LocalImporter("/tmp", mode="off").enabled
+
+    def test_source_path_stays_inside_output_dir(self, output_dir):
+        importer = LocalImporter(str(output_dir), mode="link")
+        assert importer.source_path("clip.mp4", "video") == os.path.realpath(output_dir / "video" / "clip.mp4")
+        assert importer.source_path("clip.mp4", "../..") is None
+        assert importer.source_path("../secret.txt", "") is None
+        assert importer.source_path("clip.mp4", "video", "temp") is None
+
+    @pytest.mark.asyncio
+    async def test_missing_file_falls_back(self, tmp_path, output_dir):
+        importer = LocalImporter(str(output_dir), mode="link")
+
+        imported = await importer.import_output("gone.png", "", "output", str(tmp_path / "a.png"))
+
+        assert imported is None
+        assert importer.stats()["fallbacks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_move_mode_releases_source(self, tmp_path, output_dir):
+        importer = LocalImporter(str(output_dir), mode="move")
+        dest = tmp_path / "assets" / "a.mp4"
+
+        imported = await importer.import_output("clip.mp4", "video", "output", str(dest))
+        assert imported is not None
+        assert (output_dir / "video" / "clip.mp4").exists()
+
+        importer.release(imported)
+        assert not (output_dir / "video" / "clip.mp4").exists()
+        assert dest.read_bytes() == b"video bytes" * 1000
+        stats = importer.stats()
+        assert stats["hardlink"] == 1 and stats["released"] == 1
+        assert stats["bytes_shared"] == len(b"video bytes" * 1000)
+
+    @pytest.mark.asyncio
+    async def test_link_mode_keeps_source(self, tmp_path, output_dir):
+        importer = LocalImporter(str(output_dir), mode="link")
+        imported = await importer.import_output("clip.mp4", "video", "output", str(tmp_path / "a.mp4"))
+
+        importer.release(imported)
+        assert (output_dir / "video" / "clip.mp4").exists()
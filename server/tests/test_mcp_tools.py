@@ -509,3 +509,54 @@ class TestOutputUrlConstruction:
         )
         # The fake client returns job_id.png, which gets prefixed
         assert result2["jobs"][0]["outputs"][0].endswith(".png")
+
+
+class TestAsyncClient:
+    """Tools driven by an async client (AsyncFakeCockpitApiClient)."""
+
+    @pytest.mark.asyncio
+    async def test_workflows_list_and_get_are_awaitable(self):
+        from server.fake_cockpit_api_client import AsyncFakeCockpitApiClient
+
+        client = AsyncFakeCockpitApiClient()
+        result = await workflows_list(client)
+        assert len(result["workflows"]) == 2
+        workflow = await workflow_get(client, "sd15_txt2img")
+        assert workflow["id"] == "sd15_txt2img"
+
+    @pytest.mark.asyncio
+    async def test_generate_many_submits_concurrently_with_limit(self):
+        from server.fake_cockpit_api_client import AsyncFakeCockpitApiClient
+
+        client = AsyncFakeCockpitApiClient(latency_sec=0.02)
+        prompts = [f"prompt {i}" for i in range(10)]
+        result = await images_generate_many(
+            client, prompts=prompts, wait=False, max_concurrency=3,
+        )
+        assert client.max_in_flight == 3
+        # Results keep prompt order and job numbering follows submission order
+        assert [r["prompt"] for r in result["results"]] == prompts
+        assert [r["job_id"] for r in result["results"]] == [f"job_{i}" for i in range(1, 11)]
+
+    @pytest.mark.asyncio
+    async def test_generate_many_partial_failure(self):
+        from server.fake_cockpit_api_client import AsyncFakeCockpitApiClient
+
+        client = AsyncFakeCockpitApiClient()
+        client.fail_on_job_number = 2
+        result = await images_generate_many(client, prompts=["a", "b", "c"], wait=False)
+        statuses = [r["status"] for r in result["results"]]
+        assert statuses == ["queued", "failed", "queued"]
+        assert "Simulated failure" in result["results"][1]["error"]
+
+    @pytest.mark.asyncio
+    async def test_generate_waits_for_completion(self):
+        from server.fake_cockpit_api_client import AsyncFakeCockpitApiClient
+
+        client = AsyncFakeCockpitApiClient()
+        client.auto_complete = True
+        result = await images_generate(
+            client, params={"prompt": "cat"}, count=3, wait=True, timeout_sec=5,
+        )
+        assert all(j["status"] == "completed" for j in result["jobs"])
+        assert all(j["outputs"] for j in result["jobs"])
@@ -0,0 +1,38 @@
+"""Tests for output kind detection and collection."""
+from __future__ import annotations
+
+from server.media import collect_output_files, media_kind, media_type
+
+
+def test_media_kind_from_extension_and_flags():
+    assert media_kind("a.png") == "image"
+    assert media_kind("a.webp") == "image"
+    assert media_kind("a.webp", {"animated": True}) == "animation"
+    assert media_kind("a.gif") == "animation"
+    assert media_kind("a.MP4") == "video"
+    assert media_kind("combined", {"format": "video/h265-mp4"}) == "video"
+    assert media_kind("a.wav") == "audio"
+
+
+def test_media_type():
+    assert media_type("a.mp4") == "video/mp4"
+    assert media_type("a.webp") == "image/webp"
+    assert media_type("a.unknownext") == "application/octet-stream"
+
+
+def test_collects_every_output_key_once():
+    outputs = {
+        "1": {"images": [{"filename": "a.png"}, {"filename": "b.webp"}], "animated": [False, True]},
+        "2": {"gifs": [{"filename": "c.mp4", "subfolder": "v"}]},
+        "3": {"audio": [{"filename": "d.ogg"}]},
+        "4": {"images": [{"filename": "a.png"}], "text": ["ignored"]},
+        "5": "not a dict",
+        "6": {"images": [{"subfolder": "no filename"}]},
+    }
+    files = collect_output_files(outputs)
+    assert [(node, info["filename"], info["kind"]) for node, info in files] == [
+        ("1", "a.png", "image"),
+        ("1", "b.webp", "animation"),
+        ("2", "c.mp4", "video"),
+        ("3", "d.ogg", "audio"),
+    ]
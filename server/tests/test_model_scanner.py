@@ -94,3 +94,161 @@ def test_scan_custom_extensions(tmp_path):
     assert "model.pth" in result
     assert "model.bin" in result
     assert "model.safetensors" not in result
+
+
+def test_scan_includes_subfolders(tmp_path):
+    """Test that models in subfolders are listed relative to the directory."""
+    import os
+    from server.model_scanner import scan_models
+
+    (tmp_path / "sdxl" / "refiners").mkdir(parents=True)
+    (tmp_path / "base.safetensors").touch()
+    (tmp_path / "sdxl" / "juggernaut.safetensors").touch()
+    (tmp_path / "sdxl" / "refiners" / "refiner.ckpt").touch()
+    (tmp_path / "sdxl" / "notes.txt").touch()
+
+    result = scan_models(str(tmp_path))
+    assert result == sorted([
+        "base.safetensors",
+        os.path.join("sdxl", "juggernaut.safetensors"),
+        os.path.join("sdxl", "refiners", "refiner.ckpt"),
+    ])
+
+
+def test_scan_follows_symlinked_folders_once(tmp_path):
+    """Test that symlinked folders are listed, and a symlink loop is not re-walked."""
+    import os
+    from server.model_scanner import scan_models
+
+    models = tmp_path / "models"
+    shared = tmp_path / "shared"
+    (models / "loras").mkdir(parents=True)
+    shared.mkdir()
+    (models / "loras" / "style.safetensors").touch()
+    (shared / "extra.safetensors").touch()
+    try:
+        (models / "loras" / "all").symlink_to(models, target_is_directory=True)
+        (models / "shared").symlink_to(shared, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("symlinks not supported")
+
+    result = scan_models(str(models))
+    assert result == sorted([
+        os.path.join("loras", "style.safetensors"),
+        os.path.join("shared", "extra.safetensors"),
+    ])
+
+def _bump_mtime(path: Path) -> None:
+    import os
+
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_model_index_serves_from_memory(tmp_path):
+    """Test that the index does not rescan before recheck_sec elapses."""
+    from server.model_scanner import ModelIndex
+
+    (tmp_path / "a.safetensors").touch()
+    clock = _FakeClock()
+    index = ModelIndex(recheck_sec=5.0, clock=clock)
+
+    assert await index.choices(str(tmp_path)) == ["a.safetensors"]
+
+    (tmp_path / "b.safetensors").touch()
+    assert await index.choices(str(tmp_path)) == ["a.safetensors"]
+
+    clock.now += 6.0
+    assert await index.choices(str(tmp_path)) == ["a.safetensors", "b.safetensors"]
+
+
+@pytest.mark.asyncio
+async def test_model_index_rescans_changed_subfolder(tmp_path):
+    """Test that a change inside a subfolder triggers a rescan."""
+    import os
+    from server.model_scanner import ModelIndex
+
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    clock = _FakeClock()
+    index = ModelIndex(recheck_sec=0.0, clock=clock)
+
+    assert await index.choices(str(tmp_path)) == []
+
+    (sub / "m.safetensors").touch()
+    _bump_mtime(sub)
+    assert await index.choices(str(tmp_path)) == [os.path.join("sub", "m.safetensors")]
+
+
+@pytest.mark.asyncio
+async def test_model_index_ttl_forces_rescan(tmp_path, monkeypatch):
+    """Test that entries older than ttl_sec are rescanned even without mtime changes."""
+    from server.model_scanner import ModelIndex
+
+    (tmp_path / "a.safetensors").touch()
+    clock = _FakeClock()
+    index = ModelIndex(ttl_sec=60.0, recheck_sec=0.0, clock=clock)
+    await index.choices(str(tmp_path))
+
+    scans = []
+    original_scan = index.scan
+    monkeypatch.setattr(index, "scan", lambda d: scans.append(d) or original_scan(d))
+
+    clock.now += 30.0
+    await index.choices(str(tmp_path))
+    assert scans == []
+
+    clock.now += 31.0
+    await index.choices(str(tmp_path))
+    assert len(scans) == 1
+
+
+@pytest.mark.asyncio
+async def test_model_index_missing_directory(tmp_path):
+    """Test that a missing directory indexes as empty and is picked up once created."""
+    from server.model_scanner import ModelIndex
+
+    missing = tmp_path / "models"
+    index = ModelIndex(recheck_sec=0.0)
+
+    assert await index.choices(str(missing)) == []
+
+    missing.mkdir()
+    (missing / "a.ckpt").touch()
+    assert await index.choices(str(missing)) == ["a.ckpt"]
+
+
+@pytest.mark.asyncio
+async def test_model_index_partial_hash_reused(tmp_path, monkeypatch):
+    """Test that partial hashes are computed once per unchanged file."""
+    from server import model_scanner
+    from server.model_scanner import ModelIndex
+
+    (tmp_path / "a.safetensors").write_bytes(b"a" * 100)
+    (tmp_path / "b.safetensors").write_bytes(b"b" * 100)
+    index = ModelIndex(hash_files=True, ttl_sec=0.0)  # rescan on every access
+
+    first = await index.files(str(tmp_path))
+    assert all(f.partial_hash for f in first)
+    assert first[0].partial_hash != first[1].partial_hash
+
+    hashed = []
+    original = model_scanner.partial_hash
+    monkeypatch.setattr(model_scanner, "partial_hash", lambda p, s: hashed.append(p) or original(p, s))
+
+    (tmp_path / "b.safetensors").write_bytes(b"c" * 100)
+    _bump_mtime(tmp_path / "b.safetensors")
+    second = await index.files(str(tmp_path))
+
+    assert [Path(p).name for p in hashed] == ["b.safetensors"]
+    assert second[0].partial_hash == first[0].partial_hash
+    assert second[1].partial_hash != first[1].partial_hash
@@ -276,6 +276,78 @@ class TestErrorHandling:
         assert "prompt" in str(exc_info.value)
 
 
+class TestPatchPlan:
+    """Tests for compiled patch plans (copy-on-write patching)."""
+
+    def test_matches_apply_patch(
+        self, sample_template: Dict[str, Any], sample_manifest: Dict[str, Any]
+    ):
+        """Test that plan.apply produces the same workflow as apply_patch."""
+        from server.workflow_patcher import PatchPlan, apply_patch
+
+        plan = PatchPlan(sample_template, sample_manifest)
+        params = {"prompt": "a cat", "seed": 42, "steps": "30", "cfg": 5, "width": 768}
+
+        assert plan.apply(params) == apply_patch(sample_template, sample_manifest, params)
+        assert plan.apply(params, independent=True) == plan.apply(params)
+
+    def test_only_patched_nodes_copied(
+        self, sample_template: Dict[str, Any], sample_manifest: Dict[str, Any]
+    ):
+        """Test that unpatched nodes are shared and patched ones are copied."""
+        from server.workflow_patcher import PatchPlan
+
+        original = copy.deepcopy(sample_template)
+        plan = PatchPlan(sample_template, sample_manifest)
+
+        result = plan.apply({"prompt": "a cat", "seed": 1})
+
+        assert sample_template == original
+        # Unpatched nodes are the template's own objects
+        assert result["1"] is sample_template["1"]
+        assert result["7"] is sample_template["7"]
+        # Patched nodes and their inputs dicts are fresh copies
+        assert result["2"] is not sample_template["2"]
+        assert result["2"]["inputs"] is not sample_template["2"]["inputs"]
+        assert result["2"]["inputs"]["clip"] is sample_template["2"]["inputs"]["clip"]
+        assert result["5"]["inputs"]["seed"] == 1
+
+    def test_applies_are_independent(
+        self, sample_template: Dict[str, Any], sample_manifest: Dict[str, Any]
+    ):
+        """Test that successive applies do not see each other's values."""
+        from server.workflow_patcher import PatchPlan
+
+        plan = PatchPlan(sample_template, sample_manifest)
+
+        first = plan.apply({"prompt": "first", "steps": 10})
+        second = plan.apply({"prompt": "second"})
+
+        assert first["2"]["inputs"]["text"] == "first"
+        assert first["5"]["inputs"]["steps"] == 10
+        assert second["2"]["inputs"]["text"] == "second"
+        assert second["5"]["inputs"]["steps"] == 20
+
+    def test_bad_path_raises_on_apply(
+        self, sample_template: Dict[str, Any], sample_manifest: Dict[str, Any]
+    ):
+        """Test that an unresolvable patch path compiles but fails when applied."""
+        from server.workflow_patcher import PatchError, PatchPlan
+
+        sample_manifest["params"]["bad_param"] = {
+            "type": "string",
+            "required": False,
+            "patch": {"node_id": "999", "field": "inputs.text"},
+        }
+
+        plan = PatchPlan(sample_template, sample_manifest)
+
+        # No value and no default: the broken patch is never applied
+        assert plan.apply({"prompt": "test"})["2"]["inputs"]["text"] == "test"
+        with pytest.raises(PatchError, match="bad_param.*999"):
+            plan.apply({"prompt": "test", "bad_param": "value"})
+
+
 # ---------------------------------------------------------------------------
 # Manifest-Driven Tests (using actual workflow manifests)
 # ---------------------------------------------------------------------------
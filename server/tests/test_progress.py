@@ -0,0 +1,125 @@
+"""Tests for coalesced progress persistence."""
+from __future__ import annotations
+
+import pytest
+
+from server.db import AsyncDatabase, Database
+from server.progress import ProgressTracker
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    db = Database(str(tmp_path / "progress.sqlite3"))
+    for job_id in ("job-1", "job-2"):
+        db.create_job(
+            job_id=job_id,
+            engine="comfy",
+            status="running",
+            prompt="p",
+            negative_prompt="",
+            params={},
+        )
+    adb = AsyncDatabase(db)
+    yield adb
+    adb.close()
+    db.close()
+
+
+class TestProgressPersistence:
+    """Pending progress is coalesced and flushed in one batch."""
+
+    @pytest.mark.asyncio
+    async def test_record_does_not_touch_db(self, async_db):
+        tracker = ProgressTracker(async_db)
+        tracker.record("job-1", "p1", 5, 20)
+
+        row = await async_db.get_job("job-1")
+        assert row.progress_value == 0
+        assert tracker.pending_count() == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_latest_value_per_job(self, async_db, monkeypatch):
+        tracker = ProgressTracker(async_db)
+        calls = []
+        original = async_db.update_jobs_progress
+
+        async def spy(updates):
+            calls.append(list(updates))
+            await original(updates)
+
+        monkeypatch.setattr(async_db, "update_jobs_progress", spy)
+
+        for step in range(1, 11):
+            tracker.record("job-1", "p1", step, 20)
+        tracker.record("job-2", "p2", 3, 4)
+
+        assert await tracker.flush() == 2
+        assert len(calls) == 1
+        assert sorted(calls[0]) == [("job-1", 10, 20), ("job-2", 3, 4)]
+
+        assert (await async_db.get_job("job-1")).progress_value == 10
+        assert (await async_db.get_job("job-2")).progress_max == 4
+        assert await tracker.flush() == 0
+
+    @pytest.mark.asyncio
+    async def test_pop_hands_pending_to_state_change(self, async_db):
+        tracker = ProgressTracker(async_db)
+        tracker.record("job-1", "p1", 19, 20)
+
+        fields = tracker.pop("job-1")
+        assert fields == {"progress_value": 19, "progress_max": 20}
+        await async_db.update_job("job-1", status="completed", durable=True, **fields)
+
+        row = await async_db.get_job("job-1")
+        assert row.status == "completed"
+        assert row.progress_value == 19
+        assert tracker.pop("job-1") == {}
+        assert await tracker.flush() == 0
+
+
+class TestBroadcastThrottle:
+    """job_progress broadcasts are rate limited per job."""
+
+    def test_throttles_within_window(self, async_db):
+        clock = FakeClock()
+        tracker = ProgressTracker(async_db, broadcast_hz=2.0, clock=clock)
+
+        assert tracker.record("job-1", "p1", 1, 20) is True
+        clock.now += 0.1
+        assert tracker.record("job-1", "p1", 2, 20) is False
+        # Other jobs have their own window
+        assert tracker.record("job-2", "p2", 1, 20) is True
+        clock.now += 0.5
+        assert tracker.record("job-1", "p1", 3, 20) is True
+
+    def test_final_step_always_broadcast(self, async_db):
+        clock = FakeClock()
+        tracker = ProgressTracker(async_db, broadcast_hz=1.0, clock=clock)
+
+        assert tracker.record("job-1", "p1", 1, 4) is True
+        assert tracker.record("job-1", "p1", 4, 4) is True
+
+    def test_trailing_broadcast_for_throttled_value(self, async_db):
+        clock = FakeClock()
+        tracker = ProgressTracker(async_db, broadcast_hz=2.0, clock=clock)
+
+        tracker.record("job-1", "p1", 1, 20)
+        tracker.record("job-1", "p1", 2, 20)
+        assert tracker.take_due_broadcasts() == []
+
+        clock.now += 0.6
+        due = tracker.take_due_broadcasts()
+        assert due == [{"job_id": "job-1", "prompt_id": "p1", "value": 2, "max": 20}]
+        assert tracker.take_due_broadcasts() == []
+
+    def test_zero_rate_disables_throttle(self, async_db):
+        tracker = ProgressTracker(async_db, broadcast_hz=0, clock=FakeClock())
+        assert all(tracker.record("job-1", "p1", i, 20) for i in range(5))
@@ -0,0 +1,190 @@
+"""Tests for the reconciler (missed ComfyUI websocket events)."""
+from __future__ import annotations
+
+import dataclasses
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from server.db import JobRow, PageKey
+from server.fake_comfy_client import FakeComfyClient
+from server.reconciler import Reconciler, history_error
+
+
+def _row(job_id: str, prompt_id: str, status: str = "running", *, harvested: int = 0, i: int = 0) -> JobRow:
+    return JobRow(
+        id=job_id, engine="comfy", status=status, prompt_id=prompt_id, prompt="p", negative_prompt="",
+        params_json="{}", created_at=f"2026-01-01T00:00:{i:02d}+00:00", updated_at="2026-01-01T00:00:00+00:00",
+        progress_value=0.0, progress_max=0.0, harvested=harvested, error=None,
+    )
+
+
+class FakeJobs:
+    """Unsettled jobs plus recorded reconciler callbacks."""
+
+    def __init__(self, rows: List[JobRow]) -> None:
+        self.rows = {row.id: row for row in rows}
+        self.pages = 0
+        self.completed: List[Tuple[str, Dict]] = []
+        self.failed: Dict[str, str] = {}
+        self.running: List[str] = []
+
+    async def list_unsettled(self, limit: int, after: Optional[PageKey]) -> List[JobRow]:
+        self.pages += 1
+        rows = sorted(self.rows.values(), key=lambda r: (r.created_at, r.id))
+        if after is not None:
+            rows = [r for r in rows if (r.created_at, r.id) > after]
+        return rows[:limit]
+
+    async def complete(self, job: JobRow, entry: Dict) -> None:
+        self.completed.append((job.id, entry))
+        self.rows.pop(job.id)
+
+    async def fail(self, job_id: str, error: str) -> None:
+        self.failed[job_id] = error
+        self.rows.pop(job_id)
+
+    async def mark_running(self, job_id: str) -> None:
+        self.running.append(job_id)
+        self.rows[job_id] = dataclasses.replace(self.rows[job_id], status="running")
+
+
+def _reconciler(fake: FakeComfyClient, jobs: FakeJobs, **kwargs) -> Reconciler:
+    return Reconciler(
+        lambda: fake, jobs.list_unsettled,
+        complete=jobs.complete, fail=jobs.fail, mark_running=jobs.mark_running, **kwargs,
+    )
+
+
+async def _submit(fake: FakeComfyClient, count: int) -> List[str]:
+    return [(await fake.submit_prompt({}, "c"))["prompt_id"] for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_settles_each_job_from_one_queue_and_history_read():
+    fake = FakeComfyClient()
+    done, broken, running, pending, queued_running = await _submit(fake, 5)
+    fake.history_overrides[broken] = {
+        "status": {"status_str": "error", "messages": [["execution_error", {"exception_message": "OOM"}]]},
+        "outputs": {},
+    }
+    fake.queue_running = [[1, running], [2, queued_running]]
+    fake.queue_pending = [[3, pending]]
+    jobs = FakeJobs([
+        _row("done", done, i=0),
+        _row("broken", broken, i=1),
+        _row("running", running, i=2),
+        _row("pending", pending, "queued", i=3),
+        _row("queued-running", queued_running, "queued", i=4),
+        _row("lost", "never-submitted", i=5),
+    ])
+    reconciler = _reconciler(fake, jobs)
+
+    await reconciler.reconcile()
+
+    assert [job_id for job_id, _ in jobs.completed] == ["done"]
+    assert jobs.completed[0][1]["outputs"]["7"]["images"]  # history entry handed over for harvesting
+    assert "OOM" in jobs.failed["broken"]
+    assert "not found" in jobs.failed["lost"]
+    assert jobs.running == ["queued-running"]
+    assert set(jobs.rows) == {"running", "pending", "queued-running"}
+    assert fake.history_calls == 1
+    stats = reconciler.stats()
+    assert (stats["completed"], stats["failed"], stats["lost"], stats["widened"]) == (1, 1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_completed_but_unharvested_job_is_harvested_even_after_error():
+    fake = FakeComfyClient()
+    (prompt_id,) = await _submit(fake, 1)
+    fake.history_overrides[prompt_id] = {"status": {"status_str": "error"}, "outputs": {}}
+    jobs = FakeJobs([_row("j", prompt_id, "completed")])
+
+    await _reconciler(fake, jobs).reconcile()
+    assert [job_id for job_id, _ in jobs.completed] == ["j"]
+    assert jobs.failed == {}
+
+
+@pytest.mark.asyncio
+async def test_full_history_window_is_widened_once_per_pass():
+    fake = FakeComfyClient()
+    oldest, older, *recent = await _submit(fake, 8)
+    jobs = FakeJobs([_row(f"j{i}", p, i=i) for i, p in enumerate([oldest, older, "never-submitted"])])
+    reconciler = _reconciler(fake, jobs, history_items=2, full_history_items=10, batch_size=1)
+
+    await reconciler.reconcile()
+    assert sorted(job_id for job_id, _ in jobs.completed) == ["j0", "j1"]
+    assert "not found" in jobs.failed["j2"]
+    assert reconciler.stats()["widened"] == 1
+    assert fake.history_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_pages_through_jobs_and_skips_http_when_nothing_is_unsettled():
+    fake = FakeComfyClient()
+    prompt_ids = await _submit(fake, 5)
+    jobs = FakeJobs([_row(f"j{i}", p, i=i) for i, p in enumerate(prompt_ids)])
+    reconciler = _reconciler(fake, jobs, batch_size=2)
+
+    await reconciler.reconcile()
+    assert len(jobs.completed) == 5
+    assert jobs.pages == 3
+    assert fake.history_calls == 1
+
+    await reconciler.reconcile()
+    assert fake.history_calls == 1
+    assert reconciler.stats()["passes"] == 2
+
+
+@pytest.mark.asyncio
+async def test_job_updated_after_snapshot_is_not_failed_as_lost():
+    fake = FakeComfyClient()
+    row = dataclasses.replace(_row("fresh", "submitted-just-now"), updated_at="2999-01-01T00:00:00+00:00")
+    jobs = FakeJobs([row])
+
+    await _reconciler(fake, jobs).reconcile()
+    assert jobs.failed == {}
+    assert "fresh" in jobs.rows
+
+
+@pytest.mark.asyncio
+async def test_unreachable_comfy_leaves_jobs_alone():
+    fake = FakeComfyClient()
+    fake.set_unreachable()
+    jobs = FakeJobs([_row("j", "p")])
+    reconciler = _reconciler(fake, jobs)
+
+    reconciler.trigger()
+    await reconciler._task
+    assert "j" in jobs.rows
+    assert reconciler.stats()["errors"] == 1
+
+
+def test_history_error_detects_interrupts():
+    assert history_error({"status": {"status_str": "success", "messages": []}}) is None
+    assert history_error({"outputs": {}}) is None
+    interrupted = {"status": {"messages": [["execution_interrupted", {"node_id": "3"}]]}}
+    assert history_error(interrupted) == '{"node_id": "3"}'
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_a_running_pass():
+    import asyncio
+
+    fake = FakeComfyClient()
+    jobs = FakeJobs([_row("j", "p")])
+    started = asyncio.Event()
+
+    async def slow_list_unsettled(limit, after):
+        started.set()
+        await asyncio.sleep(10)
+        return []
+
+    reconciler = Reconciler(
+        lambda: fake, slow_list_unsettled, complete=jobs.complete, fail=jobs.fail, mark_running=jobs.mark_running,
+    )
+    reconciler.trigger()
+    await started.wait()
+
+    await asyncio.wait_for(reconciler.close(), timeout=1)
+    assert reconciler.stats()["passes"] == 0
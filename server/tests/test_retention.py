@@ -0,0 +1,238 @@
+"""Tests for retention policies and the retention engine."""
+from __future__ import annotations
+
+import io
+import json
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from server.blob_store import BlobStore
+from server.db import AsyncDatabase, Database
+from server.retention import RetentionEngine, RetentionPolicy, parse_policies
+
+DAY = 86400.0
+
+
+def _png(size=(1024, 768)) -> bytes:
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", compress_level=0)
+    return buffer.getvalue()
+
+
+def _noisy_jpeg() -> bytes:
+    img = Image.effect_noise((256, 256), 100).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=60)
+    return buffer.getvalue()
+
+
+class TestPolicies:
+    def test_parse_and_precedence(self):
+        policies = parse_policies(json.dumps({
+            "default": {"compress_days": 7, "thumbnail_days": 90, "format": "jpeg", "quality": 85},
+            "favorite": {},
+            "workflows": {"wan": {"thumbnail_days": 3}},
+        }))
+
+        assert policies.enabled
+        assert policies.min_age_days() == 3
+        assert policies.for_asset(True, "wan") == RetentionPolicy()
+        assert policies.for_asset(False, "wan").thumbnail_days == 3
+        assert policies.for_asset(False, "sdxl").format == "jpeg"
+
+    def test_empty_keeps_everything(self):
+        policies = parse_policies("")
+        assert not policies.enabled
+        assert policies.min_age_days() is None
+        assert not parse_policies({"default": {"compress_days": 5, "format": "none"}}).enabled
+
+    @pytest.mark.parametrize("bad", [
+        {"default": {"compress_days": 1, "format": "gif"}},
+        {"default": {"keep_days": 1}},
+        {"workflows": ["wan"]},
+        {"favorite": "forever"},
+    ])
+    def test_rejects_malformed(self, bad):
+        with pytest.raises(ValueError):
+            parse_policies(bad)
+
+    def test_target_tiers(self):
+        policy = RetentionPolicy(compress_days=7, thumbnail_days=30)
+        assert policy.target_tier(1, "image") == "original"
+        assert policy.target_tier(8, "image") == "compressed"
+        assert policy.target_tier(31, "image") == "thumbnail"
+        # Only still images are recompressed; audio has no thumbnail
+        assert policy.target_tier(8, "video") == "original"
+        assert policy.target_tier(31, "video") == "thumbnail"
+        assert policy.target_tier(31, "audio") == "original"
+        assert RetentionPolicy(compress_days=7, format="none").target_tier(8, "image") == "original"
+
+
+@pytest.fixture
+def env(tmp_path):
+    db = Database(str(tmp_path / "test.sqlite3"))
+    db.create_job(job_id="job-1", engine="comfy", status="completed", prompt="p", negative_prompt="", params={})
+    adb = AsyncDatabase(db, readers=1)
+    store = BlobStore(str(tmp_path / "assets"))
+    yield db, adb, store
+    adb.close()
+    db.close()
+
+
+async def _add(db, store, asset_id, data, ext=".png", *, workflow_id="sdxl", favorite=False, kind="image"):
+    staged = await store.stage_bytes(data, ext)
+    path = store.commit(staged)
+    db.create_asset(
+        asset_id=asset_id, job_id="job-1", engine="comfy", filename=path,
+        recipe={"prompt": "a cat", "params": {"workflow_id": workflow_id, "seed": 1}},
+        meta={"media": {"kind": kind, "mime": "image/png"}},
+        content_hash=staged.content_hash, blob_size=staged.size,
+    )
+    if favorite:
+        db.toggle_favorite(asset_id)
+    return path
+
+
+def _engine(adb, store, policies, days_later):
+    return RetentionEngine(
+        adb, store, parse_policies(policies), workers=0, assets_per_sec=0, mb_per_sec=0,
+        clock=lambda: time.time() + days_later * DAY,
+    )
+
+
+class TestRetentionEngine:
+    @pytest.mark.asyncio
+    async def test_recompresses_then_thumbnails(self, env):
+        db, adb, store = env
+        data = _png()
+        original = await _add(db, store, "a1", data)
+        recipe = db.get_asset("a1").recipe_json
+        policies = {"default": {"compress_days": 7, "thumbnail_days": 30}}
+
+        assert (await _engine(adb, store, policies, 1).run_pass())["assets_moved"] == 0
+
+        result = await _engine(adb, store, policies, 10).run_pass()
+        row = db.get_asset("a1")
+        assert result["assets_moved"] == 1
+        assert row.tier == "compressed"
+        assert row.filename.endswith(".webp")
+        assert not os.path.exists(store.path(original))
+        assert result["bytes_reclaimed"] == len(data) - os.path.getsize(store.path(row.filename))
+        with Image.open(store.path(row.filename)) as img, Image.open(io.BytesIO(data)) as src:
+            assert img.size == src.size
+            assert list(img.convert("RGB").getdata()) == list(src.convert("RGB").getdata())  # lossless
+        meta = json.loads(row.meta_json)
+        assert meta["retention"]["tier"] == "compressed"
+        assert meta["retention"]["original"]["size"] == len(data)
+        assert meta["media"] == {"kind": "image", "mime": "image/webp"}
+        assert db.get_blob(row.content_hash).refcount == 1
+
+        engine = _engine(adb, store, policies, 40)
+        await engine.run_pass()
+        row = db.get_asset("a1")
+        assert row.tier == "thumbnail"
+        with Image.open(store.path(row.filename)) as img:
+            assert max(img.size) == 512
+        meta = json.loads(row.meta_json)
+        assert meta["retention"]["original"]["size"] == len(data)
+        assert row.recipe_json == recipe
+        assert engine.stats()["transitions"] == {"compressed": 0, "thumbnail": 1}
+        # Thumbnail-tier assets are not scanned again
+        assert (await engine.run_pass())["assets_moved"] == 0
+
+    @pytest.mark.asyncio
+    async def test_hardlinked_blob_reclaims_no_bytes(self, env, tmp_path):
+        db, adb, store = env
+        original = await _add(db, store, "a1", _png())
+        comfy_copy = tmp_path / "comfy_output.png"
+        os.link(store.path(original), comfy_copy)  # as imported in local_import "link" mode
+
+        result = await _engine(adb, store, {"default": {"compress_days": 7}}, 10).run_pass()
+
+        assert result["assets_moved"] == 1
+        # The original's data is still on disk through ComfyUI's link; only the new file counts
+        assert result["bytes_reclaimed"] == -os.path.getsize(store.path(db.get_asset("a1").filename))
+        assert not os.path.exists(store.path(original))
+        assert comfy_copy.exists()
+
+    @pytest.mark.asyncio
+    async def test_favorite_and_workflow_policies(self, env):
+        db, adb, store = env
+        await _add(db, store, "fav", _png((300, 200)), favorite=True)
+        await _add(db, store, "wan", _png((200, 300)), workflow_id="wan")
+        await _add(db, store, "sdxl", _png((400, 100)))
+        policies = {
+            "default": {"thumbnail_days": 60},
+            "favorite": {},
+            "workflows": {"wan": {"thumbnail_days": 3}},
+        }
+
+        await _engine(adb, store, policies, 10).run_pass()
+
+        assert {i: db.get_asset(i).tier for i in ("fav", "wan", "sdxl")} == {
+            "fav": "original", "wan": "thumbnail", "sdxl": "original",
+        }
+
+    @pytest.mark.asyncio
+    async def test_shared_blob_moves_only_as_far_as_every_asset_allows(self, env):
+        db, adb, store = env
+        data = _png()
+        path = await _add(db, store, "keep", data, favorite=True)
+        assert await _add(db, store, "drop", data) == path
+        policies = {"default": {"thumbnail_days": 1}, "favorite": {"compress_days": 1}}
+
+        await _engine(adb, store, policies, 5).run_pass()
+
+        keep, drop = db.get_asset("keep"), db.get_asset("drop")
+        assert keep.tier == drop.tier == "compressed"
+        assert keep.filename == drop.filename != path
+        assert db.get_blob(keep.content_hash).refcount == 2
+        assert not os.path.exists(store.path(path))
+
+    @pytest.mark.asyncio
+    async def test_keeps_original_when_recompression_does_not_help(self, env):
+        db, adb, store = env
+        data = _noisy_jpeg()
+        path = await _add(db, store, "a1", data, ext=".jpg")
+
+        result = await _engine(adb, store, {"default": {"compress_days": 1}}, 5).run_pass()
+
+        row = db.get_asset("a1")
+        assert row.tier == "compressed"
+        assert row.filename == path
+        assert result["bytes_reclaimed"] == 0
+        assert db.get_blob(row.content_hash).refcount == 1
+        assert os.listdir(os.path.join(store.blob_root, ".staging")) == []
+
+    @pytest.mark.asyncio
+    async def test_skips_assets_outside_the_blob_store(self, env):
+        db, adb, store = env
+        db.create_asset(asset_id="legacy", job_id="job-1", engine="comfy", filename="old.png", recipe={}, meta={})
+
+        result = await _engine(adb, store, {"default": {"thumbnail_days": 1}}, 5).run_pass()
+
+        assert result["skipped"] == 1
+        assert db.get_asset("legacy").tier == "original"
+
+    @pytest.mark.asyncio
+    async def test_throttles_to_rate_limits(self, env, monkeypatch):
+        from server import retention
+
+        db, adb, store = env
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        monkeypatch.setattr(retention.asyncio, "sleep", fake_sleep)
+        engine = RetentionEngine(adb, store, parse_policies({}), workers=0, assets_per_sec=0.5, mb_per_sec=1)
+
+        await engine._throttle(time.perf_counter(), 4 * 1024 * 1024)
+        await engine._throttle(time.perf_counter(), 1024)
+
+        assert 3.9 < sleeps[0] <= 4.0  # bytes limit: 4 MB at 1 MB/s
+        assert 1.9 < sleeps[1] <= 2.0  # asset limit: 0.5 per second
@@ -0,0 +1,188 @@
+"""Tests for the job submission scheduler."""
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+from server.db import WaitingJob
+from server.submission_queue import SubmissionScheduler
+
+
+class FakeBackend:
+    """Jobs waiting in 'SQLite' plus a ComfyUI queue that grows on submit."""
+
+    def __init__(self, job_ids: List[str], *, submit_delay: float = 0.0) -> None:
+        self.waiting: List[str] = list(job_ids)
+        self.submitted: List[str] = []
+        self.comfy_queue: List[str] = []
+        self.submit_delay = submit_delay
+        self.active = 0
+        self.peak = 0
+        self.fail: Dict[str, str] = {}
+        self.priority: Dict[str, str] = {}
+        self.loads = 0
+
+    def job(self, job_id: str) -> WaitingJob:
+        created_at = f"2026-01-01T00:00:{self.waiting.index(job_id):02d}"
+        return WaitingJob(job_id, self.priority.get(job_id, "interactive"), "c", "wf", created_at)
+
+    async def load_waiting(self, limit: int) -> List[WaitingJob]:
+        self.loads += 1
+        return [self.job(job_id) for job_id in self.waiting[:limit]]
+
+    async def queue_depth(self) -> int:
+        return len(self.comfy_queue)
+
+    async def submit(self, job_id: str) -> bool:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.submit_delay)
+            if self.fail.get(job_id) == "raise":
+                raise RuntimeError("boom")
+            self.waiting.remove(job_id)
+            if job_id in self.fail:
+                return False
+            self.submitted.append(job_id)
+            self.comfy_queue.append(job_id)
+            return True
+        finally:
+            self.active -= 1
+
+
+def _scheduler(backend: FakeBackend, **kwargs) -> SubmissionScheduler:
+    kwargs.setdefault("depth_refresh_sec", 0)
+    kwargs.setdefault("poll_sec", 0.01)
+    return SubmissionScheduler(backend.submit, backend.load_waiting, backend.queue_depth, **kwargs)
+
+
+async def _until(predicate, timeout: float = 2.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_submits_oldest_first_with_bounded_concurrency():
+    backend = FakeBackend([f"job-{i}" for i in range(10)], submit_delay=0.01)
+    scheduler = _scheduler(backend, concurrency=3, target_depth=0)
+    scheduler.notify()
+    await _until(lambda: len(backend.submitted) == 10)
+
+    assert sorted(backend.submitted) == sorted(f"job-{i}" for i in range(10))
+    assert backend.submitted[:3] == ["job-0", "job-1", "job-2"]
+    assert backend.peak == 3
+    assert scheduler.stats()["submitted"] == 10
+
+
+@pytest.mark.asyncio
+async def test_target_depth_holds_jobs_until_comfy_drains():
+    backend = FakeBackend(["a", "b", "c", "d"])
+    scheduler = _scheduler(backend, concurrency=4, target_depth=2)
+    scheduler.notify()
+    await _until(lambda: len(backend.submitted) == 2)
+    await asyncio.sleep(0.05)
+    assert backend.submitted == ["a", "b"]
+    assert scheduler.stats()["throttled"] > 0
+
+    backend.comfy_queue.clear()  # ComfyUI finished both prompts
+    await _until(lambda: len(backend.submitted) == 4)
+    assert backend.submitted == ["a", "b", "c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_exits_when_idle_and_restarts_on_notify():
+    backend = FakeBackend(["a"])
+    scheduler = _scheduler(backend, target_depth=0)
+    scheduler.notify()
+    await _until(lambda: not scheduler.stats()["running"])
+    assert backend.submitted == ["a"]
+
+    backend.waiting.append("b")
+    scheduler.notify()
+    await _until(lambda: backend.submitted == ["a", "b"])
+
+
+@pytest.mark.asyncio
+async def test_resumes_jobs_already_waiting():
+    # Jobs left in the table by a previous run are found without being passed in
+    backend = FakeBackend(["left-over-1", "left-over-2"])
+    scheduler = _scheduler(backend, target_depth=0)
+    scheduler.notify()
+    await _until(lambda: len(backend.submitted) == 2)
+
+
+@pytest.mark.asyncio
+async def test_failures_are_counted_and_raising_jobs_are_not_retried():
+    backend = FakeBackend(["bad", "rejected", "good"])
+    backend.fail = {"bad": "raise", "rejected": "reject"}
+    scheduler = _scheduler(backend, concurrency=1, target_depth=0)
+    scheduler.notify()
+    await _until(lambda: "good" in backend.submitted)
+    await asyncio.sleep(0.05)
+
+    stats = scheduler.stats()
+    assert stats["submitted"] == 1
+    assert stats["failed"] == 1
+    assert stats["errors"] == 1
+    assert backend.waiting == ["bad"]  # still waiting in the table, skipped until restart
+    assert not stats["running"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_comfy_depth_does_not_block_submission():
+    backend = FakeBackend(["a", "b"])
+
+    async def unreachable() -> int:
+        raise RuntimeError("Connection refused")
+
+    scheduler = SubmissionScheduler(
+        backend.submit, backend.load_waiting, unreachable,
+        target_depth=1, depth_refresh_sec=0, poll_sec=0.01,
+    )
+    scheduler.notify()
+    await _until(lambda: len(backend.submitted) == 2)
+    assert scheduler.stats()["comfy_queue_depth"] is None
+
+
+@pytest.mark.asyncio
+async def test_select_policy_orders_submissions():
+    backend = FakeBackend(["a", "b", "c", "d"])
+
+    def newest_first(jobs: List[WaitingJob], n: int) -> List[WaitingJob]:
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)[:n]
+
+    scheduler = _scheduler(backend, concurrency=1, target_depth=0, select=newest_first)
+    scheduler.notify()
+    await _until(lambda: len(backend.submitted) == 4)
+    assert backend.submitted == ["d", "c", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_notified_jobs_skip_the_table_read():
+    backend = FakeBackend(["a"])
+    scheduler = _scheduler(backend, target_depth=0, rescan_sec=60)
+    scheduler.notify([backend.job("a")])
+    await _until(lambda: backend.submitted == ["a"])
+    await _until(lambda: not scheduler.stats()["running"])
+    # Only the final check that nothing else is waiting reads the table
+    assert backend.loads == 1
+
+
+@pytest.mark.asyncio
+async def test_rescan_drops_jobs_no_longer_waiting():
+    backend = FakeBackend(["a", "b"])
+    scheduler = _scheduler(backend, concurrency=1, target_depth=1, rescan_sec=0)
+    backend.comfy_queue.append("busy")  # ComfyUI full: nothing is submitted yet
+    scheduler.notify([backend.job("a"), backend.job("b")])
+    await asyncio.sleep(0.03)
+    backend.waiting.remove("a")  # e.g. cancelled through the API
+    await asyncio.sleep(0.03)
+    backend.comfy_queue.clear()
+    await _until(lambda: backend.submitted == ["b"])
+    await asyncio.sleep(0.03)
+    assert backend.submitted == ["b"]
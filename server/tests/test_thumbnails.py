@@ -0,0 +1,216 @@
+"""Tests for thumbnail rendering and the thumbnail cache."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+
+import pytest
+from PIL import Image
+
+
+def _write_image(path, size=(1024, 768), color=(200, 40, 40), fmt="PNG", mode="RGB"):
+    img = Image.new(mode, size, color)
+    img.save(path, format=fmt)
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class TestRenderThumbnail:
+    """Tests for thumbnails.render_thumbnail."""
+
+    def test_fits_longest_side(self, tmp_path):
+        from server.thumbnails import render_thumbnail
+
+        src = tmp_path / "src.png"
+        _write_image(src)
+        dest = tmp_path / "out" / "t.webp"
+
+        written = render_thumbnail(str(src), str(dest), 256, "webp")
+
+        assert written == dest.stat().st_size
+        with Image.open(dest) as thumb:
+            assert thumb.format == "WEBP"
+            assert thumb.size == (256, 192)
+
+    def test_jpeg_flattens_alpha(self, tmp_path):
+        from server.thumbnails import render_thumbnail
+
+        src = tmp_path / "src.png"
+        _write_image(src, size=(64, 64), color=(0, 0, 0, 0), mode="RGBA")
+        dest = tmp_path / "t.jpg"
+
+        render_thumbnail(str(src), str(dest), 256, "jpeg")
+
+        with Image.open(dest) as thumb:
+            assert thumb.mode == "RGB"
+            # Small images are not upscaled; transparent pixels become white
+            assert thumb.size == (64, 64)
+            assert thumb.getpixel((0, 0)) == (255, 255, 255)
+
+    def test_animation_uses_first_frame(self, tmp_path):
+        from server.thumbnails import render_thumbnail
+
+        src = tmp_path / "anim.gif"
+        frames = [Image.new("RGB", (64, 64), color) for color in ((255, 0, 0), (0, 0, 255))]
+        frames[0].save(src, save_all=True, append_images=frames[1:], duration=100)
+        dest = tmp_path / "t.jpg"
+
+        render_thumbnail(str(src), str(dest), 256, "jpeg")
+        with Image.open(dest) as thumb:
+            r, g, b = thumb.getpixel((32, 32))
+            assert r > 200 and b < 50
+
+    def test_video_uses_poster_frame(self, tmp_path, monkeypatch):
+        import io
+
+        from server import thumbnails
+
+        poster = io.BytesIO()
+        Image.new("RGB", (640, 360), (0, 200, 0)).save(poster, format="PNG")
+        requested = []
+
+        def fake_poster(path):
+            requested.append(path)
+            return poster.getvalue()
+
+        monkeypatch.setattr(thumbnails, "extract_poster_frame", fake_poster)
+        src = tmp_path / "clip.mp4"
+        src.write_bytes(b"not decoded by Pillow")
+        dest = tmp_path / "t.webp"
+
+        thumbnails.render_thumbnail(str(src), str(dest), 256, "webp")
+        assert requested == [str(src)]
+        with Image.open(dest) as thumb:
+            assert thumb.size == (256, 144)
+
+    def test_audio_has_no_thumbnail(self, tmp_path):
+        from server.thumbnails import render_thumbnail
+
+        src = tmp_path / "voice.wav"
+        src.write_bytes(b"RIFF")
+        with pytest.raises(ValueError):
+            render_thumbnail(str(src), str(tmp_path / "t.webp"), 256, "webp")
+
+
+class TestThumbnailCache:
+    """Tests for thumbnails.ThumbnailCache."""
+
+    @pytest.mark.asyncio
+    async def test_renders_once_and_reuses(self, tmp_path, monkeypatch):
+        from server import thumbnails
+        from server.thumbnails import ThumbnailCache
+
+        src = tmp_path / "src.png"
+        digest = _write_image(src)
+        cache = ThumbnailCache(str(tmp_path / "thumbs"), workers=0)
+
+        calls = []
+        original = thumbnails.render_thumbnail
+
+        def counting(*args):
+            calls.append(args)
+            return original(*args)
+
+        monkeypatch.setattr(thumbnails, "render_thumbnail", counting)
+
+        paths = await asyncio.gather(*(cache.get(str(src), digest, 256) for _ in range(5)))
+        assert len(set(paths)) == 1
+        assert paths[0] == os.path.join(str(tmp_path / "thumbs"), digest[:2], f"{digest}-256.webp")
+        assert await cache.get(str(src), digest, 256) == paths[0]
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_unknown_size(self, tmp_path):
+        from server.thumbnails import ThumbnailCache
+
+        cache = ThumbnailCache(str(tmp_path / "thumbs"), workers=0)
+        with pytest.raises(ValueError):
+            await cache.get(str(tmp_path / "src.png"), "ab" * 32, 300)
+
+    @pytest.mark.asyncio
+    async def test_missing_source(self, tmp_path):
+        from server.thumbnails import ThumbnailCache
+
+        cache = ThumbnailCache(str(tmp_path / "thumbs"), workers=0)
+        with pytest.raises(FileNotFoundError):
+            await cache.get(str(tmp_path / "gone.png"), "ab" * 32, 256)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        from server.thumbnails import ThumbnailCache
+
+        cache = ThumbnailCache(str(tmp_path / "thumbs"), max_bytes=3000, workers=0)
+        for i, name in enumerate(["old", "mid", "new"]):
+            path = tmp_path / "thumbs" / "aa" / f"{name}-256.webp"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * 1400)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        freed = cache.evict()
+
+        assert freed == 2800
+        assert [p.name for p in (tmp_path / "thumbs" / "aa").iterdir()] == ["new-256.webp"]
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self, tmp_path):
+        from server.thumbnails import ThumbnailCache
+
+        src = tmp_path / "src.jpg"
+        digest = _write_image(src, fmt="JPEG")
+        cache = ThumbnailCache(str(tmp_path / "thumbs"), workers=1, fmt="jpeg")
+        try:
+            path = await cache.get(str(src), digest, 512)
+        finally:
+            cache.close()
+        with Image.open(path) as thumb:
+            assert thumb.format == "JPEG"
+            assert max(thumb.size) == 512
+
+
+class TestThumbnailEndpoint:
+    """Tests for GET /thumbs/{asset_id}."""
+
+    @pytest.fixture
+    def thumb_client(self, tmp_path, monkeypatch):
+        from fastapi.testclient import TestClient
+
+        from server import main
+        from server.db import AsyncDatabase, Database
+        from server.thumbnails import ThumbnailCache
+
+        assets_dir = tmp_path / "assets"
+        assets_dir.mkdir()
+        _write_image(assets_dir / "legacy.png")
+
+        db = Database(str(tmp_path / "thumbs.sqlite3"))
+        db.create_job(job_id="job-1", engine="comfy", status="completed", prompt="p", negative_prompt="", params={})
+        # Stored before content hashing existed
+        db.create_asset(asset_id="a1", job_id="job-1", engine="comfy", filename="legacy.png", recipe={}, meta={})
+        adb = AsyncDatabase(db, readers=1)
+
+        monkeypatch.setattr(main, "adb", adb)
+        monkeypatch.setattr(main, "ASSETS_DIR", str(assets_dir))
+        monkeypatch.setattr(main, "thumbnails", ThumbnailCache(str(tmp_path / "thumbs"), workers=0))
+        yield TestClient(main.app), db
+        adb.close()
+        db.close()
+
+    def test_serves_thumbnail_with_cache_headers(self, thumb_client):
+        client, db = thumb_client
+
+        response = client.get("/thumbs/a1", params={"size": 256})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["etag"]
+        # Content hash was backfilled on first use
+        assert db.get_asset("a1").content_hash
+
+        again = client.get("/thumbs/a1", params={"size": 256}, headers={"If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304
+        assert again.content == b""
+
+    def test_errors(self, thumb_client):
+        client, _ = thumb_client
+        assert client.get("/thumbs/a1", params={"size": 999}).status_code == 400
+        assert client.get("/thumbs/missing").status_code == 404
@@ -180,6 +180,40 @@ class TestWorkflowCaching:
         # Should be different objects after reload
         assert workflow1 is not workflow2
 
+    def test_plan_is_cached_until_reload(self, setup_test_workflow: Path, workflows_dir: Path):
+        """Test that the compiled patch plan is reused and dropped on reload."""
+        from server.workflow_registry import WorkflowRegistry
+
+        registry = WorkflowRegistry(workflows_dir)
+
+        plan1 = registry.get_plan("test_workflow")
+        assert registry.get_plan("test_workflow") is plan1
+        assert plan1.template is registry.get_workflow("test_workflow")["template"]
+
+        registry.reload()
+        assert registry.get_plan("test_workflow") is not plan1
+
+    @pytest.mark.asyncio
+    async def test_async_miss_does_not_block_event_loop(self, setup_test_workflow: Path, workflows_dir: Path):
+        """Test that aget_workflow waits for a running refresh() in a worker thread."""
+        import asyncio
+        import threading
+        import time
+        from server.workflow_registry import WorkflowRegistry
+
+        registry = WorkflowRegistry(workflows_dir)
+        registry._refresh_lock.acquire()  # as held by refresh() scanning in the watcher thread
+        threading.Timer(0.3, registry._refresh_lock.release).start()
+
+        task = asyncio.create_task(registry.aget_workflow("test_workflow"))
+        start = time.monotonic()
+        await asyncio.sleep(0.05)
+
+        assert time.monotonic() - start < 0.25
+        assert not task.done()
+        assert (await task) is registry.get_workflow("test_workflow")
+        assert (await registry.aget_plan("test_workflow")) is registry.get_plan("test_workflow")
+
     def test_list_after_reload_reflects_changes(
         self,
         workflows_dir: Path,
@@ -211,6 +245,143 @@ class TestWorkflowCaching:
         assert len(registry.list_workflows()) == 1
 
 
+class TestWorkflowRefresh:
+    """Tests for incremental reloading of changed workflow directories."""
+
+    @staticmethod
+    def _write_manifest(wf_path: Path, manifest: Dict[str, Any]) -> None:
+        import os
+
+        manifest_path = wf_path / "manifest.json"
+        manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+        # Bump mtime explicitly: coarse filesystem timestamps may not change between writes
+        st = manifest_path.stat()
+        os.utime(manifest_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_refresh_without_changes_is_noop(self, setup_test_workflow: Path, workflows_dir: Path):
+        """Test that refresh reloads nothing when no files changed."""
+        from server.workflow_registry import WorkflowRegistry
+
+        registry = WorkflowRegistry(workflows_dir)
+        workflow = registry.get_workflow("test_workflow")
+        etag = registry.list_etag()
+
+        assert registry.refresh() == []
+        assert registry.get_workflow("test_workflow") is workflow
+        assert registry.list_etag() == etag
+
+    def test_refresh_reloads_changed_workflow(
+        self, setup_test_workflow: Path, workflows_dir: Path, sample_manifest: Dict[str, Any]
+    ):
+        """Test that an edited manifest is picked up and its version changes."""
+        from server.workflow_registry import WorkflowRegistry
+
+        registry = WorkflowRegistry(workflows_dir)
+        registry.list_workflows()
+        plan = registry.get_plan("test_workflow")
+        wf_etag = registry.workflow_etag("test_workflow")
+        list_etag = registry.list_etag()
+
+        self._write_manifest(setup_test_workflow, {**sample_manifest, "name": "Renamed"})
+
+        assert registry.refresh() == ["test_workflow"]
+        assert registry.list_workflows()[0]["name"] == "Renamed"
+        assert registry.get_workflow("test_workflow")["manifest"]["name"] == "Renamed"
+        assert registry.workflow_etag("test_workflow") != wf_etag
+        assert registry.list_etag() != list_etag
+        assert registry.get_plan("test_workflow") is not plan
+
+    def test_invalid_change_keeps_previous_version(
+        self, setup_test_workflow: Path, workflows_dir: Path
+    ):
+        """Test that a workflow keeps serving its last good version until it validates."""
+        from server.workflow_registry import WorkflowRegistry
+
+        registry = WorkflowRegistry(workflows_dir)
+        workflow = registry.get_workflow("test_workflow")
+        etag = registry.list_etag()
+
+        self._write_manifest(setup_test_workflow, {"invalid": "manifest"})
+
+        assert registry.refresh() == []
+        assert registry.get_workflow("test_workflow") is workflow
+        assert len(registry.list_workflows()) == 1
+        assert registry.list_etag() == etag
+
+    def test_refresh_picks_up_added_and_removed_workflows(
+        self,
+        setup_test_workflow: Path,
+        workflows_dir: Path,
+        sample_template: Dict[str, Any],
+        sample_manifest: Dict[str, Any],
+    ):
+        """Test that new directories are added and deleted ones dropped."""
+        import shutil
+        from server.workflow_registry import WorkflowNotFoundError, WorkflowRegistry
+
+        registry = WorkflowRegistry(workflows_dir)
+        assert len(registry.list_workflows()) == 1
+
+        wf_path = workflows_dir / "new_workflow"
+        wf_path.mkdir()
+        (wf_path / "template_api.json").write_text(json.dumps(sample_template), encoding="utf-8")
+        self._write_manifest(wf_path, {**sample_manifest, "id": "new_workflow"})
+        shutil.rmtree(setup_test_workflow)
+
+        assert sorted(registry.refresh()) == ["new_workflow", "test_workflow"]
+        assert [w["id"] for w in registry.list_workflows()] == ["new_workflow"]
+        with pytest.raises(WorkflowNotFoundError):
+            registry.get_workflow("test_workflow")
+
+    def test_get_before_refresh_updates_listing(
+        self,
+        setup_test_workflow: Path,
+        workflows_dir: Path,
+        sample_template: Dict[str, Any],
+        sample_manifest: Dict[str, Any],
+    ):
+        """Test that a workflow loaded by id before the next refresh is listed."""
+        from server.workflow_registry import WorkflowRegistry
+
+        registry = WorkflowRegistry(workflows_dir)
+        etag = registry.list_etag()
+
+        wf_path = workflows_dir / "new_workflow"
+        wf_path.mkdir()
+        (wf_path / "template_api.json").write_text(json.dumps(sample_template), encoding="utf-8")
+        self._write_manifest(wf_path, {**sample_manifest, "id": "new_workflow"})
+        registry.get_workflow("new_workflow")
+
+        assert registry.refresh() == []
+        assert [w["id"] for w in registry.list_workflows()] == ["new_workflow", "test_workflow"]
+        assert registry.list_etag() != etag
+
+    def test_plan_compiled_during_refresh_is_not_cached(
+        self, setup_test_workflow: Path, workflows_dir: Path, sample_manifest: Dict[str, Any], monkeypatch
+    ):
+        """Test that a plan built from a workflow replaced meanwhile is not kept."""
+        from server import workflow_registry
+        from server.workflow_registry import WorkflowRegistry
+
+        registry = WorkflowRegistry(workflows_dir)
+        registry.list_workflows()
+        real_plan = workflow_registry.PatchPlan
+
+        def plan_during_refresh(template, manifest):
+            self._write_manifest(setup_test_workflow, {**sample_manifest, "name": "Renamed"})
+            assert registry.refresh() == ["test_workflow"]
+            return real_plan(template, manifest)
+
+        monkeypatch.setattr(workflow_registry, "PatchPlan", plan_during_refresh)
+        stale = registry.get_plan("test_workflow")
+        monkeypatch.setattr(workflow_registry, "PatchPlan", real_plan)
+
+        plan = registry.get_plan("test_workflow")
+        assert plan is not stale
+        assert plan.template is registry.get_workflow("test_workflow")["template"]
+        assert registry.get_plan("test_workflow") is plan
+
+
 class TestValidation:
     """Tests for workflow validation during loading."""
 
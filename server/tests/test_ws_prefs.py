@@ -28,3 +28,10 @@ def test_event_allowed_respects_jobs_and_assets_flags():
     assert event_allowed("jobs_snapshot", prefs) is False
     assert event_allowed("asset_created", prefs) is False
     assert event_allowed("assets_snapshot", prefs) is False
+
+
+def test_event_allowed_respects_system_flag():
+    prefs = DEFAULT_WS_PREFS.copy()
+    prefs["system"] = False
+    assert event_allowed("comfy_connected", prefs) is False
+    assert event_allowed("comfy_health", prefs) is False
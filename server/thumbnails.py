@@ -0,0 +1,227 @@
+"""Thumbnail rendering and a content-addressed, size-bounded thumbnail cache."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, features
+
+from .media import extract_poster_frame, media_kind
+from .workers import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Longest-side sizes a thumbnail can be requested at.
+THUMB_SIZES = (256, 512)
+DEFAULT_THUMB_SIZE = 256
+
+# format name -> (Pillow format, media type, file extension)
+THUMB_FORMATS: Dict[str, Tuple[str, str, str]] = {
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+}
+
+_SAVE_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "WEBP": {"quality": 80, "method": 4},
+    "JPEG": {"quality": 85, "optimize": True},
+}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """Hex sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _open_source(src_path: str) -> Image.Image:
+    """The image to thumbnail: the file itself, its first frame if animated, or
+    a poster frame extracted by ffmpeg for videos."""
+    kind = media_kind(src_path)
+    if kind == "video":
+        return Image.open(io.BytesIO(extract_poster_frame(src_path)))
+    if kind == "audio":
+        raise ValueError("audio assets have no thumbnail")
+    return Image.open(src_path)
+
+
+def render_thumbnail(src_path: str, dest_path: str, size: int, fmt: str) -> int:
+    """Write a thumbnail (longest side <= size) of src_path to dest_path.
+
+    Runs in a worker process. The file is written to a temp name and renamed, so
+    readers never see a partial thumbnail. Returns the thumbnail size in bytes.
+    """
+    pil_format = THUMB_FORMATS[fmt][0]
+    with _open_source(src_path) as img:
+        if img.format == "JPEG":
+            # Let libjpeg decode at a reduced scale instead of full resolution
+            img.draft("RGB", (size, size))
+        img.thumbnail((size, size), Image.LANCZOS)
+
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        if pil_format == "JPEG" or not has_alpha:
+            if has_alpha:
+                rgba = img.convert("RGBA")
+                background = Image.new("RGB", rgba.size, (255, 255, 255))
+                background.paste(rgba, mask=rgba.split()[3])
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+        elif img.mode != "RGBA":
+            img = img.convert("RGBA")
+
+        directory = os.path.dirname(dest_path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f".{os.path.basename(dest_path)}.{uuid.uuid4().hex[:8]}.part")
+        try:
+            img.save(tmp_path, format=pil_format, **_SAVE_OPTIONS[pil_format])
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    return os.path.getsize(dest_path)
+
+
+class ThumbnailCache:
+    """Content-addressed thumbnail cache under `root`.
+
+    Thumbnails are stored as `<root>/<hash[:2]>/<hash>-<size><ext>`, keyed by the
+    sha256 of the source file, so identical outputs share thumbnails and a cached
+    file never goes stale. Rendering runs in a process pool (`workers=0` uses the
+    default thread pool instead); concurrent requests for the same thumbnail share
+    one render.
+
+    The cache is bounded by `max_bytes`: once exceeded, the least recently used
+    thumbnails (cache hits refresh the file mtime) are deleted until the total
+    drops to 90% of the limit.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        max_bytes: int = 1024 * 1024 * 1024,
+        workers: int = 2,
+        fmt: str = "webp",
+    ) -> None:
+        if fmt not in THUMB_FORMATS:
+            raise ValueError(f"Unsupported thumbnail format: {fmt} (expected one of {sorted(THUMB_FORMATS)})")
+        if fmt == "webp" and not features.check("webp"):
+            logger.warning("Pillow was built without WebP support; falling back to JPEG thumbnails")
+            fmt = "jpeg"
+        self.root = root
+        self.max_bytes = max_bytes
+        self.fmt = fmt
+        self._pool = WorkerPool(workers)
+        self._inflight: Dict[Tuple[str, int], "asyncio.Future[str]"] = {}
+        self._total_bytes: Optional[int] = None
+        self._evict_lock = threading.Lock()
+
+    @property
+    def media_type(self) -> str:
+        return THUMB_FORMATS[self.fmt][1]
+
+    def path_for(self, content_hash: str, size: int) -> str:
+        ext = THUMB_FORMATS[self.fmt][2]
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}-{size}{ext}")
+
+    async def get(self, src_path: str, content_hash: str, size: int = DEFAULT_THUMB_SIZE) -> str:
+        """Return the path of the thumbnail for a source file, rendering it if needed.
+
+        Raises:
+            ValueError: If `size` is not one of THUMB_SIZES
+            FileNotFoundError: If the thumbnail is missing and src_path does not exist
+        """
+        if size not in THUMB_SIZES:
+            raise ValueError(f"Unsupported thumbnail size: {size} (expected one of {list(THUMB_SIZES)})")
+        dest = self.path_for(content_hash, size)
+        try:
+            os.utime(dest)  # cache hit: mark as recently used
+            return dest
+        except FileNotFoundError:
+            pass
+
+        loop = asyncio.get_running_loop()
+        key = (content_hash, size)
+        fut = self._inflight.get(key)
+        if fut is None or fut.get_loop() is not loop:
+            fut = asyncio.ensure_future(self._render(src_path, dest, size))
+            self._inflight[key] = fut
+
+            def _done(f: "asyncio.Future[str]") -> None:
+                if self._inflight.get(key) is f:
+                    del self._inflight[key]
+
+            fut.add_done_callback(_done)
+        return await asyncio.shield(fut)
+
+    async def generate_all(self, src_path: str, content_hash: str) -> None:
+        """Render every size for a new asset (called after harvest)."""
+        await asyncio.gather(*(self.get(src_path, content_hash, size) for size in THUMB_SIZES))
+
+    async def _render(self, src_path: str, dest: str, size: int) -> str:
+        written = await self._pool.run(render_thumbnail, src_path, dest, size, self.fmt)
+        if self._total_bytes is None:
+            self._total_bytes = await asyncio.to_thread(self._scan_total)
+        else:
+            self._total_bytes += written
+        if self._total_bytes > self.max_bytes:
+            await asyncio.to_thread(self.evict)
+        return dest
+
+    def _iter_files(self):
+        if not os.path.isdir(self.root):
+            return
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file() and not entry.name.startswith("."):
+                    yield entry
+
+    def _scan_total(self) -> int:
+        return sum(entry.stat().st_size for entry in self._iter_files())
+
+    def evict(self) -> int:
+        """Delete least recently used thumbnails until under 90% of max_bytes. Returns bytes freed."""
+        if not self._evict_lock.acquire(blocking=False):
+            return 0  # another eviction is already running
+        try:
+            files = []
+            total = 0
+            for entry in self._iter_files():
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            target = int(self.max_bytes * 0.9)
+            freed = 0
+            for _mtime, size, path in sorted(files):
+                if total - freed <= target:
+                    break
+                try:
+                    os.remove(path)
+                    freed += size
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = total - freed
+            if freed:
+                logger.info(f"Thumbnail cache evicted {freed} bytes")
+            return freed
+        finally:
+            self._evict_lock.release()
+
+    def close(self) -> None:
+        self._pool.close()
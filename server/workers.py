@@ -0,0 +1,38 @@
+"""Lazily started process pool for CPU-bound work (image decoding, encoding)."""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class WorkerPool:
+    """Runs picklable module-level functions in a process pool from async code.
+
+    The pool is created on first use. `workers=0` runs jobs in the event loop's
+    default thread pool instead (useful for tests and small machines).
+    """
+
+    def __init__(self, workers: int = 2) -> None:
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            # spawn: the server process is multi-threaded (DB threads), fork is unsafe there
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,9 +1,10 @@
-"""Workflow Patcher: Apply parameters to template via deep copy + patch."""
+"""Workflow Patcher: Apply parameters to a template via a compiled patch plan."""
 from __future__ import annotations
 
 import copy
 import random
-from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 
 class PatchError(Exception):
@@ -19,7 +20,9 @@ def apply_patch(
 ) -> Dict[str, Any]:
     """Apply parameters to a template via deep copy and patching.
 
-    This function is pure - it does not modify the original template.
+    This function is pure - it does not modify the original template, and the
+    result shares no objects with it. Hot paths should compile a PatchPlan once
+    (WorkflowRegistry.get_plan) instead.
 
     Args:
         template: The ComfyUI API template (will not be modified)
@@ -32,217 +35,199 @@ def apply_patch(
     Raises:
         PatchError: If patching fails (missing required param, invalid value, etc.)
     """
-    # Deep copy to ensure original is never modified
-    result = copy.deepcopy(template)
+    return PatchPlan(template, manifest).apply(params, independent=True)
 
-    param_defs = manifest.get("params", {})
 
-    # First, validate all params and apply defaults
-    validated_params = _validate_and_prepare_params(param_defs, params)
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in ("true", "1", "yes")
+    return bool(value)
 
-    # Then apply each patch
-    for param_name, value in validated_params.items():
-        param_def = param_defs.get(param_name)
-        if param_def is None:
-            continue  # Skip unknown params
 
-        patch = param_def.get("patch")
-        if patch is None:
-            continue
+def _identity(value: Any) -> Any:
+    return value
 
-        node_id = patch.get("node_id")
-        field_path = patch.get("field")
 
-        _apply_single_patch(result, node_id, field_path, value, param_name)
+# Type coercers by manifest param type ("image" is just a filename string)
+_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    "integer": int,
+    "number": float,
+    "boolean": _to_bool,
+    "string": str,
+    "image": str,
+}
 
-    return result
 
+@dataclass(frozen=True)
+class _Target:
+    """A patch destination resolved against the template at compile time."""
 
-def _validate_and_prepare_params(
-    param_defs: Dict[str, Any],
-    params: Dict[str, Any],
-) -> Dict[str, Any]:
-    """Validate params and fill in defaults.
-
-    Args:
-        param_defs: Parameter definitions from manifest
-        params: User-provided params
-
-    Returns:
-        Dict of validated/coerced params with defaults filled in
-
-    Raises:
-        PatchError: If validation fails
-    """
-    result = {}
-
-    for param_name, param_def in param_defs.items():
-        value = params.get(param_name)
-        is_required = param_def.get("required", False)
-        default = param_def.get("default")
-        param_type = param_def.get("type", "string")
-
-        # Handle missing values
-        if value is None:
-            if is_required:
-                raise PatchError(f"Missing required parameter: {param_name}")
-            if default is not None:
-                value = default
-            else:
-                continue  # Skip params with no value and no default
-
-        # Special case: seed of -1 means random
-        if param_name == "seed" and value == -1:
-            value = random.randint(0, 2**31 - 1)
+    node_id: str
+    parents: Tuple[str, ...]
+    field: str
+    # Set when the path does not resolve; raised only if the param is applied
+    error: Optional[str] = None
 
-        # Type coercion
-        value = _coerce_type(param_name, value, param_type)
 
-        # Range validation
-        _validate_range(param_name, value, param_def)
+@dataclass(frozen=True)
+class _ParamStep:
+    name: str
+    required: bool
+    default: Any
+    coerce: Callable[[Any], Any]
+    min: Any
+    max: Any
+    choices: Optional[List[Any]]
+    target: Optional[_Target]
 
-        # Choice validation
-        _validate_choices(param_name, value, param_def)
 
-        result[param_name] = value
+class PatchPlan:
+    """A manifest compiled against its template for repeated patching.
 
-    return result
-
-
-def _coerce_type(param_name: str, value: Any, param_type: str) -> Any:
-    """Coerce a value to the expected type.
-
-    Args:
-        param_name: For error messages
-        value: The value to coerce
-        param_type: Expected type (string, integer, number, boolean, image)
-
-    Returns:
-        Coerced value
-
-    Raises:
-        PatchError: If coercion fails
+    Param definitions are turned into steps with a pre-selected coercer and
+    validators, and each `patch` path is resolved once. apply() copies only the
+    nodes (and the dicts along each patched path) that it writes to; every other
+    node is shared with the template, so the result must be treated as read-only.
+    Errors have the same messages and order as apply_patch always had: parameter
+    validation first, then unresolvable patch paths as they are applied.
     """
-    try:
-        if param_type == "integer":
-            return int(value)
-        elif param_type == "number":
-            return float(value)
-        elif param_type == "boolean":
-            if isinstance(value, bool):
-                return value
-            if isinstance(value, str):
-                return value.lower() in ("true", "1", "yes")
-            return bool(value)
-        elif param_type == "string":
-            return str(value)
-        elif param_type == "image":
-            # Image type is just a filename string
-            return str(value)
-        else:
-            return value
-    except (ValueError, TypeError) as e:
-        raise PatchError(f"Parameter '{param_name}' type coercion failed: {e}")
-
-
-def _validate_range(param_name: str, value: Any, param_def: Dict[str, Any]) -> None:
-    """Validate that value is within min/max range.
 
-    Args:
-        param_name: For error messages
-        value: The value to validate
-        param_def: Parameter definition
-
-    Raises:
-        PatchError: If value is out of range
-    """
-    min_val = param_def.get("min")
-    max_val = param_def.get("max")
-
-    if min_val is not None and value < min_val:
-        raise PatchError(
-            f"Parameter '{param_name}' value {value} is below minimum {min_val}"
-        )
-
-    if max_val is not None and value > max_val:
-        raise PatchError(
-            f"Parameter '{param_name}' value {value} is above maximum {max_val}"
-        )
-
-
-def _validate_choices(param_name: str, value: Any, param_def: Dict[str, Any]) -> None:
-    """Validate that value is one of the allowed choices.
-
-    Args:
-        param_name: For error messages
-        value: The value to validate
-        param_def: Parameter definition
-
-    Raises:
-        PatchError: If value is not in choices
-    """
-    choices = param_def.get("choices")
-    if choices is not None and value not in choices:
-        raise PatchError(
-            f"Parameter '{param_name}' value '{value}' not in allowed choices: {choices}"
-        )
-
-
-def _apply_single_patch(
-    template: Dict[str, Any],
-    node_id: str,
-    field_path: str,
-    value: Any,
-    param_name: str,
-) -> None:
-    """Apply a single patch to the template (in-place).
+    def __init__(self, template: Dict[str, Any], manifest: Dict[str, Any]) -> None:
+        self.template = template
+        self.steps: List[_ParamStep] = [
+            _compile_step(template, name, param_def)
+            for name, param_def in (manifest.get("params") or {}).items()
+        ]
+
+    def validate(self, params: Dict[str, Any]) -> List[Tuple[_ParamStep, Any]]:
+        """Validate params and fill in defaults.
+
+        Returns:
+            (step, value) pairs for every param that has a value, in manifest order
+
+        Raises:
+            PatchError: If validation fails
+        """
+        result: List[Tuple[_ParamStep, Any]] = []
+        for step in self.steps:
+            name = step.name
+            value = params.get(name)
+
+            # Handle missing values
+            if value is None:
+                if step.required:
+                    raise PatchError(f"Missing required parameter: {name}")
+                if step.default is None:
+                    continue  # Skip params with no value and no default
+                value = step.default
+
+            # Special case: seed of -1 means random
+            if name == "seed" and value == -1:
+                value = random.randint(0, 2**31 - 1)
+
+            try:
+                value = step.coerce(value)
+            except (ValueError, TypeError) as e:
+                raise PatchError(f"Parameter '{name}' type coercion failed: {e}")
+
+            if step.min is not None and value < step.min:
+                raise PatchError(f"Parameter '{name}' value {value} is below minimum {step.min}")
+            if step.max is not None and value > step.max:
+                raise PatchError(f"Parameter '{name}' value {value} is above maximum {step.max}")
+            if step.choices is not None and value not in step.choices:
+                raise PatchError(
+                    f"Parameter '{name}' value '{value}' not in allowed choices: {step.choices}"
+                )
+
+            result.append((step, value))
+        return result
+
+    def apply(self, params: Dict[str, Any], *, independent: bool = False) -> Dict[str, Any]:
+        """Return a patched workflow; the template is never modified.
+
+        Args:
+            params: User-provided parameter values
+            independent: Deep copy the whole template first, so the result shares
+                nothing with it (the apply_patch contract)
+
+        Raises:
+            PatchError: If validation fails or a patch path does not resolve
+        """
+        values = self.validate(params)
+        result = copy.deepcopy(self.template) if independent else dict(self.template)
+        cloned: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+        for step, value in values:
+            target = step.target
+            if target is None:
+                continue
+            if target.error is not None:
+                raise PatchError(target.error)
+            _writable(result, cloned, target)[target.field] = value
+
+        return result
+
+
+def _compile_step(template: Dict[str, Any], name: str, param_def: Dict[str, Any]) -> _ParamStep:
+    patch = param_def.get("patch")
+    target = None
+    if patch is not None:
+        target = _resolve_target(template, name, patch.get("node_id"), patch.get("field"))
+    return _ParamStep(
+        name=name,
+        required=bool(param_def.get("required", False)),
+        default=param_def.get("default"),
+        coerce=_COERCERS.get(param_def.get("type", "string"), _identity),
+        min=param_def.get("min"),
+        max=param_def.get("max"),
+        choices=param_def.get("choices"),
+        target=target,
+    )
+
+
+def _resolve_target(template: Dict[str, Any], param_name: str, node_id: str, field_path: str) -> _Target:
+    """Resolve a node_id + dot-notation field path against the template."""
+    parts = field_path.split(".")
+    parents, final_field = tuple(parts[:-1]), parts[-1]
 
-    Args:
-        template: Template to modify
-        node_id: Node ID to patch
-        field_path: Dot-notation path (e.g., "inputs.text")
-        value: Value to set
-        param_name: For error messages
+    def failed(message: str) -> _Target:
+        return _Target(node_id, parents, final_field, error=f"Cannot patch parameter '{param_name}': {message}")
 
-    Raises:
-        PatchError: If node_id or field_path not found
-    """
-    # Find the node
     if node_id not in template:
-        raise PatchError(
-            f"Cannot patch parameter '{param_name}': node_id '{node_id}' not found in template"
-        )
+        return failed(f"node_id '{node_id}' not found in template")
 
-    node = template[node_id]
-
-    # Navigate the field path
-    parts = field_path.split(".")
-    target = node
-
-    for i, part in enumerate(parts[:-1]):
+    target = template[node_id]
+    for i, part in enumerate(parents):
         if not isinstance(target, dict):
             path_so_far = ".".join(parts[: i + 1])
-            raise PatchError(
-                f"Cannot patch parameter '{param_name}': path '{path_so_far}' "
-                f"is not an object in node '{node_id}'"
-            )
-
+            return failed(f"path '{path_so_far}' is not an object in node '{node_id}'")
         if part not in target:
-            raise PatchError(
-                f"Cannot patch parameter '{param_name}': field '{part}' "
-                f"not found in node '{node_id}'"
-            )
-
+            return failed(f"field '{part}' not found in node '{node_id}'")
         target = target[part]
 
-    # Set the final field
-    final_field = parts[-1]
     if not isinstance(target, dict):
-        raise PatchError(
-            f"Cannot patch parameter '{param_name}': parent of '{final_field}' "
-            f"is not an object in node '{node_id}'"
-        )
-
-    # We allow setting fields that don't exist (for flexibility)
-    # But warn if the field doesn't exist in the original
-    target[final_field] = value
+        return failed(f"parent of '{final_field}' is not an object in node '{node_id}'")
+
+    # Setting a field that does not exist yet is allowed (for flexibility)
+    return _Target(node_id, parents, final_field)
+
+
+def _writable(result: Dict[str, Any], cloned: Dict[Tuple[str, ...], Dict[str, Any]], target: _Target) -> Dict[str, Any]:
+    """Return the dict holding target.field, shallow-copying each container on the path once."""
+    key: Tuple[str, ...] = (target.node_id,)
+    container = cloned.get(key)
+    if container is None:
+        container = dict(result[target.node_id])
+        result[target.node_id] = container
+        cloned[key] = container
+    for part in target.parents:
+        key = key + (part,)
+        child = cloned.get(key)
+        if child is None:
+            child = dict(container[part])
+            container[part] = child
+            cloned[key] = child
+        container = child
+    return container
@@ -1,9 +1,18 @@
 """Workflow Registry: Discover, load, and manage workflow definitions."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from .workflow_patcher import PatchPlan
+
+logger = logging.getLogger(__name__)
 
 
 class ManifestError(Exception):
@@ -126,10 +135,55 @@ def load_template(path: Path) -> Dict[str, Any]:
         raise ManifestError(f"Invalid JSON in template {path}: {e}")
 
 
+# (file name, mtime_ns, size) for every file in a workflow directory
+DirSignature = Tuple[Tuple[str, int, int], ...]
+
+
+def _dir_signature(wf_dir: Path) -> DirSignature:
+    entries = []
+    with os.scandir(wf_dir) as it:
+        for entry in it:
+            if entry.is_file():
+                st = entry.stat()
+                entries.append((entry.name, st.st_mtime_ns, st.st_size))
+    return tuple(sorted(entries))
+
+
+def _load_workflow_dir(wf_dir: Path) -> Dict[str, Any]:
+    """Load and validate the manifest and template of one workflow directory.
+
+    Raises:
+        ManifestError: If either file is missing or invalid
+    """
+    manifest_path = wf_dir / "manifest.json"
+    if not manifest_path.exists():
+        raise ManifestError(f"Workflow '{wf_dir.name}' missing manifest.json")
+
+    manifest = load_manifest(manifest_path)
+    validate_manifest(manifest)
+
+    template_file = manifest.get("template_file", "template_api.json")
+    template_path = wf_dir / template_file
+    if not template_path.exists():
+        raise ManifestError(f"Workflow '{wf_dir.name}' missing {template_file}")
+    template = load_template(template_path)
+
+    return {"manifest": manifest, "template": template}
+
+
+def _workflow_etag(workflow: Dict[str, Any]) -> str:
+    payload = json.dumps(workflow, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
 class WorkflowRegistry:
     """Registry for managing workflow definitions.
 
-    Discovers workflows in a directory, loads and caches them.
+    Discovers workflows in a directory, loads and caches them. refresh() (or the
+    watch() background task) re-stats every workflow directory and reloads only
+    the ones whose files changed; a changed workflow that fails validation keeps
+    serving its last good version. Each workflow has a content-derived version
+    (etag), and list_etag() covers the whole listing.
     """
 
     def __init__(self, workflows_dir: Path):
@@ -139,56 +193,42 @@ class WorkflowRegistry:
             workflows_dir: Directory containing workflow subdirectories
         """
         self._workflows_dir = Path(workflows_dir)
+        # Keyed by directory name (the id used by get_workflow)
         self._cache: Dict[str, Dict[str, Any]] = {}
+        self._plans: Dict[str, PatchPlan] = {}
+        self._signatures: Dict[str, DirSignature] = {}
+        self._etags: Dict[str, str] = {}
+        self._infos: Dict[str, Dict[str, Any]] = {}
         self._workflow_list: Optional[List[Dict[str, Any]]] = None
+        self._list_etag = ""
+        self._refresh_lock = threading.Lock()
 
     def list_workflows(self) -> List[Dict[str, Any]]:
         """List all available workflows.
 
+        The listing is built on first use and then only changes on refresh() or
+        reload().
+
         Returns:
             List of workflow info dicts with id, name, description
         """
-        if self._workflow_list is not None:
-            return self._workflow_list
+        if self._workflow_list is None:
+            self.refresh()
+        return self._workflow_list or []
 
-        workflows = []
+    def list_etag(self) -> str:
+        """Version of the current list_workflows() result, for HTTP conditional requests."""
+        self.list_workflows()
+        return self._list_etag
 
-        if not self._workflows_dir.exists():
-            self._workflow_list = []
-            return []
+    def workflow_etag(self, workflow_id: str) -> str:
+        """Content-derived version of a workflow's manifest and template.
 
-        for entry in self._workflows_dir.iterdir():
-            if not entry.is_dir():
-                continue
-
-            manifest_path = entry / "manifest.json"
-            template_path = entry / "template_api.json"
-
-            # Skip incomplete workflows
-            if not manifest_path.exists() or not template_path.exists():
-                continue
-
-            try:
-                manifest = load_manifest(manifest_path)
-                validate_manifest(manifest)
-
-                # Also validate template is loadable
-                load_template(template_path)
-
-                workflows.append(
-                    {
-                        "id": manifest.get("id", entry.name),
-                        "name": manifest.get("name", entry.name),
-                        "description": manifest.get("description", ""),
-                        "version": manifest.get("version", ""),
-                    }
-                )
-            except (ManifestError, json.JSONDecodeError):
-                # Skip invalid workflows
-                continue
-
-        self._workflow_list = workflows
-        return workflows
+        Raises:
+            WorkflowNotFoundError: If workflow doesn't exist
+        """
+        self.get_workflow(workflow_id)
+        return self._etags[workflow_id]
 
     def get_workflow(self, workflow_id: str) -> Dict[str, Any]:
         """Get a workflow by ID.
@@ -206,34 +246,160 @@ class WorkflowRegistry:
         if workflow_id in self._cache:
             return self._cache[workflow_id]
 
-        # Find workflow directory
-        wf_dir = self._workflows_dir / workflow_id
-        if not wf_dir.is_dir():
-            raise WorkflowNotFoundError(f"Workflow not found: {workflow_id}")
+        # refresh() may be walking the same dicts in a worker thread
+        with self._refresh_lock:
+            if workflow_id in self._cache:
+                return self._cache[workflow_id]
 
-        manifest_path = wf_dir / "manifest.json"
-        if not manifest_path.exists():
-            raise WorkflowNotFoundError(f"Workflow '{workflow_id}' missing manifest.json")
+            # Find workflow directory
+            wf_dir = self._workflows_dir / workflow_id
+            if not wf_dir.is_dir():
+                raise WorkflowNotFoundError(f"Workflow not found: {workflow_id}")
 
-        # Load and validate manifest
-        manifest = load_manifest(manifest_path)
-        validate_manifest(manifest)
+            manifest_path = wf_dir / "manifest.json"
+            if not manifest_path.exists():
+                raise WorkflowNotFoundError(f"Workflow '{workflow_id}' missing manifest.json")
 
-        # Load template
-        template_file = manifest.get("template_file", "template_api.json")
-        template_path = wf_dir / template_file
-        template = load_template(template_path)
+            signature = _dir_signature(wf_dir)
+            workflow = _load_workflow_dir(wf_dir)
+            if self._store(workflow_id, signature, workflow) and self._workflow_list is not None:
+                # Loaded ahead of the watcher: the next refresh() sees it as unchanged
+                self._rebuild_list()
+            return workflow
 
-        workflow = {
-            "manifest": manifest,
-            "template": template,
-        }
+    def get_plan(self, workflow_id: str) -> PatchPlan:
+        """Get the compiled PatchPlan for a workflow (compiled once, then cached).
 
-        # Cache it
-        self._cache[workflow_id] = workflow
+        Raises:
+            WorkflowNotFoundError: If workflow doesn't exist
+        """
+        plan = self._plans.get(workflow_id)
+        if plan is None:
+            workflow = self.get_workflow(workflow_id)
+            plan = PatchPlan(workflow["template"], workflow["manifest"])
+            with self._refresh_lock:
+                # Not cached if refresh() replaced the workflow while it was compiling
+                if self._cache.get(workflow_id) is workflow:
+                    plan = self._plans.setdefault(workflow_id, plan)
+        return plan
+
+    async def aget_workflow(self, workflow_id: str) -> Dict[str, Any]:
+        """get_workflow() for the event loop: a cache miss is loaded in a worker thread."""
+        workflow = self._cache.get(workflow_id)
+        if workflow is None:
+            workflow = await asyncio.to_thread(self.get_workflow, workflow_id)
         return workflow
 
+    async def aget_plan(self, workflow_id: str) -> PatchPlan:
+        """get_plan() for the event loop: a cache miss is compiled in a worker thread."""
+        plan = self._plans.get(workflow_id)
+        if plan is None:
+            plan = await asyncio.to_thread(self.get_plan, workflow_id)
+        return plan
+
+    def refresh(self) -> List[str]:
+        """Reload workflow directories whose files changed since they were loaded.
+
+        Safe to call from a worker thread: cached entries are replaced one at a
+        time, so readers always see either the old or the new version.
+
+        Returns:
+            IDs of workflows that were added, updated or removed
+        """
+        with self._refresh_lock:
+            changed: List[str] = []
+            seen = set()
+            rebuild = self._workflow_list is None
+
+            entries = sorted(self._workflows_dir.iterdir()) if self._workflows_dir.exists() else []
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                name = entry.name
+                try:
+                    signature = _dir_signature(entry)
+                except OSError:
+                    continue  # removed while scanning
+                seen.add(name)
+                if self._signatures.get(name) == signature:
+                    # Unchanged; may have been loaded by get_workflow before the first listing
+                    if name in self._cache and name not in self._infos:
+                        self._infos[name] = _workflow_info(name, self._cache[name]["manifest"])
+                        rebuild = True
+                    continue
+
+                try:
+                    workflow = _load_workflow_dir(entry)
+                except (ManifestError, OSError, ValueError) as e:
+                    # Keep serving the last good version (if any) until the files validate
+                    if name in self._infos:
+                        logger.warning(f"Workflow '{name}' changed but failed to load, keeping previous version: {e}")
+                    self._signatures[name] = signature
+                    continue
+
+                if self._store(name, signature, workflow):
+                    changed.append(name)
+
+            for name in list(self._infos):
+                if name not in seen:
+                    self._forget(name)
+                    changed.append(name)
+
+            if changed or rebuild:
+                self._rebuild_list()
+            if changed:
+                logger.info(f"Workflow registry reloaded: {', '.join(changed)}")
+            return changed
+
+    async def watch(self, interval: float = 2.0) -> None:
+        """Background loop: poll workflow directories every `interval` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.warning(f"Workflow refresh failed: {e}")
+
     def reload(self) -> None:
         """Clear the cache and force re-discovery of workflows."""
-        self._cache.clear()
-        self._workflow_list = None
+        with self._refresh_lock:
+            self._cache.clear()
+            self._plans.clear()
+            self._signatures.clear()
+            self._etags.clear()
+            self._infos.clear()
+            self._workflow_list = None
+            self._list_etag = ""
+
+    def _store(self, name: str, signature: DirSignature, workflow: Dict[str, Any]) -> bool:
+        """Install a loaded workflow. Returns False if its content did not change."""
+        etag = _workflow_etag(workflow)
+        self._signatures[name] = signature
+        if self._etags.get(name) == etag and name in self._infos:
+            return False  # touched but identical
+        self._cache[name] = workflow
+        self._etags[name] = etag
+        self._infos[name] = _workflow_info(name, workflow["manifest"])
+        self._plans.pop(name, None)
+        return True
+
+    def _forget(self, name: str) -> None:
+        for mapping in (self._cache, self._plans, self._signatures, self._etags, self._infos):
+            mapping.pop(name, None)
+
+    def _rebuild_list(self) -> None:
+        names = sorted(self._infos)
+        self._workflow_list = [self._infos[name] for name in names]
+        digest = hashlib.sha256()
+        for name in names:
+            digest.update(f"{name}:{self._etags[name]};".encode("utf-8"))
+        self._list_etag = digest.hexdigest()[:16]
+
+
+def _workflow_info(name: str, manifest: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": manifest.get("id", name),
+        "name": manifest.get("name", name),
+        "description": manifest.get("description", ""),
+        "version": manifest.get("version", ""),
+    }
@@ -3,7 +3,9 @@ const $ = (sel) => document.querySelector(sel);
 const state = {
   config: null,
   jobs: new Map(), // job_id -> job
-  assets: new Map(), // asset_id -> asset
+  assets: new Map(), // asset_id -> asset (snapshot entries are grid tiles without recipe/meta)
+  assetsNextCursor: null, // /api/assets?before= cursor for assets older than the snapshot
+  assetsLoadingMore: false,
   ws: null,
   renderScheduled: false,
   selectedAssetId: null,
@@ -339,9 +341,18 @@ function renderGallery() {
     card.className = 'card';
     card.onclick = () => openModal(a.id);
 
-    const img = document.createElement('img');
-    img.loading = 'lazy';
-    img.src = a.url;
+    const kind = a.media_kind || 'image';
+    let thumb;
+    if (kind === 'audio') {
+      // Audio has no thumbnail
+      thumb = document.createElement('div');
+      thumb.className = 'card__audio';
+      thumb.textContent = a.filename;
+    } else {
+      thumb = document.createElement('img');
+      thumb.loading = 'lazy';
+      thumb.src = a.thumb_url || a.url;
+    }
 
     if (a.favorite) {
       const star = document.createElement('div');
@@ -349,8 +360,14 @@ function renderGallery() {
       star.textContent = '?';
       card.appendChild(star);
     }
+    if (kind !== 'image') {
+      const badge = document.createElement('div');
+      badge.className = 'kind';
+      badge.textContent = kind;
+      card.appendChild(badge);
+    }
 
-    card.appendChild(img);
+    card.appendChild(thumb);
     frag.appendChild(card);
   }
 
@@ -693,8 +710,18 @@ function initGalleryControls() {
     });
   }
   if (nextBtn) {
-    nextBtn.addEventListener('click', () => {
-      const total = Math.max(1, Math.ceil(state.assets.size / state.galleryPageSize));
+    nextBtn.addEventListener('click', async () => {
+      let total = Math.max(1, Math.ceil(state.assets.size / state.galleryPageSize));
+      if (state.galleryPage >= total - 1 && state.assetsNextCursor) {
+        // Past the loaded assets: fetch the next page of older ones from the server
+        nextBtn.disabled = true;
+        try {
+          await loadMoreAssets();
+        } catch (e) {
+          console.warn('loading older assets failed', e);
+        }
+        total = Math.max(1, Math.ceil(state.assets.size / state.galleryPageSize));
+      }
       state.galleryPage = Math.min(total - 1, state.galleryPage + 1);
       scheduleRender({ gallery: true });
     });
@@ -710,9 +737,30 @@ function updateGalleryPager(pageCount) {
   const nextBtn = $('#galleryNextBtn');
   const safeCount = Math.max(1, pageCount || 1);
   const page = Math.min(Math.max(0, state.galleryPage), safeCount - 1);
-  if (info) info.textContent = `${page + 1} / ${safeCount}`;
+  const more = Boolean(state.assetsNextCursor);
+  if (info) info.textContent = `${page + 1} / ${safeCount}${more ? '+' : ''}`;
   if (prevBtn) prevBtn.disabled = page <= 0;
-  if (nextBtn) nextBtn.disabled = page >= safeCount - 1;
+  if (nextBtn) nextBtn.disabled = state.assetsLoadingMore || (page >= safeCount - 1 && !more);
+}
+
+async function loadMoreAssets() {
+  // Older assets than the websocket snapshot, as grid tiles; X-Next-Cursor continues further back
+  const cursor = state.assetsNextCursor;
+  if (!cursor || state.assetsLoadingMore) return;
+  state.assetsLoadingMore = true;
+  try {
+    const path = `/api/assets?view=grid&before=${encodeURIComponent(cursor)}`;
+    const r = await fetch(path);
+    if (!r.ok) throw new Error(`${path} -> ${r.status}`);
+    const page = await r.json();
+    for (const a of page) {
+      if (!state.assets.has(a.id)) state.assets.set(a.id, a);
+    }
+    // A new snapshot (reconnect) replaces the cursor; keep that one
+    if (state.assetsNextCursor === cursor) state.assetsNextCursor = r.headers.get('X-Next-Cursor');
+  } finally {
+    state.assetsLoadingMore = false;
+  }
 }
 
 function updateGalleryDirtyBadge() {
@@ -921,6 +969,15 @@ function setModalZoom(scale) {
   if (range) range.value = String(Math.round(zoom * 100));
 }
 
+async function loadAssetDetail(assetId) {
+  // Gallery tiles carry no recipe/meta; fetch the full asset once, when needed
+  const a = state.assets.get(assetId);
+  if (!a || a.recipe) return a;
+  const full = await apiGet(`/api/assets/${encodeURIComponent(assetId)}`);
+  state.assets.set(assetId, full);
+  return full;
+}
+
 function openModal(assetId) {
   const a = state.assets.get(assetId);
   if (!a) return;
@@ -928,16 +985,40 @@ function openModal(assetId) {
 
   $('#modalTitle').textContent = a.id;
   const img = $('#modalImg');
-  img.onload = () => {
-    state.modalFitZoom = computeFitZoom();
-    setModalZoom(state.modalFitZoom);
-  };
-  img.src = a.url;
-  if (img.complete) {
-    state.modalFitZoom = computeFitZoom();
-    setModalZoom(state.modalFitZoom);
+  const video = $('#modalVideo');
+  const audio = $('#modalAudio');
+  const kind = a.media_kind || 'image';
+  for (const player of [video, audio]) {
+    player.pause();
+    player.removeAttribute('src');
+    player.classList.add('hidden');
+  }
+  if (kind === 'video' || kind === 'audio') {
+    // Streamed with Range requests; nothing is downloaded up front
+    const player = kind === 'video' ? video : audio;
+    img.classList.add('hidden');
+    player.src = a.url;
+    player.classList.remove('hidden');
+  } else {
+    img.classList.remove('hidden');
+    img.onload = () => {
+      state.modalFitZoom = computeFitZoom();
+      setModalZoom(state.modalFitZoom);
+    };
+    img.src = a.url;
+    if (img.complete) {
+      state.modalFitZoom = computeFitZoom();
+      setModalZoom(state.modalFitZoom);
+    }
   }
   $('#modalMeta').textContent = JSON.stringify(a, null, 2);
+  if (!a.recipe) {
+    loadAssetDetail(assetId)
+      .then((full) => {
+        if (full && state.selectedAssetId === assetId) $('#modalMeta').textContent = JSON.stringify(full, null, 2);
+      })
+      .catch((e) => console.warn('asset detail failed', e));
+  }
 
   $('#favBtn').textContent = a.favorite ? 'Favorited' : 'Favorite';
 
@@ -946,6 +1027,8 @@ function openModal(assetId) {
 
 function closeModal() {
   state.selectedAssetId = null;
+  $('#modalVideo').pause();
+  $('#modalAudio').pause();
   $('#modal').classList.add('hidden');
 }
 
@@ -953,7 +1036,13 @@ async function rerunFromModal() {
   const assetId = state.selectedAssetId;
   if (!assetId) return;
 
-  const asset = state.assets.get(assetId);
+  let asset;
+  try {
+    asset = await loadAssetDetail(assetId);
+  } catch (e) {
+    console.warn('asset detail failed', e);
+    return;
+  }
   if (!asset || !asset.recipe) return;
 
   const recipe = asset.recipe;
@@ -1161,22 +1250,25 @@ async function initConfig() {
   const vaeList = ['(auto)', ...vaes];
   populateSelect($('#vae'), vaeList, defaults.vae || '(auto)');
 
-  // Check ComfyUI health status
+  // Check ComfyUI health status (later changes arrive as comfy_health events)
   try {
-    const health = await apiGet('/api/health');
-    const comfyStatusEl = $('#comfyStatus');
-    if (health.ok) {
-      setPill(comfyStatusEl, `Comfy: connected`, 'pill--good');
-    } else if (health.error_code === 'COMFY_UNREACHABLE') {
-      setPill(comfyStatusEl, `Comfy: unreachable`, 'pill--bad');
-    } else {
-      setPill(comfyStatusEl, `Comfy: error (${health.error_code || 'unknown'})`, 'pill--bad');
-    }
+    renderComfyHealth(await apiGet('/api/health?history=false'));
   } catch (e) {
     setPill($('#comfyStatus'), `Comfy: check failed`, 'pill--bad');
   }
 }
 
+function renderComfyHealth(health) {
+  const comfyStatusEl = $('#comfyStatus');
+  if (health.ok) {
+    setPill(comfyStatusEl, `Comfy: connected`, 'pill--good');
+  } else if (health.error_code === 'COMFY_UNREACHABLE') {
+    setPill(comfyStatusEl, `Comfy: unreachable`, 'pill--bad');
+  } else {
+    setPill(comfyStatusEl, `Comfy: error (${health.error_code || 'unknown'})`, 'pill--bad');
+  }
+}
+
 function getSortedAssets() {
   return Array.from(state.assets.values()).sort(sortByCreatedDesc);
 }
@@ -1239,6 +1331,10 @@ function connectWS() {
       setPill($('#comfyStatus'), `Comfy: disconnected`, 'pill--bad');
       return;
     }
+    if (type === 'comfy_health') {
+      renderComfyHealth(payload || {});
+      return;
+    }
 
     if (type === 'jobs_snapshot') {
       state.jobs.clear();
@@ -1253,11 +1349,21 @@ function connectWS() {
     if (type === 'assets_snapshot') {
       state.assets.clear();
       for (const a of payload || []) state.assets.set(a.id, a);
+      state.assetsNextCursor = msg.next_cursor || null;
       state.galleryDirty = true;
       scheduleRender({ gallery: state.galleryAutoRefresh });
       return;
     }
 
+    if (type === 'jobs_created') {
+      for (const j of payload || []) {
+        state.jobs.set(j.id, j);
+        trackJobError(j);
+      }
+      scheduleRender();
+      return;
+    }
+
     if (type === 'job_created' || type === 'job_update') {
       state.jobs.set(payload.id, payload);
       trackJobError(payload);